@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Archon Stand-in Server
+
+A local, dependency-free imitation of the Archon endpoints the RAG hook
+talks to, for benchmarks and manual testing without a running Archon:
+
+- POST /api/knowledge/search  (REST search, also served at /knowledge/search)
+- POST /api/knowledge/ingest  (batch chunk upload used by ingest/knowledge_ingest.py)
+- POST /mcp                   (MCP JSON-RPC: initialize, the initialized
+                                notification, tools/list, tools/call)
+- DELETE /mcp                 (end an MCP session)
+
+Latency, error rate and result payloads are configurable. MCP sessions are
+tracked, so a client that skips the initialized notification or never ends
+its session can be caught. Ingested chunks
+are kept in memory keyed by id, with a per-chunk processing cost to stand
+in for embedding, and batches over the size limit are rejected with 413.
+
+Usage:
+    python3 archon_stub.py --port 8181 --latency 0.05 --error-rate 0.01
+    python3 archon_stub.py --chunk-latency 0.002 --max-batch-kb 512
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+class ArchonStub:
+    """In-process Archon stand-in running on a background thread"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        results_per_query: int = 3,
+        payload: Optional[List[Dict]] = None,
+        seed: Optional[int] = None,
+        chunk_latency: float = 0.0,
+        max_batch_bytes: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.results_per_query = results_per_query
+        self.payload = payload
+        self.chunk_latency = chunk_latency
+        self.max_batch_bytes = max_batch_bytes
+        self.requests_served = 0
+        self.chunks: Dict[str, Dict] = {}
+        self.ingest_batches = 0
+        self.ingest_duplicates = 0
+        self.mcp_sessions: Dict[str, bool] = {}  # session id -> initialized
+        self.mcp_sessions_opened = 0
+        self._session_ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self._server.server_address[0]}:{self.port}/api"
+
+    @property
+    def mcp_base(self) -> str:
+        return f"http://{self._server.server_address[0]}:{self.port}"
+
+    def start(self) -> "ArchonStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "ArchonStub":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """Results returned for a query: the fixed payload or synthetic docs"""
+        if self.payload is not None:
+            return self.payload[:limit]
+
+        words = [w for w in query.split() if len(w) > 3][:4] or ["project"]
+        results = []
+        for i in range(min(limit, self.results_per_query)):
+            topic = " ".join(words)
+            results.append(
+                {
+                    "title": f"{topic.title()} (part {i + 1})",
+                    "source": f"docs/{words[0].lower().strip('?.,')}-{i + 1}.md",
+                    "url": f"http://archon.local/docs/{abs(hash((topic, i))) % 10**8}",
+                    "score": round(0.95 - 0.05 * i, 2),
+                    "excerpt": f"This section explains {topic}. " * 8,
+                }
+            )
+        return results
+
+    def ingest(self, source: str, chunks: List[Dict]) -> Dict:
+        """Store a batch of chunks; re-sent ids overwrite and count as duplicates"""
+        if self.chunk_latency:
+            time.sleep(self.chunk_latency * len(chunks))
+        with self._lock:
+            self.ingest_batches += 1
+            duplicates = sum(1 for c in chunks if c.get("id") in self.chunks)
+            self.ingest_duplicates += duplicates
+            for chunk in chunks:
+                self.chunks[chunk["id"]] = {**chunk, "source_name": source}
+        return {"accepted": len(chunks) - duplicates, "duplicates": duplicates}
+
+    def _delay_and_fail(self) -> bool:
+        """Sleep for the configured latency; return True if this call should fail"""
+        with self._lock:
+            self.requests_served += 1
+            delay = max(
+                0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)
+            )
+            fail = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                try:
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clients that hit their own deadline hang up early
+                    self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                path = self.path.split("?")[0].rstrip("/")
+                if (
+                    path == "/api/knowledge/ingest"
+                    and stub.max_batch_bytes
+                    and length > stub.max_batch_bytes
+                ):
+                    self.rfile.read(length)
+                    self._send(
+                        413, {"error": f"batch exceeds {stub.max_batch_bytes} bytes"}
+                    )
+                    return
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, {"error": "invalid JSON"})
+                    return
+
+                if stub._delay_and_fail():
+                    self._send(500, {"error": "injected failure"})
+                    return
+
+                if path in ("/api/knowledge/search", "/knowledge/search"):
+                    results = stub.search(
+                        body.get("query", ""), int(body.get("limit", 3))
+                    )
+                    self._send(200, {"results": results})
+                elif path == "/api/knowledge/ingest":
+                    chunks = body.get("chunks")
+                    if not isinstance(chunks, list) or not all(
+                        isinstance(c, dict) and c.get("id") for c in chunks
+                    ):
+                        self._send(
+                            400,
+                            {"error": "chunks must be a list of objects with an id"},
+                        )
+                        return
+                    self._send(200, stub.ingest(body.get("source", ""), chunks))
+                elif path == "/mcp":
+                    self._handle_mcp(body)
+                else:
+                    self._send(404, {"error": f"unknown endpoint {self.path}"})
+
+            def do_DELETE(self):
+                if self.path.split("?")[0].rstrip("/") != "/mcp":
+                    self._send(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+                with stub._lock:
+                    known = stub.mcp_sessions.pop(
+                        self.headers.get("Mcp-Session-Id", ""), None
+                    )
+                self._send(200 if known is not None else 404, {})
+
+            def _handle_mcp(self, message: Dict):
+                method = message.get("method")
+                reply = {"jsonrpc": "2.0", "id": message.get("id")}
+                session = self.headers.get("Mcp-Session-Id", "")
+
+                if method == "initialize":
+                    reply["result"] = {
+                        "protocolVersion": message.get("params", {}).get(
+                            "protocolVersion", "2025-03-26"
+                        ),
+                        "capabilities": {"tools": {}},
+                        "serverInfo": {"name": "archon-stub", "version": "1.0.0"},
+                    }
+                    with stub._lock:
+                        session = f"stub-session-{next(stub._session_ids)}"
+                        stub.mcp_sessions[session] = False
+                        stub.mcp_sessions_opened += 1
+                    self._send(200, reply, {"Mcp-Session-Id": session})
+                    return
+
+                with stub._lock:
+                    initialized = stub.mcp_sessions.get(session)
+                if initialized is None:
+                    self._send(404, {"error": "unknown or ended MCP session"})
+                    return
+                if method == "notifications/initialized":
+                    with stub._lock:
+                        stub.mcp_sessions[session] = True
+                    self._send(202, {})
+                    return
+                if not initialized:
+                    reply["error"] = {
+                        "code": -32002,
+                        "message": "session not initialized",
+                    }
+                elif method == "tools/list":
+                    reply["result"] = {
+                        "tools": [
+                            {
+                                "name": "perform_rag_query",
+                                "inputSchema": {"type": "object"},
+                            }
+                        ]
+                    }
+                elif method == "tools/call":
+                    arguments = message.get("params", {}).get("arguments", {})
+                    results = [
+                        {
+                            "content": r["excerpt"],
+                            "similarity": r["score"],
+                            "url": r["url"],
+                            "metadata": {"title": r["title"], "source": r["source"]},
+                        }
+                        for r in stub.search(
+                            arguments.get("query", ""),
+                            int(arguments.get("match_count", 3)),
+                        )
+                    ]
+                    reply["result"] = {
+                        "content": [
+                            {"type": "text", "text": json.dumps({"results": results})}
+                        ]
+                    }
+                else:
+                    reply["error"] = {
+                        "code": -32601,
+                        "message": f"Method not found: {method}",
+                    }
+                self._send(200, reply)
+
+        return Handler
+
+
+def main():
+    """Run the stub in the foreground"""
+    parser = argparse.ArgumentParser(description="Archon stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every request"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Uniform +/- jitter on latency"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests that return 500",
+    )
+    parser.add_argument(
+        "--results", type=int, default=3, help="Synthetic results per query"
+    )
+    parser.add_argument(
+        "--payload", help="JSON file with a fixed result list to return"
+    )
+    parser.add_argument(
+        "--chunk-latency", type=float, default=0.0, help="Seconds per ingested chunk"
+    )
+    parser.add_argument(
+        "--max-batch-kb",
+        type=int,
+        default=0,
+        help="Reject larger ingest batches with 413",
+    )
+    args = parser.parse_args()
+
+    payload = None
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+
+    stub = ArchonStub(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        results_per_query=args.results,
+        payload=payload,
+        chunk_latency=args.chunk_latency,
+        max_batch_bytes=args.max_batch_kb * 1024,
+    ).start()
+
+    print(
+        f"Archon stub listening on {stub.api_base} (MCP: {stub.mcp_base}/mcp)",
+        file=sys.stderr,
+    )
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Bulk Ingestion Benchmark
+
+Generates a synthetic documentation tree and ingests it into a local Archon
+stand-in three ways:
+
+- one-by-one: each document parsed and posted on its own, in sequence, the
+  way /knowledge:add submits sources
+- pipeline: ingest/knowledge_ingest.py (process-pool parsing, batched
+  uploads over pooled connections, resumable progress)
+- resume: the pipeline again after editing a few pages, which should only
+  parse and send the edited ones
+
+Pages share boilerplate (navigation blurbs, licence footers); shared
+passages are stored once per page, so each copy keeps its source.
+
+Usage:
+    python3 ingest_bench.py
+    python3 ingest_bench.py --pages 5000 --latency 0.02 --chunk-latency 0.001
+    python3 ingest_bench.py --json ingest.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import requests
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent / "ingest"))
+
+import knowledge_ingest  # noqa: E402
+from archon_stub import ArchonStub  # noqa: E402
+
+BOILERPLATE = [
+    "This page is part of the internal engineering handbook. Edits go through the docs "
+    "review channel.",
+    "Licensed for internal use only. Do not share outside the company without approval "
+    "from legal.",
+    "Need help? Ask in the platform support channel or open a ticket with the "
+    "developer experience team.",
+]
+WORDS = (
+    "service deploy cluster cache queue retry timeout schema migration rollout token "
+    "index shard replica latency budget alert runbook owner pipeline artifact release"
+).split()
+
+
+def make_corpus(root: Path, pages: int, seed: int = 7):
+    """Write `pages` markdown files spread over nested directories"""
+    rng = random.Random(seed)
+    for i in range(pages):
+        directory = root / f"area-{i % 20}" / f"topic-{i % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        sections = []
+        for s in range(rng.randint(2, 5)):
+            paragraphs = [
+                " ".join(
+                    rng.choice(WORDS) for _ in range(rng.randint(40, 120))
+                ).capitalize()
+                + "."
+                for _ in range(rng.randint(2, 4))
+            ]
+            sections.append(f"## Section {s + 1}\n\n" + "\n\n".join(paragraphs))
+        body = (
+            f"# Page {i}\n\n{BOILERPLATE[0]}\n\n"
+            + "\n\n".join(sections)
+            + f"\n\n## Footer\n\n{BOILERPLATE[1 + i % 2]}\n"
+        )
+        (directory / f"page-{i}.md").write_text(body)
+
+
+def one_by_one(root: Path, api_base: str) -> Dict:
+    """Baseline: parse and post each document on its own, sequentially"""
+    start = time.perf_counter()
+    requests_made = 0
+    for doc in knowledge_ingest.walk_files([str(root)]):
+        _, chunks, _ = knowledge_ingest.parse_document(
+            doc, knowledge_ingest.CHUNK_CHARS, knowledge_ingest.CHUNK_OVERLAP
+        )
+        requests.post(
+            f"{api_base}/knowledge/ingest",
+            json={"source": "bench", "chunks": chunks},
+            timeout=60,
+        )
+        requests_made += 1
+    return {"seconds": round(time.perf_counter() - start, 2), "requests": requests_made}
+
+
+def pipeline(root: Path, api_base: str, state: Path, args) -> Dict:
+    start = time.perf_counter()
+    stats = knowledge_ingest.ingest(
+        [str(root)],
+        [],
+        "bench",
+        api_base=api_base,
+        state_path=state,
+        workers=args.workers,
+        uploaders=args.uploaders,
+        progress=False,
+    )
+    return {
+        "seconds": round(time.perf_counter() - start, 2),
+        "parsed": stats.sources_parsed,
+        "unchanged": stats.sources_skipped,
+        "chunks": stats.chunks_total,
+        "duplicates": stats.chunks_duplicate,
+        "uploaded": stats.chunks_uploaded,
+        "batches": stats.batches_uploaded,
+        "failed_batches": stats.batches_failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk ingestion benchmark")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Stub seconds per request"
+    )
+    parser.add_argument(
+        "--chunk-latency", type=float, default=0.0005, help="Stub seconds per chunk"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Parse processes (default: CPU count)"
+    )
+    parser.add_argument("--uploaders", type=int, default=knowledge_ingest.UPLOADERS)
+    parser.add_argument(
+        "--edits", type=int, default=20, help="Pages edited before the resume run"
+    )
+    parser.add_argument("--skip-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    knowledge_ingest.MAX_RETRIES = 3
+    report: Dict = {
+        "config": vars(args) | {"json": str(args.json) if args.json else None}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        root = Path(workdir) / "docs"
+        state = Path(workdir) / "ingest-state.json"
+        make_corpus(root, args.pages)
+        print(f"📚 {args.pages} pages generated")
+
+        if not args.skip_baseline:
+            with ArchonStub(
+                latency=args.latency, chunk_latency=args.chunk_latency, seed=1
+            ) as stub:
+                report["one_by_one"] = one_by_one(root, stub.api_base)
+                report["one_by_one"]["stored_chunks"] = len(stub.chunks)
+            print(f"   one-by-one: {report['one_by_one']}")
+
+        with ArchonStub(
+            latency=args.latency,
+            chunk_latency=args.chunk_latency,
+            error_rate=args.error_rate,
+            seed=1,
+        ) as stub:
+            report["pipeline"] = pipeline(root, stub.api_base, state, args)
+            report["pipeline"]["stored_chunks"] = len(stub.chunks)
+            print(f"   pipeline:   {report['pipeline']}")
+
+            pages = sorted(root.rglob("*.md"))
+            for path in random.Random(3).sample(pages, min(args.edits, len(pages))):
+                path.write_text(
+                    path.read_text()
+                    + "\n\n## Changelog\n\nUpdated for the benchmark resume run.\n"
+                )
+            report["resume"] = pipeline(root, stub.api_base, state, args)
+            report["resume"]["stored_chunks"] = len(stub.chunks)
+            print(f"   resume:     {report['resume']}")
+
+    if "one_by_one" in report and report["pipeline"]["seconds"]:
+        speedup = report["one_by_one"]["seconds"] / report["pipeline"]["seconds"]
+        print(f"\n⚡ Pipeline {speedup:.1f}x faster than one-by-one")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+RAG Hook Replay Benchmark
+
+Replays a corpus of recorded prompts through rag-prompt-enhance.py against
+a local Archon stand-in and reports end-to-end latency, in two modes:
+
+- in-process: enhance_prompt() called directly (network + serialization +
+  hook logic, no interpreter cost)
+- subprocess: the hook launched once per prompt with JSON on stdin, the
+  way Claude Code invokes it
+
+Each --repeat pass starts from an empty .claude/cache (result cache and
+lookup gate), so later passes measure lookups rather than cache hits.
+
+It also measures bare interpreter startup and the cost of importing
+`requests`, so the subprocess numbers can be broken down.
+
+Usage:
+    python3 rag_hook_bench.py
+    python3 rag_hook_bench.py --latency 0.05 --error-rate 0.02 --repeat 5
+    python3 rag_hook_bench.py --json before.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from archon_stub import ArchonStub  # noqa: E402
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_HOOK = BENCH_DIR.parent / "hooks" / "rag-prompt-enhance.py"
+DEFAULT_CORPUS = BENCH_DIR / "prompts.jsonl"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float], wall_time: float) -> Dict[str, float]:
+    """Latency percentiles (ms) and throughput for one run"""
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "throughput_per_s": len(samples) / wall_time if wall_time else 0.0,
+    }
+
+
+def load_corpus(path: Path) -> List[str]:
+    """Load recorded prompts (one JSON object with a "prompt" key per line)"""
+    prompts = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                prompts.append(json.loads(line)["prompt"])
+    return prompts
+
+
+def load_hook(path: Path):
+    """Import the hook script as a module (its filename has dashes)"""
+    spec = importlib.util.spec_from_file_location("rag_prompt_enhance", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_command(args: List[str], runs: int) -> float:
+    """Median wall time of a short command"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_startup(runs: int) -> Dict[str, float]:
+    """Interpreter startup and `requests` import cost (ms)"""
+    startup = time_command([sys.executable, "-c", "pass"], runs)
+    with_requests = time_command([sys.executable, "-c", "import requests"], runs)
+    return {
+        "interpreter_startup_ms": startup * 1000,
+        "requests_import_ms": max(0.0, with_requests - startup) * 1000,
+    }
+
+
+def clear_hook_state(workdir: str):
+    """Drop the hook's result cache and gate state, so a pass starts cold"""
+    shutil.rmtree(Path(workdir) / ".claude" / "cache", ignore_errors=True)
+
+
+def bench_in_process(
+    hook, prompts: List[str], repeat: int, cwd: str
+) -> Dict[str, float]:
+    """Call enhance_prompt() directly for every prompt"""
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        clear_hook_state(cwd)
+        for prompt in prompts:
+            t0 = time.perf_counter()
+            hook.enhance_prompt(prompt)
+            samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def bench_subprocess(
+    hook_path: Path, prompts: List[str], repeat: int, env: Dict[str, str], cwd: str
+) -> Dict[str, float]:
+    """Launch the hook once per prompt, as Claude Code does"""
+    samples = []
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        clear_hook_state(cwd)
+        for prompt in prompts:
+            payload = json.dumps({"type": "userPromptSubmit", "prompt": prompt})
+            t0 = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, str(hook_path)],
+                input=payload,
+                capture_output=True,
+                text=True,
+                env=env,
+                cwd=cwd,
+            )
+            samples.append(time.perf_counter() - t0)
+            if result.returncode != 0:
+                failures += 1
+    summary = summarize(samples, time.perf_counter() - start)
+    summary["failures"] = failures
+    return summary
+
+
+def print_report(report: Dict):
+    """Print a human-readable summary table"""
+    startup = report["startup"]
+    print()
+    print("RAG hook benchmark")
+    print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+    print(
+        f"Prompts per mode: {report['prompts']}   "
+        f"stub latency: {report['stub']['latency'] * 1000:.0f} ms   "
+        f"error rate: {report['stub']['error_rate']:.0%}"
+    )
+    print()
+    print(
+        f"{'mode':<12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} "
+        f"{'req/s':>8}"
+    )
+    for mode in ("in_process", "subprocess"):
+        if mode in report:
+            r = report[mode]
+            print(
+                f"{mode:<12} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                f"{r['p99_ms']:>9.1f} "
+                f"{r['mean_ms']:>9.1f} {r['throughput_per_s']:>8.1f}"
+            )
+    print()
+    print("Subprocess breakdown (median):")
+    print(f"   interpreter startup   {startup['interpreter_startup_ms']:>8.1f} ms")
+    print(f"   import requests       {startup['requests_import_ms']:>8.1f} ms")
+    if "in_process" in report:
+        print(f"   network + hook logic  {report['in_process']['p50_ms']:>8.1f} ms")
+    if "subprocess" in report:
+        other = (
+            report["subprocess"]["p50_ms"]
+            - startup["interpreter_startup_ms"]
+            - startup["requests_import_ms"]
+            - report.get("in_process", {}).get("p50_ms", 0)
+        )
+        print(f"   other (hook imports)  {max(other, 0):>8.1f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay prompts through the RAG hook against a stub Archon"
+    )
+    parser.add_argument(
+        "--hook", type=Path, default=DEFAULT_HOOK, help="Hook script to benchmark"
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=DEFAULT_CORPUS,
+        help="JSONL file of recorded prompts",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Replay the corpus this many times per mode",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Stub latency per request (seconds)"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.005, help="Stub latency jitter (seconds)"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of stub requests that fail",
+    )
+    parser.add_argument(
+        "--results", type=int, default=3, help="Results returned per query"
+    )
+    parser.add_argument(
+        "--payload", type=Path, help="JSON file with a fixed result list"
+    )
+    parser.add_argument(
+        "--mode", choices=["both", "in-process", "subprocess"], default="both"
+    )
+    parser.add_argument(
+        "--startup-runs", type=int, default=10, help="Samples for startup/import timing"
+    )
+    parser.add_argument(
+        "--json", type=Path, help="Also write the report as JSON to this path"
+    )
+    args = parser.parse_args()
+
+    prompts = load_corpus(args.corpus)
+    payload = json.loads(args.payload.read_text()) if args.payload else None
+
+    with ArchonStub(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        results_per_query=args.results,
+        payload=payload,
+        seed=0,
+    ) as stub, tempfile.TemporaryDirectory() as workdir:
+        report = {
+            "prompts": len(prompts) * args.repeat,
+            "stub": {"latency": args.latency, "error_rate": args.error_rate},
+            "startup": bench_startup(args.startup_runs),
+        }
+
+        # Run from a scratch directory so hook state (caches, gate) starts empty
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            if args.mode in ("both", "in-process"):
+                hook = load_hook(args.hook)
+                hook.ARCHON_API_BASE = stub.api_base
+                hook.ARCHON_MCP_BASE = stub.mcp_base
+                report["in_process"] = bench_in_process(
+                    hook, prompts, args.repeat, workdir
+                )
+        finally:
+            os.chdir(previous_cwd)
+
+        if args.mode in ("both", "subprocess"):
+            env = {
+                **os.environ,
+                "ARCHON_API_BASE": stub.api_base,
+                "ARCHON_MCP_BASE": stub.mcp_base,
+            }
+            with tempfile.TemporaryDirectory() as subprocess_workdir:
+                report["subprocess"] = bench_subprocess(
+                    args.hook.resolve(), prompts, args.repeat, env, subprocess_workdir
+                )
+
+        report["stub"]["requests_served"] = stub.requests_served
+
+    print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,22 +23,112 @@ Author: Claude Code Community
 License: MIT
 """
 
-import sys
+import asyncio
+import fcntl
+import hashlib
 import json
-import requests
-from typing import Dict, List, Optional
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urljoin
 
+import requests
+
+try:
+    # installed next to this hook in .claude/hooks/
+    from hooklib.profiling import profiled
+    from hooklib.telemetry import phase
+except ImportError:
+    import contextlib
+
+    def profiled(hook):
+        return lambda fn: fn
+
+    def phase(name):
+        return contextlib.nullcontext()
+
+
 # Configuration
-ARCHON_API_BASE = "http://localhost:8181/api"
-ARCHON_MCP_BASE = "http://localhost:8051"
+ARCHON_API_BASE = os.environ.get("ARCHON_API_BASE", "http://localhost:8181/api")
+ARCHON_MCP_BASE = os.environ.get("ARCHON_MCP_BASE", "http://localhost:8051")
+LOCAL_INDEX_PATH = ".claude/knowledge/index.json"
 MAX_RESULTS = 3
 MIN_RELEVANCE = 0.65
 REQUEST_TIMEOUT = 5  # seconds
+MCP_CLOSE_TIMEOUT = 1  # seconds for the DELETE that ends an MCP session
+
+# Multi-backend fan-out
+# Backends are queried concurrently; results are merged with reciprocal-rank
+# fusion. Once one backend has answered with results, the others get
+# FANOUT_GRACE seconds to catch up before we return what we have.
+ENABLED_BACKENDS = ["archon_rest", "archon_mcp", "local_index"]
+FANOUT_DEADLINE = REQUEST_TIMEOUT  # seconds, hard cap for the whole fan-out
+FANOUT_GRACE = 0.15  # seconds
+RRF_K = 60
+
+# Context packing
+# Every injected token is re-sent on every later turn, so context is packed
+# into an explicit budget instead of appending results verbatim.
+CONTEXT_TOKEN_BUDGET = 800
+CHARS_PER_TOKEN = 4  # rough estimate for English prose and code
+DUPLICATE_THRESHOLD = 0.6  # shingle overlap above which excerpts are duplicates
+MIN_ENTRY_TOKENS = 24  # don't inject a result with less room than this
+
+# Input and query construction
+# Pasted logs and stack traces can be megabytes; the hook reads stdin in
+# bounded chunks and searches with a few short salient queries instead of
+# the whole prompt.
+MAX_INPUT_BYTES = 16 * 1024 * 1024  # larger inputs are passed through untouched
+STDIN_CHUNK_SIZE = 64 * 1024
+MAX_QUERY_CHARS = 400  # prompts up to this size are used as the query verbatim
+MAX_SUB_QUERIES = 3
+SCAN_WINDOW_CHARS = 32 * 1024  # only the head and tail of huge prompts are scanned
+
+# Result cache
+# Lookups (and the session-start prefetch in rag-session-prefetch.py) are
+# stored here; a prompt whose words closely match a cached query's is
+# answered without touching the network.
+RESULT_CACHE_PATH = ".claude/cache/rag-results.json"
+RESULT_CACHE_TTL = 6 * 3600  # seconds
+RESULT_CACHE_SIZE = 200  # entries
+CACHE_MATCH_THRESHOLD = 0.6  # Jaccard similarity of query and cached query words
+
+# Lookup gating
+# Learns which prompt shapes never return anything and stops asking.
+GATE_STATE_PATH = ".claude/cache/rag-gate.json"
+NEGATIVE_CACHE_TTL = 24 * 3600  # seconds
+NEGATIVE_CACHE_SIZE = 2000  # entries
+GATE_MIN_OBSERVATIONS = 50  # outcomes seen before the classifier may skip
+GATE_THRESHOLD = 0.2  # skip when predicted hit probability is below this
+GATE_EXPLORE_RATE = 0.05  # fraction of predicted misses looked up anyway
+GATE_LEARNING_RATE = 0.1
+GATE_L2 = 0.001
+GATE_FEATURE_BUCKETS = 1 << 14
+GATE_MAX_TOKENS = 64
+
+# Session de-duplication
+# Injected context stays in the conversation, so a document already injected
+# earlier in the session is mentioned in one line instead of being sent
+# again. Tracked per session_id from the hook input.
+SESSION_LEDGER_DIR = ".claude/cache/rag-sessions"
+SESSION_LEDGER_TTL = 24 * 3600  # seconds since the session's last prompt
+
+# Shared session: keeps connections alive between requests, which pays off
+# when the hook runs inside the persistent hook host (scripts/hooklib).
+HTTP_SESSION = requests.Session()
 
 # Feature flags
 ENABLE_CODE_EXAMPLES = True
 ENABLE_RELEVANCE_SCORES = True
+ENABLE_LOOKUP_GATE = True
+ENABLE_RESULT_CACHE = True
+ENABLE_SESSION_DEDUP = True
 VERBOSE_LOGGING = False
 
 
@@ -48,7 +138,9 @@ def log_debug(message: str):
         print(f"[RAG Hook] {message}", file=sys.stderr)
 
 
-def search_knowledge(query: str, max_results: int = MAX_RESULTS) -> List[Dict]:
+def search_knowledge(
+    query: str, max_results: int = MAX_RESULTS
+) -> Optional[List[Dict]]:
     """
     Query Archon's knowledge base for relevant documentation
 
@@ -57,20 +149,21 @@ def search_knowledge(query: str, max_results: int = MAX_RESULTS) -> List[Dict]:
         max_results: Maximum number of results to return
 
     Returns:
-        List of search results with title, excerpt, score, etc.
+        List of search results with title, excerpt, score, etc., or None
+        when Archon could not be reached or returned an error
     """
     try:
         log_debug(f"Searching knowledge base for: {query}")
 
-        response = requests.post(
+        response = HTTP_SESSION.post(
             urljoin(ARCHON_API_BASE, "/knowledge/search"),
             json={
                 "query": query,
                 "limit": max_results,
                 "min_relevance": MIN_RELEVANCE,
-                "include_code_examples": ENABLE_CODE_EXAMPLES
+                "include_code_examples": ENABLE_CODE_EXAMPLES,
             },
-            timeout=REQUEST_TIMEOUT
+            timeout=REQUEST_TIMEOUT,
         )
 
         if response.status_code == 200:
@@ -79,89 +172,699 @@ def search_knowledge(query: str, max_results: int = MAX_RESULTS) -> List[Dict]:
             return results
 
         log_debug(f"Search returned status {response.status_code}")
-        return []
+        return None
 
     except requests.exceptions.Timeout:
         log_debug("Knowledge search timed out")
-        return []
+        return None
 
     except requests.exceptions.ConnectionError:
         log_debug("Cannot connect to Archon (is it running?)")
-        return []
+        return None
 
     except Exception as e:
         log_debug(f"Knowledge search error: {e}")
+        return None
+
+
+def search_archon_mcp(
+    query: str, max_results: int = MAX_RESULTS
+) -> Optional[List[Dict]]:
+    """
+    Query Archon's MCP server (streamable HTTP) with its RAG tool
+
+    Each call is one MCP session: initialize, the initialized notification,
+    the tool call, then a DELETE that ends the session on the server.
+
+    Args:
+        query: Search query string
+        max_results: Maximum number of results to return
+
+    Returns:
+        List of search results normalized to the REST result shape, or None
+        when the server could not be reached or answered with an error
+    """
+    headers = {"Accept": "application/json, text/event-stream"}
+    endpoint = urljoin(ARCHON_MCP_BASE, "/mcp")
+    session_id = None
+
+    try:
+        init = HTTP_SESSION.post(
+            endpoint,
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-03-26",
+                    "capabilities": {},
+                    "clientInfo": {"name": "rag-prompt-enhance", "version": "1.0.0"},
+                },
+            },
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+        if init.status_code != 200:
+            log_debug(f"MCP initialize returned status {init.status_code}")
+            return None
+        session_id = init.headers.get("Mcp-Session-Id")
+        if session_id:
+            headers["Mcp-Session-Id"] = session_id
+
+        HTTP_SESSION.post(
+            endpoint,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+        response = HTTP_SESSION.post(
+            endpoint,
+            json={
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/call",
+                "params": {
+                    "name": "perform_rag_query",
+                    "arguments": {"query": query, "match_count": max_results},
+                },
+            },
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+        if response.status_code != 200:
+            log_debug(f"MCP search returned status {response.status_code}")
+            return None
+
+        message = _parse_mcp_response(response.text)
+        if "result" not in message:
+            log_debug(
+                f"MCP search failed: {message.get('error', 'no JSON-RPC result')}"
+            )
+            return None
+        results = []
+        for block in message.get("result", {}).get("content", []):
+            if block.get("type") != "text":
+                continue
+            try:
+                payload = json.loads(block.get("text", ""))
+            except json.JSONDecodeError:
+                continue
+            for item in payload.get("results", []):
+                metadata = item.get("metadata", {})
+                results.append(
+                    {
+                        "title": item.get("title") or metadata.get("title", "Untitled"),
+                        "source": item.get("source")
+                        or metadata.get("source", "Unknown source"),
+                        "content": item.get("content", ""),
+                        "score": item.get("similarity", item.get("score", 0)),
+                        "url": item.get("url") or metadata.get("url"),
+                    }
+                )
+
+        results = [r for r in results if r["score"] >= MIN_RELEVANCE]
+        log_debug(f"MCP returned {len(results)} relevant results")
+        return results[:max_results]
+
+    except Exception as e:
+        log_debug(f"MCP search error: {e}")
+        return None
+
+    finally:
+        if session_id:
+            _end_mcp_session(endpoint, headers)
+
+
+def _end_mcp_session(endpoint: str, headers: Dict):
+    """End an MCP session, so the server does not keep one per prompt"""
+    try:
+        HTTP_SESSION.delete(endpoint, headers=headers, timeout=MCP_CLOSE_TIMEOUT)
+    except Exception as e:
+        log_debug(f"MCP session close failed: {e}")
+
+
+def _parse_mcp_response(body: str) -> Dict:
+    """Parse a JSON-RPC response sent either as plain JSON or as SSE events"""
+    body = body.strip()
+    if body.startswith("{"):
+        return json.loads(body)
+
+    for line in body.splitlines():
+        if line.startswith("data:"):
+            try:
+                message = json.loads(line[5:].strip())
+            except json.JSONDecodeError:
+                continue
+            if "result" in message or "error" in message:
+                return message
+    return {}
+
+
+def search_local_index(
+    query: str, max_results: int = MAX_RESULTS
+) -> Optional[List[Dict]]:
+    """
+    Keyword search over a local JSON index (a list of result dicts)
+
+    Args:
+        query: Search query string
+        max_results: Maximum number of results to return
+
+    Returns:
+        List of matching documents scored by query term overlap, or None
+        when there is no readable index
+    """
+    if not os.path.exists(LOCAL_INDEX_PATH):
+        return None
+
+    try:
+        with open(LOCAL_INDEX_PATH) as f:
+            documents = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        log_debug(f"Cannot read local index: {e}")
+        return None
+
+    terms = set(re.findall(r"[a-z0-9_]{3,}", query.lower()))
+    if not terms:
         return []
 
+    scored = []
+    for doc in documents:
+        body = doc.get("content", doc.get("excerpt", ""))
+        text = f"{doc.get('title', '')} {body}".lower()
+        words = set(re.findall(r"[a-z0-9_]{3,}", text))
+        score = len(terms & words) / len(terms)
+        if score >= MIN_RELEVANCE:
+            scored.append({**doc, "score": score})
+
+    scored.sort(key=lambda r: r["score"], reverse=True)
+    return scored[:max_results]
+
+
+# A backend returns its ranked results ([] for "nothing relevant") or None
+# when it could not answer, so an outage is never mistaken for a miss.
+BACKENDS: Dict[str, Callable[[str, int], Optional[List[Dict]]]] = {
+    "archon_rest": search_knowledge,
+    "archon_mcp": search_archon_mcp,
+    "local_index": search_local_index,
+}
+
 
-def format_context(results: List[Dict]) -> str:
+def _result_key(result: Dict) -> str:
+    """Identity used to de-duplicate the same document across backends"""
+    url = result.get("url")
+    if url:
+        return url.rstrip("/").lower()
+    return f"{result.get('source', '')}::{result.get('title', '')}".lower()
+
+
+def fuse_results(
+    ranked_lists: List[List[Dict]], max_results: int = MAX_RESULTS
+) -> List[Dict]:
     """
-    Format search results into readable context
+    Merge per-backend rankings with reciprocal-rank fusion
 
     Args:
-        results: List of search results from Archon
+        ranked_lists: One ranked result list per backend
+        max_results: Maximum number of fused results to return
 
     Returns:
-        Formatted context string to append to prompt
+        De-duplicated results ordered by fused score
     """
-    if not results:
-        return ""
-
-    lines = [
-        "",
-        "=" * 70,
-        "📚 RELEVANT CONTEXT FROM PROJECT KNOWLEDGE BASE",
-        "=" * 70,
-        ""
-    ]
-
-    for i, result in enumerate(results, 1):
-        # Title and source
+    fused: Dict[str, float] = {}
+    best: Dict[str, Dict] = {}
+
+    for results in ranked_lists:
+        for rank, result in enumerate(results, 1):
+            key = _result_key(result)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank)
+            if key not in best or result.get("score", 0) > best[key].get("score", 0):
+                best[key] = result
+
+    ordered = sorted(fused, key=lambda k: fused[k], reverse=True)
+    return [best[key] for key in ordered[:max_results]]
+
+
+def _run_in_thread(
+    loop: asyncio.AbstractEventLoop, func: Callable, *args
+) -> asyncio.Future:
+    """
+    Run a blocking backend call on a daemon thread
+
+    Daemon threads (unlike the default executor) do not hold up interpreter
+    exit, so a backend that misses the deadline cannot delay the hook.
+    """
+    future = loop.create_future()
+
+    def worker():
+        try:
+            result = func(*args)
+        except Exception as e:
+            result = None
+            log_debug(f"Backend {getattr(func, '__name__', func)} failed: {e}")
+        # The loop may close between any check and the call: the fan-out
+        # returned without this backend, so its result is simply dropped
+        try:
+            loop.call_soon_threadsafe(
+                lambda: future.done() or future.set_result(result)
+            )
+        except RuntimeError:
+            pass
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+
+async def _fan_out(query: str, max_results: int) -> Optional[List[Dict]]:
+    """
+    Query all enabled backends concurrently and fuse what arrives in time
+
+    Returns None when no backend answered before the deadline.
+    """
+    loop = asyncio.get_running_loop()
+    pending = {
+        _run_in_thread(loop, BACKENDS[name], query, max_results)
+        for name in ENABLED_BACKENDS
+        if name in BACKENDS
+    }
+    ranked_lists: List[List[Dict]] = []
+    answered = False
+    deadline = loop.time() + FANOUT_DEADLINE
+
+    while pending:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        done, pending = await asyncio.wait(
+            pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+        )
+        for future in done:
+            results = future.result()
+            answered = answered or results is not None
+            if results:
+                ranked_lists.append(results)
+        if ranked_lists:
+            # First useful answer is in: give the rest a short grace period
+            deadline = min(deadline, loop.time() + FANOUT_GRACE)
+
+    if pending:
+        log_debug(f"{len(pending)} backend(s) missed the deadline")
+
+    return fuse_results(ranked_lists, max_results) if answered else None
+
+
+def search_all_backends(
+    query: str, max_results: int = MAX_RESULTS
+) -> Optional[List[Dict]]:
+    """
+    Query every enabled backend concurrently and merge the results
+
+    Args:
+        query: Search query string
+        max_results: Maximum number of results to return
+
+    Returns:
+        Fused, de-duplicated list of search results, or None when no
+        backend answered
+    """
+    if len(ENABLED_BACKENDS) == 1 and ENABLED_BACKENDS[0] in BACKENDS:
+        return BACKENDS[ENABLED_BACKENDS[0]](query, max_results)
+
+    return asyncio.run(_fan_out(query, max_results))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    """Word n-grams used to detect overlapping excerpts"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _result_text(result: Dict) -> str:
+    return result.get("excerpt") or result.get("content") or ""
+
+
+def dedupe_results(results: List[Dict]) -> List[Dict]:
+    """
+    Drop results whose excerpt overlaps one already kept
+
+    Overlap is measured as shingle containment, so a short excerpt that is
+    a slice of a longer one from the same document counts as a duplicate.
+    Results are visited in relevance order, so the best copy survives.
+    """
+    kept: List[Dict] = []
+    kept_shingles: List[set] = []
+
+    for result in sorted(results, key=lambda r: r.get("score", 0), reverse=True):
+        shingles = _shingles(_result_text(result))
+        duplicate = False
+        for other in kept_shingles:
+            if shingles and other:
+                overlap = len(shingles & other) / min(len(shingles), len(other))
+                if overlap >= DUPLICATE_THRESHOLD:
+                    duplicate = True
+                    break
+        if not duplicate:
+            kept.append(result)
+            kept_shingles.append(shingles)
+
+    return kept
+
+
+def _trim_prose(text: str, max_chars: int) -> str:
+    """Cut prose at the last sentence boundary that fits"""
+    if len(text) <= max_chars:
+        return text
+
+    head = text[:max_chars]
+    boundaries = [m.end() for m in re.finditer(r"[.!?](?=\s|$)|\n", head)]
+    if boundaries and boundaries[-1] >= max_chars * 0.4:
+        return head[: boundaries[-1]].rstrip()
+
+    cut = head.rfind(" ")
+    return head[: cut if cut > 0 else max_chars].rstrip() + " …"
+
+
+def _trim_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Trim text to a token budget at sentence or code-block boundaries
+
+    Fenced code blocks are kept whole or dropped; they are never cut.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    parts = []
+    used = 0
+    for segment in re.split(r"(```.*?```)", text, flags=re.DOTALL):
+        if not segment:
+            continue
+        remaining = max_chars - used
+        if remaining <= 0:
+            break
+        if segment.startswith("```"):
+            if len(segment) > remaining:
+                break
+            parts.append(segment)
+        else:
+            trimmed = _trim_prose(segment, remaining)
+            parts.append(trimmed)
+            if len(trimmed) < len(segment):
+                break
+        used += len(parts[-1])
+
+    return "".join(parts).strip()
+
+
+def _pack_entries(
+    results: List[Dict], available: float, known: Optional[Dict] = None
+) -> tuple[List[str], List[Dict]]:
+    """
+    Render results into numbered entries within `available` tokens
+
+    Results are visited in relevance order. Each gets a share of the budget
+    still left in proportion to its score, so whatever an entry leaves
+    unused passes down to the ones below it. An entry whose share is too
+    small for an excerpt takes what it needs from the results below it, and
+    one that leaves too little for another entry takes the rest; the most
+    relevant results are never dropped to make room for others.
+
+    Documents in `known` were linked earlier in the session, so their
+    "Full document" line is left out.
+
+    Returns:
+        Tuple of (entry strings, results that made it in)
+    """
+    weights = [max(r.get("score", 0), 0.01) for r in results]
+    remaining_weight = sum(weights)
+
+    entries = []
+    injected = []
+    for result, weight in zip(results, weights):
+        share = available * weight / remaining_weight
+        remaining_weight -= weight
+
         title = result.get("title", "Untitled")
         source = result.get("source", "Unknown source")
-        lines.append(f"{i}. {title}")
-        lines.append(f"   Source: {source}")
-
-        # Relevance score (optional)
+        heading = f"{len(entries) + 1}. {title} ({source}"
         if ENABLE_RELEVANCE_SCORES:
-            score = result.get("score", 0)
-            lines.append(f"   Relevance: {score:.0%}")
+            heading += f", relevance {result.get('score', 0):.0%}"
+        heading += ")"
 
-        # Content excerpt
-        excerpt = result.get("excerpt", result.get("content", ""))
-        if excerpt:
-            # Wrap long excerpts
-            max_excerpt_length = 300
-            if len(excerpt) > max_excerpt_length:
-                excerpt = excerpt[:max_excerpt_length] + "..."
+        lines = [heading]
+        cost = estimate_tokens(heading) + 1
+        share = max(share, min(available, cost + MIN_ENTRY_TOKENS))
+        if share - cost < MIN_ENTRY_TOKENS:
+            break  # no room left for this or any lower-ranked result
+        if available - share < cost + MIN_ENTRY_TOKENS:
+            share = available  # what would be left is too little for another entry
 
-            lines.append(f"   {excerpt}")
+        excerpt = _trim_to_budget(_result_text(result).strip(), int(share - cost))
+        if excerpt:
+            lines.append(excerpt)
+            cost += estimate_tokens(excerpt) + 1
 
-        # Code example (if available)
-        if ENABLE_CODE_EXAMPLES and "code_example" in result:
-            code = result["code_example"]
+        if ENABLE_CODE_EXAMPLES and result.get("code_example"):
             language = result.get("language", "")
+            code = f"```{language}\n{result['code_example'].strip()}\n```"
+            if estimate_tokens(code) + 1 <= share - cost:
+                lines.append(code)
+                cost += estimate_tokens(code) + 1
 
-            lines.append("")
-            lines.append(f"   Example Code:")
-            lines.append(f"   ```{language}")
-            lines.append(f"   {code}")
-            lines.append(f"   ```")
+        if result.get("url") and _result_key(result) not in (known or {}):
+            link = f"Full document: {result['url']}"
+            if estimate_tokens(link) + 1 <= share - cost:
+                lines.append(link)
+                cost += estimate_tokens(link) + 1
 
-        # Link to full document
-        if "url" in result:
-            lines.append(f"   📖 Full document: {result['url']}")
+        entries.append("\n".join(lines))
+        injected.append(result)
+        available -= cost
 
-        lines.append("")
+    return entries, injected
 
-    lines.extend([
-        "=" * 70,
-        "END CONTEXT",
-        "=" * 70,
-        ""
-    ])
 
-    return "\n".join(lines)
+def _reference_line(results: List[Dict]) -> str:
+    """One line naming documents the session has already been given"""
+    names = ", ".join(
+        f"{r.get('title', 'Untitled')} ({r.get('source', 'Unknown source')})"
+        for r in results
+    )
+    return f"Relevant, already provided earlier in this session: {names}"
+
+
+def pack_context(
+    results: List[Dict],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    ledger: Optional["SessionLedger"] = None,
+) -> tuple[str, int, int]:
+    """
+    Pack search results into a context block that fits a token budget
+
+    Near-duplicate excerpts are removed, then the budget is split across the
+    remaining results in proportion to their relevance score. Budget a
+    result does not use rolls over to the next one; a top result whose share
+    is too small is trimmed to fit rather than dropped.
+
+    With a session ledger, results already injected earlier in the session
+    are named on one reference line instead, their share of the budget goes
+    to new material, and whatever is injected is recorded in the ledger.
+
+    Args:
+        results: List of search results from Archon
+        token_budget: Maximum number of tokens to inject
+        ledger: Injection history of the current session, if known
+
+    Returns:
+        Tuple of (context string, documents injected, estimated tokens injected)
+    """
+    results = dedupe_results(results)
+    repeats: List[Dict] = []
+    if ledger:
+        results, repeats = ledger.split(results)
+    if not results and not repeats:
+        return "", 0, 0
+
+    header = "[Relevant context from project knowledge base]"
+    footer = "[End context]"
+    reference = _reference_line(repeats) if repeats else ""
+    available = token_budget - estimate_tokens(header) - estimate_tokens(footer) - 2
+    if reference:
+        available -= estimate_tokens(reference) + 1
+
+    known = ledger.documents if ledger else None
+    entries, injected = (
+        _pack_entries(results, available, known) if results else ([], [])
+    )
+    if not entries and not reference:
+        return "", 0, 0
+    if ledger and injected:
+        ledger.record(injected)
+
+    context = "\n".join([header, *entries, *([reference] if reference else []), footer])
+    return context, len(entries), estimate_tokens(context)
+
+
+async def _fan_out_batch(queries: List[str], max_results: int) -> Optional[List[Dict]]:
+    """Run the fan-out for several sub-queries at once and fuse them"""
+    ranked_lists = await asyncio.gather(*(_fan_out(q, max_results) for q in queries))
+    if all(r is None for r in ranked_lists):
+        return None
+    return fuse_results([r for r in ranked_lists if r], max_results)
+
+
+def search_queries(
+    queries: List[str], max_results: int = MAX_RESULTS
+) -> Optional[List[Dict]]:
+    """
+    Search for several sub-queries in one batch
+
+    Args:
+        queries: Short queries derived from one prompt
+        max_results: Maximum number of results to return
+
+    Returns:
+        Fused, de-duplicated list of search results across all queries, or
+        None when no backend answered
+    """
+    if len(queries) == 1:
+        return search_all_backends(queries[0], max_results)
+
+    return asyncio.run(_fan_out_batch(queries, max_results))
+
+
+# Words of the result cache and lookup gate
+TOKEN_PATTERN = re.compile(r"[a-z_][a-z0-9_]{2,}")
+CACHE_STOPWORDS = {
+    "the",
+    "and",
+    "for",
+    "how",
+    "what",
+    "why",
+    "does",
+    "with",
+    "this",
+    "that",
+    "can",
+    "you",
+    "please",
+    "from",
+    "into",
+    "are",
+    "our",
+    "use",
+    "when",
+    "where",
+}
+
+
+def _query_terms(text: str) -> set:
+    """Lowercased content words with a naive plural strip, for cache matching"""
+    return {
+        t[:-1] if t.endswith("s") and len(t) > 4 else t
+        for t in TOKEN_PATTERN.findall(text.lower())
+        if t not in CACHE_STOPWORDS
+    }
+
+
+def load_result_cache(path: str = RESULT_CACHE_PATH) -> List[Dict]:
+    """Load unexpired result cache entries"""
+    try:
+        with open(path) as f:
+            entries = json.load(f).get("entries", [])
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return []
+
+    now = time.time()
+    return [e for e in entries if now - e.get("ts", 0) < RESULT_CACHE_TTL]
+
+
+def store_results(items: List[tuple], path: str = RESULT_CACHE_PATH):
+    """
+    Add (query, results) pairs to the result cache
+
+    Newer entries replace older ones for the same query; the cache is
+    trimmed to the RESULT_CACHE_SIZE most recent entries.
+    """
+    now = time.time()
+    fresh = {query: results for query, results in items if results}
+    if not fresh:
+        return
+
+    entries = [e for e in load_result_cache(path) if e.get("query") not in fresh]
+    entries.extend({"query": q, "results": r, "ts": now} for q, r in fresh.items())
+    entries = sorted(entries, key=lambda e: e["ts"], reverse=True)[:RESULT_CACHE_SIZE]
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"entries": entries}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log_debug(f"Cannot save result cache: {e}")
+
+
+def lookup_cached_results(
+    queries: List[str], max_results: int = MAX_RESULTS
+) -> List[Dict]:
+    """
+    Answer queries from the result cache
+
+    An entry matches when the Jaccard similarity of its words and one
+    query's words reaches CACHE_MATCH_THRESHOLD, so a prefetched "user auth
+    refresh" serves "why does the auth refresh fail for users?", but a long
+    prompt that merely mentions those words among many others does not.
+    """
+    term_sets = [terms for terms in (_query_terms(q) for q in queries) if terms]
+    if not term_sets:
+        return []
+
+    matches = []
+    for entry in load_result_cache():
+        cached_terms = _query_terms(entry.get("query", ""))
+        if cached_terms and any(
+            len(cached_terms & terms) / len(cached_terms | terms)
+            >= CACHE_MATCH_THRESHOLD
+            for terms in term_sets
+        ):
+            matches.append(entry["results"])
+
+    return fuse_results(matches, max_results) if matches else []
+
+
+def format_context(
+    results: List[Dict], token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> str:
+    """
+    Format search results into readable context
+
+    Args:
+        results: List of search results from Archon
+        token_budget: Maximum number of tokens to inject
+
+    Returns:
+        Formatted context string to append to prompt
+    """
+    context, _, _ = pack_context(results, token_budget)
+    return context
+
+
+# Skip rules compiled into one anchored alternation so a prompt is checked
+# in a single pass. Word boundaries keep "hi" from matching "highlight".
+SKIP_PATTERN = re.compile(
+    r"^(?:/help|/clear|/exit|hello|hi|hey|thanks|thank\s+you)(?![\w-])", re.IGNORECASE
+)
 
 
 def should_enhance_prompt(prompt: str) -> bool:
@@ -176,32 +879,393 @@ def should_enhance_prompt(prompt: str) -> bool:
     if len(prompt) < 10:
         return False
 
-    # Skip for meta commands
-    skip_patterns = [
-        "/help",
-        "/clear",
-        "/exit",
-        "hello",
-        "hi",
-        "hey",
-        "thanks",
-        "thank you"
-    ]
-
-    prompt_lower = prompt.lower().strip()
-    for pattern in skip_patterns:
-        if prompt_lower.startswith(pattern) or prompt_lower == pattern:
-            return False
+    if SKIP_PATTERN.match(prompt.strip()):
+        return False
 
     return True
 
 
-def enhance_prompt(original_prompt: str) -> tuple[str, Optional[str]]:
+class LookupGate:
+    """
+    Predicts whether a knowledge lookup is worth making
+
+    Two signals, both persisted in GATE_STATE_PATH between hook runs:
+    - A negative cache of prompt shapes that recently returned nothing
+    - An online logistic regression over hashed token features, trained
+      on every observed hit/miss
+
+    The classifier only gates lookups after GATE_MIN_OBSERVATIONS outcomes,
+    and a small fraction of predicted misses is looked up anyway so the
+    model keeps learning.
+    """
+
+    def __init__(self, state: Optional[Dict] = None):
+        self._restore(state or {})
+
+    def _restore(self, state: Dict):
+        self.weights: Dict[str, float] = state.get("weights", {})
+        self.bias: float = state.get("bias", 0.0)
+        self.observations: int = state.get("observations", 0)
+        self.negative_cache: Dict[str, float] = state.get("negative_cache", {})
+
+    @staticmethod
+    def _read(path: str) -> Dict:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    @classmethod
+    def load(cls, path: str = GATE_STATE_PATH) -> "LookupGate":
+        return cls(cls._read(path))
+
+    def update(self, prompt: str, hit: bool, path: str = GATE_STATE_PATH):
+        """
+        Record an outcome and save it, under an exclusive lock
+
+        Other hook runs may have saved since this gate was loaded, so the
+        outcome is applied to the state on disk rather than to this copy.
+        """
+        directory, name = os.path.split(path)
+        try:
+            os.makedirs(directory or ".", exist_ok=True)
+            with open(os.path.join(directory, f".{name}.lock"), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._restore(self._read(path))
+                self.record(prompt, hit)
+                self.save(path)
+        except OSError as e:
+            log_debug(f"Cannot update gate state: {e}")
+
+    def save(self, path: str = GATE_STATE_PATH):
+        now = time.time()
+        live = {
+            k: t for k, t in self.negative_cache.items() if now - t < NEGATIVE_CACHE_TTL
+        }
+        newest = sorted(live.items(), key=lambda item: item[1], reverse=True)
+        self.negative_cache = dict(newest[:NEGATIVE_CACHE_SIZE])
+
+        state = {
+            "weights": self.weights,
+            "bias": self.bias,
+            "observations": self.observations,
+            "negative_cache": self.negative_cache,
+        }
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_debug(f"Cannot save gate state: {e}")
+
+    @staticmethod
+    def _tokens(prompt: str) -> List[str]:
+        return TOKEN_PATTERN.findall(prompt.lower())[:GATE_MAX_TOKENS]
+
+    def shape_key(self, prompt: str) -> str:
+        """Order-insensitive fingerprint of the prompt's vocabulary"""
+        tokens = sorted(set(self._tokens(prompt)))
+        return hashlib.sha1(" ".join(tokens).encode()).hexdigest()[:16]
+
+    def _features(self, prompt: str) -> List[str]:
+        features = {f"w:{token}" for token in self._tokens(prompt)}
+        features.add(f"len:{min(len(prompt).bit_length(), 16)}")
+        if prompt.rstrip().endswith("?"):
+            features.add("question")
+        if "```" in prompt or re.search(r"\w\(.*\)", prompt):
+            features.add("code")
+        if re.search(r"[\w.-]+/[\w.-]+\.\w+", prompt):
+            features.add("path")
+        return [str(zlib.crc32(f.encode()) % GATE_FEATURE_BUCKETS) for f in features]
+
+    def predict(self, prompt: str) -> float:
+        """Probability that a lookup for this prompt returns useful results"""
+        z = self.bias + sum(self.weights.get(f, 0.0) for f in self._features(prompt))
+        z = max(min(z, 30.0), -30.0)
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def should_lookup(self, prompt: str) -> bool:
+        """Decide whether to query the knowledge backends for this prompt"""
+        cached_at = self.negative_cache.get(self.shape_key(prompt))
+        if cached_at and time.time() - cached_at < NEGATIVE_CACHE_TTL:
+            log_debug("Skipping lookup: prompt shape is in the negative cache")
+            return False
+
+        if self.observations < GATE_MIN_OBSERVATIONS:
+            return True
+
+        probability = self.predict(prompt)
+        if probability >= GATE_THRESHOLD or random.random() < GATE_EXPLORE_RATE:
+            return True
+
+        log_debug(f"Skipping lookup: predicted hit probability {probability:.2f}")
+        return False
+
+    def record(self, prompt: str, hit: bool):
+        """Update the negative cache and take one SGD step on the outcome"""
+        key = self.shape_key(prompt)
+        if hit:
+            self.negative_cache.pop(key, None)
+        else:
+            self.negative_cache[key] = time.time()
+
+        error = (1.0 if hit else 0.0) - self.predict(prompt)
+        for f in self._features(prompt):
+            weight = self.weights.get(f, 0.0)
+            self.weights[f] = round(
+                weight + GATE_LEARNING_RATE * (error - GATE_L2 * weight), 6
+            )
+        self.bias += GATE_LEARNING_RATE * error
+        self.observations += 1
+
+
+class SessionLedger:
+    """
+    Documents and excerpts already injected into one session
+
+    Injected context stays in the conversation history, so sending the same
+    excerpt again only makes every later turn bigger. The ledger keeps the
+    document keys and excerpt hashes injected so far in one small file per
+    session under SESSION_LEDGER_DIR. Files untouched for SESSION_LEDGER_TTL
+    are removed, and rag-session-prefetch.py forgets a session when it is
+    compacted or cleared, since the earlier context is gone then.
+    """
+
+    def __init__(self, session_id: str, state: Optional[Dict] = None):
+        state = state or {}
+        self.session_id = session_id
+        self.turn: int = state.get("turn", 0)
+        self.documents: Dict[str, int] = state.get("documents", {})
+        self.chunks: Dict[str, int] = state.get("chunks", {})
+        self.repeated = 0  # results referenced instead of injected on this turn
+
+    @staticmethod
+    def path_for(session_id: str, directory: str = SESSION_LEDGER_DIR) -> str:
+        safe = re.sub(r"[^\w-]", "_", session_id)[:128]
+        return os.path.join(directory, f"{safe}.json")
+
+    @classmethod
+    def load(
+        cls, session_id: str, directory: str = SESSION_LEDGER_DIR
+    ) -> "SessionLedger":
+        try:
+            with open(cls.path_for(session_id, directory)) as f:
+                return cls(session_id, json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return cls(session_id)
+
+    def save(self, directory: str = SESSION_LEDGER_DIR):
+        state = {"turn": self.turn, "documents": self.documents, "chunks": self.chunks}
+        path = self.path_for(self.session_id, directory)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+            self._prune(directory)
+        except OSError as e:
+            log_debug(f"Cannot save session ledger: {e}")
+
+    @staticmethod
+    def _prune(directory: str):
+        cutoff = time.time() - SESSION_LEDGER_TTL
+        for entry in os.scandir(directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+    @classmethod
+    def forget(cls, session_id: str, directory: str = SESSION_LEDGER_DIR):
+        """Drop a session's history, e.g. after its context was compacted"""
+        try:
+            os.unlink(cls.path_for(session_id, directory))
+        except OSError:
+            pass
+
+    @staticmethod
+    def chunk_hash(result: Dict) -> str:
+        """Whitespace- and case-insensitive hash of a result's excerpt"""
+        text = " ".join(_result_text(result).lower().split())
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    def split(self, results: List[Dict]) -> tuple[List[Dict], List[Dict]]:
+        """
+        Separate new material from excerpts this session already has
+
+        A new excerpt from a document injected before still counts as new.
+
+        Returns:
+            Tuple of (new results, repeated results)
+        """
+        new, repeats = [], []
+        for result in results:
+            (repeats if self.chunk_hash(result) in self.chunks else new).append(result)
+        self.repeated = len(repeats)
+        return new, repeats
+
+    def record(self, results: List[Dict]):
+        """Remember results injected in full on this turn"""
+        self.turn += 1
+        for result in results:
+            self.chunks.setdefault(self.chunk_hash(result), self.turn)
+            self.documents.setdefault(_result_key(result), self.turn)
+
+
+ERROR_LINE_PATTERN = re.compile(
+    r"^.*\b(?:\w*Error|\w*Exception|Traceback|FAILED|FATAL|panic|fatal|error)\b.*$",
+    re.MULTILINE,
+)
+PATH_PATTERN = re.compile(
+    r"(?:[\w.-]+/)*[\w.-]+\.(?:py|js|jsx|ts|tsx|go|rs|java|rb|php|c|cc|cpp|h|hpp"
+    r"|cs|kt|swift|json|ya?ml|toml|md)\b"
+)
+IDENTIFIER_PATTERN = re.compile(
+    r"\b(?:[A-Z][a-z0-9]+(?:[A-Z][a-z0-9]+)+|[a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b"
+)
+LOG_LINE_PATTERN = re.compile(
+    r"^\s*(?:at |File \"|\[?\d{4}-\d\d-\d\d|\d+[:|]|[#>|$]|\w+\.\w+\(|\.\.\.)"
+)
+VOLATILE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\b\d+\b")
+
+
+def read_hook_input(stream=None, max_bytes: int = MAX_INPUT_BYTES) -> Optional[Dict]:
+    """
+    Read the hook's JSON input from stdin in bounded chunks
+
+    Args:
+        stream: Binary stream to read (defaults to stdin)
+        max_bytes: Largest input that is parsed
+
+    Returns:
+        Parsed input, or None if the input exceeded max_bytes. Oversized
+        input is still drained so the writer never sees a broken pipe.
+    """
+    stream = stream or sys.stdin.buffer
+    chunks = []
+    total = 0
+
+    while True:
+        chunk = stream.read(STDIN_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total <= max_bytes:
+            chunks.append(chunk)
+        elif chunks:
+            chunks = []
+            log_debug(f"Input exceeds {max_bytes} bytes, passing through")
+
+    if total > max_bytes:
+        return None
+
+    return json.loads(b"".join(chunks))
+
+
+def _question_lines(text: str) -> List[str]:
+    """Lines that read like the user talking rather than pasted output"""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if (
+            len(line) < 8
+            or LOG_LINE_PATTERN.match(line)
+            or ERROR_LINE_PATTERN.match(line)
+        ):
+            continue
+        if sum(c.isalpha() or c.isspace() for c in line) < 0.8 * len(line):
+            continue
+        lines.append(line)
+    return lines
+
+
+def extract_salient_spans(prompt: str) -> Dict[str, List[str]]:
+    """
+    Pull the parts of a large prompt worth searching for
+
+    Only the head and tail of the prompt are scanned, so the cost is bounded
+    no matter how much was pasted in between.
+
+    Returns:
+        Dict with "question", "errors", "paths" and "identifiers" lists
+    """
+    if len(prompt) > 2 * SCAN_WINDOW_CHARS:
+        head, tail = prompt[:SCAN_WINDOW_CHARS], prompt[-SCAN_WINDOW_CHARS:]
+        # Drop the lines cut in half by the window edges
+        head = head[: head.rfind("\n") + 1] or head
+        tail = tail[tail.find("\n") + 1 :] or tail
+    else:
+        head, tail = prompt, ""
+
+    # The question is usually typed before or after the paste
+    question = _question_lines(head)[:2] + _question_lines(tail)[-2:]
+    asked = [line for line in question if line.endswith("?")]
+
+    errors: List[str] = []
+    seen = set()
+    for match in ERROR_LINE_PATTERN.finditer(f"{head}\n{tail}"):
+        line = match.group(0).strip()[:200]
+        key = VOLATILE_PATTERN.sub("N", line)
+        if key not in seen:
+            seen.add(key)
+            errors.append(line)
+
+    window = f"{head}\n{tail}"
+    paths = list(dict.fromkeys(PATH_PATTERN.findall(window)))
+    counts: Dict[str, int] = {}
+    for name in IDENTIFIER_PATTERN.findall(window):
+        counts[name] = counts.get(name, 0) + 1
+    identifiers = sorted(counts, key=counts.get, reverse=True)
+
+    return {
+        "question": list(dict.fromkeys(asked or question)),
+        "errors": errors[-3:],  # the last errors are usually the root cause
+        "paths": paths[:5],
+        "identifiers": identifiers[:8],
+    }
+
+
+def build_queries(prompt: str) -> List[str]:
+    """
+    Turn a prompt into one or more compact search queries
+
+    Short prompts are searched as-is. Large ones become up to
+    MAX_SUB_QUERIES short queries: the user's question, the most relevant
+    error line, and the paths and identifiers mentioned.
+    """
+    prompt = prompt.strip()
+    if len(prompt) <= MAX_QUERY_CHARS:
+        return [prompt]
+
+    spans = extract_salient_spans(prompt)
+    queries = []
+    if spans["question"]:
+        queries.append(" ".join(spans["question"]))
+    if spans["errors"]:
+        queries.append(spans["errors"][-1])
+    if spans["paths"] or spans["identifiers"]:
+        queries.append(" ".join(spans["paths"][:3] + spans["identifiers"][:5]))
+
+    if not queries:
+        queries.append(prompt[:MAX_QUERY_CHARS])
+
+    return [q[:MAX_QUERY_CHARS] for q in queries[:MAX_SUB_QUERIES]]
+
+
+def enhance_prompt(
+    original_prompt: str, session_id: Optional[str] = None
+) -> tuple[str, Optional[str]]:
     """
     Add relevant context to user prompt
 
     Args:
         original_prompt: Original user prompt
+        session_id: Session the prompt belongs to; enables session de-duplication
 
     Returns:
         Tuple of (enhanced_prompt, status_message)
@@ -211,38 +1275,94 @@ def enhance_prompt(original_prompt: str) -> tuple[str, Optional[str]]:
         log_debug("Skipping enhancement for short/meta prompt")
         return original_prompt, None
 
-    # Search for relevant knowledge
-    results = search_knowledge(original_prompt)
+    queries = build_queries(original_prompt)
+    query_text = "\n".join(queries)
+    log_debug(f"Searching with {len(queries)} query(ies), {len(query_text)} chars")
+
+    results = lookup_cached_results(queries) if ENABLE_RESULT_CACHE else []
+    if results:
+        log_debug(f"Answered from cache with {len(results)} result(s)")
+    else:
+        gate = LookupGate.load() if ENABLE_LOOKUP_GATE else None
+        if gate and not gate.should_lookup(query_text):
+            return original_prompt, None
+
+        # Search for relevant knowledge; backends run on worker threads, so the
+        # wait is timed here, on the thread that owns the telemetry span
+        with phase("network"):
+            results = search_queries(queries)
+
+        if results is None:
+            # An outage says nothing about whether this prompt shape has answers
+            log_debug("No knowledge backend answered")
+            results = []
+        else:
+            if gate:
+                gate.update(query_text, bool(results))
+            if ENABLE_RESULT_CACHE:
+                store_results([(query_text, results)])
 
     if not results:
         log_debug("No relevant context found")
         return original_prompt, None
 
-    # Format and append context
-    context = format_context(results)
-    enhanced = original_prompt + "\n" + context
+    # Pack and append context
+    ledger = (
+        SessionLedger.load(session_id) if ENABLE_SESSION_DEDUP and session_id else None
+    )
+    context, documents, tokens = pack_context(results, ledger=ledger)
+    if not context:
+        log_debug("No new context to inject")
+        return original_prompt, None
+    if ledger:
+        ledger.save()
 
-    status_msg = f"✨ Added {len(results)} relevant document(s) from knowledge base"
+    enhanced = original_prompt + "\n\n" + context
+    repeated = ledger.repeated if ledger else 0
+    log_debug(
+        f"Injected {documents} document(s), referenced {repeated}, ~{tokens} tokens"
+    )
+
+    status_msg = (
+        f"✨ Added {documents} relevant document(s) from knowledge base "
+        f"(~{tokens} tokens)"
+    )
+    if repeated and documents:
+        status_msg = (
+            f"✨ Added {documents} relevant document(s) from knowledge base, "
+            f"{repeated} already in this session (~{tokens} tokens)"
+        )
+    elif repeated:
+        status_msg = (
+            f"✨ Referenced {repeated} document(s) already in this session "
+            f"(~{tokens} tokens)"
+        )
 
     return enhanced, status_msg
 
 
+@profiled("rag-prompt-enhance")
 def main():
     """Main hook execution"""
     try:
         # Read hook input
-        input_data = json.loads(sys.stdin.read())
+        input_data = read_hook_input()
+        if input_data is None:
+            # Too large to enhance; leave the prompt untouched
+            print(json.dumps({}))
+            sys.exit(0)
+
         prompt = input_data.get("prompt", "")
 
         log_debug(f"Processing prompt: {prompt[:50]}...")
 
         # Enhance prompt with RAG
-        enhanced_prompt, status_message = enhance_prompt(prompt)
+        enhanced_prompt, status_message = enhance_prompt(
+            prompt, input_data.get("session_id")
+        )
 
         # Prepare response
-        result = {
-            "prompt": enhanced_prompt
-        }
+        result = {"prompt": enhanced_prompt}
 
         if status_message:
             result["message"] = status_message
@@ -251,10 +1371,10 @@ def main():
         print(json.dumps(result))
         sys.exit(0)
 
-    except json.JSONDecodeError:
+    except ValueError:
         log_debug("Invalid JSON input")
-        # Return original input on error
-        print(json.dumps({"prompt": sys.stdin.read()}))
+        # stdin is already consumed; leave the prompt untouched
+        print(json.dumps({}))
         sys.exit(0)
 
     except Exception as e:
@@ -264,5 +1384,5 @@ def main():
         sys.exit(0)
 
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+RAG Session Prefetch Hook for Claude Code + Archon Integration
+
+Warms the RAG prompt hook's result cache at session start, so the first
+prompt of a session is answered from local data instead of waiting on
+Archon. Likely queries are derived from:
+
+- The current branch name (feature/user-auth-refresh -> "user auth refresh")
+- Recently changed files (uncommitted and in the last few commits)
+- Recent commit subjects
+
+The lookups run in a detached background process; the hook itself returns
+immediately so session start is not delayed.
+
+When a session starts because its context was compacted or cleared, the
+prompt hook's record of what it already injected into that session is
+dropped, so documents are injected in full again instead of being
+referenced.
+
+Setup:
+1. Install rag-prompt-enhance.py first (this hook reuses its search code)
+2. Copy this file to .claude/hooks/rag-session-prefetch.py
+3. Enable in .claude/settings.json next to the session-start hook:
+   {
+     "hooks": {
+       "sessionStart": {
+         "command": ".claude/hooks/rag-session-prefetch.py",
+         "enabled": true
+       }
+     }
+   }
+
+Author: Claude Code Community
+License: MIT
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+# Configuration
+RAG_HOOK_PATH = Path(__file__).parent / "rag-prompt-enhance.py"
+MAX_PREFETCH_QUERIES = 6
+RECENT_COMMITS = 5
+MAX_CHANGED_FILES = 3
+GIT_TIMEOUT = 3  # seconds
+
+# Branch name words that say nothing about the work itself
+GENERIC_BRANCH_WORDS = {
+    "feature",
+    "feat",
+    "fix",
+    "bugfix",
+    "hotfix",
+    "chore",
+    "refactor",
+    "release",
+    "main",
+    "master",
+    "develop",
+    "dev",
+    "wip",
+    "head",
+    "docs",
+    "test",
+    "tests",
+}
+CONVENTIONAL_PREFIX = re.compile(r"^\w+(?:\([^)]*\))?!?:\s*")
+
+
+def log_debug(message: str):
+    """Log debug messages to stderr"""
+    if os.environ.get("RAG_PREFETCH_VERBOSE"):
+        print(f"[RAG Prefetch] {message}", file=sys.stderr)
+
+
+def git(*args: str) -> List[str]:
+    """Run a git command and return its non-empty output lines"""
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            timeout=GIT_TIMEOUT,
+            check=True,
+        )
+        return [line for line in result.stdout.splitlines() if line.strip()]
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+
+def branch_query() -> List[str]:
+    """Query from the meaningful words of the current branch name"""
+    branch = git("rev-parse", "--abbrev-ref", "HEAD")
+    if not branch:
+        return []
+
+    words = [
+        w
+        for w in re.split(r"[/_\-.]+", branch[0].lower())
+        if w and not w.isdigit() and w not in GENERIC_BRANCH_WORDS
+    ]
+    return [" ".join(words)] if words else []
+
+
+def changed_file_queries() -> List[str]:
+    """Queries from the most recently changed files: "<name> <directory>" """
+    paths = [line[3:].split(" -> ")[-1] for line in git("status", "--porcelain")]
+    paths += git("log", f"-{RECENT_COMMITS}", "--name-only", "--format=")
+
+    queries = []
+    for path in dict.fromkeys(paths):
+        path = path.strip('"')
+        if path.endswith("/") or path.startswith("."):
+            continue
+        p = Path(path)
+        words = re.split(r"[_\-.]+", p.stem) + (
+            [p.parent.name] if p.parent.name else []
+        )
+        query = " ".join(w for w in words if len(w) > 2)
+        if query and query not in queries:
+            queries.append(query)
+        if len(queries) >= MAX_CHANGED_FILES:
+            break
+    return queries
+
+
+def commit_subject_queries() -> List[str]:
+    """Queries from recent commit subjects, minus conventional-commit prefixes"""
+    subjects = git("log", f"-{RECENT_COMMITS}", "--format=%s")
+    return [
+        CONVENTIONAL_PREFIX.sub("", s) for s in subjects if not s.startswith("Merge ")
+    ]
+
+
+def derive_queries() -> List[str]:
+    """Likely first-prompt topics for this checkout, most specific first"""
+    queries = branch_query() + changed_file_queries() + commit_subject_queries()
+    return list(dict.fromkeys(q for q in queries if q))[:MAX_PREFETCH_QUERIES]
+
+
+def load_rag_hook():
+    """Import rag-prompt-enhance.py (its filename has dashes)"""
+    spec = importlib.util.spec_from_file_location("rag_prompt_enhance", RAG_HOOK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _prefetch(rag, queries: List[str]) -> List[tuple]:
+    ranked = await asyncio.gather(*(rag._fan_out(q, rag.MAX_RESULTS) for q in queries))
+    return list(zip(queries, ranked))
+
+
+def prefetch(queries: List[str]) -> int:
+    """
+    Search for every query and store the results in the RAG hook's cache
+
+    Returns:
+        Number of queries that returned results
+    """
+    rag = load_rag_hook()
+    items = asyncio.run(_prefetch(rag, queries))
+    rag.store_results(items)
+    return sum(1 for _, results in items if results)
+
+
+def main():
+    """Main hook execution"""
+    if "--worker" in sys.argv:
+        if "--forget" in sys.argv:
+            session_id = sys.argv[sys.argv.index("--forget") + 1]
+            load_rag_hook().SessionLedger.forget(session_id)
+            log_debug(f"Forgot injected context for session {session_id}")
+        queries = derive_queries()
+        log_debug(f"Prefetching {len(queries)} queries: {queries}")
+        if queries:
+            warmed = prefetch(queries)
+            log_debug(f"Cached results for {warmed} queries")
+        return
+
+    worker = [sys.executable, __file__, "--worker"]
+    try:
+        input_data = json.loads(sys.stdin.read() or "{}")
+    except (OSError, ValueError):
+        input_data = {}
+    if (
+        isinstance(input_data, dict)
+        and input_data.get("source") in ("compact", "clear")
+        and input_data.get("session_id")
+    ):
+        worker += ["--forget", str(input_data["session_id"])]
+
+    try:
+        subprocess.Popen(
+            worker,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=None
+            if os.environ.get("RAG_PREFETCH_VERBOSE")
+            else subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        log_debug(f"Cannot start prefetch worker: {e}")
+
+    print(json.dumps({}))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
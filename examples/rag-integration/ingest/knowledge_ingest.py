@@ -0,0 +1,918 @@
+#!/usr/bin/env python3
+"""
+Bulk Knowledge Base Ingestion
+
+Streams a large documentation set into Archon instead of submitting sources
+one at a time. The stages are chained generators, so memory stays flat no
+matter how many pages there are:
+
+    walk sources -> parse + chunk (process pool) -> de-duplicate by source
+    and content hash -> size-bounded batches -> upload (pooled keep-alive
+    connections)
+
+Every stage is bounded: only a fixed number of documents are in the parse
+pool, and only a fixed number of batches wait for an upload slot, so a slow
+server throttles the walk instead of piling up chunks in memory.
+
+Progress is resumable. The state file records each finished source with its
+signature (mtime and size, or ETag / Last-Modified for URLs) and the id of
+every chunk the server has acknowledged. Chunk ids hash the source together
+with the content, so a passage that appears in several documents is stored
+once per document and every copy keeps its own source metadata. A re-run
+skips unchanged sources before parsing them and never re-uploads an
+acknowledged chunk, so an interrupted run picks up where it stopped and a
+nightly run only sends what changed.
+
+Sources:
+    - Files and directories (.md, .mdx, .markdown, .txt, .rst, .html, .htm)
+    - URLs, given directly or listed one per line with --urls FILE; a URL
+      ending in sitemap.xml is expanded to the pages it lists
+
+Usage:
+    python3 knowledge_ingest.py docs/ handbook/ --source internal-docs
+    python3 knowledge_ingest.py --urls pages.txt --uploaders 8
+    python3 knowledge_ingest.py docs/ --dry-run          # parse and count only
+    python3 knowledge_ingest.py docs/ --reset            # forget saved progress
+
+Configuration (environment):
+    ARCHON_API_BASE      default http://localhost:8181/api
+    ARCHON_INGEST_PATH   batch endpoint under the API base (default /knowledge/ingest)
+
+Stock Archon has no batch chunk endpoint: its ingestion endpoints are
+/api/sources/file (one uploaded file) and /api/sources/website (a crawl).
+This pipeline needs a custom endpoint in front of Archon's storage that
+accepts POST {"source": NAME, "chunks": [{"id", "content", "metadata"}]},
+treats a re-sent id as an update, and answers 413 to oversized batches.
+benchmarks/archon_stub.py implements that contract.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuration
+ARCHON_API_BASE = os.environ.get("ARCHON_API_BASE", "http://localhost:8181/api")
+INGEST_PATH = os.environ.get("ARCHON_INGEST_PATH", "/knowledge/ingest")
+STATE_PATH = Path(".claude/knowledge/ingest-state.json")
+INCLUDE_SUFFIXES = {".md", ".mdx", ".markdown", ".txt", ".rst", ".html", ".htm"}
+SKIP_DIRS = {
+    ".git",
+    "node_modules",
+    ".venv",
+    "venv",
+    "__pycache__",
+    "dist",
+    "build",
+    ".claude",
+}
+CHUNK_CHARS = 1500  # Target chunk size
+CHUNK_OVERLAP = 200  # Trailing context repeated at the start of the next chunk
+BATCH_BYTES = 1024 * 1024  # Upload batch limit (JSON-encoded chunk bytes)
+BATCH_CHUNKS = 256  # Upload batch limit (chunk count)
+UPLOADERS = 4  # Concurrent upload connections
+FETCHERS = 8  # Concurrent URL fetches
+MAX_RETRIES = 5  # Per batch, with exponential backoff
+REQUEST_TIMEOUT = 60
+SAVE_INTERVAL = 5.0  # Seconds between state checkpoints
+HASH_HEX = 16  # Chunk ids: first 64 bits of the source + content hash
+STATE_VERSION = 2  # 1 keyed acknowledged chunks on content alone
+
+
+@dataclass
+class SourceDoc:
+    """One document to ingest: a local file, or a fetched URL with its content"""
+
+    id: str
+    signature: str
+    path: Optional[str] = None
+    content: Optional[bytes] = None
+    kind: str = "text"
+
+
+@dataclass
+class Batch:
+    chunks: List[Dict]
+    size: int
+
+
+@dataclass
+class IngestStats:
+    sources_seen: int = 0
+    sources_skipped: int = 0
+    sources_parsed: int = 0
+    sources_failed: int = 0
+    chunks_total: int = 0
+    chunks_duplicate: int = 0
+    chunks_uploaded: int = 0
+    batches_uploaded: int = 0
+    batches_failed: int = 0
+    bytes_uploaded: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def line(self) -> str:
+        rate = self.sources_parsed / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.sources_parsed} parsed, {self.sources_skipped} unchanged, "
+            f"{self.chunks_uploaded}/{self.chunks_total - self.chunks_duplicate} "
+            "chunks uploaded "
+            f"({self.chunks_duplicate} dup), {self.bytes_uploaded / 1e6:.1f} MB, "
+            f"{rate:.0f} docs/s"
+        )
+
+
+class IngestState:
+    """Resumable progress: finished sources and acknowledged chunk ids.
+
+    A source is finished once every new chunk it produced has been
+    acknowledged. Chunks are tracked separately, so a source cut off halfway
+    only re-sends the chunks that never made it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sources: Dict[str, str] = {}
+        self.uploaded: Set[str] = set()
+        self._pending: Dict[str, int] = {}
+        self._streamed: Set[str] = set()
+        self._signatures: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self._dirty = False
+
+    def load(self) -> "IngestState":
+        try:
+            data = json.loads(self.path.read_text())
+            self.sources = dict(data.get("sources", {}))
+            if data.get("version") == STATE_VERSION:
+                self.uploaded = set(data.get("uploaded", []))
+        except (OSError, ValueError):
+            pass
+        return self
+
+    def save(self):
+        with self.lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": STATE_VERSION,
+                "sources": self.sources,
+                "uploaded": sorted(self.uploaded),
+            }
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp, self.path)
+
+    def unchanged(self, doc: SourceDoc) -> bool:
+        return self.sources.get(doc.id) == doc.signature
+
+    def admit(
+        self, doc: SourceDoc, chunks: List[Dict], queued: Dict[str, Dict]
+    ) -> Tuple[List[Dict], int]:
+        """Register a parsed source; return its chunks that still need uploading.
+
+        Chunks already acknowledged are dropped. Chunk ids include the source,
+        so a chunk already queued is a passage this source repeats (or a
+        source listed twice): it is uploaded once, and every source waiting
+        on it is finished by the same acknowledgement. Returns (fresh chunks,
+        duplicate count).
+        """
+        fresh: List[Dict] = []
+        duplicates = 0
+        with self.lock:
+            waiting = 0
+            for chunk in chunks:
+                if chunk["id"] in self.uploaded:
+                    duplicates += 1
+                elif chunk["id"] in queued:
+                    duplicates += 1
+                    sources = queued[chunk["id"]]["_sources"]
+                    if doc.id not in sources:
+                        sources.append(doc.id)
+                        waiting += 1
+                else:
+                    chunk["_sources"] = [doc.id]
+                    queued[chunk["id"]] = chunk
+                    fresh.append(chunk)
+            self._pending[doc.id] = self._pending.get(doc.id, 0) + len(fresh) + waiting
+            self._signatures[doc.id] = doc.signature
+            self._streamed.add(doc.id)
+            self._finish_if_done(doc.id)
+        return fresh, duplicates
+
+    def acknowledge(self, chunks: List[Dict]):
+        """Record chunks the server accepted"""
+        with self.lock:
+            for chunk in chunks:
+                self.uploaded.add(chunk["id"])
+                for source_id in chunk["_sources"]:
+                    self._pending[source_id] -= 1
+                    self._finish_if_done(source_id)
+            self._dirty = True
+
+    def _finish_if_done(self, source_id: str):
+        if source_id in self._streamed and self._pending.get(source_id, 0) <= 0:
+            self.sources[source_id] = self._signatures[source_id]
+            self._pending.pop(source_id, None)
+            self._streamed.discard(source_id)
+            self._dirty = True
+
+
+# ---------------------------------------------------------------------------
+# Stage 1: walk sources
+# ---------------------------------------------------------------------------
+
+
+def kind_of(name: str, content_type: str = "") -> str:
+    suffix = Path(urllib.parse.urlparse(name).path).suffix.lower()
+    if "html" in content_type or suffix in (".html", ".htm"):
+        return "html"
+    if suffix in (".md", ".mdx", ".markdown"):
+        return "markdown"
+    return "text"
+
+
+def walk_files(paths: Iterable[str]) -> Iterator[SourceDoc]:
+    """Yield every supported file under the given paths, lazily"""
+    for raw in paths:
+        root = Path(raw)
+        if root.is_file():
+            candidates: Iterable[Path] = [root]
+        elif root.is_dir():
+            candidates = _walk_dir(root)
+        else:
+            print(f"⚠️  Skipping missing path: {raw}", file=sys.stderr)
+            continue
+        for path in candidates:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            yield SourceDoc(
+                id=str(path.resolve()),
+                signature=f"{st.st_mtime_ns}:{st.st_size}",
+                path=str(path),
+                kind=kind_of(path.name),
+            )
+
+
+def _walk_dir(root: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if Path(name).suffix.lower() in INCLUDE_SUFFIXES:
+                yield Path(dirpath) / name
+
+
+def expand_urls(urls: Iterable[str], session: requests.Session) -> Iterator[str]:
+    """Pass page URLs through; replace sitemaps with the pages they list"""
+    for url in urls:
+        if not url.rstrip("/").endswith("sitemap.xml"):
+            yield url
+            continue
+        try:
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            tree = ET.fromstring(response.content)
+        except (requests.RequestException, ET.ParseError) as e:
+            print(f"⚠️  Could not read sitemap {url}: {e}", file=sys.stderr)
+            continue
+        for loc in tree.iter():
+            if loc.tag.endswith("loc") and loc.text:
+                yield from expand_urls([loc.text.strip()], session)
+
+
+def fetch_urls(
+    urls: Iterable[str],
+    session: requests.Session,
+    state: IngestState,
+    stats: IngestStats,
+    workers: int = FETCHERS,
+) -> Iterator[SourceDoc]:
+    """Fetch pages concurrently, at most `workers * 2` in flight.
+
+    Pages already ingested are requested conditionally, so an unchanged page
+    costs a 304 instead of a download and a re-parse.
+    """
+
+    def fetch(url: str) -> Optional[SourceDoc]:
+        headers = {}
+        previous = state.sources.get(url, "")
+        if previous.startswith("etag:"):
+            headers["If-None-Match"] = previous[5:]
+        elif previous.startswith("modified:"):
+            headers["If-Modified-Since"] = previous[9:]
+        try:
+            response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"⚠️  Fetch failed {url}: {e}", file=sys.stderr)
+            stats.sources_failed += 1
+            return None
+        if response.status_code == 304:
+            return SourceDoc(id=url, signature=previous)
+        if response.status_code >= 400:
+            print(
+                f"⚠️  Fetch failed {url}: HTTP {response.status_code}", file=sys.stderr
+            )
+            stats.sources_failed += 1
+            return None
+        if response.headers.get("ETag"):
+            signature = "etag:" + response.headers["ETag"]
+        elif response.headers.get("Last-Modified"):
+            signature = "modified:" + response.headers["Last-Modified"]
+        else:
+            signature = "sha256:" + hashlib.sha256(response.content).hexdigest()
+        return SourceDoc(
+            id=url,
+            signature=signature,
+            content=response.content,
+            kind=kind_of(url, response.headers.get("Content-Type", "")),
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from _bounded(pool, fetch, urls, workers * 2)
+
+
+def _bounded(pool, fn, items: Iterable, limit: int) -> Iterator:
+    """Like pool.map, but pulls from `items` only as results drain.
+
+    Executor.map submits the whole iterable up front, which for a generator
+    of 20k documents means 20k queued futures and their payloads in memory.
+    This keeps at most `limit` in flight, which is what gives the pipeline
+    its backpressure.
+    """
+    iterator = iter(items)
+    in_flight = set()
+    exhausted = False
+    while True:
+        while not exhausted and len(in_flight) < limit:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            in_flight.add(pool.submit(fn, item))
+        if not in_flight:
+            return
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if result is not None:
+                yield result
+
+
+# ---------------------------------------------------------------------------
+# Stage 2: parse and chunk (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+
+class _HtmlText(HTMLParser):
+    """HTML to markdown-ish text: headings become '#' lines, blocks become paragraphs"""
+
+    BLOCKS = {"p", "div", "li", "pre", "tr", "section", "article", "blockquote", "br"}
+    SKIP = {"script", "style", "nav", "footer", "header", "noscript", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif re.fullmatch(r"h[1-6]", tag):
+            self.parts.append("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag in self.BLOCKS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCKS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data.strip()
+        elif not self._skip:
+            self.parts.append(data)
+
+
+def _text_of(
+    path: Optional[str], content: Optional[bytes], kind: str
+) -> Tuple[str, str]:
+    """(title, text) for a document"""
+    raw = content if content is not None else Path(path).read_bytes()
+    text = raw.decode("utf-8", errors="replace")
+    if kind == "html":
+        parser = _HtmlText()
+        parser.feed(text)
+        text = re.sub(r"[ \t]+", " ", "".join(parser.parts))
+        return parser.title, text
+    title = ""
+    match = re.search(r"^#\s+(.+)$", text, re.MULTILINE)
+    if match:
+        title = match.group(1).strip()
+    return title, text
+
+
+def _blocks(text: str) -> Iterator[Tuple[List[str], str]]:
+    """Yield (heading path, paragraph) pairs; fenced code stays in one block"""
+    headings: List[str] = []
+    lines: List[str] = []
+    in_fence = False
+
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        heading = None if in_fence else re.match(r"^(#{1,6})\s+(.*)$", line)
+        if heading or (not in_fence and not line.strip()):
+            paragraph = "\n".join(lines).strip()
+            if paragraph:
+                yield headings, paragraph
+            lines = []
+            if heading:
+                level = len(heading.group(1))
+                headings = headings[: level - 1] + [heading.group(2).strip()]
+            continue
+        lines.append(line)
+    paragraph = "\n".join(lines).strip()
+    if paragraph:
+        yield headings, paragraph
+
+
+def chunk_text(
+    text: str, chunk_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP
+) -> List[Tuple[str, str]]:
+    """Split text into (section, chunk) pairs of about `chunk_chars` characters.
+
+    Chunks never straddle a heading, so each carries the section it came
+    from. Paragraphs are packed whole where they fit; the tail of the
+    previous chunk (up to `overlap` characters) is repeated at the start of
+    the next so a sentence split across chunks is still retrievable.
+    """
+    chunks: List[Tuple[str, str]] = []
+    section = ""
+    carry = ""
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal carry, current, size
+        if current:
+            body = "\n\n".join(([carry] if carry else []) + current)
+            chunks.append((section, body))
+            tail = body[-overlap:] if overlap else ""
+            carry = tail[tail.find(" ") + 1 :] if " " in tail else tail
+        current, size = [], len(carry)
+
+    for headings, paragraph in _blocks(text):
+        path = " > ".join(headings)
+        if path != section:
+            flush()
+            section, carry, size = path, "", 0
+        while (
+            size + len(paragraph) > chunk_chars and len(paragraph) > chunk_chars - size
+        ):
+            if current:
+                flush()
+                continue
+            room = max(chunk_chars - size, chunk_chars // 2)
+            cut = paragraph.rfind(" ", 0, room)
+            cut = cut if cut > room // 2 else room
+            current.append(paragraph[:cut])
+            flush()
+            paragraph = paragraph[cut:].lstrip()
+        if size + len(paragraph) > chunk_chars:
+            flush()
+        if paragraph:
+            current.append(paragraph)
+            size += len(paragraph) + 2
+    flush()
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    """Hash of whitespace-normalized content"""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode()).hexdigest()[:HASH_HEX]
+
+
+def chunk_id(source_id: str, text: str) -> str:
+    """Chunk id: hash of the source and the chunk's content hash"""
+    return hashlib.sha256(f"{source_id}\0{content_hash(text)}".encode()).hexdigest()[
+        :HASH_HEX
+    ]
+
+
+def parse_document(
+    doc: SourceDoc, chunk_chars: int, overlap: int
+) -> Tuple[SourceDoc, List[Dict], Optional[str]]:
+    """Worker entry point: read, parse and chunk one document"""
+    try:
+        title, text = _text_of(doc.path, doc.content, doc.kind)
+    except (OSError, ValueError) as e:
+        return doc, [], str(e)
+    chunks = []
+    for index, (section, body) in enumerate(chunk_text(text, chunk_chars, overlap)):
+        chunks.append(
+            {
+                "id": chunk_id(doc.id, body),
+                "content": body,
+                "metadata": {
+                    "source": doc.path or doc.id,
+                    "content_hash": content_hash(body),
+                    "title": title or Path(urllib.parse.urlparse(doc.id).path).stem,
+                    "section": section,
+                    "chunk_index": index,
+                },
+            }
+        )
+    doc.content = None  # Don't ship the page back across the process boundary
+    return doc, chunks, None
+
+
+def _parse_job(args):
+    return parse_document(*args)
+
+
+def parse_stream(
+    docs: Iterable[SourceDoc], workers: int, chunk_chars: int, overlap: int
+) -> Iterator[Tuple[SourceDoc, List[Dict], Optional[str]]]:
+    """Parse documents on a process pool, a bounded number at a time"""
+    jobs = ((doc, chunk_chars, overlap) for doc in docs)
+    if workers <= 1:
+        yield from map(_parse_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _bounded(pool, _parse_job, jobs, workers * 4)
+
+
+# ---------------------------------------------------------------------------
+# Stage 3 and 4: de-duplicate and batch
+# ---------------------------------------------------------------------------
+
+
+def dedupe(
+    parsed: Iterable[Tuple[SourceDoc, List[Dict], Optional[str]]],
+    state: IngestState,
+    stats: IngestStats,
+) -> Iterator[Dict]:
+    """Drop chunks already uploaded or already queued in this run.
+
+    A passage repeated within a source is uploaded once for it; passages
+    shared by several sources are uploaded once per source.
+    """
+    queued: Dict[str, Dict] = {}
+    for doc, chunks, error in parsed:
+        if error:
+            print(f"⚠️  Could not parse {doc.path or doc.id}: {error}", file=sys.stderr)
+            stats.sources_failed += 1
+            continue
+        stats.sources_parsed += 1
+        stats.chunks_total += len(chunks)
+        fresh, duplicates = state.admit(doc, chunks, queued)
+        stats.chunks_duplicate += duplicates
+        yield from fresh
+        # Acknowledged chunks are in state.uploaded; drop them from the local index
+        if len(queued) > 50_000:
+            with state.lock:
+                for key in [k for k in queued if k in state.uploaded]:
+                    del queued[key]
+
+
+def batches(
+    chunks: Iterable[Dict], max_bytes: int = BATCH_BYTES, max_chunks: int = BATCH_CHUNKS
+) -> Iterator[Batch]:
+    """Group chunks into batches under both the byte and the count limit"""
+    current: List[Dict] = []
+    size = 0
+    for chunk in chunks:
+        # Content plus metadata overhead
+        chunk_size = len(chunk["content"].encode()) + 200
+        if current and (size + chunk_size > max_bytes or len(current) >= max_chunks):
+            yield Batch(current, size)
+            current, size = [], 0
+        current.append(chunk)
+        size += chunk_size
+    if current:
+        yield Batch(current, size)
+
+
+# ---------------------------------------------------------------------------
+# Stage 5: upload
+# ---------------------------------------------------------------------------
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """A session whose connection pool covers every uploader and fetcher thread"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Uploader:
+    """Upload threads fed by a bounded queue.
+
+    put() blocks while the queue is full, which is what stops the parse
+    stage from racing ahead of a slow server.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        source: str,
+        state: IngestState,
+        stats: IngestStats,
+        workers: int = UPLOADERS,
+    ):
+        self.session = session
+        self.url = url
+        self.source = source
+        self.state = state
+        self.stats = stats
+        self.queue: "queue.Queue[Optional[Batch]]" = queue.Queue(maxsize=workers * 2)
+        self.threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers)
+        ]
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Uploader":
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def put(self, batch: Batch):
+        self.queue.put(batch)
+
+    def _run(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            ok = self._send(batch)
+            with self._lock:
+                if ok:
+                    self.stats.batches_uploaded += 1
+                    self.stats.chunks_uploaded += len(batch.chunks)
+                    self.stats.bytes_uploaded += batch.size
+                else:
+                    self.stats.batches_failed += 1
+            if ok:
+                self.state.acknowledge(batch.chunks)
+
+    def _send(self, batch: Batch) -> bool:
+        payload = {
+            "source": self.source,
+            "chunks": [
+                {k: v for k, v in c.items() if not k.startswith("_")}
+                for c in batch.chunks
+            ],
+        }
+        delay = 1.0
+        for attempt in range(MAX_RETRIES):
+            try:
+                response = self.session.post(
+                    self.url, json=payload, timeout=REQUEST_TIMEOUT
+                )
+                if response.status_code < 300:
+                    return True
+                if response.status_code == 413 and len(batch.chunks) > 1:
+                    # Server limit below ours: split and send the halves
+                    half = len(batch.chunks) // 2
+                    first, second = batch.chunks[:half], batch.chunks[half:]
+                    return self._send(Batch(first, batch.size // 2)) and self._send(
+                        Batch(second, batch.size - batch.size // 2)
+                    )
+                if response.status_code < 500 and response.status_code != 429:
+                    print(
+                        f"⚠️  Batch rejected: HTTP {response.status_code} "
+                        f"{response.text[:200]}",
+                        file=sys.stderr,
+                    )
+                    return False
+                retry_after = response.headers.get("Retry-After", "")
+                wait_for = float(retry_after) if retry_after.isdigit() else delay
+            except requests.RequestException:
+                wait_for = delay
+            if attempt < MAX_RETRIES - 1:
+                time.sleep(wait_for)
+                delay = min(delay * 2, 30.0)
+        print(
+            f"⚠️  Batch of {len(batch.chunks)} chunks failed after {MAX_RETRIES} "
+            "attempts",
+            file=sys.stderr,
+        )
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+
+def ingest(
+    paths: List[str],
+    urls: List[str],
+    source: str,
+    api_base: str = ARCHON_API_BASE,
+    state_path: Path = STATE_PATH,
+    workers: Optional[int] = None,
+    uploaders: int = UPLOADERS,
+    chunk_chars: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    batch_bytes: int = BATCH_BYTES,
+    batch_chunks: int = BATCH_CHUNKS,
+    dry_run: bool = False,
+    reset: bool = False,
+    progress: bool = True,
+) -> IngestStats:
+    """Run the whole pipeline and return its counters"""
+    workers = workers or os.cpu_count() or 1
+    state = IngestState(state_path)
+    if not reset:
+        state.load()
+    stats = IngestStats()
+    session = make_session(max(uploaders, FETCHERS))
+
+    def sources() -> Iterator[SourceDoc]:
+        walked = walk_files(paths)
+        if urls:
+            walked = itertools.chain(
+                walked, fetch_urls(expand_urls(urls, session), session, state, stats)
+            )
+        for doc in walked:
+            stats.sources_seen += 1
+            if state.unchanged(doc):
+                stats.sources_skipped += 1
+                continue
+            yield doc
+
+    chunks = dedupe(
+        parse_stream(sources(), workers, chunk_chars, overlap), state, stats
+    )
+    last_save = last_report = time.monotonic()
+
+    if dry_run:
+        for _ in chunks:
+            pass
+        return stats
+
+    url = api_base.rstrip("/") + INGEST_PATH
+    try:
+        with Uploader(session, url, source, state, stats, uploaders) as uploader:
+            for batch in batches(chunks, batch_bytes, batch_chunks):
+                uploader.put(batch)
+                now = time.monotonic()
+                if now - last_save > SAVE_INTERVAL:
+                    state.save()
+                    last_save = now
+                if progress and now - last_report > 1.0:
+                    print(f"\r   {stats.line()}", end="", file=sys.stderr, flush=True)
+                    last_report = now
+    finally:
+        # Everything acknowledged so far survives an interrupt
+        state.save()
+    if progress:
+        print(f"\r   {stats.line()}", file=sys.stderr)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream documentation into the Archon knowledge base"
+    )
+    parser.add_argument("paths", nargs="*", help="Files or directories to ingest")
+    parser.add_argument(
+        "--urls", type=Path, help="File with one URL (or sitemap.xml) per line"
+    )
+    parser.add_argument(
+        "--url",
+        action="append",
+        default=[],
+        help="URL or sitemap to ingest (repeatable)",
+    )
+    parser.add_argument(
+        "--source", default="bulk-ingest", help="Knowledge source name in Archon"
+    )
+    parser.add_argument("--api-base", default=ARCHON_API_BASE)
+    parser.add_argument("--state", type=Path, default=STATE_PATH, help="Progress file")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Parse processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--uploaders", type=int, default=UPLOADERS, help="Concurrent upload connections"
+    )
+    parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument(
+        "--batch-kb",
+        type=int,
+        default=BATCH_BYTES // 1024,
+        help="Upload batch size limit",
+    )
+    parser.add_argument("--batch-chunks", type=int, default=BATCH_CHUNKS)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Parse and de-duplicate without uploading",
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="Ignore saved progress and start over"
+    )
+    args = parser.parse_args()
+
+    urls = list(args.url)
+    if args.urls:
+        urls += [
+            line.strip()
+            for line in args.urls.read_text().splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+    if not args.paths and not urls:
+        parser.error("nothing to ingest: give paths, --url or --urls")
+
+    print(f"📚 Ingesting into {args.api_base} as '{args.source}'", file=sys.stderr)
+    try:
+        stats = ingest(
+            args.paths,
+            urls,
+            args.source,
+            api_base=args.api_base,
+            state_path=args.state,
+            workers=args.workers,
+            uploaders=args.uploaders,
+            chunk_chars=args.chunk_chars,
+            overlap=args.overlap,
+            batch_bytes=args.batch_kb * 1024,
+            batch_chunks=args.batch_chunks,
+            dry_run=args.dry_run,
+            reset=args.reset,
+        )
+    except KeyboardInterrupt:
+        print(
+            f"\n⏸️  Interrupted; progress saved to {args.state}, re-run to resume",
+            file=sys.stderr,
+        )
+        sys.exit(130)
+
+    print(f"\n✅ {stats.sources_seen} sources in {stats.elapsed:.1f}s")
+    print(
+        f"   Parsed: {stats.sources_parsed}, unchanged: {stats.sources_skipped}, "
+        f"failed: {stats.sources_failed}"
+    )
+    print(
+        f"   Chunks: {stats.chunks_total} total, {stats.chunks_duplicate} duplicate, "
+        f"{stats.chunks_uploaded} uploaded in {stats.batches_uploaded} batches"
+    )
+    if stats.batches_failed or stats.sources_failed:
+        print(
+            f"   ⚠️  {stats.batches_failed} batches failed; re-run to retry (progress "
+            f"is saved to {args.state})"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
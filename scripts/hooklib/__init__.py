@@ -0,0 +1,8 @@
+"""
+Claude Code Starter - Hook Support Library
+
+Copy this package next to your hooks (.claude/hooks/hooklib/) so hook
+scripts can import it directly.
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Hook Client Shim
+
+Forwards one hook invocation to the persistent hook host over a Unix domain
+socket, keeping the usual stdin/stdout JSON contract and exit code. When no
+host is running, the hook script is executed in this process instead. Once
+the host has the event the hook is never run a second time: if no reply
+arrives within REPLY_TIMEOUT, the event fails with a non-blocking error.
+
+Usage (in .claude/settings.json):
+    "command": "python3 .claude/hooks/hooklib/client.py .claude/hooks/pre-tool-use.py"
+
+This module must stay small and stdlib-only: it runs on every hook event,
+so anything it imports is paid for on every tool call.
+"""
+
+import hashlib
+import io
+import json
+import os
+import socket
+import sys
+from typing import Dict, List, Optional
+
+CONNECT_TIMEOUT = 0.05  # seconds; a live host accepts immediately
+REPLY_TIMEOUT = 60  # seconds
+SOCKET_ENV = "CLAUDE_HOOK_SOCKET"
+MAX_UNIX_PATH = 100  # sun_path is 104-108 bytes depending on platform
+
+
+def default_socket_path(project_root: str = ".") -> str:
+    """
+    Socket path for a project: .claude/run/hooks.sock, or a per-project
+    path under the temp directory when that would be too long for AF_UNIX
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+
+    root = os.path.abspath(project_root)
+    path = os.path.join(root, ".claude", "run", "hooks.sock")
+    if len(path) <= MAX_UNIX_PATH:
+        return path
+
+    digest = hashlib.sha1(root.encode()).hexdigest()[:12]
+    return os.path.join("/tmp", f"claude-hooks-{os.getuid()}-{digest}.sock")
+
+
+def send_request(request: Dict, socket_path: str) -> Optional[Dict]:
+    """
+    Send one request to the host
+
+    Returns:
+        The host's reply, None if no host is listening, or an error reply
+        with "delivered": True if the host took the request but did not answer
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        return None  # no AF_UNIX on this platform
+
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+
+    try:
+        sock.settimeout(REPLY_TIMEOUT)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        sock.close()
+        return None  # the host went away before it had the whole request
+
+    try:
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        if chunks:
+            return json.loads(b"".join(chunks))
+        error = "hook host closed the connection without a reply"
+    except socket.timeout:
+        error = f"no reply from the hook host within {REPLY_TIMEOUT}s"
+    except (OSError, ValueError) as e:
+        error = f"bad reply from the hook host: {e}"
+    finally:
+        sock.close()
+    return {"error": error, "delivered": True}
+
+
+def run_in_process(script: str, args: List[str], stdin_data: str) -> int:
+    """Run the hook script in this interpreter, as if launched directly"""
+    import runpy
+
+    sys.argv = [script, *args]
+    sys.stdin = io.TextIOWrapper(io.BytesIO(stdin_data.encode()), encoding="utf-8")
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        return _exit_code(e.code)
+    return 0
+
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: client.py <hook-script> [args...]", file=sys.stderr)
+        sys.exit(1)
+
+    script = os.path.abspath(sys.argv[1])
+    args = sys.argv[2:]
+    stdin_data = "" if sys.stdin is None or sys.stdin.isatty() else sys.stdin.read()
+
+    reply = send_request(
+        {"script": script, "args": args, "stdin": stdin_data, "cwd": os.getcwd()},
+        default_socket_path(),
+    )
+
+    if reply is not None and reply.get("delivered"):
+        # The host may have run the hook already; a second run could repeat its effects
+        print(f"{os.path.basename(script)}: {reply['error']}, skipped", file=sys.stderr)
+        sys.exit(1)
+    if reply is None or "error" in reply:
+        # No host, or the host refused this script: run it ourselves
+        sys.exit(run_in_process(script, args, stdin_data))
+
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    sys.stdout.flush()
+    sys.exit(reply.get("exit_code", 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Concurrent Hook Dispatcher
+
+Runs every hook registered for one event, concurrently where their declared
+dependencies allow, under a shared deadline, and merges their outputs into
+one JSON reply. For blocking events the first block decision wins and the
+remaining hooks are stopped.
+
+Usage (in .claude/settings.json):
+    {
+      "hooks": {
+        "preToolUse": {
+          "enabled": true,
+          "command": "python3 .claude/hooks/hooklib/dispatch.py preToolUse",
+          "timeout": 10,
+          "scripts": [
+            {"name": "safety", "script": ".claude/hooks/pre-tool-use.py"},
+            {"name": "secrets", "script": ".claude/hooks/secret-scan.py"},
+            {"name": "audit", "script": ".claude/hooks/audit.py",
+             "after": ["safety", "secrets"], "blocking": false}
+          ]
+        }
+      }
+    }
+
+Each entry runs a Python "script" (with this interpreter) or a shell
+"command". "after" lists hooks that must finish first; a hook that depends
+on another receives the input with that hook's "prompt" change applied.
+"blocking": false marks a hook whose block decision is only reported.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooklib import profiling, telemetry
+
+SETTINGS_FILES = [".claude/settings.json", ".claude/settings.local.json"]
+BLOCKING_EVENTS = {"preToolUse", "userPromptSubmit"}
+DEFAULT_TIMEOUT = 10  # seconds, shared by all hooks of one event
+BLOCK_EXIT_CODE = 2
+
+
+@dataclass
+class HookSpec:
+    """One hook registered for an event"""
+
+    name: str
+    argv: List[str]
+    after: List[str] = field(default_factory=list)
+    blocking: bool = True
+    shell: bool = False
+
+
+@dataclass
+class HookOutcome:
+    """What one hook did"""
+
+    name: str
+    status: str  # "ok", "blocked", "error", "timeout", "skipped", "cancelled"
+    exit_code: Optional[int] = None
+    output: Dict = field(default_factory=dict)
+    stderr: str = ""
+    duration: float = 0.0
+
+
+class ConfigError(Exception):
+    """Invalid hook configuration in settings"""
+
+
+def load_event_config(event: str, settings_files: List[str] = SETTINGS_FILES) -> Dict:
+    """Read the config for one event; later settings files override earlier ones"""
+    config: Dict = {}
+    for path in settings_files:
+        try:
+            with open(path) as f:
+                hooks = json.load(f).get("hooks", {})
+        except (OSError, ValueError):
+            continue
+        if event in hooks:
+            config = hooks[event]
+    return config
+
+
+def parse_specs(config: Dict, event_blocking: bool) -> List[HookSpec]:
+    """Build hook specs from an event config and validate the dependency graph"""
+    specs = []
+    profile_config = profiling.load_config()
+    for i, entry in enumerate(config.get("scripts", [])):
+        if entry.get("enabled") is False:
+            continue
+        name = entry.get("name") or f"hook{i + 1}"
+        if "script" in entry:
+            argv, shell = [
+                sys.executable,
+                entry["script"],
+                *entry.get("args", []),
+            ], False
+            if profiling.enabled_for(name, profile_config):
+                argv[1:1] = [profiling.__file__, "run", "--hook", name]
+        elif "command" in entry:
+            argv, shell = [entry["command"]], True
+        else:
+            raise ConfigError(f"hook '{name}' needs a 'script' or 'command'")
+        specs.append(
+            HookSpec(
+                name=name,
+                argv=argv,
+                after=list(entry.get("after", [])),
+                blocking=event_blocking and entry.get("blocking", True),
+                shell=shell,
+            )
+        )
+
+    names = [s.name for s in specs]
+    if len(set(names)) != len(names):
+        raise ConfigError("hook names must be unique within an event")
+    for spec in specs:
+        missing = set(spec.after) - set(names)
+        if missing:
+            raise ConfigError(
+                f"hook '{spec.name}' depends on unknown hook(s): "
+                f"{', '.join(sorted(missing))}"
+            )
+
+    # Reject cycles (Kahn's algorithm)
+    indegree = {s.name: len(s.after) for s in specs}
+    ready = [n for n, d in indegree.items() if d == 0]
+    seen = 0
+    while ready:
+        current = ready.pop()
+        seen += 1
+        for spec in specs:
+            if current in spec.after:
+                indegree[spec.name] -= 1
+                if indegree[spec.name] == 0:
+                    ready.append(spec.name)
+    if seen != len(specs):
+        raise ConfigError("hook dependencies contain a cycle")
+
+    return specs
+
+
+class Dispatcher:
+    """Runs the hooks of one event as a dependency DAG under a deadline"""
+
+    def __init__(
+        self,
+        specs: List[HookSpec],
+        timeout: float = DEFAULT_TIMEOUT,
+        blocking: bool = True,
+    ):
+        self.specs = specs
+        self.timeout = timeout
+        self.blocking = blocking
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._cancelled: set = set()
+        # Held while a hook is spawned and registered, and while hooks are
+        # cancelled, so a cancel can never miss a process that is starting
+        self._lock = threading.Lock()
+
+    def _run_hook(
+        self, spec: HookSpec, input_data: Dict, deadline: float
+    ) -> HookOutcome:
+        start = time.monotonic()
+        with self._lock:
+            if spec.name in self._cancelled:
+                return HookOutcome(spec.name, "cancelled")
+            try:
+                process = subprocess.Popen(
+                    spec.argv[0] if spec.shell else spec.argv,
+                    shell=spec.shell,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    # Own process group, so shell children die with it
+                    start_new_session=True,
+                )
+            except OSError as e:
+                return HookOutcome(spec.name, "error", stderr=str(e))
+            self._processes[spec.name] = process
+
+        try:
+            stdout, stderr = process.communicate(
+                json.dumps(input_data), timeout=max(deadline - time.monotonic(), 0.001)
+            )
+        except subprocess.TimeoutExpired:
+            _kill_group(process)
+            process.communicate()
+            return HookOutcome(spec.name, "timeout", duration=time.monotonic() - start)
+
+        outcome = HookOutcome(
+            spec.name,
+            "ok",
+            exit_code=process.returncode,
+            stderr=stderr,
+            duration=time.monotonic() - start,
+        )
+        if process.returncode < 0:
+            outcome.status = "cancelled"
+            return outcome
+
+        try:
+            parsed = json.loads(stdout) if stdout.strip() else {}
+            outcome.output = parsed if isinstance(parsed, dict) else {}
+        except ValueError:
+            outcome.stderr += f"\n{spec.name}: output is not valid JSON"
+
+        if process.returncode == BLOCK_EXIT_CODE or outcome.output.get("block"):
+            outcome.status = "blocked"
+        elif process.returncode != 0:
+            outcome.status = "error"
+        return outcome
+
+    def _input_for(
+        self, spec: HookSpec, input_data: Dict, outcomes: Dict[str, HookOutcome]
+    ) -> Dict:
+        """Input for a hook, with its dependencies' prompt changes applied"""
+        data = dict(input_data)
+        for dep in spec.after:
+            prompt = outcomes[dep].output.get("prompt")
+            if prompt is not None:
+                data["prompt"] = prompt
+        return data
+
+    def run(self, input_data: Dict) -> List[HookOutcome]:
+        """Run all hooks; returns outcomes in declaration order"""
+        deadline = time.monotonic() + self.timeout
+        outcomes: Dict[str, HookOutcome] = {}
+        pending = {s.name: s for s in self.specs}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(len(self.specs), 1)) as pool:
+            while pending or running:
+                # Start every hook whose dependencies have completed
+                for name, spec in list(pending.items()):
+                    deps = [outcomes.get(d) for d in spec.after]
+                    if any(
+                        d is not None and d.status not in ("ok", "blocked")
+                        for d in deps
+                    ):
+                        outcomes[name] = HookOutcome(
+                            name, "skipped", stderr="a dependency did not complete"
+                        )
+                        del pending[name]
+                    elif all(d is not None for d in deps):
+                        data = self._input_for(spec, input_data, outcomes)
+                        running[
+                            pool.submit(self._run_hook, spec, data, deadline)
+                        ] = name
+                        del pending[name]
+
+                if not running:
+                    continue
+
+                done, _ = wait(
+                    running,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    break  # deadline passed; workers time out their own processes
+
+                blocked = False
+                for future in done:
+                    outcome = future.result()
+                    outcomes[running.pop(future)] = outcome
+                    spec = next(s for s in self.specs if s.name == outcome.name)
+                    if outcome.status == "blocked" and self.blocking and spec.blocking:
+                        blocked = True
+
+                if blocked:
+                    self._cancel(running.values())
+                    for name in pending:
+                        outcomes[name] = HookOutcome(name, "cancelled")
+                    pending.clear()
+
+            for future, name in running.items():
+                outcomes[name] = future.result()
+            for name in pending:
+                outcomes[name] = HookOutcome(
+                    name, "skipped", stderr="the event deadline passed first"
+                )
+
+        return [outcomes[s.name] for s in self.specs if s.name in outcomes]
+
+    def _cancel(self, names):
+        with self._lock:
+            for name in names:
+                self._cancelled.add(name)
+                process = self._processes.get(name)
+                if process and process.poll() is None:
+                    _kill_group(process)
+
+
+def _kill_group(process: subprocess.Popen):
+    """
+    Kill a hook and anything it started (a killed
+    shell leaves children holding its pipes)
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def merge_outputs(
+    outcomes: List[HookOutcome], specs: List[HookSpec], event_blocking: bool
+) -> tuple[Dict, bool]:
+    """
+    Merge hook outputs deterministically (declaration order)
+
+    - The first blocking hook that blocked decides the block and its reason
+    - Messages are joined in declaration order
+    - "prompt" comes from the last hook that changed it; independent hooks
+      that both change the prompt should be chained with "after" instead
+    - "metadata" dicts are merged; other keys: later hooks win
+
+    Returns:
+        Tuple of (merged output, blocked)
+    """
+    blocking = {s.name: s.blocking for s in specs}
+    merged: Dict = {}
+    messages = []
+    metadata: Dict = {}
+
+    for outcome in outcomes:
+        if (
+            outcome.status == "blocked"
+            and event_blocking
+            and blocking.get(outcome.name)
+        ):
+            reason = outcome.output.get("reason") or f"Blocked by {outcome.name}"
+            return {"block": True, "reason": reason}, True
+
+    for outcome in outcomes:
+        output = outcome.output
+        if outcome.status == "blocked":
+            messages.append(
+                f"{outcome.name}: {output.get('reason', 'block requested')} "
+                "(non-blocking hook)"
+            )
+        for key, value in output.items():
+            if key == "message":
+                messages.append(value)
+            elif key == "metadata" and isinstance(value, dict):
+                metadata.update(value)
+            elif key not in ("block", "reason"):
+                merged[key] = value
+
+    if messages:
+        merged["message"] = "\n".join(m for m in messages if m)
+    if metadata:
+        merged["metadata"] = metadata
+    return merged, False
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: dispatch.py <event>", file=sys.stderr)
+        sys.exit(1)
+
+    event = sys.argv[1]
+    try:
+        input_data = json.loads(sys.stdin.read() or "{}")
+    except ValueError:
+        input_data = {}
+
+    config = load_event_config(event)
+    if not config or config.get("enabled") is False:
+        print(json.dumps({}))
+        sys.exit(0)
+
+    event_blocking = config.get("blocking", event in BLOCKING_EVENTS)
+    try:
+        specs = parse_specs(config, event_blocking)
+    except ConfigError as e:
+        print(f"[dispatch] {event}: {e}", file=sys.stderr)
+        print(json.dumps({}))
+        sys.exit(1)
+
+    dispatcher = Dispatcher(
+        specs, timeout=config.get("timeout", DEFAULT_TIMEOUT), blocking=event_blocking
+    )
+    start = time.monotonic()
+    outcomes = dispatcher.run(input_data)
+    elapsed = time.monotonic() - start
+
+    for outcome in outcomes:
+        if outcome.status in ("ok", "blocked", "error", "timeout"):
+            telemetry.record(outcome.name, event, outcome.status, outcome.duration)
+
+    for outcome in outcomes:
+        if outcome.stderr.strip():
+            sys.stderr.write(
+                outcome.stderr
+                if outcome.stderr.endswith("\n")
+                else outcome.stderr + "\n"
+            )
+        if outcome.status in ("error", "timeout", "skipped"):
+            print(
+                f"[dispatch] {event}/{outcome.name}: {outcome.status}", file=sys.stderr
+            )
+
+    merged, blocked = merge_outputs(outcomes, specs, event_blocking)
+    telemetry.record("dispatch", event, "blocked" if blocked else "ok", elapsed)
+    print(json.dumps(merged))
+    sys.exit(BLOCK_EXIT_CODE if blocked else 0)
+
+
+if __name__ == "__main__":
+    main()
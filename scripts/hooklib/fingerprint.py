@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Merkle-Tree Project Fingerprint
+
+Caches around the wizard and hooks (discovery results, MCP manifests, lint
+results, the knowledge index) all need to know what changed since they were
+filled. This module keeps one answer for all of them: a Merkle tree of the
+project, where every file node holds a content hash and every directory
+node holds a digest of its children's names and hashes.
+
+- Equal root digests mean nothing changed, an O(1) check
+- Otherwise diff() descends only into subtrees whose digests differ, so the
+  cost tracks the size of the change, not the size of the tree
+- Files whose size and mtime match the previous fingerprint reuse its hash;
+  only new or touched files are read, on a thread pool (hashlib releases
+  the GIL while hashing)
+
+A file modified within RACY_WINDOW_NS of the previous fingerprint is always
+re-hashed, since a second write in the same mtime tick would otherwise go
+unnoticed. A fingerprint can be limited to the top `depth` levels of the
+tree when a cache only depends on those; directories at the limit are
+recorded by name only.
+
+Usage:
+    from hooklib.fingerprint import Fingerprint
+    previous, current = Fingerprint.update(".")    # load, refresh, save
+    if previous is None or previous.digest != current.digest:
+        changes = previous.diff(current) if previous else None
+        for path in changes.paths: ...
+
+Command line:
+    python3 scripts/hooklib/fingerprint.py update [ROOT]   # refresh, print changes
+    python3 scripts/hooklib/fingerprint.py update --depth 1
+    python3 scripts/hooklib/fingerprint.py show [ROOT] [SUBPATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from hooklib.inventory import SKIP_DIRS, SKIP_PATHS
+except ImportError:  # run as a script from scripts/hooklib/
+    from inventory import SKIP_DIRS, SKIP_PATHS
+
+FINGERPRINT_PATH = Path(".claude/cache/fingerprint.json")
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+HASH_CHUNK = 1024 * 1024
+DIGEST_SIZE = 16  # bytes of BLAKE2b
+RACY_WINDOW_NS = 2_000_000_000  # coarsest common mtime resolution (FAT: 2 s)
+
+# Tree nodes are plain dicts so they serialize directly:
+#   file:      {"h": hash, "s": size, "m": mtime_ns}
+#   directory: {"h": digest, "c": {name: node, ...}}
+Node = Dict
+
+
+@dataclass
+class FingerprintDiff:
+    """Paths that differ between two fingerprints (files only, root-relative)"""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    dirs_visited: int = 0  # directories whose digests differed and were descended into
+
+    @property
+    def paths(self) -> List[str]:
+        return sorted(self.added + self.removed + self.modified)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+def hash_file(path: str) -> str:
+    """BLAKE2b of a file's contents, read in chunks"""
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dir_digest(children: Dict[str, Node]) -> str:
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for name in sorted(children):
+        node = children[name]
+        digest.update(
+            f"{'d' if 'c' in node else 'f'}\0{name}\0{node['h']}\n".encode(
+                "utf-8", "surrogateescape"
+            )
+        )
+    return digest.hexdigest()
+
+
+def _walk(
+    root: str,
+    depth: Optional[int] = None,
+    skip_dirs=SKIP_DIRS,
+    skip_paths=SKIP_PATHS,
+) -> Iterator[Tuple[str, bool, int, int]]:
+    """
+    Yield (relative path, is_dir, size, mtime_ns) for every entry under root,
+    at most `depth` levels down
+    """
+    stack = [("", root, 1)]
+    while stack:
+        relative, directory, level = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            child = f"{relative}/{entry.name}" if relative else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip_dirs or child in skip_paths:
+                        continue
+                    yield child, True, 0, 0
+                    if depth is None or level < depth:
+                        stack.append((child, entry.path, level + 1))
+                elif entry.is_file():
+                    st = entry.stat()
+                    yield child, False, st.st_size, st.st_mtime_ns
+            except OSError:
+                continue
+
+
+class Fingerprint:
+    """A Merkle tree of a project's files"""
+
+    def __init__(
+        self,
+        root: str,
+        tree: Node,
+        built_at_ns: int = 0,
+        depth: Optional[int] = None,
+    ):
+        self.root = root
+        self.tree = tree
+        self.built_at_ns = built_at_ns
+        self.depth = depth  # levels walked; None for the whole tree
+        self.hashed = 0  # files read while computing this fingerprint
+        self.reused = 0  # files whose hash was carried over by the stat shortcut
+
+    @property
+    def digest(self) -> str:
+        return self.tree["h"]
+
+    # -- computing ----------------------------------------------------------
+
+    @classmethod
+    def compute(
+        cls,
+        root: str = ".",
+        previous: Optional["Fingerprint"] = None,
+        workers: int = HASH_WORKERS,
+        depth: Optional[int] = None,
+    ) -> "Fingerprint":
+        """
+        Fingerprint the tree under `root`, or its top `depth` levels
+
+        With `previous`, files whose size and mtime are unchanged (and not
+        racily close to the previous build) keep their old hash.
+        """
+        root = os.path.abspath(root)
+        started_ns = time.time_ns()
+        tree: Node = {"c": {}}
+        directories: Dict[str, Node] = {"": tree}
+        pending: List[Tuple[Node, str]] = []
+        reused = 0
+        racy_before = (previous.built_at_ns - RACY_WINDOW_NS) if previous else 0
+
+        for relative, is_dir, size, mtime in sorted(_walk(root, depth)):
+            parent_path, _, name = relative.rpartition("/")
+            parent = directories.get(parent_path)
+            if parent is None:
+                continue
+            if is_dir:
+                node = directories[relative] = {"c": {}}
+            else:
+                node = {"s": size, "m": mtime}
+                old = previous.node(relative) if previous else None
+                if (
+                    old
+                    and "c" not in old
+                    and old["s"] == size
+                    and old["m"] == mtime
+                    and mtime < racy_before
+                ):
+                    node["h"] = old["h"]
+                    reused += 1
+                else:
+                    pending.append((node, relative))
+            parent["c"][name] = node
+
+        def fill(item: Tuple[Node, str]):
+            node, relative = item
+            try:
+                node["h"] = hash_file(os.path.join(root, relative))
+            except OSError:
+                # Unreadable: still part of the tree, never equal to real content
+                node["h"] = ""
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                list(pool.map(fill, pending))
+
+        _seal(tree)
+        fingerprint = cls(root, tree, started_ns, depth)
+        fingerprint.hashed = len(pending)
+        fingerprint.reused = reused
+        return fingerprint
+
+    @classmethod
+    def update(
+        cls,
+        root: str = ".",
+        path: Optional[Path] = None,
+        depth: Optional[int] = None,
+    ) -> Tuple[Optional["Fingerprint"], "Fingerprint"]:
+        """
+        Load the saved fingerprint, compute a fresh one
+        from it, save that; return (previous, current)
+
+        A saved fingerprint of another root or depth is not comparable and
+        counts as none.
+        """
+        root = os.path.abspath(root)
+        path = path or Path(root) / FINGERPRINT_PATH
+        previous = cls.load(path)
+        if previous is not None and (previous.root, previous.depth) != (root, depth):
+            previous = None
+        current = cls.compute(root, previous, depth=depth)
+        try:
+            current.save(path)
+        except OSError:
+            pass
+        return previous, current
+
+    # -- persistence ----------------------------------------------------------
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "version": 1,
+                    "root": self.root,
+                    "built_at_ns": self.built_at_ns,
+                    "depth": self.depth,
+                    "tree": self.tree,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Fingerprint"]:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return cls(
+                data["root"],
+                data["tree"],
+                data.get("built_at_ns", 0),
+                data.get("depth"),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    # -- queries ----------------------------------------------------------------
+
+    def node(self, relative: str) -> Optional[Node]:
+        """The node at a root-relative path, or None"""
+        node = self.tree
+        for part in filter(None, relative.split("/")):
+            node = node.get("c", {}).get(part)
+            if node is None:
+                return None
+        return node
+
+    def digest_of(self, relative: str) -> Optional[str]:
+        """
+        Digest of a file or subtree: a cache keyed on it is valid while it is unchanged
+        """
+        node = self.node(relative)
+        return node["h"] if node else None
+
+    def files(self, relative: str = "") -> Iterator[str]:
+        """Root-relative paths of all files under a subtree"""
+        node = self.node(relative)
+        if node is not None:
+            yield from _files(node, relative)
+
+    def diff(self, newer: "Fingerprint") -> FingerprintDiff:
+        """Files added, removed and modified going from this fingerprint to `newer`"""
+        result = FingerprintDiff()
+        _diff(self.tree, newer.tree, "", result)
+        for paths in (result.added, result.removed, result.modified):
+            paths.sort()
+        return result
+
+
+def _seal(node: Node) -> str:
+    """Compute directory digests bottom-up"""
+    for child in node["c"].values():
+        if "c" in child:
+            _seal(child)
+    node["h"] = _dir_digest(node["c"])
+    return node["h"]
+
+
+def _files(node: Node, prefix: str) -> Iterator[str]:
+    if "c" not in node:
+        yield prefix
+        return
+    for name, child in node["c"].items():
+        yield from _files(child, f"{prefix}/{name}" if prefix else name)
+
+
+def _diff(old: Node, new: Node, prefix: str, result: FingerprintDiff):
+    if old["h"] == new["h"]:
+        return
+    result.dirs_visited += 1
+    old_children, new_children = old["c"], new["c"]
+    for name in old_children.keys() | new_children.keys():
+        path = f"{prefix}/{name}" if prefix else name
+        before, after = old_children.get(name), new_children.get(name)
+        if after is None:
+            result.removed.extend(_files(before, path))
+        elif before is None:
+            result.added.extend(_files(after, path))
+        elif ("c" in before) != ("c" in after):
+            result.removed.extend(_files(before, path))
+            result.added.extend(_files(after, path))
+        elif "c" in before:
+            _diff(before, after, path, result)
+        elif before["h"] != after["h"]:
+            result.modified.append(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merkle-tree project fingerprint")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser(
+        "update", help="Refresh the saved fingerprint and print what changed"
+    )
+    update.add_argument("root", nargs="?", default=".")
+    update.add_argument("--depth", type=int, help="levels to walk (default: all)")
+    update.add_argument("--json", action="store_true")
+    show = sub.add_parser("show", help="Print the digest of the project or a subtree")
+    show.add_argument("root", nargs="?", default=".")
+    show.add_argument("subpath", nargs="?", default="")
+    args = parser.parse_args()
+
+    path = Path(os.path.abspath(args.root)) / FINGERPRINT_PATH
+    if args.command == "show":
+        fingerprint = Fingerprint.load(path)
+        if fingerprint is None:
+            print(f"❌ No fingerprint at {path}; run 'update' first", file=sys.stderr)
+            sys.exit(1)
+        digest = fingerprint.digest_of(args.subpath)
+        if digest is None:
+            print(f"❌ {args.subpath} is not in the fingerprint", file=sys.stderr)
+            sys.exit(1)
+        print(digest)
+        return
+
+    start = time.perf_counter()
+    previous, current = Fingerprint.update(args.root, path, args.depth)
+    elapsed = time.perf_counter() - start
+    changes = previous.diff(current) if previous else None
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "digest": current.digest,
+                    "previous": previous.digest if previous else None,
+                    "hashed": current.hashed,
+                    "reused": current.reused,
+                    "elapsed": round(elapsed, 4),
+                    "added": changes.added if changes else None,
+                    "removed": changes.removed if changes else None,
+                    "modified": changes.modified if changes else None,
+                }
+            )
+        )
+        return
+
+    print(
+        f"🌳 Fingerprint {current.digest} ({current.hashed} hashed, "
+        f"{current.reused} reused, {elapsed * 1000:.0f} ms)"
+    )
+    if previous is None:
+        print("   No previous fingerprint")
+    elif not changes:
+        print("   Unchanged")
+    else:
+        for label, paths in (
+            ("+", changes.added),
+            ("-", changes.removed),
+            ("~", changes.modified),
+        ):
+            for changed in paths:
+                print(f"   {label} {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Debounced, Batched Formatting for the Post-Tool-Use Hook
+
+Instead of formatting and linting each file synchronously on every
+Write/Edit, the post-tool-use hook enqueues the path and returns. A
+background flusher waits until edits have been quiet for FORMAT_DEBOUNCE
+seconds, then formats the whole batch with one invocation per tool and
+language. Resident daemons (blackd, prettierd, eslint_d) are used when
+available, so bursts of edits no longer cold-start a formatter per file.
+
+Usage from a hook:
+    from hooklib.formatting import enqueue
+    enqueue(file_path)
+
+Or from the command line:
+    python3 .claude/hooks/hooklib/formatting.py enqueue src/app.py
+    python3 .claude/hooks/hooklib/formatting.py flush      # format in the foreground
+
+Results are appended to .claude/logs/quality.log, one JSON record per file.
+Files returning to a previously formatted/linted state are answered from
+the content-hash cache in quality_cache.py without running any tool.
+"""
+
+import fcntl
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooklib.logstore import get_store
+from hooklib.quality_cache import QualityCache
+from hooklib.telemetry import instrument, phase
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+RUN_DIR = Path(".claude/run")
+QUEUE_PATH = RUN_DIR / "format-queue"
+LOCK_PATH = RUN_DIR / "format.lock"
+QUALITY_LOG = Path(".claude/logs/quality.log")
+
+FORMAT_DEBOUNCE = 0.4  # seconds without new edits before a batch runs
+FORMAT_MAX_DELAY = 3.0  # flush anyway after this long under constant edits
+TOOL_TIMEOUT = 60  # seconds per formatter/linter invocation
+BLACKD_URL = os.environ.get("BLACKD_URL", "http://localhost:45484")
+ENABLE_QUALITY_CACHE = True  # skip tools for content seen before (quality_cache.py)
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".rs": "rust",
+    ".go": "go",
+    ".java": "java",
+    ".rb": "ruby",
+    ".php": "php",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+}
+
+# Formatters and linters in order of preference. "blackd" and "prettierd"
+# talk to resident daemons; everything else is one process per batch, with
+# the files appended to the command line. Linters are asked for one
+# "path:line:..." finding per line so findings can be attributed to files.
+FORMATTERS = {
+    "python": ["blackd", ["black", "-q"], ["autopep8", "-i"], ["yapf", "-i"]],
+    "javascript": [
+        "prettierd",
+        ["prettier", "--write", "--log-level", "warn"],
+        ["standard", "--fix"],
+    ],
+    "typescript": [
+        "prettierd",
+        ["prettier", "--write", "--log-level", "warn"],
+        ["standard", "--fix"],
+    ],
+    "rust": [["rustfmt"]],
+    "go": [["gofmt", "-w"], ["goimports", "-w"]],
+    "java": [["google-java-format", "-i"]],
+    "ruby": [["rubocop", "-a", "--format", "quiet"]],
+    "php": [["php-cs-fixer", "fix", "--quiet"]],
+    "c": [["clang-format", "-i"]],
+    "cpp": [["clang-format", "-i"]],
+}
+LINTERS = {
+    "python": [["pylint", "--output-format=parseable"], ["flake8"]],
+    "javascript": [
+        ["eslint_d", "--format", "unix"],
+        ["eslint", "--format", "unix"],
+        ["standard"],
+    ],
+    "typescript": [
+        ["eslint_d", "--format", "unix"],
+        ["eslint", "--format", "unix"],
+        ["standard"],
+    ],
+    "rust": [["cargo", "clippy", "--quiet", "--message-format=short"]],
+    "go": [["golangci-lint", "run"], ["go", "vet"]],
+    "java": [["checkstyle", "-c", "/google_checks.xml"]],
+    "ruby": [["rubocop", "--format", "emacs"]],
+    "php": [["phpcs", "--report=emacs"]],
+    "c": [["clang-tidy", "--quiet"]],
+    "cpp": [["clang-tidy", "--quiet"]],
+}
+
+# Linters that check a whole crate or package rather than the files given.
+# "project" linters run without file arguments and "package" linters get the
+# files' directories. Their findings depend on neighbouring files, so they
+# are not cached by file content.
+LINT_SCOPE = {"cargo": "project", "golangci-lint": "package", "go": "package"}
+
+# "path:line:" at the start of a finding, after an optional "[WARN] " tag
+FINDING_PATTERN = re.compile(r"^\s*(?:\[\w+\]\s+)?([^\s:][^:]*):\d+[:\s]")
+
+_which_cache: Dict[str, Optional[str]] = {}
+
+
+def _which(tool: str) -> Optional[str]:
+    if tool not in _which_cache:
+        _which_cache[tool] = shutil.which(tool)
+    return _which_cache[tool]
+
+
+def enqueue(file_path: str):
+    """
+    Queue a file for formatting and make sure a flusher is running
+
+    Cheap enough to call on every Write/Edit: one appended line and one
+    non-blocking lock probe.
+    """
+    RUN_DIR.mkdir(parents=True, exist_ok=True)
+    line = (os.path.abspath(file_path) + "\n").encode()
+    fd = os.open(QUEUE_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+    if not _flusher_running():
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "flush", "--wait"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def _flusher_running() -> bool:
+    """
+    True if another process holds the flusher lock
+
+    A flusher that is just releasing the lock re-checks the queue afterwards
+    (see flush), so a True here never strands the file just queued.
+    """
+    with open(LOCK_PATH, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        return False
+
+
+def _take_queue() -> List[str]:
+    """Atomically claim everything queued so far"""
+    claimed = QUEUE_PATH.with_name(f"{QUEUE_PATH.name}.{os.getpid()}")
+    try:
+        os.replace(QUEUE_PATH, claimed)
+    except FileNotFoundError:
+        return []
+    try:
+        paths = claimed.read_text().splitlines()
+    finally:
+        claimed.unlink()
+    return [p for p in dict.fromkeys(paths) if p and os.path.isfile(p)]
+
+
+def _wait_for_quiet():
+    """Block until the queue has not changed for FORMAT_DEBOUNCE seconds"""
+    start = time.monotonic()
+    while time.monotonic() - start < FORMAT_MAX_DELAY:
+        try:
+            idle = time.time() - QUEUE_PATH.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if idle >= FORMAT_DEBOUNCE:
+            return
+        time.sleep(FORMAT_DEBOUNCE - idle)
+
+
+def group_by_language(paths: List[str]) -> Dict[str, List[str]]:
+    """Group files by language; unknown extensions are dropped"""
+    groups: Dict[str, List[str]] = {}
+    for path in paths:
+        language = LANGUAGES.get(Path(path).suffix.lower())
+        if language:
+            groups.setdefault(language, []).append(path)
+    return groups
+
+
+def _run(argv: List[str], files: List[str]) -> Tuple[Optional[int], str]:
+    """Run a tool on files; returns (exit code or None if it could not run, output)"""
+    try:
+        with phase("subprocess"):
+            result = subprocess.run(
+                argv + files, capture_output=True, text=True, timeout=TOOL_TIMEOUT
+            )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return None, str(e)
+    return result.returncode, result.stdout + result.stderr
+
+
+def _blackd_available() -> bool:
+    if "blackd" not in _which_cache:
+        try:
+            with phase("network"):
+                urllib.request.urlopen(
+                    urllib.request.Request(BLACKD_URL, data=b"", method="POST"),
+                    timeout=0.2,
+                )
+            _which_cache["blackd"] = BLACKD_URL
+        except urllib.error.HTTPError:
+            _which_cache["blackd"] = BLACKD_URL  # it answered, just not happily
+        except (OSError, ValueError):
+            _which_cache["blackd"] = None
+    return _which_cache["blackd"] is not None
+
+
+_black_headers_cache: Dict[Path, Dict[str, str]] = {}
+
+
+def _black_headers(path: str) -> Dict[str, str]:
+    """
+    blackd request headers for the [tool.black] settings that apply to path
+
+    blackd formats with its defaults unless told otherwise, so the project's
+    line length, target versions and normalization options are forwarded.
+    """
+    directory = Path(path).resolve().parent
+    for candidate in (directory, *directory.parents):
+        pyproject = candidate / "pyproject.toml"
+        if pyproject.is_file():
+            break
+    else:
+        return {}
+
+    if pyproject not in _black_headers_cache:
+        try:
+            with open(pyproject, "rb") as f:
+                config = tomllib.load(f).get("tool", {}).get("black", {})
+        except (OSError, ValueError):
+            config = {}
+        headers = {}
+        if "line-length" in config:
+            headers["X-Line-Length"] = str(config["line-length"])
+        if config.get("target-version"):
+            headers["X-Python-Variant"] = ",".join(config["target-version"])
+        if config.get("pyi"):
+            headers["X-Python-Variant"] = "pyi"
+        if config.get("skip-string-normalization"):
+            headers["X-Skip-String-Normalization"] = "1"
+        if config.get("skip-magic-trailing-comma"):
+            headers["X-Skip-Magic-Trailing-Comma"] = "1"
+        if config.get("preview"):
+            headers["X-Preview"] = "1"
+        _black_headers_cache[pyproject] = headers
+    return _black_headers_cache[pyproject]
+
+
+def _format_with_blackd(files: List[str]) -> Dict[str, bool]:
+    """Format through a running blackd (no process per file)"""
+    results = {}
+    for path in files:
+        try:
+            source = Path(path).read_bytes()
+            request = urllib.request.Request(
+                BLACKD_URL, data=source, method="POST", headers=_black_headers(path)
+            )
+            with phase("network"), urllib.request.urlopen(
+                request, timeout=TOOL_TIMEOUT
+            ) as response:
+                if response.status == 200:
+                    Path(path).write_bytes(response.read())
+            results[path] = True  # 204 = already formatted
+        except (OSError, urllib.error.HTTPError):
+            results[path] = False  # 400 = syntax error
+    return results
+
+
+def _format_with_prettierd(files: List[str]) -> Dict[str, bool]:
+    """Format through prettierd's client (the daemon keeps prettier warm)"""
+    results = {}
+    for path in files:
+        try:
+            source = Path(path).read_text()
+            with phase("subprocess"):
+                result = subprocess.run(
+                    ["prettierd", path],
+                    input=source,
+                    capture_output=True,
+                    text=True,
+                    timeout=TOOL_TIMEOUT,
+                )
+            if result.returncode == 0 and result.stdout and result.stdout != source:
+                Path(path).write_text(result.stdout)
+            results[path] = result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            results[path] = False
+    return results
+
+
+def _select_formatter(language: str):
+    for tool in FORMATTERS.get(language, []):
+        # Without a TOML parser the project's [tool.black] settings can't be
+        # forwarded to blackd; black itself still reads them
+        if tool == "blackd" and tomllib is not None and _blackd_available():
+            return tool
+        if tool == "prettierd" and _which("prettierd"):
+            return tool
+        if isinstance(tool, list) and _which(tool[0]):
+            return tool
+    return None
+
+
+def _tool_name(tool) -> str:
+    if isinstance(tool, str):
+        return tool
+    return (
+        " ".join(tool[:2])
+        if tool[0] in LINT_SCOPE and tool[0] != "golangci-lint"
+        else tool[0]
+    )
+
+
+def _lint_targets(tool: List[str], files: List[str]) -> List[str]:
+    """Command-line arguments naming what a linter should check"""
+    scope = LINT_SCOPE.get(tool[0])
+    if scope == "project":
+        return []
+    if scope == "package":
+        directories = (os.path.relpath(os.path.dirname(path)) for path in files)
+        return [
+            d if d.startswith(".") else f"./{d}" for d in dict.fromkeys(directories)
+        ]
+    return files
+
+
+def attribute_findings(output: str, files: List[str]) -> Dict[str, List[str]]:
+    """Split linter output into findings per file, by the path each line starts with"""
+    findings: Dict[str, List[str]] = {path: [] for path in files}
+    by_path = {os.path.abspath(path): path for path in files}
+    for line in output.splitlines():
+        match = FINDING_PATTERN.match(line)
+        if match:
+            path = by_path.get(os.path.abspath(match.group(1)))
+            if path:
+                findings[path].append(line.strip())
+    return findings
+
+
+def format_batch(
+    language: str, files: List[str], cache: Optional[QualityCache] = None
+) -> Tuple[Optional[str], Dict[str, bool], Set[str]]:
+    """
+    Format a batch of same-language files with the first available tool
+
+    Files whose current content is in the cache get the cached output
+    written back without running the tool.
+
+    Returns:
+        Tuple of (tool name or None, per-file success, files served from cache)
+    """
+    tool = _select_formatter(language)
+    if tool is None:
+        return None, {}, set()
+    name = _tool_name(tool)
+
+    originals = {path: Path(path).read_bytes() for path in files}
+    results: Dict[str, bool] = {}
+    cached: Set[str] = set()
+    if cache:
+        for path, data in originals.items():
+            formatted = cache.get_formatted(data, name, language)
+            if formatted is not None:
+                if formatted != data:
+                    Path(path).write_bytes(formatted)
+                results[path] = True
+                cached.add(path)
+
+    misses = [path for path in files if path not in cached]
+    if misses:
+        if tool == "blackd":
+            results.update(_format_with_blackd(misses))
+        elif tool == "prettierd":
+            results.update(_format_with_prettierd(misses))
+        else:
+            code, _ = _run(tool, misses)
+            results.update({path: code == 0 for path in misses})
+
+        if cache:
+            for path in misses:
+                if results.get(path):
+                    cache.put_formatted(
+                        originals[path], Path(path).read_bytes(), name, language
+                    )
+
+    return name, results, cached
+
+
+def lint_batch(
+    language: str, files: List[str], cache: Optional[QualityCache] = None
+) -> Tuple[Optional[str], Dict[str, List[str]], Set[str]]:
+    """
+    Lint a batch of same-language files in one invocation
+
+    Returns:
+        Tuple of (tool name or None, findings per file, files served from cache)
+    """
+    tool = next((t for t in LINTERS.get(language, []) if _which(t[0])), None)
+    if tool is None:
+        return None, {}, set()
+    name = _tool_name(tool)
+    if tool[0] in LINT_SCOPE:
+        cache = None
+
+    contents = {path: Path(path).read_bytes() for path in files}
+    findings: Dict[str, List[str]] = {}
+    cached: Set[str] = set()
+    if cache:
+        for path, data in contents.items():
+            hit = cache.get_findings(data, name, language)
+            if hit is not None:
+                findings[path] = hit
+                cached.add(path)
+
+    misses = [path for path in files if path not in cached]
+    if misses:
+        code, output = _run(tool, _lint_targets(tool, misses))
+        findings.update(attribute_findings(output, misses))
+        if cache and code is not None:
+            for path in misses:
+                cache.put_findings(contents[path], findings[path], name, language)
+
+    return name, findings, cached
+
+
+def log_quality(record: Dict):
+    """Append one record to the quality log"""
+    get_store(
+        QUALITY_LOG.stem, hook="post-tool-use", directory=QUALITY_LOG.parent
+    ).append(record)
+
+
+def process_batch(paths: List[str], cache: Optional[QualityCache] = None) -> List[Dict]:
+    """Format and lint a batch of files; returns the quality records"""
+    records = []
+    timestamp = datetime.now(timezone.utc).isoformat()
+    for language, files in group_by_language(paths).items():
+        formatter, formatted, format_cached = format_batch(language, files, cache)
+        linter, findings, lint_cached = lint_batch(language, files, cache)
+        for path in files:
+            issues = len(findings.get(path, []))
+            record = {
+                "timestamp": timestamp,
+                "file": os.path.relpath(path),
+                "language": language,
+                "formatter": formatter,
+                "formatter_success": formatted.get(path, False) if formatter else None,
+                "linter": linter,
+                "linter_issues": issues if linter else None,
+                "linter_success": issues == 0 if linter else None,
+                "batch_size": len(files),
+                "cached": (not formatter or path in format_cached)
+                and (not linter or path in lint_cached),
+            }
+            log_quality(record)
+            records.append(record)
+    get_store(QUALITY_LOG.stem, directory=QUALITY_LOG.parent).flush()
+    return records
+
+
+def flush(wait: bool = False) -> int:
+    """
+    Drain the queue, formatting batches until no more edits arrive
+
+    Args:
+        wait: Debounce before each batch (background flusher mode)
+
+    Returns:
+        Number of files processed
+    """
+    RUN_DIR.mkdir(parents=True, exist_ok=True)
+    processed = 0
+    while True:
+        with open(LOCK_PATH, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | (fcntl.LOCK_NB if wait else 0))
+            except OSError:
+                return processed  # another flusher owns the queue
+
+            cache = QualityCache() if ENABLE_QUALITY_CACHE else None
+            try:
+                while True:
+                    if wait:
+                        _wait_for_quiet()
+                    paths = _take_queue()
+                    if not paths:
+                        break
+                    processed += len(process_batch(paths, cache))
+            finally:
+                if cache:
+                    cache.close()
+
+        # An enqueue() between our last _take_queue() and the unlock saw the
+        # lock held and started no flusher; its file is still queued
+        if not QUEUE_PATH.exists():
+            return processed
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("enqueue", "flush"):
+        print(
+            "usage: formatting.py enqueue <file>... | flush [--wait]", file=sys.stderr
+        )
+        sys.exit(1)
+
+    if sys.argv[1] == "enqueue":
+        for path in sys.argv[2:]:
+            enqueue(path)
+    else:
+        with instrument("format-flush", "postToolUse"):
+            count = flush(wait="--wait" in sys.argv[2:])
+        if "--wait" not in sys.argv[2:]:
+            print(f"Formatted {count} file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Persistent Hook Host
+
+A long-lived process that serves hook events over a Unix domain socket, so
+each event no longer pays for interpreter startup, imports (requests,
+compiled regexes) and fresh TCP connections.
+
+Hook scripts are loaded as plugins: each script in the hooks directory is
+imported once and its main() is called per event with stdin, stdout,
+stderr and argv redirected. Module-level state (caches, compiled patterns,
+requests.Session pools) therefore stays warm between events. A script is
+re-imported when its file changes.
+
+Events are handled concurrently. stdin, stdout, stderr and argv are
+per-thread while a hook runs, and the working directory is shared: events
+for the host's own directory run side by side, an event for another
+directory waits for the others and runs alone. A hook script runs one
+event at a time unless it declares HOST_CONCURRENT = True, so hooks with
+module-level state need no locking of their own.
+
+Usage:
+    python3 .claude/hooks/hooklib/host.py                 # foreground
+    python3 .claude/hooks/hooklib/host.py --daemon        # background
+    python3 .claude/hooks/hooklib/host.py --stop
+
+Hooks reach the host through client.py, which falls back to running the
+script directly when the host is not up.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooklib.client import _exit_code, default_socket_path, send_request
+from hooklib.logstore import flush_all
+from hooklib.profiling import profile
+from hooklib.telemetry import EXPORT_INTERVAL, compact_if_due, event_name, instrument
+
+DEFAULT_HOOKS_DIR = ".claude/hooks"
+DEFAULT_IDLE_TIMEOUT = 30 * 60  # seconds
+
+
+class _PerThread:
+    """Stands in for a process-global (sys.stdout, sys.argv) with a per-thread value"""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def set(self, value):
+        self._local.value = value
+
+    def reset(self):
+        self._local.value = self._default
+
+    def _target(self):
+        return getattr(self._local, "value", self._default)
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __getitem__(self, key):
+        return self._target()[key]
+
+    def __len__(self):
+        return len(self._target())
+
+    def __bool__(self):
+        return bool(self._target())
+
+
+class _CwdLock:
+    """Shared holders keep the working directory; an exclusive holder may change it"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextlib.contextmanager
+    def shared(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive and not self._waiting)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            self._cond.wait_for(lambda: not self._exclusive and not self._shared)
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+_PER_THREAD: Dict[str, _PerThread] = {}
+
+
+def _install_per_thread_stdio():
+    """
+    Route sys.stdin/stdout/stderr/argv through
+    per-thread values, again if replaced since
+    """
+    for name in ("stdin", "stdout", "stderr", "argv"):
+        current = getattr(sys, name)
+        if current is not _PER_THREAD.get(name):
+            _PER_THREAD[name] = (
+                current if isinstance(current, _PerThread) else _PerThread(current)
+            )
+            setattr(sys, name, _PER_THREAD[name])
+
+
+class HookHost:
+    """Loads hook scripts as plugins and runs them on request"""
+
+    def __init__(self, hooks_dir: str = DEFAULT_HOOKS_DIR):
+        self.hooks_dir = Path(hooks_dir).resolve()
+        self.plugins: Dict[Path, Tuple[float, ModuleType]] = {}
+        self.events_served = 0
+        self.last_activity = time.monotonic()
+        self.cwd = os.getcwd()
+        self._lock = threading.Lock()  # plugins, per-hook locks and counters
+        self._hook_locks: Dict[Path, threading.Lock] = {}
+        self._cwd_lock = _CwdLock()
+
+    def load_plugin(self, script: Path) -> ModuleType:
+        """Import a hook script, reusing the loaded module until it changes"""
+        with self._lock:
+            mtime = script.stat().st_mtime
+            cached = self.plugins.get(script)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            name = "hook_" + "".join(c if c.isalnum() else "_" for c in script.stem)
+            spec = importlib.util.spec_from_file_location(name, script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            if not callable(getattr(module, "main", None)):
+                raise ImportError(f"{script.name} has no main() function")
+
+            self.plugins[script] = (mtime, module)
+            return module
+
+    def _hook_lock(self, script: Path, module: ModuleType):
+        """The lock serializing a hook's events, or a no-op for HOST_CONCURRENT hooks"""
+        if getattr(module, "HOST_CONCURRENT", False):
+            return contextlib.nullcontext()
+        with self._lock:
+            return self._hook_locks.setdefault(script, threading.Lock())
+
+    def handle(self, request: Dict) -> Dict:
+        """Run one hook event and return its captured output and exit code"""
+        script = Path(request.get("script", "")).resolve()
+        if self.hooks_dir not in script.parents or not script.is_file():
+            return {"error": f"not a hook in {self.hooks_dir}: {script}"}
+
+        self.last_activity = time.monotonic()
+        try:
+            module = self.load_plugin(script)
+        except Exception as e:
+            return {"error": f"cannot load {script.name}: {e}"}
+
+        cwd = request.get("cwd") or self.cwd
+        cwd_lock = (
+            self._cwd_lock.shared() if cwd == self.cwd else self._cwd_lock.exclusive()
+        )
+        stdout, stderr = io.StringIO(), io.StringIO()
+        stdin = io.TextIOWrapper(
+            io.BytesIO(request.get("stdin", "").encode()), encoding="utf-8"
+        )
+        exit_code = 0
+        with self._hook_lock(script, module), cwd_lock:
+            with self._lock:
+                _install_per_thread_stdio()
+                streams = dict(_PER_THREAD)
+            try:
+                os.chdir(cwd)
+                for name, value in (
+                    ("stdin", stdin),
+                    ("stdout", stdout),
+                    ("stderr", stderr),
+                    ("argv", [str(script), *request.get("args", [])]),
+                ):
+                    streams[name].set(value)
+                with instrument(script.stem, _event_of(request)) as span:
+                    try:
+                        with profile(script.stem):
+                            module.main()
+                    except SystemExit as e:
+                        exit_code = _exit_code(e.code)
+                    except Exception as e:
+                        print(
+                            f"{script.name}: {type(e).__name__}: {e}", file=sys.stderr
+                        )
+                        exit_code = 1
+                    span.outcome = {0: "ok", 2: "blocked"}.get(exit_code, "error")
+            finally:
+                flush_all()  # the host never exits between events, so no atexit flush
+                for stream in streams.values():
+                    stream.reset()
+                os.chdir(self.cwd)
+
+        with self._lock:
+            self.events_served += 1
+        self.last_activity = time.monotonic()
+        return {
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "exit_code": exit_code,
+        }
+
+
+def _event_of(request: Dict) -> str:
+    try:
+        return event_name(json.loads(request.get("stdin") or "{}"))
+    except (ValueError, AttributeError):
+        return ""
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read() or b"{}")
+        except ValueError:
+            reply = {"error": "invalid request"}
+        else:
+            if request.get("command") == "status":
+                host = self.server.host
+                reply = {
+                    "pid": os.getpid(),
+                    "events_served": host.events_served,
+                    "plugins": sorted(p.name for p in host.plugins),
+                }
+            elif request.get("command") == "stop":
+                reply = {"stopping": True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                reply = self.server.host.handle(request)
+        self.wfile.write(json.dumps(reply).encode())
+
+
+class _HostServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, host: HookHost):
+        self.host = host
+        super().__init__(socket_path, _RequestHandler)
+
+
+def _watch_idle(server: _HostServer, idle_timeout: float):
+    """Shut the host down after idle_timeout seconds without events"""
+    while True:
+        time.sleep(min(idle_timeout, 30))
+        if time.monotonic() - server.host.last_activity > idle_timeout:
+            server.shutdown()
+            return
+
+
+def _fold_telemetry(server: _HostServer):
+    """Fold telemetry samples between events, off the hooks' own path"""
+    while True:
+        time.sleep(EXPORT_INTERVAL)
+        # the telemetry paths are relative to the host's own directory
+        with server.host._cwd_lock.shared():
+            compact_if_due()
+
+
+def serve(hooks_dir: str, socket_path: str, idle_timeout: float):
+    """Serve hook events until stopped or idle"""
+    if send_request({"command": "status"}, socket_path) is not None:
+        print(f"Hook host already running on {socket_path}", file=sys.stderr)
+        return
+
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)  # stale socket from a crashed host
+
+    old_umask = os.umask(0o177)  # socket is private to this user
+    try:
+        server = _HostServer(socket_path, HookHost(hooks_dir))
+    finally:
+        os.umask(old_umask)
+
+    signal.signal(
+        signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start()
+    )
+    threading.Thread(target=_fold_telemetry, args=(server,), daemon=True).start()
+    if idle_timeout > 0:
+        threading.Thread(
+            target=_watch_idle, args=(server, idle_timeout), daemon=True
+        ).start()
+
+    print(
+        f"Hook host serving {server.host.hooks_dir} on {socket_path}", file=sys.stderr
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+
+
+def _daemonize():
+    """Detach from the terminal (double fork)"""
+    if os.fork() > 0:
+        os._exit(0)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Persistent host for Claude Code hooks"
+    )
+    parser.add_argument(
+        "--hooks-dir",
+        default=DEFAULT_HOOKS_DIR,
+        help="Directory of hook scripts to serve",
+    )
+    parser.add_argument(
+        "--socket", help="Unix socket path (default: .claude/run/hooks.sock)"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Exit after this many idle seconds (0 = never)",
+    )
+    parser.add_argument("--daemon", action="store_true", help="Run in the background")
+    parser.add_argument(
+        "--status", action="store_true", help="Show status of a running host"
+    )
+    parser.add_argument("--stop", action="store_true", help="Stop a running host")
+    args = parser.parse_args()
+
+    socket_path = args.socket or default_socket_path()
+
+    if args.status or args.stop:
+        reply = send_request(
+            {"command": "stop" if args.stop else "status"}, socket_path
+        )
+        if reply is None:
+            print("Hook host is not running")
+            sys.exit(1)
+        print(json.dumps(reply, indent=2))
+        return
+
+    if args.daemon:
+        _daemonize()
+
+    serve(args.hooks_dir, socket_path, args.idle_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Test-Impact Selection
+
+Runs only the tests affected by what changed, instead of the full suite
+after every edit:
+
+1. A full run records, for every test, the project files its code touched
+   (pytest: impact_pytest.py traces file-level coverage per test)
+2. Later runs diff the working tree against the commit of that full run,
+   ignore files whose content is unchanged since the tests last ran, and
+   select the tests whose recorded files changed, plus changed or new test
+   files and tests that failed last time
+3. A full run happens anyway every FULL_RUN_EVERY selective runs, after
+   FULL_RUN_MAX_AGE, when runner config changes (pytest.ini, conftest.py,
+   package.json, go.mod, ...), or when history was rewritten
+
+Runners share one interface (detect, is_test_file, select, run), so each
+language can use what its toolchain offers: pytest uses the recorded
+coverage map, Jest its own --findRelatedTests, Go the package import graph,
+and Cargo (no per-test dependency data) runs in full when Rust files change.
+
+Usage:
+    python3 .claude/hooks/hooklib/impact.py run             # affected tests only
+    python3 .claude/hooks/hooklib/impact.py run --full      # everything, new map
+    python3 .claude/hooks/hooklib/impact.py run --dry-run   # show the selection
+    python3 .claude/hooks/hooklib/impact.py show
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_DIR = Path(".claude/cache/impact")
+FULL_RUN_EVERY = 20  # selective runs between safety full runs
+FULL_RUN_MAX_AGE = 24 * 3600  # seconds since the last full run
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Selection:
+    """What a runner should run; full=True ignores tests/files"""
+
+    full: bool = False
+    reason: str = ""
+    tests: List[str] = field(default_factory=list)
+    files: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.full and not self.tests and not self.files
+
+
+def _git(root: Path, *args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=root, capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha1(path.read_bytes()).hexdigest()
+    except OSError:
+        return None  # deleted
+
+
+class Runner:
+    """Language-neutral test runner interface"""
+
+    name = ""
+    config_files: tuple = ()  # changes to these force a full run
+    source_suffixes: tuple = ()
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def detect(self) -> bool:
+        raise NotImplementedError
+
+    def is_test_file(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def relevant(self, path: str) -> bool:
+        return (
+            path.endswith(self.source_suffixes) or Path(path).name in self.config_files
+        )
+
+    def exists(self, test: str) -> bool:
+        """
+        Whether a mapped test's file is still there (IDs start with the test file path)
+        """
+        return (self.root / test.split("::")[0]).exists()
+
+    def select(self, changed: List[str], state: Dict) -> Selection:
+        """Default: tests whose recorded files intersect the change set"""
+        changed_set = set(changed)
+        tests = sorted(
+            t
+            for t, info in state.get("tests", {}).items()
+            if changed_set.intersection(info.get("files", []))
+        )
+        tests += [t for t in state.get("failed", []) if t not in tests]
+        files = [
+            p for p in changed if self.is_test_file(p) and (self.root / p).exists()
+        ]
+        # A changed test file runs in full, so its node IDs would only be listed twice
+        tests = [t for t in tests if self.exists(t) and t.split("::")[0] not in files]
+        return Selection(
+            tests=tests,
+            files=files,
+            changed=changed,
+            reason=f"{len(changed)} changed file(s)",
+        )
+
+    def run(self, selection: Selection, record: Path, extra: List[str]) -> int:
+        raise NotImplementedError
+
+    def load_record(self, record: Path) -> Dict[str, Dict]:
+        """Per-test results of the last run: {test: {"files", "outcome", "duration"}}"""
+        return {}
+
+
+class PytestRunner(Runner):
+    name = "pytest"
+    config_files = (
+        "pytest.ini",
+        "conftest.py",
+        "pyproject.toml",
+        "setup.cfg",
+        "tox.ini",
+        "requirements.txt",
+        "requirements-dev.txt",
+    )
+    source_suffixes = (".py",)
+
+    def detect(self) -> bool:
+        if importlib.util.find_spec("pytest") is None:
+            return False
+        markers = ("pytest.ini", "conftest.py", "tox.ini", "setup.cfg")
+        if any((self.root / m).exists() for m in markers):
+            return True
+        pyproject = self.root / "pyproject.toml"
+        if pyproject.exists() and "[tool.pytest" in pyproject.read_text(
+            errors="replace"
+        ):
+            return True
+        return any((self.root / d).is_dir() for d in ("tests", "test"))
+
+    def is_test_file(self, path: str) -> bool:
+        name = Path(path).name
+        return name.endswith(".py") and (
+            name.startswith("test_") or name.endswith("_test.py")
+        )
+
+    def run(self, selection: Selection, record: Path, extra: List[str]) -> int:
+        argv = [sys.executable, "-m", "pytest", "-p", "hooklib.impact_pytest"]
+        env = dict(os.environ, CLAUDE_IMPACT_RECORD=str(record.resolve()))
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(HOOKS_DIR), env.get("PYTHONPATH")])
+        )
+        if not selection.full:
+            select_path = record.with_suffix(".select.json")
+            files = sorted({str((self.root / p).resolve()) for p in selection.files})
+            select_path.write_text(
+                json.dumps({"tests": selection.tests, "files": files})
+            )
+            env["CLAUDE_IMPACT_SELECT"] = str(select_path.resolve())
+            # Only collect the files that hold selected tests
+            argv += sorted(
+                {t.split("::")[0] for t in selection.tests} | set(selection.files)
+            )
+            if importlib.util.find_spec("pytest_cov") is not None:
+                # coverage thresholds are meaningless on a subset
+                argv.append("--no-cov")
+        return subprocess.call(argv + extra, cwd=self.root, env=env)
+
+    def load_record(self, record: Path) -> Dict[str, Dict]:
+        try:
+            return json.loads(record.read_text()).get("tests", {})
+        except (OSError, ValueError):
+            return {}
+
+
+class JestRunner(Runner):
+    name = "jest"
+    config_files = (
+        "package.json",
+        "package-lock.json",
+        "yarn.lock",
+        "pnpm-lock.yaml",
+        "jest.config.js",
+        "jest.config.ts",
+        "jest.config.json",
+        "babel.config.js",
+        "tsconfig.json",
+    )
+    source_suffixes = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+
+    def detect(self) -> bool:
+        if any(
+            (self.root / c).exists()
+            for c in self.config_files
+            if c.startswith("jest.config")
+        ):
+            return True
+        try:
+            package = json.loads((self.root / "package.json").read_text())
+        except (OSError, ValueError):
+            return False
+        deps = {**package.get("dependencies", {}), **package.get("devDependencies", {})}
+        return "jest" in deps or "jest" in package.get("scripts", {}).get("test", "")
+
+    def is_test_file(self, path: str) -> bool:
+        return ".test." in path or ".spec." in path or "/__tests__/" in f"/{path}"
+
+    def select(self, changed: List[str], state: Dict) -> Selection:
+        # Jest resolves the import graph itself
+        return Selection(
+            files=[p for p in changed if (self.root / p).exists()],
+            changed=changed,
+            reason=f"{len(changed)} changed file(s), --findRelatedTests",
+        )
+
+    def run(self, selection: Selection, record: Path, extra: List[str]) -> int:
+        argv = [
+            "npx",
+            "--no-install",
+            "jest",
+            "--json",
+            f"--outputFile={record.resolve()}",
+        ]
+        if not selection.full:
+            argv += ["--passWithNoTests", "--findRelatedTests", *selection.files]
+        return subprocess.call(argv + extra, cwd=self.root)
+
+    def load_record(self, record: Path) -> Dict[str, Dict]:
+        try:
+            data = json.loads(record.read_text())
+        except (OSError, ValueError):
+            return {}
+        tests = {}
+        for suite in data.get("testResults", []):
+            path = os.path.relpath(suite.get("name", ""), self.root)
+            for case in suite.get("assertionResults", []):
+                tests[f"{path}::{case.get('fullName')}"] = {
+                    "files": [path],
+                    "outcome": case.get("status"),
+                    "duration": (case.get("duration") or 0) / 1000,
+                }
+        return tests
+
+
+class GoRunner(Runner):
+    name = "go"
+    config_files = ("go.mod", "go.sum")
+    source_suffixes = (".go",)
+
+    def detect(self) -> bool:
+        return (self.root / "go.mod").exists() and shutil.which("go") is not None
+
+    def is_test_file(self, path: str) -> bool:
+        return path.endswith("_test.go")
+
+    def exists(self, test: str) -> bool:
+        return True
+
+    def _packages(self) -> List[Dict]:
+        fmt = (
+            '{"path":"{{.ImportPath}}","dir":"{{.Dir}}","deps":"{{join .Deps ","}}",'
+            '"tests":"{{join .TestImports ","}},{{join .XTestImports ","}}"}'
+        )
+        try:
+            out = subprocess.run(
+                ["go", "list", "-f", fmt, "./..."],
+                cwd=self.root,
+                capture_output=True,
+                text=True,
+                timeout=120,
+            ).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return []
+        return [json.loads(line) for line in out.splitlines() if line.startswith("{")]
+
+    def select(self, changed: List[str], state: Dict) -> Selection:
+        packages = self._packages()
+        changed_dirs = {str((self.root / p).parent.resolve()) for p in changed}
+        changed_paths = {p["path"] for p in packages if p["dir"] in changed_dirs}
+        selected = [
+            p["path"]
+            for p in packages
+            if p["path"] in changed_paths
+            or changed_paths.intersection(p["deps"].split(","))
+            or changed_paths.intersection(p["tests"].split(","))
+        ]
+        return Selection(
+            tests=selected,
+            changed=changed,
+            reason=f"{len(changed_paths)} changed package(s), import graph",
+        )
+
+    def run(self, selection: Selection, record: Path, extra: List[str]) -> int:
+        targets = ["./..."] if selection.full else selection.tests
+        with open(record, "w") as out:
+            process = subprocess.Popen(
+                ["go", "test", "-json", *extra, *targets],
+                cwd=self.root,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for line in process.stdout:
+                out.write(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get("Action") == "output":
+                    sys.stdout.write(event.get("Output", ""))
+            return process.wait()
+
+    def load_record(self, record: Path) -> Dict[str, Dict]:
+        tests = {}
+        try:
+            lines = record.read_text().splitlines()
+        except OSError:
+            return {}
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("Test") and event.get("Action") in ("pass", "fail", "skip"):
+                outcome = {"pass": "passed", "fail": "failed", "skip": "skipped"}[
+                    event["Action"]
+                ]
+                tests[f"{event['Package']}::{event['Test']}"] = {
+                    "files": [],
+                    "outcome": outcome,
+                    "duration": event.get("Elapsed", 0),
+                }
+        return tests
+
+
+class CargoRunner(Runner):
+    name = "cargo"
+    config_files = ("Cargo.toml", "Cargo.lock", "build.rs")
+    source_suffixes = (".rs",)
+
+    def detect(self) -> bool:
+        return (self.root / "Cargo.toml").exists() and shutil.which("cargo") is not None
+
+    def is_test_file(self, path: str) -> bool:
+        return path.endswith(".rs") and "/tests/" in f"/{path}"
+
+    def select(self, changed: List[str], state: Dict) -> Selection:
+        # No per-test dependency data: any Rust change runs the crate's tests
+        return Selection(
+            full=bool(changed), changed=changed, reason="Rust sources changed"
+        )
+
+    def run(self, selection: Selection, record: Path, extra: List[str]) -> int:
+        return subprocess.call(["cargo", "test", *extra], cwd=self.root)
+
+
+RUNNERS = [PytestRunner, JestRunner, GoRunner, CargoRunner]
+
+
+class ImpactEngine:
+    """Chooses between full and selective runs and maintains per-runner state"""
+
+    def __init__(self, root: str = ".", state_dir: Path = STATE_DIR):
+        self.root = Path(root).resolve()
+        self.state_dir = self.root / state_dir
+
+    def runners(self, names: Optional[List[str]] = None) -> List[Runner]:
+        found = [cls(self.root) for cls in RUNNERS if not names or cls.name in names]
+        return [r for r in found if r.detect()]
+
+    def load_state(self, runner: Runner) -> Dict:
+        try:
+            return json.loads((self.state_dir / f"{runner.name}.json").read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, runner: Runner, state: Dict):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        path = self.state_dir / f"{runner.name}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, separators=(",", ":")))
+        os.replace(tmp, path)
+
+    def changed_files(self, base: str) -> Optional[List[str]]:
+        """
+        Files differing from base (committed, staged,
+        unstaged, untracked); None if base is unusable
+        """
+        if _git(self.root, "merge-base", "--is-ancestor", base, "HEAD") is None:
+            return None  # history rewritten or not a git repo
+        diff = _git(self.root, "diff", "--name-only", base)
+        untracked = _git(self.root, "ls-files", "--others", "--exclude-standard")
+        if diff is None or untracked is None:
+            return None
+        top = _git(self.root, "rev-parse", "--show-toplevel")
+        top_path = Path(top.strip()) if top else self.root
+        paths = set()
+        for line in diff.splitlines():
+            paths.add(os.path.relpath(top_path / line, self.root))
+        # already relative to the working directory
+        paths.update(untracked.splitlines())
+        return sorted(p for p in paths if not p.startswith(".."))
+
+    def plan(self, runner: Runner, state: Dict, force_full: bool = False) -> Selection:
+        """Decide what this runner should run"""
+        if force_full:
+            return Selection(full=True, reason="requested")
+        if not state.get("tests") and not state.get("full_run_at"):
+            return Selection(full=True, reason="no impact map yet")
+        if state.get("selective_runs", 0) >= FULL_RUN_EVERY:
+            return Selection(
+                full=True,
+                reason=f"{FULL_RUN_EVERY} selective runs since the last full run",
+            )
+        if time.time() - state.get("full_run_at", 0) > FULL_RUN_MAX_AGE:
+            return Selection(full=True, reason="last full run is over a day old")
+
+        changed = self.changed_files(state.get("base", ""))
+        if changed is None:
+            return Selection(full=True, reason="base commit of the impact map is gone")
+        hashes = state.get("hashes", {})
+        # Files edited and then reverted to the base no longer show in the diff
+        candidates = sorted(set(changed) | set(hashes))
+        changed = [
+            p
+            for p in candidates
+            if runner.relevant(p)
+            and _file_hash(self.root / p) != hashes.get(p, "unseen")
+        ]
+        config = [p for p in changed if Path(p).name in runner.config_files]
+        if config:
+            return Selection(
+                full=True,
+                changed=changed,
+                reason=f"config changed: {', '.join(config)}",
+            )
+        if not changed:
+            return Selection(reason="no relevant changes")
+        return runner.select(changed, state)
+
+    def execute(
+        self, runner: Runner, selection: Selection, state: Dict, extra: List[str]
+    ) -> int:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        record = self.state_dir / f"{runner.name}.record"
+        record.unlink(missing_ok=True)
+        code = runner.run(selection, record, extra)
+        results = runner.load_record(record)
+
+        tests = (
+            {}
+            if selection.full
+            else {t: i for t, i in state.get("tests", {}).items() if runner.exists(t)}
+        )
+        for test, info in results.items():
+            previous = tests.get(test, {})
+            tests[test] = {
+                **previous,
+                **info,
+                "files": info.get("files") or previous.get("files", []),
+            }
+        failed = sorted(
+            t for t, info in results.items() if info.get("outcome") == "failed"
+        )
+        if not selection.full:
+            failed = sorted(
+                set(failed) | {t for t in state.get("failed", []) if t not in results}
+            )
+
+        if selection.full:
+            head = _git(self.root, "rev-parse", "HEAD")
+            state = {
+                "base": head.strip() if head else "",
+                "full_run_at": time.time(),
+                "selective_runs": 0,
+                "hashes": {},
+            }
+            # Uncommitted edits were just tested: remember them, they aren't changes
+            changed = self.changed_files(state["base"]) or [] if state["base"] else []
+        else:
+            state = dict(state, selective_runs=state.get("selective_runs", 0) + 1)
+            changed = selection.changed
+        state["hashes"] = {
+            **state.get("hashes", {}),
+            **{p: _file_hash(self.root / p) for p in changed if runner.relevant(p)},
+        }
+        state["tests"] = tests
+        state["failed"] = failed
+        self.save_state(runner, state)
+        return code
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run only the tests affected by changes"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run")
+    run.add_argument("--full", action="store_true")
+    run.add_argument("--dry-run", action="store_true")
+    run.add_argument(
+        "--runner", action="append", help="pytest, jest, go, cargo (default: detected)"
+    )
+    run.add_argument(
+        "extra", nargs=argparse.REMAINDER, help="arguments after -- go to the runner"
+    )
+    show = commands.add_parser("show")
+    show.add_argument("--runner", action="append")
+    args = parser.parse_args()
+
+    engine = ImpactEngine()
+    runners = engine.runners(args.runner)
+    if not runners:
+        print("No supported test runner detected", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "show":
+        for runner in runners:
+            state = engine.load_state(runner)
+            age = time.time() - state.get("full_run_at", 0)
+            print(
+                f"{runner.name}: {len(state.get('tests', {}))} test(s) mapped, "
+                f"{state.get('selective_runs', 0)} selective run(s), last full run "
+                f"{age / 3600:.1f}h ago, {len(state.get('failed', []))} failing"
+            )
+        return
+
+    extra = args.extra[1:] if args.extra[:1] == ["--"] else args.extra
+    exit_code = 0
+    for runner in runners:
+        state = engine.load_state(runner)
+        selection = engine.plan(runner, state, args.full)
+        total = len(state.get("tests", {}))
+        if selection.full:
+            print(f"[impact] {runner.name}: full run ({selection.reason})")
+        elif selection.empty:
+            print(f"[impact] {runner.name}: no affected tests ({selection.reason})")
+            continue
+        else:
+            count = len(selection.tests) + len(selection.files)
+            print(
+                f"[impact] {runner.name}: {count} selected of {total} known "
+                f"({selection.reason})"
+            )
+            for item in list(dict.fromkeys(selection.tests + selection.files))[:20]:
+                print(f"           {item}")
+        if args.dry_run:
+            continue
+        start = time.time()
+        code = engine.execute(runner, selection, state, extra)
+        print(f"[impact] {runner.name}: exit {code} in {time.time() - start:.1f}s")
+        exit_code = exit_code or code
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
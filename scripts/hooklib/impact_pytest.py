@@ -0,0 +1,187 @@
+"""
+Pytest Plugin for Test-Impact Selection
+
+Loaded by impact.py with `-p hooklib.impact_pytest`. Does nothing unless
+one of its environment variables is set:
+
+- CLAUDE_IMPACT_RECORD: path to write per-test results to. For every test
+  this is the project files whose code ran during setup, call and teardown,
+  plus the test's outcome and duration. Test IDs and files are relative to
+  the working directory.
+- CLAUDE_IMPACT_SELECT: path to a JSON selection ({"tests": [...],
+  "files": [...]}). Only the listed node IDs, and every test in the listed
+  files (absolute paths), are kept.
+
+File-level tracing uses sys.monitoring on Python 3.12+. Each code object
+reports once per test, then is disabled. Older versions fall back to
+sys.setprofile call events.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Set
+
+import pytest
+
+MONITORING_TOOL_NAME = "claude-impact"
+EXCLUDED_PARTS = (
+    "site-packages",
+    "dist-packages",
+    f"{os.sep}.venv{os.sep}",
+    f"{os.sep}venv{os.sep}",
+)
+
+
+class FileTracer:
+    """Collects the project files whose functions run between start() and stop()"""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root) + os.sep
+        self.files: Set[str] = set()
+        self._seen_codes: Dict[str, bool] = {}
+        self._monitoring = getattr(sys, "monitoring", None)
+        self._tool = None
+
+    def _keep(self, filename: str) -> bool:
+        keep = self._seen_codes.get(filename)
+        if keep is None:
+            if filename.startswith("<"):
+                keep = False  # <string>, <frozen ...>: no file on disk to map
+            else:
+                path = os.path.realpath(filename)
+                keep = path.startswith(self.root) and not any(
+                    p in path for p in EXCLUDED_PARTS
+                )
+            self._seen_codes[filename] = keep
+        return keep
+
+    def _on_start(self, code, offset):
+        if self._keep(code.co_filename):
+            self.files.add(code.co_filename)
+        return self._monitoring.DISABLE  # one event per code object per test
+
+    def _on_profile(self, frame, event, arg):
+        if event == "call" and self._keep(frame.f_code.co_filename):
+            self.files.add(frame.f_code.co_filename)
+
+    def install(self):
+        if self._monitoring is not None:
+            for tool in (self._monitoring.COVERAGE_ID, self._monitoring.PROFILER_ID, 5):
+                if self._monitoring.get_tool(tool) is None:
+                    self._monitoring.use_tool_id(tool, MONITORING_TOOL_NAME)
+                    self._tool = tool
+                    break
+            if self._tool is not None:
+                self._monitoring.register_callback(
+                    self._tool, self._monitoring.events.PY_START, self._on_start
+                )
+
+    def uninstall(self):
+        if self._tool is not None:
+            self._monitoring.set_events(self._tool, 0)
+            self._monitoring.free_tool_id(self._tool)
+            self._tool = None
+
+    def start(self):
+        self.files = set()
+        if self._tool is not None:
+            self._monitoring.restart_events()
+            self._monitoring.set_events(self._tool, self._monitoring.events.PY_START)
+        else:
+            sys.setprofile(self._on_profile)
+            threading.setprofile(self._on_profile)
+
+    def stop(self) -> Set[str]:
+        if self._tool is not None:
+            self._monitoring.set_events(self._tool, 0)
+        else:
+            sys.setprofile(None)
+            threading.setprofile(None)
+        return {os.path.relpath(os.path.realpath(f), self.root) for f in self.files}
+
+
+def test_id(item) -> str:
+    """
+    Node ID relative to the working directory (the project root), not pytest's rootdir
+    """
+    path = os.path.relpath(str(item.path), os.getcwd())
+    _, _, rest = item.nodeid.partition("::")
+    return f"{path}::{rest}" if rest else path
+
+
+class ImpactRecorder:
+    """Records per-test file coverage, outcome and duration"""
+
+    def __init__(self, output: str):
+        self.output = output
+        self.tracer = FileTracer(os.getcwd())
+        self.tests: Dict[str, Dict] = {}
+        self._ids: Dict[str, str] = {}
+
+    def pytest_sessionstart(self, session):
+        self.tracer.install()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        start = time.perf_counter()
+        self._ids[item.nodeid] = test_id(item)
+        self.tracer.start()
+        try:
+            yield
+        finally:
+            files = self.tracer.stop()
+            files.add(os.path.relpath(str(item.path), os.getcwd()))
+            entry = self.tests.setdefault(self._ids[item.nodeid], {"outcome": "passed"})
+            entry["files"] = sorted(files)
+            entry["duration"] = round(time.perf_counter() - start, 4)
+
+    def pytest_runtest_logreport(self, report):
+        key = self._ids.get(report.nodeid, report.nodeid)
+        if report.failed:
+            self.tests.setdefault(key, {})["outcome"] = "failed"
+        elif report.skipped and report.when != "teardown":
+            self.tests.setdefault(key, {})["outcome"] = "skipped"
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.tracer.uninstall()
+        try:
+            with open(self.output, "w") as f:
+                json.dump({"runner": "pytest", "tests": self.tests}, f)
+        except OSError as e:
+            print(f"[impact] cannot write {self.output}: {e}", file=sys.stderr)
+
+
+class ImpactSelector:
+    """Deselects tests outside the selection"""
+
+    def __init__(self, selection_path: str):
+        with open(selection_path) as f:
+            selection = json.load(f)
+        self.tests = set(selection.get("tests", []))
+        self.files = {os.path.realpath(f) for f in selection.get("files", [])}
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        selected, deselected = [], []
+        for item in items:
+            keep = (
+                test_id(item) in self.tests
+                or os.path.realpath(str(item.path)) in self.files
+            )
+            (selected if keep else deselected).append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+
+def pytest_configure(config):
+    if os.environ.get("CLAUDE_IMPACT_SELECT"):
+        config.pluginmanager.register(
+            ImpactSelector(os.environ["CLAUDE_IMPACT_SELECT"]), "impact-select"
+        )
+    if os.environ.get("CLAUDE_IMPACT_RECORD"):
+        config.pluginmanager.register(
+            ImpactRecorder(os.environ["CLAUDE_IMPACT_RECORD"]), "impact-record"
+        )
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Compact, Memory-Mapped File Inventory
+
+A list of relative path strings costs a few hundred bytes per file once
+the str objects (and any Path objects built from them) are counted, and it
+has to be rebuilt by walking the tree on every run. This inventory stores
+the tree as parallel `array` columns instead:
+
+    parent   int32   index of the containing directory entry (-1 for the root)
+    name     uint32  id in the string table (every path component is interned)
+    size     int64   bytes
+    mtime    int64   nanoseconds
+    ext      uint16  id in the extension table
+    flags    uint8   directory / hidden bits
+
+That is 27 bytes per entry plus each distinct name once. The whole
+structure is written to one binary file (.claude/cache/inventory.bin) that
+later runs memory-map: columns are zero-copy memoryviews over the file, so
+loading costs a header parse regardless of tree size, and pages are only
+read when touched.
+
+Freshness is checked against directory mtimes, which change whenever an
+entry is added, removed or renamed inside them. In-place edits to a file do
+not touch its directory, so size and mtime columns can lag behind edits;
+callers that need exact stats should os.stat() the files they care about.
+
+Usage:
+    from hooklib.inventory import Inventory
+    inv = Inventory.open(".")              # load if current, else rebuild and save
+    for path in inv.paths(limit=100): ...
+    inv.extension_counts()                 # {".py": 120, ".md": 40, ...}
+
+Command line:
+    python3 scripts/hooklib/inventory.py build [ROOT]
+    python3 scripts/hooklib/inventory.py stats [ROOT]
+    python3 scripts/hooklib/inventory.py ls [ROOT] [--limit N] [--hidden]
+"""
+
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+INVENTORY_PATH = Path(".claude/cache/inventory.bin")
+SKIP_DIRS = {
+    ".git",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+    "dist",
+    "build",
+    "target",
+}
+# Written to by hooks on every run; indexing them would make the inventory always stale
+SKIP_PATHS = {".claude/cache", ".claude/logs"}
+MAGIC = b"CSINV001"
+# magic, byte order (0 little/1 big), strings, blob bytes, extensions, entries, built_at
+HEADER = struct.Struct("<8sB3xIQIId")
+COLUMNS = [
+    ("parent", "i"),
+    ("name", "I"),
+    ("size", "q"),
+    ("mtime", "q"),
+    ("ext", "H"),
+    ("flags", "B"),
+]
+FLAG_DIR = 1
+FLAG_HIDDEN = 2  # the entry or one of its ancestors starts with "."
+MAX_EXTENSIONS = 0xFFFF
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class Inventory:
+    """
+    A file tree as interned strings and parallel columns
+
+    Entry 0 is the root directory. Entries are in depth-first order, so a
+    directory always comes before its contents.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        strings: List[str],
+        extensions: List[str],
+        columns: Dict[str, object],
+        built_at: float = 0.0,
+    ):
+        self.root = root
+        self._strings = strings
+        self._extensions = extensions
+        self.parent = columns["parent"]
+        self.name = columns["name"]
+        self.size = columns["size"]
+        self.mtime = columns["mtime"]
+        self.ext = columns["ext"]
+        self.flags = columns["flags"]
+        self.built_at = built_at
+        self._mmap: Optional[mmap.mmap] = None
+        self._dir_paths: Dict[int, str] = {0: ""}
+
+    # -- building ---------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls, root: str = ".", skip_dirs=SKIP_DIRS, skip_paths=SKIP_PATHS
+    ) -> "Inventory":
+        """Walk `root` with os.scandir and build the columns"""
+        root = os.path.abspath(root)
+        strings: List[str] = [root]
+        string_ids: Dict[str, int] = {root: 0}
+        extensions: List[str] = [""]
+        extension_ids: Dict[str, int] = {"": 0}
+        columns = {name: array.array(code) for name, code in COLUMNS}
+
+        def intern(text: str) -> int:
+            index = string_ids.get(text)
+            if index is None:
+                index = string_ids[text] = len(strings)
+                strings.append(text)
+            return index
+
+        def add(
+            parent: int, name_id: int, size: int, mtime: int, ext: int, flags: int
+        ) -> int:
+            columns["parent"].append(parent)
+            columns["name"].append(name_id)
+            columns["size"].append(size)
+            columns["mtime"].append(mtime)
+            columns["ext"].append(ext)
+            columns["flags"].append(flags)
+            return len(columns["parent"]) - 1
+
+        st = os.stat(root)
+        add(-1, 0, 0, st.st_mtime_ns, 0, FLAG_DIR)
+        stack = [(root, "", 0, 0)]
+        while stack:
+            directory, relative, index, inherited = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                hidden = inherited | (FLAG_HIDDEN if entry.name.startswith(".") else 0)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        child_relative = (
+                            f"{relative}/{entry.name}" if relative else entry.name
+                        )
+                        if entry.name in skip_dirs or child_relative in skip_paths:
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                        child = add(
+                            index,
+                            intern(entry.name),
+                            0,
+                            st.st_mtime_ns,
+                            0,
+                            FLAG_DIR | hidden,
+                        )
+                        subdirs.append((entry.path, child_relative, child, hidden))
+                    elif entry.is_file():
+                        st = entry.stat()
+                        suffix = os.path.splitext(entry.name)[1].lower()
+                        ext = extension_ids.get(suffix)
+                        if ext is None:
+                            ext = (
+                                len(extensions)
+                                if len(extensions) < MAX_EXTENSIONS
+                                else 0
+                            )
+                            if ext:
+                                extension_ids[suffix] = ext
+                                extensions.append(suffix)
+                        add(
+                            index,
+                            intern(entry.name),
+                            st.st_size,
+                            st.st_mtime_ns,
+                            ext,
+                            hidden,
+                        )
+                except OSError:
+                    continue
+            # Reversed so the stack pops them in name order
+            stack.extend(reversed(subdirs))
+
+        return cls(root, strings, extensions, columns, time.time())
+
+    # -- serialization ----------------------------------------------------
+
+    def save(self, path: Path):
+        """Write the inventory to one binary file (atomically)"""
+        blob = bytearray()
+        offsets = array.array("I", [0])
+        for text in self._strings:
+            blob += text.encode("utf-8", "surrogateescape")
+            offsets.append(len(blob))
+        ext_blob = "\0".join(self._extensions).encode()
+
+        sections = [offsets.tobytes(), bytes(blob), ext_blob]
+        sections += [
+            array.array(code, getattr(self, name)).tobytes() for name, code in COLUMNS
+        ]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    sys.byteorder == "big",
+                    len(self._strings),
+                    len(blob),
+                    len(ext_blob),
+                    len(self),
+                    self.built_at,
+                )
+            )
+            position = HEADER.size
+            for section in sections:
+                padding = _align(position) - position
+                f.write(b"\0" * padding + section)
+                position += padding + len(section)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Inventory"]:
+        """Memory-map a saved inventory; None if missing or unreadable"""
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            (
+                magic,
+                big_endian,
+                n_strings,
+                blob_len,
+                ext_len,
+                n_entries,
+                built_at,
+            ) = HEADER.unpack_from(mapped)
+        except struct.error:
+            mapped.close()
+            return None
+        if magic != MAGIC:
+            mapped.close()
+            return None
+        swap = bool(big_endian) != (sys.byteorder == "big")
+
+        view = memoryview(mapped)
+        views = [view]  # every view of the map, so a failed load can release them
+        position = HEADER.size
+
+        def section(length: int) -> memoryview:
+            nonlocal position
+            start = _align(position)
+            position = start + length
+            if position > len(view):
+                raise ValueError("truncated inventory")
+            views.append(view[start:position])
+            return views[-1]
+
+        def column(code: str, count: int):
+            raw = section(count * array.array(code).itemsize)
+            if not swap:
+                views.append(raw.cast(code))
+                return views[-1]
+            copy = array.array(code, raw.tobytes())
+            copy.byteswap()
+            return copy
+
+        try:
+            offsets = column("I", n_strings + 1)
+            blob = section(blob_len)
+            ext_names = bytes(section(ext_len)).decode().split("\0")
+            columns = {name: column(code, n_entries) for name, code in COLUMNS}
+        except (ValueError, TypeError):
+            for section_view in reversed(views):
+                section_view.release()
+            mapped.close()
+            return None
+
+        strings = _StringTable(offsets, blob)
+        inventory = cls(strings[0], strings, ext_names, columns, built_at)
+        inventory._mmap = mapped
+        return inventory
+
+    @classmethod
+    def open(cls, root: str = ".", path: Optional[Path] = None) -> "Inventory":
+        """
+        Load the saved inventory for `root` if it
+        is current; otherwise rebuild and save it
+        """
+        root = os.path.abspath(root)
+        path = path or Path(root) / INVENTORY_PATH
+        inventory = cls.load(path)
+        if inventory is not None and inventory.root == root and not inventory.changed():
+            return inventory
+        if inventory is not None:
+            inventory.close()
+        inventory = cls.build(root)
+        try:
+            inventory.save(path)
+        except OSError:
+            pass
+        return inventory
+
+    def close(self):
+        """Release the memory map (columns become unusable)"""
+        if self._mmap is None:
+            return
+        for name, _ in COLUMNS:
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                column.release()
+        if isinstance(self._strings, _StringTable):
+            self._strings.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # a caller still holds a view; the map is freed with it
+        self._mmap = None
+
+    # -- queries ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @property
+    def file_count(self) -> int:
+        return sum(1 for f in self.flags if not f & FLAG_DIR)
+
+    def is_dir(self, index: int) -> bool:
+        return bool(self.flags[index] & FLAG_DIR)
+
+    def path(self, index: int) -> str:
+        """Root-relative POSIX path of an entry ("" for the root)"""
+        cached = self._dir_paths.get(index)
+        if cached is not None:
+            return cached
+        parent = self.parent[index]
+        base = self.path(parent)
+        name = self._strings[self.name[index]]
+        result = f"{base}/{name}" if base else name
+        if self.flags[index] & FLAG_DIR:
+            self._dir_paths[index] = result
+        return result
+
+    def extension(self, index: int) -> str:
+        return self._extensions[self.ext[index]]
+
+    def files(self, include_hidden: bool = False) -> Iterator[int]:
+        """Indexes of file entries, in tree order"""
+        skip = FLAG_DIR if include_hidden else FLAG_DIR | FLAG_HIDDEN
+        for index, flags in enumerate(self.flags):
+            if not flags & skip:
+                yield index
+
+    def paths(
+        self, include_hidden: bool = False, limit: Optional[int] = None
+    ) -> Iterator[str]:
+        """Relative paths of files, in tree order"""
+        for count, index in enumerate(self.files(include_hidden)):
+            if limit is not None and count >= limit:
+                return
+            yield self.path(index)
+
+    def extension_counts(self, include_hidden: bool = False) -> Dict[str, int]:
+        """Number of files per lowercased extension ("" for none)"""
+        counts = [0] * len(self._extensions)
+        skip = FLAG_DIR if include_hidden else FLAG_DIR | FLAG_HIDDEN
+        for ext, flags in zip(self.ext, self.flags):
+            if not flags & skip:
+                counts[ext] += 1
+        return {self._extensions[i]: n for i, n in enumerate(counts) if n}
+
+    def total_size(self, include_hidden: bool = False) -> int:
+        skip = FLAG_DIR if include_hidden else FLAG_DIR | FLAG_HIDDEN
+        return sum(
+            size for size, flags in zip(self.size, self.flags) if not flags & skip
+        )
+
+    def changed(self) -> bool:
+        """True if any directory gained, lost or renamed an entry since the build"""
+        for index, flags in enumerate(self.flags):
+            if flags & FLAG_DIR:
+                try:
+                    if (
+                        os.stat(os.path.join(self.root, self.path(index))).st_mtime_ns
+                        != self.mtime[index]
+                    ):
+                        return True
+                except OSError:
+                    return True
+        return False
+
+    def nbytes(self) -> int:
+        """Bytes used by the columns and string data"""
+        total = sum(
+            len(getattr(self, name)) * array.array(code).itemsize
+            for name, code in COLUMNS
+        )
+        if isinstance(self._strings, _StringTable):
+            return total + self._strings.nbytes
+        return total + sum(
+            len(s.encode("utf-8", "surrogateescape")) + 4 for s in self._strings
+        )
+
+
+class _StringTable:
+    """Strings decoded on demand from an offsets column and a UTF-8 blob"""
+
+    def __init__(self, offsets, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._blob[start:end]).decode("utf-8", "surrogateescape")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blob) + len(self._offsets) * 4
+
+    def release(self):
+        for view in (self._offsets, self._blob):
+            if isinstance(view, memoryview):
+                view.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact file inventory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("build", "stats", "ls"):
+        command = sub.add_parser(name)
+        command.add_argument("root", nargs="?", default=".")
+        if name == "ls":
+            command.add_argument("--limit", type=int)
+            command.add_argument(
+                "--hidden",
+                action="store_true",
+                help="Include dotfiles and dot-directories",
+            )
+    args = parser.parse_args()
+
+    path = Path(os.path.abspath(args.root)) / INVENTORY_PATH
+    start = time.perf_counter()
+    if args.command == "build":
+        inventory = Inventory.build(args.root)
+        inventory.save(path)
+        action = "built"
+    else:
+        inventory = Inventory.open(args.root, path)
+        action = "opened"
+    elapsed = time.perf_counter() - start
+
+    if args.command == "ls":
+        for line in inventory.paths(include_hidden=args.hidden, limit=args.limit):
+            print(line)
+        return
+
+    files = inventory.file_count
+    print(f"📦 Inventory {action} in {elapsed * 1000:.1f} ms: {path}")
+    print(
+        f"   Entries: {len(inventory)} ({files} files), {len(inventory._strings)} "
+        "distinct names"
+    )
+    print(
+        f"   Size in memory: {inventory.nbytes() / 1024:.1f} KB "
+        f"({inventory.nbytes() / max(len(inventory), 1):.0f} bytes per entry)"
+    )
+    top = sorted(inventory.extension_counts().items(), key=lambda item: -item[1])[:8]
+    print("   Extensions: " + ", ".join(f"{ext or '(none)'} {n}" for ext, n in top))
+
+
+if __name__ == "__main__":
+    main()
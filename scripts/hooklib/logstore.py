@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Buffered, Rotating, Indexed JSONL Log Store for .claude/logs
+
+Hooks append JSON records to security.log, quality.log and completion.log.
+Appending with open(path, "a") from concurrent hook processes can interleave
+partial lines, the files grow without bound, and answering "what did the
+pre-tool-use hook block yesterday" means scanning every byte with grep.
+
+LogStore fixes all three:
+
+- Records are buffered per process and written with a single O_APPEND
+  write() per flush, so concurrent writers never interleave lines
+- Each flush appends one entry to a sidecar index (<name>.log.idx) with the
+  byte range, time range and hooks of the records it wrote
+- Segments rotate by size or age to <name>.log.<stamp>.gz, one gzip member
+  per index block (with a member index kept alongside); writers only wait
+  for the rename, compression runs after. Only the newest ROTATE_KEEP
+  segments are retained
+- Queries use the indexes to read, or decompress, only the blocks that can
+  match
+
+Usage from a hook:
+    from hooklib.logstore import get_store
+    get_store("security", hook="pre-tool-use").append({"tool": "Bash", ...})
+
+Query from the command line:
+    cd .claude/hooks/hooklib
+    python3 logstore.py query security --since 1d --where tool=Bash
+    python3 logstore.py query quality --hook post-tool-use --count
+    python3 logstore.py stats
+"""
+
+import argparse
+import atexit
+import fcntl
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+LOG_DIR = Path(".claude/logs")
+
+BUFFER_RECORDS = 64  # flush after this many buffered records
+ROTATE_BYTES = 64 * 1024 * 1024  # rotate the active segment past this size
+ROTATE_AGE = 7 * 24 * 3600  # ... or once its first record is this old (seconds)
+ROTATE_KEEP = 20  # rotated segments kept per log
+
+DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _timestamp(record: Dict) -> float:
+    """Epoch seconds of a record's ISO timestamp (0 when missing or invalid)"""
+    value = record.get("timestamp")
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class LogStore:
+    """Append-only JSONL log with a sidecar index and rotation"""
+
+    def __init__(
+        self,
+        name: str,
+        directory: Path = LOG_DIR,
+        hook: Optional[str] = None,
+        rotate_bytes: int = ROTATE_BYTES,
+        rotate_age: float = ROTATE_AGE,
+        keep: int = ROTATE_KEEP,
+        buffer_records: int = BUFFER_RECORDS,
+    ):
+        self.name = name
+        self.directory = Path(directory).resolve()
+        self.hook = hook
+        self.rotate_bytes = rotate_bytes
+        self.rotate_age = rotate_age
+        self.keep = keep
+        self.buffer_records = buffer_records
+        self._buffer: List[Tuple[float, Optional[str], bytes]] = []
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.name}.log"
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / f"{self.name}.log.idx"
+
+    @property
+    def lock_path(self) -> Path:
+        return self.directory / f".{self.name}.log.lock"
+
+    # Writing
+
+    def append(self, record: Dict):
+        """Buffer one record; written on flush(), when the buffer fills, or at exit"""
+        if "timestamp" not in record:
+            record = {"timestamp": datetime.now(timezone.utc).isoformat(), **record}
+        if self.hook and "hook" not in record:
+            record = {**record, "hook": self.hook}
+        line = (json.dumps(record) + "\n").encode()
+        self._buffer.append(
+            (_timestamp(record) or time.time(), record.get("hook"), line)
+        )
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records with one O_APPEND write and index them"""
+        if not self._buffer:
+            return
+        buffered, self._buffer = self._buffer, []
+        data = b"".join(line for _, _, line in buffered)
+        times = [t for t, _, _ in buffered]
+        entry = {
+            "t0": min(times),
+            "t1": max(times),
+            "n": len(buffered),
+            "h": sorted({h for _, h, _ in buffered if h}),
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._maybe_rotate()
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)  # rotation takes LOCK_EX
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                # end of *our* write, even with other writers
+                end = os.lseek(fd, 0, os.SEEK_CUR)
+            finally:
+                os.close(fd)
+            entry["o"], entry["l"] = end - len(data), len(data)
+            fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, (json.dumps(entry, separators=(",", ":")) + "\n").encode())
+            finally:
+                os.close(fd)
+
+    # Rotation
+
+    def _segment_start(self) -> Optional[float]:
+        try:
+            with open(self.index_path) as f:
+                return json.loads(f.readline())["t0"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _needs_rotation(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if size >= self.rotate_bytes:
+            return True
+        start = self._segment_start() if self.rotate_age else None
+        return start is not None and time.time() - start >= self.rotate_age
+
+    def _maybe_rotate(self):
+        if not self._needs_rotation():
+            return
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not self._needs_rotation():
+                return  # another process rotated while we waited
+            rotated = self.rotate()
+        self.compress(rotated)  # writers only wait for the rename
+
+    def rotate(self) -> Path:
+        """
+        Move the active segment aside (caller holds
+        the exclusive lock); compress() it next
+        """
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        rotated = self.directory / f"{self.name}.log.{stamp}"
+        os.replace(self.path, rotated)
+        if self.index_path.exists():
+            os.replace(self.index_path, self._index_for(rotated))
+        return rotated
+
+    def compress(self, rotated: Path):
+        """
+        Gzip a rotated segment as one gzip member per index block, so queries
+        can decompress just the blocks they need, then prune old segments
+        """
+        entries, size = self._entries(rotated), rotated.stat().st_size
+        blocks, covered = [], 0
+        for entry in entries:
+            if entry["o"] > covered:
+                # unindexed records
+                blocks.append({"o": covered, "l": entry["o"] - covered})
+            blocks.append(entry)
+            covered = max(covered, entry["o"] + entry["l"])
+        if size > covered:
+            blocks.append({"o": covered, "l": size - covered})
+
+        compressed = Path(f"{rotated}.gz")
+        index = self._index_for(compressed)
+        members = []
+        with open(rotated, "rb") as src, open(f"{compressed}.tmp", "wb") as dst:
+            for block in blocks:
+                src.seek(block["o"])
+                start = dst.tell()
+                dst.write(gzip.compress(src.read(block["l"]), compresslevel=6))
+                members.append({**block, "o": start, "l": dst.tell() - start})
+        Path(f"{index}.tmp").write_text(
+            "".join(json.dumps(m, separators=(",", ":")) + "\n" for m in members)
+        )
+        # before the segment, so readers never see it unindexed
+        os.replace(f"{index}.tmp", index)
+        os.replace(f"{compressed}.tmp", compressed)
+        rotated.unlink()
+        self._index_for(rotated).unlink(missing_ok=True)
+
+        rotated_segments = sorted(self.directory.glob(f"{self.name}.log.*.gz"))
+        for old in rotated_segments[: max(0, len(rotated_segments) - self.keep)]:
+            old.unlink(missing_ok=True)
+            self._index_for(old).unlink(missing_ok=True)
+
+    # Reading
+
+    def segments(self) -> List[Path]:
+        """Rotated segments oldest first, then the active segment"""
+        rotated: Dict[str, Path] = {}
+        for path in self.directory.glob(f"{self.name}.log.*"):
+            if path.suffix in (".idx", ".tmp"):
+                continue
+            stamp = path.name[len(self.name) + 5 :].split(".")[0]
+            if path.suffix == ".gz" or stamp not in rotated:
+                rotated[
+                    stamp
+                ] = path  # a compressed copy wins over one still being compressed
+        ordered = [rotated[stamp] for stamp in sorted(rotated)]
+        return ordered + ([self.path] if self.path.exists() else [])
+
+    @staticmethod
+    def _index_for(segment: Path) -> Path:
+        return Path(f"{segment}.idx")
+
+    def _entries(self, segment: Path) -> List[Dict]:
+        entries = []
+        try:
+            with open(self._index_for(segment)) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return sorted(entries, key=lambda e: e["o"])
+
+    def _blocks(
+        self, segment: Path, size: int, since: float, until: float, hook: Optional[str]
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Byte ranges of a segment (gzip members if
+        compressed) that may hold matching records
+        """
+        entries = self._entries(segment)
+        if segment.suffix == ".gz" and not entries:
+            yield 0, -1  # no member index: decompress it all
+            return
+
+        # Records written before indexing existed (or by other writers) are scanned
+        covered = 0
+        for entry in entries:
+            if entry["o"] > covered:
+                yield covered, entry["o"] - covered
+            covered = max(covered, entry["o"] + entry["l"])
+            if "t0" not in entry:
+                # an unindexed stretch, compressed on its own
+                yield entry["o"], entry["l"]
+                continue
+            if entry["t1"] < since or entry["t0"] > until:
+                continue
+            if hook and entry.get("h") and hook not in entry["h"]:
+                continue
+            yield entry["o"], entry["l"]
+        if size > covered:
+            yield covered, size - covered
+
+    def _open_segment(self, segment: Path) -> Tuple[Path, Optional[BinaryIO]]:
+        try:
+            return segment, open(segment, "rb")
+        except FileNotFoundError:
+            pass
+        if segment.suffix == ".gz" or segment == self.path:
+            return segment, None  # pruned, or rotated away
+        compressed = Path(f"{segment}.gz")  # compressed since it was listed
+        try:
+            return compressed, open(compressed, "rb")
+        except FileNotFoundError:
+            return compressed, None
+
+    def query(
+        self,
+        since: float = 0.0,
+        until: float = float("inf"),
+        hook: Optional[str] = None,
+        where: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Dict]:
+        """Yield records in the time range matching hook and field filters"""
+        self.flush()
+        where = where or {}
+        # Values as the JSON text spells them (quotes, backslashes, non-ASCII escaped)
+        needles = [json.dumps(value)[1:-1].encode() for value in where.values()]
+        for listed in self.segments():
+            segment, f = self._open_segment(listed)
+            if f is None:
+                continue
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                for offset, length in self._blocks(segment, size, since, until, hook):
+                    f.seek(offset)
+                    if segment.suffix != ".gz":
+                        data = f.read() if length < 0 else f.read(length)
+                    elif length < 0:
+                        data = gzip.GzipFile(fileobj=f).read()  # every member
+                    else:
+                        data = gzip.decompress(f.read(length))
+                    for line in data.splitlines():
+                        if not line or not all(n in line for n in needles):
+                            continue  # cheap byte check before parsing
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if not since <= _timestamp(record) <= until:
+                            continue
+                        if hook and record.get("hook", self.hook) != hook:
+                            continue
+                        if all(_field(record, k) == v for k, v in where.items()):
+                            yield record
+
+    def stats(self) -> Dict:
+        segments = self.segments()
+        return {
+            "log": self.name,
+            "segments": len(segments),
+            "bytes": sum(s.stat().st_size for s in segments),
+        }
+
+
+def _field(record: Dict, key: str) -> Optional[str]:
+    """Dotted-path field lookup, stringified for comparison with CLI values"""
+    value = record
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool) or value is None:
+        return json.dumps(value)  # true / false / null, as written in the log
+    return str(value)
+
+
+_stores: Dict[Tuple[str, str], LogStore] = {}
+
+
+def get_store(
+    name: str, hook: Optional[str] = None, directory: Path = LOG_DIR
+) -> LogStore:
+    """Per-process store for a log, resolved against the current directory"""
+    key = (str(Path(directory).resolve()), name)
+    if key not in _stores:
+        _stores[key] = LogStore(name, directory, hook=hook)
+    return _stores[key]
+
+
+def flush_all():
+    """Flush every store opened in this process"""
+    for store in _stores.values():
+        try:
+            store.flush()
+        except OSError:
+            pass
+
+
+atexit.register(flush_all)
+
+
+def _parse_time(value: Optional[str], default: float) -> float:
+    """Accept relative durations (30m, 2h, 1d) or ISO timestamps"""
+    if not value:
+        return default
+    match = DURATION.match(value)
+    if match:
+        return time.time() - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    return _timestamp({"timestamp": value})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain .claude/logs")
+    parser.add_argument("--dir", default=str(LOG_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="Print matching records")
+    query.add_argument("log", help="security, quality, completion, ...")
+    query.add_argument("--since", help="e.g. 2h, 1d or 2025-11-11T10:00:00")
+    query.add_argument("--until")
+    query.add_argument("--hook")
+    query.add_argument("--where", action="append", default=[], metavar="FIELD=VALUE")
+    query.add_argument("--limit", type=int, default=0)
+    query.add_argument("--count", action="store_true")
+
+    rotate = commands.add_parser("rotate", help="Rotate and compress a log now")
+    rotate.add_argument("log")
+
+    commands.add_parser("stats", help="Segments and size per log")
+
+    args = parser.parse_args()
+
+    if args.command == "query":
+        where = dict(w.split("=", 1) for w in args.where if "=" in w)
+        store = LogStore(args.log, Path(args.dir))
+        records = store.query(
+            _parse_time(args.since, 0.0),
+            _parse_time(args.until, float("inf")),
+            args.hook,
+            where,
+        )
+        count = 0
+        for record in records:
+            count += 1
+            if not args.count:
+                print(json.dumps(record))
+            if args.limit and count >= args.limit:
+                break
+        if args.count:
+            print(count)
+
+    elif args.command == "rotate":
+        store = LogStore(args.log, Path(args.dir))
+        if store.path.exists():
+            with open(store.lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                rotated = store.rotate()
+            store.compress(rotated)
+
+    else:
+        names = sorted(
+            {
+                p.name.split(".log")[0]
+                for p in Path(args.dir).glob("*.log*")
+                if not p.name.startswith(".")
+            }
+        )
+        for name in names:
+            stats = LogStore(name, Path(args.dir)).stats()
+            print(
+                f"{stats['log']:<14} {stats['segments']:>3} segment(s)  "
+                f"{stats['bytes'] / 1024:>10.1f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,934 @@
+#!/usr/bin/env python3
+"""
+Parallel Multi-Language Test Orchestrator
+
+Polyglot projects otherwise run each language's suite on its own, one after
+another. This module runs them all at once, within one CPU budget:
+
+1. Discovers every suite under the project: pytest (pytest.ini, [tool.pytest]
+   in pyproject.toml, ..., or a top-level conftest.py), Jest (jest.config.* or
+   jest in package.json), Go (go.mod) and Cargo (Cargo.toml)
+2. Sizes the CPU budget from the cores this process may use, minus current
+   load average, capped by available memory (MEMORY_PER_WORKER per worker)
+3. Splits the budget between suites by their historical serial time, so
+   the longest suite gets the most workers
+4. Python suites are sharded like pytest-xdist workers: the collected tests
+   are dealt longest-first (by their durations from earlier runs) to the
+   least loaded shard, and each shard is its own pytest process. Jest, Go
+   and Cargo use their native parallelism (--maxWorkers, -p, --test-threads)
+   with the suite's share of the budget
+5. Results are merged into one JUnit XML and one JSON report, and per-test
+   durations are kept for the next schedule
+
+Wall time approaches the longest shard rather than the sum of all suites.
+
+Usage:
+    python3 .claude/hooks/hooklib/orchestrator.py run             # all suites
+    python3 .claude/hooks/hooklib/orchestrator.py run --jobs 8 --kind python --kind go
+    python3 .claude/hooks/hooklib/orchestrator.py run --dry-run   # show the schedule
+    python3 .claude/hooks/hooklib/orchestrator.py list
+"""
+
+import argparse
+import heapq
+import importlib.util
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+STATE_DIR = Path(".claude/cache/orchestrator")
+HISTORY_PATH = STATE_DIR / "durations.json"
+REPORT_JUNIT = Path(".claude/logs/test-report.xml")
+REPORT_JSON = Path(".claude/logs/test-report.json")
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+MEMORY_PER_WORKER = 512 * 1024 * 1024  # bytes of MemAvailable reserved per worker
+MIN_SHARD_SECONDS = 1.0  # a pytest shard must save more than its startup cost
+DEFAULT_TEST_SECONDS = 0.1  # estimate for a test with no recorded duration
+DEFAULT_SUITE_SECONDS = 10.0  # estimate for a suite that has never run
+MAX_OUTPUT_CHARS = 4000  # failure output kept per test case in the reports
+SKIP_DIRS = {
+    ".git",
+    ".claude",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "dist",
+    "build",
+    "target",
+    "vendor",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+    "coverage",
+}
+
+
+@dataclass
+class Case:
+    """One test result, in JUnit terms"""
+
+    classname: str
+    name: str
+    time: float = 0.0
+    outcome: str = "passed"  # passed, failed, error, skipped
+    message: str = ""
+    output: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.classname}::{self.name}"
+
+
+@dataclass
+class Job:
+    """One process to run: a whole suite, or one shard of a Python suite"""
+
+    suite: "Suite"
+    argv: List[str]
+    slots: int
+    estimate: float
+    index: int = 0
+    shards: int = 1
+    env: Dict[str, str] = field(default_factory=dict)
+    output: Optional[Path] = None  # machine-readable results
+    log: Optional[Path] = None  # console output
+    exit_code: Optional[int] = None
+    elapsed: float = 0.0
+    cases: List[Case] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return (
+            f"{self.suite.key} [{self.index + 1}/{self.shards}]"
+            if self.shards > 1
+            else self.suite.key
+        )
+
+
+class Suite:
+    """A test suite rooted at one directory, run by one toolchain"""
+
+    kind = ""
+    markers: tuple = ()
+
+    def __init__(self, root: Path, directory: Path):
+        self.root = root
+        self.directory = directory
+        self.nested: List[Path] = []  # suites of the same kind below this one
+        self.estimate = DEFAULT_SUITE_SECONDS
+        self.max_slots = 1 << 16
+
+    @property
+    def key(self) -> str:
+        relative = os.path.relpath(self.directory, self.root)
+        return f"{self.kind}:{relative}"
+
+    @classmethod
+    def detect(cls, directory: Path, names: set, inside: bool = False) -> bool:
+        """Whether directory roots a suite; inside: below one of the same kind"""
+        return bool(names.intersection(cls.markers))
+
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    def prepare(self, history: Dict):
+        """Estimate serial time and how many workers the suite can use"""
+        self.estimate = history.get("serial", DEFAULT_SUITE_SECONDS)
+
+    def jobs(self, slots: int, state_dir: Path) -> List[Job]:
+        raise NotImplementedError
+
+    def parse(self, job: Job) -> List[Case]:
+        raise NotImplementedError
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(errors="replace")
+    except OSError:
+        return ""
+
+
+def _trim(text: str) -> str:
+    return text if len(text) <= MAX_OUTPUT_CHARS else "...\n" + text[-MAX_OUTPUT_CHARS:]
+
+
+def _junit_cases(path: Path) -> List[Case]:
+    """Test cases from a JUnit XML file (as written by pytest --junitxml)"""
+    try:
+        tree = ET.parse(path)
+    except (OSError, ET.ParseError):
+        return []
+    cases = []
+    for element in tree.iter("testcase"):
+        case = Case(
+            element.get("classname", ""),
+            element.get("name", ""),
+            float(element.get("time") or 0),
+        )
+        for outcome in ("failure", "error", "skipped"):
+            child = element.find(outcome)
+            if child is not None:
+                case.outcome = {
+                    "failure": "failed",
+                    "error": "error",
+                    "skipped": "skipped",
+                }[outcome]
+                case.message = child.get("message", "")
+                case.output = _trim(child.text or "")
+                break
+        cases.append(case)
+    return cases
+
+
+def junit_key(nodeid: str) -> str:
+    """The classname::name pytest's JUnit report uses for a node ID"""
+    names = [n for n in nodeid.split("::") if n != "()"]
+    names[0] = re.sub(r"\.py$", "", names[0].replace("/", "."))
+    return f"{'.'.join(names[:-1])}::{names[-1]}"
+
+
+class PythonSuite(Suite):
+    kind = "python"
+    markers = ("pytest.ini", "conftest.py", "pyproject.toml", "tox.ini", "setup.cfg")
+
+    @classmethod
+    def detect(cls, directory: Path, names: set, inside: bool = False) -> bool:
+        if "pytest.ini" in names:
+            return True
+        if "conftest.py" in names and not inside:
+            return True  # a conftest.py below a rootdir belongs to that suite
+        for name, section in (
+            ("pyproject.toml", "[tool.pytest"),
+            ("tox.ini", "[pytest]"),
+            ("setup.cfg", "[tool:pytest]"),
+        ):
+            if name in names and section in _read(directory / name):
+                return True
+        return False
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("pytest") is not None
+
+    def _base_argv(self) -> List[str]:
+        argv = [sys.executable, "-m", "pytest", "--rootdir=."]
+        for nested in self.nested:
+            argv.append(f"--ignore={os.path.relpath(nested, self.directory)}")
+        return argv
+
+    def collect(self) -> Optional[List[str]]:
+        """Node IDs relative to the suite directory, or None if collection fails"""
+        try:
+            result = subprocess.run(
+                self._base_argv() + ["--collect-only", "-q", "-p", "no:cacheprovider"],
+                cwd=self.directory,
+                capture_output=True,
+                text=True,
+                timeout=300,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode not in (0, 5):  # 5: no tests collected
+            return None
+        return [
+            line.strip()
+            for line in result.stdout.splitlines()
+            if "::" in line and not line.startswith(" ")
+        ]
+
+    def prepare(self, history: Dict):
+        self.tests = self.collect()
+        if self.tests is None:
+            super().prepare(history)
+            self.max_slots = 1  # let a plain run report the collection error
+            return
+        cases = history.get("cases", {})
+        known = sorted(cases.values())
+        fallback = known[len(known) // 2] if known else DEFAULT_TEST_SECONDS
+        self.durations = {t: cases.get(junit_key(t), fallback) for t in self.tests}
+        self.estimate = sum(self.durations.values())
+        self.max_slots = max(
+            1, min(len(self.tests), int(self.estimate // MIN_SHARD_SECONDS) or 1)
+        )
+
+    def jobs(self, slots: int, state_dir: Path) -> List[Job]:
+        shards = max(1, min(slots, self.max_slots))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(HOOKS_DIR), env.get("PYTHONPATH")])
+        )
+        if shards == 1:
+            output = state_dir / f"{_slug(self.key)}.xml"
+            return [
+                Job(
+                    self,
+                    self._base_argv() + [f"--junitxml={output}"],
+                    slots=1,
+                    estimate=self.estimate,
+                    env=env,
+                    output=output,
+                )
+            ]
+
+        # Longest processing time first: each test goes to the least loaded shard
+        loads = [(0.0, i) for i in range(shards)]
+        assigned: List[List[str]] = [[] for _ in range(shards)]
+        for test in sorted(self.tests, key=lambda t: self.durations[t], reverse=True):
+            load, index = heapq.heappop(loads)
+            assigned[index].append(test)
+            heapq.heappush(loads, (load + self.durations[test], index))
+        estimates = dict((i, load) for load, i in loads)
+
+        # shards would race on .pytest_cache
+        extra = ["-p", "hooklib.impact_pytest", "-p", "no:cacheprovider"]
+        if importlib.util.find_spec("pytest_cov") is not None:
+            extra.append("--no-cov")  # per-shard coverage thresholds would fail
+        jobs = []
+        for index, tests in enumerate(assigned):
+            base = state_dir / f"{_slug(self.key)}-{index}"
+            selection = Path(f"{base}.select.json")
+            selection.write_text(json.dumps({"tests": tests}))
+            files = sorted({t.split("::")[0] for t in tests})
+            argv = self._base_argv() + extra + [f"--junitxml={base}.xml", *files]
+            jobs.append(
+                Job(
+                    self,
+                    argv,
+                    slots=1,
+                    estimate=estimates[index],
+                    index=index,
+                    shards=shards,
+                    env=dict(env, CLAUDE_IMPACT_SELECT=str(selection.resolve())),
+                    output=Path(f"{base}.xml"),
+                )
+            )
+        return jobs
+
+    def parse(self, job: Job) -> List[Case]:
+        return _junit_cases(job.output)
+
+
+class JestSuite(Suite):
+    kind = "jest"
+    markers = (
+        "package.json",
+        "jest.config.js",
+        "jest.config.ts",
+        "jest.config.mjs",
+        "jest.config.json",
+    )
+
+    @classmethod
+    def detect(cls, directory: Path, names: set, inside: bool = False) -> bool:
+        if any(n.startswith("jest.config.") for n in names):
+            return True
+        if "package.json" not in names:
+            return False
+        try:
+            package = json.loads(_read(directory / "package.json"))
+        except ValueError:
+            return False
+        deps = {**package.get("dependencies", {}), **package.get("devDependencies", {})}
+        return "jest" in deps or "jest" in package.get("scripts", {}).get("test", "")
+
+    def _binary(self) -> Optional[Path]:
+        """
+        node_modules/.bin/jest here or in a parent
+        (workspaces hoist it); npx would download it
+        """
+        for directory in (self.directory, *self.directory.parents):
+            binary = directory / "node_modules" / ".bin" / "jest"
+            if binary.exists():
+                return binary
+            if directory == self.root:
+                return None
+        return None
+
+    def available(self) -> bool:
+        return shutil.which("node") is not None and self._binary() is not None
+
+    def jobs(self, slots: int, state_dir: Path) -> List[Job]:
+        output = state_dir / f"{_slug(self.key)}.json"
+        argv = [
+            str(self._binary()),
+            "--ci",
+            "--json",
+            f"--outputFile={output}",
+            f"--maxWorkers={slots}",
+        ]
+        if self.nested:
+            patterns = ["/node_modules/"] + [
+                f"<rootDir>/{os.path.relpath(n, self.directory)}/" for n in self.nested
+            ]
+            argv += ["--testPathIgnorePatterns", *patterns]
+        return [Job(self, argv, slots=slots, estimate=self.estimate, output=output)]
+
+    def parse(self, job: Job) -> List[Case]:
+        try:
+            data = json.loads(job.output.read_text())
+        except (OSError, ValueError):
+            return []
+        cases = []
+        for result in data.get("testResults", []):
+            path = os.path.relpath(result.get("name", ""), self.directory)
+            assertions = result.get("assertionResults", [])
+            if not assertions and result.get("status") == "failed":
+                cases.append(
+                    Case(
+                        path,
+                        "(suite)",
+                        outcome="error",
+                        message="test file failed to run",
+                        output=_trim(result.get("message", "")),
+                    )
+                )
+            for assertion in assertions:
+                status = assertion.get("status")
+                failures = "\n".join(assertion.get("failureMessages") or [])
+                cases.append(
+                    Case(
+                        path,
+                        assertion.get("fullName") or assertion.get("title", ""),
+                        (assertion.get("duration") or 0) / 1000,
+                        outcome={"passed": "passed", "failed": "failed"}.get(
+                            status, "skipped"
+                        ),
+                        message=failures.splitlines()[0] if failures else "",
+                        output=_trim(failures),
+                    )
+                )
+        return cases
+
+
+class GoSuite(Suite):
+    kind = "go"
+    markers = ("go.mod",)
+
+    def available(self) -> bool:
+        return shutil.which("go") is not None
+
+    def jobs(self, slots: int, state_dir: Path) -> List[Job]:
+        output = state_dir / f"{_slug(self.key)}.jsonl"
+        return [
+            Job(
+                self,
+                ["go", "test", "-json", f"-p={slots}", "./..."],
+                slots=slots,
+                estimate=self.estimate,
+                output=output,
+            )
+        ]
+
+    def parse(self, job: Job) -> List[Case]:
+        outputs: Dict[Tuple[str, str], List[str]] = {}
+        cases = []
+        for line in _read(job.output).splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            key = (event.get("Package", ""), event.get("Test") or "")
+            action = event.get("Action")
+            if action == "output":
+                outputs.setdefault(key, []).append(event.get("Output", ""))
+            elif action in ("pass", "fail", "skip") and (key[1] or action == "fail"):
+                text = "".join(outputs.pop(key, []))
+                if not key[1] and any(c.classname == key[0] for c in cases):
+                    continue  # a package failing because a test failed
+                cases.append(
+                    Case(
+                        key[0],
+                        key[1] or "(package)",
+                        event.get("Elapsed") or 0,
+                        outcome={
+                            "pass": "passed",
+                            "fail": "failed" if key[1] else "error",
+                            "skip": "skipped",
+                        }[action],
+                        output=_trim(text) if action == "fail" else "",
+                    )
+                )
+        return cases
+
+
+class CargoSuite(Suite):
+    kind = "cargo"
+    markers = ("Cargo.toml",)
+
+    TEST_LINE = re.compile(r"^test (\S+) \.\.\. (ok|FAILED|ignored)")
+    FAILURE_HEADER = re.compile(r"^---- (\S+) stdout ----$")
+
+    def available(self) -> bool:
+        return shutil.which("cargo") is not None
+
+    def jobs(self, slots: int, state_dir: Path) -> List[Job]:
+        env = dict(os.environ, CARGO_BUILD_JOBS=str(slots))
+        return [
+            Job(
+                self,
+                ["cargo", "test", "--no-fail-fast", "--", f"--test-threads={slots}"],
+                slots=slots,
+                estimate=self.estimate,
+                env=env,
+            )
+        ]
+
+    def parse(self, job: Job) -> List[Case]:
+        # Stable libtest has no machine-readable output or per-test timings
+        crate = self.directory.name
+        cases, failures, current = {}, {}, None
+        for line in _read(job.log).splitlines():
+            match = self.TEST_LINE.match(line)
+            if match:
+                name, status = match.groups()
+                cases[name] = Case(
+                    crate,
+                    name,
+                    outcome={"ok": "passed", "FAILED": "failed"}.get(status, "skipped"),
+                )
+                continue
+            header = self.FAILURE_HEADER.match(line)
+            if header:
+                current = header.group(1)
+                failures[current] = []
+            elif current is not None:
+                if line.startswith("failures:") or line.startswith("---- "):
+                    current = None
+                else:
+                    failures[current].append(line)
+        for name, lines in failures.items():
+            if name in cases:
+                cases[name].output = _trim("\n".join(lines).strip())
+                cases[name].message = next(
+                    (line for line in lines if "panicked" in line), ""
+                )
+        return list(cases.values())
+
+
+SUITES = [PythonSuite, JestSuite, GoSuite, CargoSuite]
+
+
+def _slug(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", key).strip("_")
+
+
+def discover(root: Path, kinds: Optional[List[str]] = None) -> List[Suite]:
+    """
+    Every suite under root; a suite nested in one of the same kind is run on its own
+    """
+    found: List[Suite] = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        names = {e.name for e in entries if e.is_file()}
+        for cls in SUITES:
+            if kinds and cls.kind not in kinds:
+                continue
+            parent = next(
+                (
+                    s
+                    for s in reversed(found)
+                    if s.kind == cls.kind
+                    and Path(directory).is_relative_to(s.directory)
+                ),
+                None,
+            )
+            if not cls.detect(Path(directory), names, parent is not None):
+                continue
+            suite = cls(root, Path(directory))
+            if parent is not None:
+                if cls is CargoSuite and "[workspace]" in _read(
+                    parent.directory / "Cargo.toml"
+                ):
+                    continue  # workspace members are tested by the workspace
+                parent.nested.append(suite.directory)
+            found.append(suite)
+        stack.extend(
+            sorted(
+                (
+                    Path(e.path)
+                    for e in entries
+                    if e.is_dir(follow_symlinks=False) and e.name not in SKIP_DIRS
+                ),
+                reverse=True,
+            )
+        )
+    return found
+
+
+def cpu_budget(requested: Optional[int] = None) -> int:
+    """Workers to use: usable cores minus current load, capped by available memory"""
+    if requested:
+        return requested
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        cores -= int(os.getloadavg()[0])
+    except OSError:
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            available = next(
+                int(line.split()[1]) * 1024
+                for line in f
+                if line.startswith("MemAvailable:")
+            )
+        cores = min(cores, available // MEMORY_PER_WORKER)
+    except (OSError, StopIteration, ValueError):
+        pass
+    return max(1, cores)
+
+
+def allocate(suites: List[Suite], budget: int) -> Dict[str, int]:
+    """
+    Slots per suite, minimizing the largest
+    estimate/slots (every suite gets at least one)
+    """
+    slots = {s.key: 1 for s in suites}
+    heap = [(-s.estimate, s.key, s) for s in suites if s.max_slots > 1]
+    heapq.heapify(heap)
+    spare = budget - len(suites)
+    while spare > 0 and heap:
+        _, key, suite = heapq.heappop(heap)
+        slots[key] += 1
+        spare -= 1
+        if slots[key] < suite.max_slots:
+            heapq.heappush(heap, (-suite.estimate / slots[key], key, suite))
+    return slots
+
+
+class Orchestrator:
+    """Discovers, schedules and runs every suite, then merges the results"""
+
+    def __init__(self, root: str = ".", state_dir: Path = STATE_DIR):
+        self.root = Path(root).resolve()
+        self.state_dir = self.root / state_dir
+        self.history_path = self.root / HISTORY_PATH
+        self._running: Dict[int, subprocess.Popen] = {}
+
+    def load_history(self) -> Dict:
+        try:
+            return json.loads(self.history_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save_history(self, history: Dict):
+        self.history_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.history_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(history, separators=(",", ":")))
+        os.replace(tmp, self.history_path)
+
+    def plan(self, suites: List[Suite], budget: int) -> List[Job]:
+        """Jobs for every suite, longest estimate first"""
+        history = self.load_history()
+        with ThreadPoolExecutor(
+            max_workers=max(1, len(suites))
+        ) as pool:  # pytest collection is slow-ish
+            list(pool.map(lambda s: s.prepare(history.get(s.key, {})), suites))
+        slots = allocate(suites, budget)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [
+            job
+            for suite in suites
+            for job in suite.jobs(slots[suite.key], self.state_dir)
+        ]
+        for job in jobs:
+            job.log = self.state_dir / f"{_slug(job.suite.key)}-{job.index}.log"
+        return sorted(jobs, key=lambda j: j.estimate, reverse=True)
+
+    def _run_job(self, job: Job, timeout: Optional[float]) -> Job:
+        if job.output is not None:
+            job.output.unlink(missing_ok=True)
+        start = time.time()
+        with open(job.log, "w") as log:
+            process = subprocess.Popen(
+                job.argv,
+                cwd=job.suite.directory,
+                env=job.env or None,
+                stdout=subprocess.PIPE if job.suite.kind == "go" else log,
+                stderr=subprocess.STDOUT,
+                text=True,
+                start_new_session=True,
+            )
+            self._running[id(job)] = process
+            try:
+                # `go test -json` writes its events to stdout
+                if job.suite.kind == "go":
+                    with open(job.output, "w") as events:
+                        for line in process.stdout:
+                            events.write(line)
+                            if line.startswith("{"):
+                                try:
+                                    log.write(json.loads(line).get("Output", ""))
+                                except ValueError:
+                                    log.write(line)
+                job.exit_code = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill(process)
+                job.exit_code = -1
+                log.write(f"\n[tests] timed out after {timeout:.0f}s\n")
+            finally:
+                self._running.pop(id(job), None)
+        job.elapsed = time.time() - start
+        job.cases = job.suite.parse(job)
+        if job.exit_code == 5 and job.suite.kind == "python" and not job.cases:
+            job.exit_code = 0  # pytest: nothing collected
+        return job
+
+    def run(self, jobs: List[Job], timeout: Optional[float] = None) -> List[Job]:
+        done = []
+        pool = ThreadPoolExecutor(max_workers=max(1, len(jobs)))
+        try:
+            futures = [pool.submit(self._run_job, job, timeout) for job in jobs]
+            for future in as_completed(futures):
+                job = future.result()
+                done.append(job)
+                _print_job(job)
+        except KeyboardInterrupt:
+            for process in list(self._running.values()):
+                _kill(process)
+            raise
+        finally:
+            pool.shutdown(wait=True)
+        self._update_history(done)
+        return done
+
+    def _update_history(self, jobs: List[Job]):
+        history = self.load_history()
+        by_suite: Dict[str, List[Job]] = {}
+        for job in jobs:
+            by_suite.setdefault(job.suite.key, []).append(job)
+        for key, suite_jobs in by_suite.items():
+            cases = [c for j in suite_jobs for c in j.cases]
+            timed = {c.key: round(c.time, 4) for c in cases if c.time}
+            serial = (
+                sum(timed.values())
+                if timed
+                else sum(j.elapsed * j.slots for j in suite_jobs)
+            )
+            history[key] = {
+                "cases": timed,
+                "serial": round(serial, 3),
+                "wall": round(max(j.elapsed for j in suite_jobs), 3),
+                "at": time.time(),
+            }
+        self.save_history(history)
+
+
+def _kill(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)  # the runner's own workers too
+    except OSError:
+        pass
+    process.wait()
+
+
+def _counts(cases: List[Case]) -> Dict[str, int]:
+    counts = {"tests": len(cases), "failures": 0, "errors": 0, "skipped": 0}
+    for case in cases:
+        if case.outcome == "failed":
+            counts["failures"] += 1
+        elif case.outcome == "error":
+            counts["errors"] += 1
+        elif case.outcome == "skipped":
+            counts["skipped"] += 1
+    return counts
+
+
+def _print_job(job: Job):
+    counts = _counts(job.cases)
+    passed = counts["tests"] - counts["failures"] - counts["errors"] - counts["skipped"]
+    status = "ok" if job.exit_code == 0 else f"FAILED (exit {job.exit_code})"
+    print(
+        f"[tests] {job.label}: {passed} passed, {counts['failures']} failed, "
+        f"{counts['errors']} error(s), "
+        f"{counts['skipped']} skipped in {job.elapsed:.1f}s - {status}",
+        flush=True,
+    )
+    if job.exit_code != 0 and not counts["failures"] and not counts["errors"]:
+        tail = _read(job.log).splitlines()[-15:]  # e.g. a build or collection error
+        for line in tail:
+            print(f"    {line}")
+
+
+def write_reports(
+    jobs: List[Job], wall: float, junit_path: Path, json_path: Path
+) -> Dict:
+    """Merge every job's results into one JUnit XML and one JSON report"""
+    suites: Dict[str, List[Job]] = {}
+    for job in jobs:
+        suites.setdefault(job.suite.key, []).append(job)
+
+    root = ET.Element("testsuites", name="claude-tests", time=f"{wall:.3f}")
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall": round(wall, 3),
+        "suites": [],
+    }
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    for key, suite_jobs in sorted(suites.items()):
+        cases = [c for j in sorted(suite_jobs, key=lambda j: j.index) for c in j.cases]
+        counts = _counts(cases)
+        failed = any(j.exit_code != 0 for j in suite_jobs)
+        if failed and not counts["failures"] and not counts["errors"]:
+            # The runner failed without a failing test (build, collection, timeout)
+            output = _trim(
+                "\n".join(_read(j.log) for j in suite_jobs if j.exit_code != 0)
+            )
+            cases.append(
+                Case(
+                    key,
+                    "(runner)",
+                    outcome="error",
+                    message="test runner failed",
+                    output=output,
+                )
+            )
+            counts = _counts(cases)
+        suite_wall = max(j.elapsed for j in suite_jobs)
+        element = ET.SubElement(
+            root,
+            "testsuite",
+            name=key,
+            time=f"{suite_wall:.3f}",
+            **{k: str(v) for k, v in counts.items()},
+        )
+        for case in cases:
+            testcase = ET.SubElement(
+                element,
+                "testcase",
+                classname=case.classname,
+                name=case.name,
+                time=f"{case.time:.3f}",
+            )
+            if case.outcome in ("failed", "error"):
+                child = ET.SubElement(
+                    testcase,
+                    "failure" if case.outcome == "failed" else "error",
+                    message=case.message,
+                )
+                child.text = case.output
+            elif case.outcome == "skipped":
+                ET.SubElement(testcase, "skipped", message=case.message)
+        for name in totals:
+            totals[name] += counts[name]
+        report["suites"].append(
+            {
+                "name": key,
+                "directory": os.path.relpath(suite_jobs[0].suite.directory),
+                "status": "failed" if failed else "passed",
+                "exit_codes": [j.exit_code for j in suite_jobs],
+                "shards": len(suite_jobs),
+                "workers": sum(j.slots for j in suite_jobs),
+                "wall": round(suite_wall, 3),
+                "serial": round(sum(c.time for c in cases), 3),
+                **counts,
+                "cases": [
+                    {
+                        "classname": c.classname,
+                        "name": c.name,
+                        "time": round(c.time, 4),
+                        "outcome": c.outcome,
+                        "message": c.message,
+                        "output": c.output,
+                    }
+                    for c in cases
+                ],
+            }
+        )
+    root.attrib.update({k: str(v) for k, v in totals.items()})
+    report.update(totals)
+
+    for path in (junit_path, json_path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+    ET.indent(root)
+    ET.ElementTree(root).write(junit_path, encoding="utf-8", xml_declaration=True)
+    json_path.write_text(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every test suite in parallel")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run")
+    run.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="worker budget (default: free cores, memory permitting)",
+    )
+    run.add_argument(
+        "--kind", action="append", help="python, jest, go, cargo (default: all)"
+    )
+    run.add_argument("--timeout", type=float, help="seconds per job")
+    run.add_argument("--junit", type=Path, default=REPORT_JUNIT)
+    run.add_argument("--json", type=Path, default=REPORT_JSON)
+    run.add_argument("--dry-run", action="store_true")
+    listing = commands.add_parser("list")
+    listing.add_argument("--kind", action="append")
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator()
+    suites = discover(orchestrator.root, args.kind)
+    missing = [s for s in suites if not s.available()]
+    if args.command == "list":
+        for suite in suites:
+            note = "  (toolchain not installed)" if suite in missing else ""
+            print(f"{suite.key}{note}")
+        return
+    for suite in missing:
+        print(f"[tests] {suite.key}: skipped, toolchain not installed", file=sys.stderr)
+    suites = [s for s in suites if s not in missing]
+    if not suites:
+        print("No runnable test suites found", file=sys.stderr)
+        sys.exit(1)
+
+    budget = cpu_budget(args.jobs)
+    jobs = orchestrator.plan(suites, budget)
+    serial = sum(s.estimate for s in suites)
+    longest = max(j.estimate for j in jobs)
+    print(
+        f"[tests] {len(suites)} suite(s), {len(jobs)} job(s) on {budget} worker(s); "
+        f"estimated {serial:.1f}s serial, {longest:.1f}s longest job"
+    )
+    for job in jobs:
+        print(f"           {job.label}: {job.slots} worker(s), ~{job.estimate:.1f}s")
+    if args.dry_run:
+        return
+
+    start = time.time()
+    try:
+        jobs = orchestrator.run(jobs, args.timeout)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    wall = time.time() - start
+    report = write_reports(jobs, wall, args.junit, args.json)
+    busy = sum(j.elapsed for j in jobs)
+    print(
+        f"[tests] {report['tests']} test(s), {report['failures']} failed, "
+        f"{report['errors']} error(s), "
+        f"{report['skipped']} skipped; wall {wall:.1f}s for {busy:.1f}s of runner time"
+    )
+    print(f"[tests] reports: {args.junit}, {args.json}")
+    sys.exit(1 if any(s["status"] == "failed" for s in report["suites"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
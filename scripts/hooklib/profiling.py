@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+On-Demand Profiling for Hook Invocations
+
+When profiling is enabled, a sampled fraction of hook invocations run under
+cProfile and tracemalloc. Each profile is written to .claude/logs/profiles/
+as <hook>-<timestamp>-<pid>-<n>.prof (pstats format), with a matching .mem.json
+listing the top allocation sites and peak traced memory. At a low sample
+rate this can stay on during normal work.
+
+Enable with an environment variable:
+    CLAUDE_HOOK_PROFILE=1 CLAUDE_HOOK_PROFILE_RATE=0.1 claude
+
+or in .claude/settings.json:
+    {
+      "profiling": {
+        "enabled": true,
+        "sampleRate": 0.05,
+        "hooks": ["rag-prompt-enhance", "safety"],
+        "tracemalloc": true
+      }
+    }
+
+Hooks run by the persistent host or the dispatcher are profiled without
+changes. A standalone hook wraps its main:
+
+    from hooklib.profiling import profiled
+
+    @profiled("rag-prompt-enhance")
+    def main(): ...
+
+Summarize hot functions and allocation sites across all captured profiles:
+    python3 .claude/hooks/hooklib/profiling.py summary --hook rag-prompt-enhance \
+        --top 20
+"""
+
+import contextlib
+import functools
+import io
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+PROFILE_DIR = Path(".claude/logs/profiles")
+SETTINGS_FILES = [".claude/settings.json", ".claude/settings.local.json"]
+DEFAULT_SAMPLE_RATE = 1.0  # when enabled by env var without a rate
+PROFILE_KEEP = 500  # newest profile captures kept on disk
+MEMORY_TOP = 25  # allocation sites recorded per capture
+TRACEMALLOC_FRAMES = 1
+
+# Threads inside a profiled invocation; the host runs hooks on many threads,
+# so it is only read and changed under _lock
+_active: Set[int] = set()
+_lock = threading.Lock()
+# The host captures many invocations per second in one process
+_sequence = itertools.count(1)
+
+
+def load_config() -> Dict:
+    """Profiling config; environment variables override settings.json"""
+    config: Dict = {}
+    for path in SETTINGS_FILES:
+        try:
+            with open(path) as f:
+                config.update(json.load(f).get("profiling", {}))
+        except (OSError, ValueError, AttributeError):
+            continue
+
+    env = os.environ.get("CLAUDE_HOOK_PROFILE")
+    if env is not None:
+        config["enabled"] = env not in ("", "0", "false", "no")
+        if env not in ("1", "true", "yes", "0", "false", "no", ""):
+            config["hooks"] = [h.strip() for h in env.split(",") if h.strip()]
+    if "CLAUDE_HOOK_PROFILE_RATE" in os.environ:
+        try:
+            config["sampleRate"] = float(os.environ["CLAUDE_HOOK_PROFILE_RATE"])
+        except ValueError:
+            pass
+    return config
+
+
+def enabled_for(hook: str, config: Optional[Dict] = None) -> bool:
+    """Whether profiling is switched on for this hook (before sampling)"""
+    config = load_config() if config is None else config
+    if not config.get("enabled"):
+        return False
+    hooks = config.get("hooks")
+    return not hooks or hook in hooks
+
+
+def _prune(directory: Path, keep: int = PROFILE_KEEP):
+    captures = sorted(directory.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in captures[: max(0, len(captures) - keep)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".mem.json").unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def profile(hook: str, config: Optional[Dict] = None) -> Iterator[bool]:
+    """
+    Profile the enclosed block if profiling is enabled and this call is sampled
+
+    Invocations on other threads (the persistent host) are profiled too, but
+    tracemalloc is process-wide, so only a capture that starts while no
+    other one is running records memory.
+
+    Yields:
+        True when this invocation is being profiled
+    """
+    config = load_config() if config is None else config
+    thread = threading.get_ident()
+    with _lock:
+        nested = thread in _active
+    if (
+        nested
+        or not enabled_for(hook, config)
+        or random.random() >= float(config.get("sampleRate", DEFAULT_SAMPLE_RATE))
+    ):
+        yield False  # not sampled, or already inside a profiled invocation
+        return
+
+    # Imported only when sampled; hooks import this module on every call
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    with _lock:
+        try:
+            profiler.enable()
+        except ValueError:
+            started = None  # Python 3.12+ allows one profiler per process
+        else:
+            started = time.time()
+            trace_memory = (
+                config.get("tracemalloc", True)
+                and not _active
+                and not tracemalloc.is_tracing()
+            )
+            if trace_memory:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            _active.add(thread)
+    if started is None:
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        profiler.disable()
+        elapsed = time.time() - started
+        memory = None
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = {
+                "hook": hook,
+                "duration": elapsed,
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [
+                    {
+                        "site": "{0.filename}:{0.lineno}".format(stat.traceback[0]),
+                        "bytes": stat.size,
+                        "count": stat.count,
+                    }
+                    for stat in snapshot.statistics("lineno")[:MEMORY_TOP]
+                ],
+            }
+        with _lock:
+            _active.discard(thread)
+        _write_capture(hook, started, profiler, memory)
+
+
+def _write_capture(hook: str, started: float, profiler, memory: Optional[Dict]):
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(started))
+        base = PROFILE_DIR / f"{hook}-{stamp}-{os.getpid()}-{next(_sequence)}"
+        profiler.dump_stats(f"{base}.prof")
+        if memory is not None:
+            Path(f"{base}.mem.json").write_text(json.dumps(memory))
+        _prune(PROFILE_DIR)
+    except OSError:
+        pass  # profiling must never break a hook
+
+
+def profiled(hook: str):
+    """Decorator form of profile() for a hook's main()"""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile(hook):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def run_script(hook: str, script: str, args: List[str]):
+    """Run a hook script as __main__ under the profiler (used by the dispatcher)"""
+    import runpy
+
+    sys.argv = [script, *args]
+    sys.path.insert(0, str(Path(script).resolve().parent))
+    with profile(hook):
+        runpy.run_path(script, run_name="__main__")
+
+
+# Summaries
+
+
+def _captures(hook: Optional[str], since: float) -> List[Path]:
+    captures = sorted(PROFILE_DIR.glob("*.prof"))
+    if hook:
+        # Exactly this hook: "safety" must not pick up "safety-audit-..." captures
+        name = re.compile(rf"{re.escape(hook)}-\d{{8}}T\d{{6}}-\d+(-\d+)?\.prof")
+        captures = [p for p in captures if name.fullmatch(p.name)]
+    return [p for p in captures if p.stat().st_mtime >= since]
+
+
+def summarize(
+    hook: Optional[str] = None,
+    top: int = 20,
+    sort: str = "cumulative",
+    since: float = 0.0,
+) -> str:
+    """Merge captures into top-N hot functions and allocation sites"""
+    captures = _captures(hook, since)
+    if not captures:
+        return "No profiles captured" + (f" for {hook}" if hook else "")
+
+    import pstats
+
+    out = io.StringIO()
+    stats = pstats.Stats(str(captures[0]), stream=out)
+    for capture in captures[1:]:
+        stats.add(str(capture))
+    stats.files = []  # don't list every capture file in the header
+    print(f"{len(captures)} profile(s) merged, {stats.total_tt:.3f}s total\n", file=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    sites: Dict[str, Dict[str, int]] = {}
+    peaks = []
+    for capture in captures:
+        try:
+            memory = json.loads(capture.with_suffix(".mem.json").read_text())
+        except (OSError, ValueError):
+            continue
+        peaks.append(memory.get("peak_bytes", 0))
+        for entry in memory.get("top", []):
+            site = sites.setdefault(
+                entry["site"], {"bytes": 0, "count": 0, "captures": 0}
+            )
+            site["bytes"] += entry["bytes"]
+            site["count"] += entry["count"]
+            site["captures"] += 1
+
+    if peaks:
+        peaks.sort()
+        print(
+            f"Peak traced memory: median {peaks[len(peaks) // 2] / 1024:.0f} KiB, "
+            f"max {peaks[-1] / 1024:.0f} KiB over {len(peaks)} capture(s)\n",
+            file=out,
+        )
+        print(f"{'KiB/capture':>12} {'blocks':>8} {'seen':>5}  site", file=out)
+        ranked = sorted(sites.items(), key=lambda item: item[1]["bytes"], reverse=True)[
+            :top
+        ]
+        for site, totals in ranked:
+            print(
+                f"{totals['bytes'] / 1024 / totals['captures']:>12.1f} "
+                f"{totals['count']:>8} "
+                f"{totals['captures']:>5}  {site}",
+                file=out,
+            )
+    return out.getvalue()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hook profiling")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary = commands.add_parser(
+        "summary", help="Merge captured profiles into top-N hot spots"
+    )
+    summary.add_argument("--hook")
+    summary.add_argument("--top", type=int, default=20)
+    summary.add_argument(
+        "--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"]
+    )
+    summary.add_argument("--since-hours", type=float, default=0)
+
+    run = commands.add_parser("run", help="Run a hook script under the profiler")
+    run.add_argument("--hook", required=True)
+    run.add_argument("script")
+    run.add_argument("args", nargs=argparse.REMAINDER)
+
+    commands.add_parser("clear", help="Delete captured profiles")
+
+    args = parser.parse_args()
+    if args.command == "summary":
+        since = time.time() - args.since_hours * 3600 if args.since_hours else 0.0
+        print(summarize(args.hook, args.top, args.sort, since))
+    elif args.command == "run":
+        run_script(args.hook, args.script, args.args)
+    else:
+        for capture in PROFILE_DIR.glob("*"):
+            capture.unlink()
+
+
+if __name__ == "__main__":
+    main()
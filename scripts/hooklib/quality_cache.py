@@ -0,0 +1,235 @@
+"""
+Content-Hash Keyed Format/Lint Result Cache
+
+Claude often flips a file between a handful of states while iterating, and
+each state used to be formatted and linted again from scratch. This cache
+remembers, per (content hash, tool, tool version, config hash):
+
+- the formatter's output for that content
+- the linter's findings for that content
+
+so a file that returns to a known state skips tool execution entirely.
+Entries live in a small SQLite database (safe across concurrent hook
+processes) and are evicted least-recently-used once the total size passes
+QUALITY_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+QUALITY_CACHE_PATH = Path(".claude/cache/quality.sqlite3")
+QUALITY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Files whose contents change what a formatter or linter does
+CONFIG_FILES = {
+    "python": ["pyproject.toml", "setup.cfg", "tox.ini", ".flake8", ".pylintrc"],
+    "javascript": [
+        "package.json",
+        ".prettierrc",
+        ".prettierrc.json",
+        ".prettierrc.js",
+        ".eslintrc",
+        ".eslintrc.js",
+        ".eslintrc.json",
+        "eslint.config.js",
+    ],
+    "typescript": [
+        "package.json",
+        "tsconfig.json",
+        ".prettierrc",
+        ".prettierrc.json",
+        ".prettierrc.js",
+        ".eslintrc",
+        ".eslintrc.js",
+        ".eslintrc.json",
+        "eslint.config.js",
+    ],
+    "rust": ["rustfmt.toml", ".rustfmt.toml"],
+    "go": ["go.mod"],
+    "java": [],
+    "ruby": [".rubocop.yml"],
+    "php": [
+        ".php-cs-fixer.php",
+        ".php-cs-fixer.dist.php",
+        "phpcs.xml",
+        "phpcs.xml.dist",
+    ],
+    "c": [".clang-format", ".clang-tidy"],
+    "cpp": [".clang-format", ".clang-tidy"],
+}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class QualityCache:
+    """Formatter outputs and lint findings keyed by content and tool identity"""
+
+    def __init__(
+        self, path: Path = QUALITY_CACHE_PATH, max_bytes: int = QUALITY_CACHE_MAX_BYTES
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=5, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_lru ON results (last_used);
+            CREATE TABLE IF NOT EXISTS tool_versions (
+                tool TEXT PRIMARY KEY,
+                binary_mtime REAL NOT NULL,
+                version TEXT NOT NULL
+            );
+        """
+        )
+        self._config_hashes: Dict[str, str] = {}
+
+    def close(self):
+        self._db.close()
+
+    # Key components
+
+    def tool_version(self, tool: str) -> str:
+        """
+        Version string of a tool, cached per binary mtime so `--version`
+        only runs again after the tool is upgraded
+        """
+        binary = shutil.which(tool)
+        if not binary:
+            return "daemon" if tool.endswith("d") else "unknown"
+        mtime = os.stat(binary).st_mtime
+
+        row = self._db.execute(
+            "SELECT version FROM tool_versions WHERE tool = ? AND binary_mtime = ?",
+            (tool, mtime),
+        ).fetchone()
+        if row:
+            return row[0]
+
+        try:
+            result = subprocess.run(
+                [binary, "--version"], capture_output=True, text=True, timeout=10
+            )
+            version = (
+                (result.stdout or result.stderr).strip().splitlines()[0]
+                if (result.stdout or result.stderr)
+                else "unknown"
+            )
+        except (OSError, subprocess.TimeoutExpired, IndexError):
+            version = "unknown"
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO tool_versions (tool, binary_mtime, version) VALUES "
+            "(?, ?, ?)",
+            (tool, mtime, version),
+        )
+        return version
+
+    def config_hash(self, language: str) -> str:
+        """Combined hash of the config files that affect this language's tools"""
+        if language not in self._config_hashes:
+            digest = hashlib.sha256()
+            for name in CONFIG_FILES.get(language, []):
+                try:
+                    digest.update(
+                        name.encode() + b"\0" + Path(name).read_bytes() + b"\0"
+                    )
+                except OSError:
+                    continue
+            self._config_hashes[language] = digest.hexdigest()
+        return self._config_hashes[language]
+
+    def key(self, kind: str, data: bytes, tool: str, language: str) -> str:
+        parts = [
+            kind,
+            content_hash(data),
+            tool,
+            self.tool_version(tool),
+            self.config_hash(language),
+        ]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    # Lookups and stores
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._db.execute(
+            "SELECT value FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        return row[0]
+
+    def _put(self, key: str, kind: str, value: bytes):
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, kind, value, size, last_used) VALUES "
+            "(?, ?, ?, ?, ?)",
+            (key, kind, value, len(value) + len(key), time.time()),
+        )
+        self._evict()
+
+    def get_formatted(self, data: bytes, tool: str, language: str) -> Optional[bytes]:
+        """Formatter output previously produced for this content, if any"""
+        return self._get(self.key("format", data, tool, language))
+
+    def put_formatted(self, data: bytes, formatted: bytes, tool: str, language: str):
+        """Remember formatter output; formatted content maps to itself too"""
+        self._put(self.key("format", data, tool, language), "format", formatted)
+        if formatted != data:
+            self._put(
+                self.key("format", formatted, tool, language), "format", formatted
+            )
+
+    def get_findings(
+        self, data: bytes, tool: str, language: str
+    ) -> Optional[List[str]]:
+        """Lint findings previously recorded for this content, if any"""
+        value = self._get(self.key("lint", data, tool, language))
+        return json.loads(value) if value is not None else None
+
+    def put_findings(self, data: bytes, findings: List[str], tool: str, language: str):
+        self._put(
+            self.key("lint", data, tool, language),
+            "lint",
+            json.dumps(findings).encode(),
+        )
+
+    def _evict(self):
+        """
+        Drop least-recently-used entries until the cache is under 90% of its budget
+        """
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM results ORDER BY last_used"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", victims)
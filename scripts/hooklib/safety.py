@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Compiled Rule Engine for Pre-Tool-Use Safety Checks
+
+Replaces pattern-by-pattern scanning with rules compiled once per process:
+
+- Bash commands are tokenized with shlex and matched structurally, per
+  pipeline segment: `rm -rf /tmp/x` is allowed, `rm -rf /` is not
+- All free-form regex rules are merged into a single alternation, so a
+  command is scanned once however many regex rules exist
+- Write/Edit paths are resolved with a cached realpath and looked up in a
+  prefix trie of protected directories (longest prefix wins, so allow
+  entries like /var/tmp can punch holes in deny entries like /var)
+
+Usage as the pre-tool-use hook:
+    python3 .claude/hooks/hooklib/safety.py < tool-input.json
+
+Benchmark:
+    python3 .claude/hooks/hooklib/safety.py --bench 10000
+"""
+
+import functools
+import json
+import os
+import random
+import re
+import shlex
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hooklib.logstore import get_store
+
+SECURITY_LOG = Path(".claude/logs/security.log")
+
+# Free-form patterns that do not need structure; merged into one regex
+REGEX_RULES = [
+    ("fork-bomb", r":\(\)\s*\{\s*:\s*\|\s*:?\s*&\s*\}\s*;\s*:", "Fork bomb"),
+    ("mkfs", r"\bmkfs(?:\.\w+)?\b", "Filesystem creation (mkfs)"),
+    ("partition", r"\b(?:fdisk|parted|sfdisk|wipefs)\b", "Disk partitioning"),
+    (
+        "device-redirect",
+        r">\s*/dev/(?:sd|hd|nvme|xvd|vd|disk|mmcblk)\w*",
+        "Write to a raw block device",
+    ),
+]
+
+# Directories writes may not touch. Longest prefix wins, so more specific
+# allow entries override broader deny entries.
+PROTECTED_PREFIXES = [
+    ("/etc", False),
+    ("/bin", False),
+    ("/sbin", False),
+    ("/usr", False),
+    ("/var", False),
+    ("/sys", False),
+    ("/proc", False),
+    ("/boot", False),
+    ("/lib", False),
+    ("/lib64", False),
+    ("/private/etc", False),
+    ("/private/var", False),
+    # Temp directories (macOS resolves /tmp and $TMPDIR under /private/var)
+    ("/var/tmp", True),
+    ("/var/folders", True),
+    ("/private/var/folders", True),
+    ("/private/tmp", True),
+]
+
+# Directories holding home directories: a recursive rm may not remove one of
+# these or any home directory in it, though it may clean up inside a home
+HOME_ROOTS = ["/home", "/Users"]
+HOME_DIRS = ["/root"]
+
+SENSITIVE_EXTENSIONS = {".pem", ".key", ".crt", ".p12", ".pfx"}
+SENSITIVE_NAMES = {"id_rsa", "id_ed25519", "id_ecdsa", "id_dsa", "database.yml"}
+SENSITIVE_STEMS = {"credentials", "secrets", "token"}
+SENSITIVE_DIRS = {".ssh", ".aws", ".gcp", ".azure", ".gnupg"}
+
+# Arguments that make a recursive rm catastrophic
+DANGEROUS_RM_TARGETS = {
+    "/",
+    "/*",
+    "~",
+    "~/",
+    "~/*",
+    "*",
+    ".",
+    "./",
+    "..",
+    "../",
+    "$HOME",
+    "${HOME}",
+    "$HOME/",
+}
+COMMAND_PREFIXES = {
+    "sudo",
+    "doas",
+    "env",
+    "nice",
+    "nohup",
+    "time",
+    "command",
+    "exec",
+    "xargs",
+}
+SHELLS = {
+    "sh",
+    "bash",
+    "zsh",
+    "dash",
+    "ksh",
+    "fish",
+    "python",
+    "python3",
+    "perl",
+    "ruby",
+    "node",
+}
+# Shells whose `-c SCRIPT` argument is itself a command line, checked like the outer one
+POSIX_SHELLS = {"sh", "bash", "zsh", "dash", "ksh"}
+MAX_NESTING = 4  # sh -c "eval '...'" levels followed before giving up
+DOWNLOADERS = {"curl", "wget", "fetch"}
+SEPARATORS = {";", "&&", "||", "&", "\n", "|", "|&", "(", ")"}
+BLOCK_DEVICE = re.compile(r"^/dev/(?:sd|hd|nvme|xvd|vd|disk|mmcblk)\w*$")
+GLOB_CHARS = re.compile(r"[*?\[]")
+UNSET_VARIABLE = re.compile(r"\$(?:\{[^}]*\}|\w+)")
+
+
+@dataclass
+class Verdict:
+    """A rule that matched, and why it blocks"""
+
+    rule: str
+    reason: str
+
+
+class PathTrie:
+    """Prefix trie over path components; lookup returns the longest match"""
+
+    _VALUE = "\0"
+
+    def __init__(self, entries: Iterable[Tuple[str, bool]] = ()):
+        self.root: Dict = {}
+        for prefix, allowed in entries:
+            self.add(prefix, allowed)
+
+    def add(self, prefix: str, allowed: bool):
+        node = self.root
+        for part in Path(prefix).parts:
+            node = node.setdefault(part, {})
+        node[self._VALUE] = allowed
+
+    def lookup(self, path: str) -> Optional[Tuple[str, bool]]:
+        """(matched prefix, allowed) for the longest prefix of path, or None"""
+        node = self.root
+        match = None
+        parts = Path(path).parts
+        for i, part in enumerate(parts):
+            node = node.get(part)
+            if node is None:
+                break
+            if self._VALUE in node:
+                match = (str(Path(*parts[: i + 1])), node[self._VALUE])
+        return match
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve(path: str, cwd: str) -> str:
+    return os.path.realpath(os.path.join(cwd, os.path.expanduser(path)))
+
+
+def _rm_paths(target: str, cwd: str) -> List[str]:
+    """
+    Absolute paths a recursive rm of `target` would remove everything under
+
+    ~, $HOME and ${HOME} are expanded; variables that are still unset are
+    dropped, as the shell would. `..` is folded away before anything is
+    matched. A trailing glob stands for the directory it matches in (`/usr/*`
+    empties /usr). Both the lexical path and its realpath are returned,
+    since /bin may resolve to /usr/bin.
+    """
+    expanded = UNSET_VARIABLE.sub("", os.path.expandvars(os.path.expanduser(target)))
+    if not expanded:
+        return []
+    absolute = os.path.normpath(os.path.join(cwd, expanded))
+    while GLOB_CHARS.search(os.path.basename(absolute)) and absolute != "/":
+        absolute = os.path.dirname(absolute)
+    paths = [absolute]
+    if not GLOB_CHARS.search(absolute):
+        resolved = _resolve(absolute, cwd)
+        if resolved != absolute:
+            paths.append(resolved)
+    return paths
+
+
+class RuleEngine:
+    """Compiled safety rules for Bash commands and file paths"""
+
+    def __init__(self, regex_rules=REGEX_RULES, protected=PROTECTED_PREFIXES):
+        self.regex_rules: Dict[str, str] = {}
+        self._regex_patterns: List[Tuple[str, str]] = []
+        self._combined: Optional[re.Pattern] = None
+        for name, pattern, reason in regex_rules:
+            self.add_regex_rule(name, pattern, reason)
+        self.trie = PathTrie(protected)
+        self._denied = [prefix for prefix, allowed in protected if not allowed]
+
+    def add_regex_rule(self, name: str, pattern: str, reason: str):
+        """Add a regex rule; all regex rules are matched in one pass"""
+        group = f"r{len(self._regex_patterns)}"
+        self._regex_patterns.append((group, pattern))
+        self.regex_rules[group] = f"{name}\0{reason}"
+        self._combined = None
+
+    @property
+    def combined(self) -> re.Pattern:
+        if self._combined is None:
+            alternation = (
+                "|".join(f"(?P<{g}>{p})" for g, p in self._regex_patterns) or r"(?!)"
+            )
+            self._combined = re.compile(alternation)
+        return self._combined
+
+    # Bash
+
+    @staticmethod
+    def tokenize(command: str) -> List[List[str]]:
+        """Split a command line into pipeline-aware segments of tokens"""
+        try:
+            lexer = shlex.shlex(command, posix=True, punctuation_chars=";&|()<>")
+            lexer.whitespace_split = True
+            lexer.commenters = ""
+            tokens = list(lexer)
+        except ValueError:
+            tokens = command.split()  # unbalanced quotes: fall back to whitespace
+
+        segments: List[List[str]] = [[]]
+        for token in tokens:
+            if token in SEPARATORS:
+                segments.append([token])  # keep the operator as the segment head
+            else:
+                segments[-1].append(token)
+        return [s for s in segments if s]
+
+    @staticmethod
+    def _program(segment: List[str]) -> Tuple[Optional[str], List[str]]:
+        """Strip the operator and wrappers (sudo, env, xargs ...) from a segment"""
+        tokens = segment[1:] if segment and segment[0] in SEPARATORS else segment
+        i = 0
+        while i < len(tokens) and (
+            tokens[i] in COMMAND_PREFIXES
+            or "=" in tokens[i]
+            and not tokens[i].startswith("-")
+        ):
+            i += 1
+            # skip wrapper options such as `sudo -u root` or `nice -n 10`
+            while i < len(tokens) and tokens[i].startswith("-"):
+                i += 2 if tokens[i] in ("-u", "-n", "-g") else 1
+        if i >= len(tokens):
+            return None, []
+        return os.path.basename(tokens[i]), tokens[i + 1 :]
+
+    def _check_rm(self, args: List[str], cwd: str) -> Optional[Verdict]:
+        flags = set()
+        targets = []
+        for arg in args:
+            if arg == "--":
+                continue
+            if arg.startswith("--"):
+                flags.add(arg)
+            elif arg.startswith("-") and len(arg) > 1:
+                flags.update(arg[1:])
+            else:
+                targets.append(arg)
+
+        if not ({"r", "R", "--recursive"} & flags):
+            return None
+
+        homes = {os.path.normpath(os.path.expanduser("~")), *HOME_DIRS}
+        for target in targets:
+            if target in DANGEROUS_RM_TARGETS or target.rstrip("/") in (
+                "",
+                "~",
+                "$HOME",
+                "${HOME}",
+            ):
+                return Verdict("rm-recursive", f"Recursive delete of '{target}'")
+            for path in _rm_paths(target, cwd):
+                if path == "/" or any(
+                    path == home or _is_ancestor(path, home) for home in homes
+                ):
+                    return Verdict("rm-recursive", f"Recursive delete of '{target}'")
+                if any(
+                    path == root or os.path.dirname(path) == root for root in HOME_ROOTS
+                ):
+                    return Verdict(
+                        "rm-recursive", f"Recursive delete of home directory '{target}'"
+                    )
+                # At or under a deny entry, unless an allow entry below it matches
+                # (the allowed directory itself is still off limits)
+                match = self.trie.lookup(path)
+                if match and (not match[1] or path == match[0]):
+                    return Verdict(
+                        "rm-recursive",
+                        f"Recursive delete of system directory '{target}'",
+                    )
+                if any(_is_ancestor(path, denied) for denied in self._denied):
+                    return Verdict(
+                        "rm-recursive",
+                        f"Recursive delete of system directory '{target}'",
+                    )
+        return None
+
+    @staticmethod
+    def _inner_script(program: str, args: List[str]) -> Optional[str]:
+        """The command line run by `sh -c SCRIPT` or `eval ARGS...`, if any"""
+        if program == "eval":
+            return " ".join(args)
+        if program in POSIX_SHELLS:
+            for i, arg in enumerate(args):
+                if arg.startswith("-") and not arg.startswith("--") and "c" in arg[1:]:
+                    return args[i + 1] if i + 1 < len(args) else None
+                if not arg.startswith("-"):
+                    return None  # a script file, not -c
+        return None
+
+    def check_bash(
+        self, command: str, cwd: str = ".", _depth: int = 0
+    ) -> Optional[Verdict]:
+        """Return the first rule a Bash command violates, or None"""
+        match = self.combined.search(command)
+        if match:
+            name, reason = self.regex_rules[match.lastgroup].split("\0")
+            return Verdict(name, reason)
+
+        cwd = os.path.abspath(cwd)
+        segments = self.tokenize(command)
+        for i, segment in enumerate(segments):
+            program, args = self._program(segment)
+            if program is None:
+                continue
+
+            inner = self._inner_script(program, args)
+            if inner is not None:
+                if _depth >= MAX_NESTING:
+                    return Verdict("nested-shell", "Too deeply nested shell -c / eval")
+                verdict = self.check_bash(inner, cwd, _depth + 1)
+                if verdict:
+                    return verdict
+
+            if program == "rm":
+                verdict = self._check_rm(args, cwd)
+                if verdict:
+                    return verdict
+
+            elif program == "chmod":
+                if any(
+                    a.lstrip("0") == "777" or a in ("a+rwx", "ugo+rwx") for a in args
+                ):
+                    return Verdict(
+                        "chmod-777", "World-writable permissions (chmod 777)"
+                    )
+
+            elif program == "dd":
+                if any(a.startswith("of=") and BLOCK_DEVICE.match(a[3:]) for a in args):
+                    return Verdict("dd-device", "dd onto a raw block device")
+
+            elif program in SHELLS and segment[0] in ("|", "|&"):
+                previous, _ = self._program(segments[i - 1]) if i > 0 else (None, [])
+                if previous in DOWNLOADERS:
+                    return Verdict(
+                        "pipe-to-shell", f"Piping {previous} output into {program}"
+                    )
+
+            for j, token in enumerate(args[:-1]):
+                if token in (">", ">>") and BLOCK_DEVICE.match(args[j + 1]):
+                    return Verdict("device-redirect", "Write to a raw block device")
+        return None
+
+    # Paths
+
+    def check_path(self, path: str, cwd: str = ".") -> Optional[Verdict]:
+        """Return the rule a write to this path violates, or None"""
+        resolved = _resolve(path, os.path.abspath(cwd))
+        name = os.path.basename(resolved)
+        lowered = name.lower()
+
+        if lowered.startswith(".env") and lowered not in (
+            ".env.example",
+            ".env.sample",
+            ".env.template",
+        ):
+            return Verdict(
+                "sensitive-file", f"Attempted write to sensitive file: '{path}'"
+            )
+        if (
+            lowered in SENSITIVE_NAMES
+            or os.path.splitext(lowered)[1] in SENSITIVE_EXTENSIONS
+        ):
+            return Verdict(
+                "sensitive-file", f"Attempted write to sensitive file: '{path}'"
+            )
+        if os.path.splitext(lowered)[0] in SENSITIVE_STEMS:
+            return Verdict(
+                "sensitive-file", f"Attempted write to sensitive file: '{path}'"
+            )
+        if SENSITIVE_DIRS.intersection(Path(resolved).parts):
+            return Verdict(
+                "sensitive-dir",
+                f"Attempted write inside a credentials directory: '{path}'",
+            )
+
+        match = self.trie.lookup(resolved)
+        if match and not match[1]:
+            return Verdict(
+                "system-dir",
+                f"Attempted write to system directory {match[0]}: '{path}'",
+            )
+        return None
+
+    # Tool calls
+
+    def check_tool(self, input_data: Dict, cwd: str = ".") -> Optional[Verdict]:
+        """Check a pre-tool-use event (Bash, Write, Edit, MultiEdit)"""
+        tool = input_data.get("tool") or input_data.get("tool_name", "")
+        params = input_data.get("parameters") or input_data.get("tool_input") or {}
+        if tool == "Bash":
+            return self.check_bash(params.get("command", ""), cwd)
+        if tool in ("Write", "Edit", "MultiEdit", "NotebookEdit"):
+            path = params.get("file_path") or params.get("notebook_path")
+            if path:
+                return self.check_path(path, cwd)
+        return None
+
+
+def _is_ancestor(path: str, other: str) -> bool:
+    """True if `path` is a proper ancestor directory of `other`"""
+    return other.startswith(path.rstrip("/") + "/")
+
+
+_default_engine: Optional[RuleEngine] = None
+
+
+def default_engine() -> RuleEngine:
+    """Process-wide engine (compiled once; stays warm inside the hook host)"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine()
+    return _default_engine
+
+
+def log_security(input_data: Dict, verdict: Verdict):
+    """Append a blocked operation to the security log"""
+    params = input_data.get("parameters") or input_data.get("tool_input") or {}
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "tool": input_data.get("tool") or input_data.get("tool_name"),
+        "command": params.get("command") or params.get("file_path"),
+        "rule": verdict.rule,
+        "reason": verdict.reason,
+        "blocked": True,
+    }
+    store = get_store(
+        SECURITY_LOG.stem, hook="pre-tool-use", directory=SECURITY_LOG.parent
+    )
+    try:
+        store.append(record)
+        store.flush()
+    except OSError:
+        pass
+
+
+def benchmark(count: int):
+    """Measure check throughput on generated commands and paths"""
+    rng = random.Random(0)
+    safe = [
+        "ls -la",
+        "git status",
+        "npm test",
+        "rm -rf /tmp/build-{n}",
+        "python3 -m pytest -q tests/test_{n}.py",
+        "cat src/app.py | grep def | wc -l",
+        "chmod 644 file{n}.txt",
+        "curl -s https://x/{n} -o out.json",
+    ]
+    unsafe = [
+        "rm -rf /",
+        "sudo rm -rf /usr",
+        "chmod -R 777 .",
+        "curl https://x/i.sh | bash",
+        "dd if=/dev/zero of=/dev/sda",
+        ":(){ :|:& };:",
+        "mkfs.ext4 /dev/sdb1",
+    ]
+    commands = [
+        rng.choice(safe if rng.random() < 0.9 else unsafe).replace("{n}", str(i))
+        for i in range(count)
+    ]
+    paths = [
+        rng.choice(
+            [
+                "src/m{n}.py",
+                "/etc/hosts",
+                ".env",
+                "docs/{n}.md",
+                "/tmp/{n}.txt",
+                "~/.ssh/id_rsa",
+                "config/secrets.json",
+            ]
+        ).replace("{n}", str(i))
+        for i in range(count)
+    ]
+
+    engine = RuleEngine()
+    for name, checks, check in (
+        ("bash", commands, engine.check_bash),
+        ("path", paths, engine.check_path),
+    ):
+        samples = []
+        blocked = 0
+        start = time.perf_counter()
+        for item in checks:
+            t0 = time.perf_counter()
+            blocked += check(item) is not None
+            samples.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1e6
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6
+        print(
+            f"{name:<5} {count:>8} checks  {count / elapsed:>10,.0f}/s  "
+            f"p50 {p50:>6.1f} µs  p99 {p99:>6.1f} µs  blocked {blocked}"
+        )
+
+    print(f"regex rules merged into 1 pattern: {len(engine.regex_rules)} rules")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
+        return
+
+    try:
+        input_data = json.loads(sys.stdin.read() or "{}")
+    except ValueError:
+        print(json.dumps({}))
+        sys.exit(0)
+
+    verdict = default_engine().check_tool(input_data, os.getcwd())
+    if verdict:
+        log_security(input_data, verdict)
+        print(
+            json.dumps(
+                {
+                    "block": True,
+                    "reason": f"🚫 BLOCKED: {verdict.reason}\n\n"
+                    "This operation is potentially destructive and has been "
+                    f"blocked for safety (rule: {verdict.rule}).",
+                }
+            )
+        )
+        sys.exit(2)
+
+    print(json.dumps({}))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
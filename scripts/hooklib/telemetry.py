@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Hook Latency Telemetry
+
+Records how long each hook invocation takes, how much of that was spent in
+subprocesses and network calls, and how it ended (ok, blocked, error,
+timeout). Latencies are aggregated into HDR-style log-linear histograms:
+each bucket spans at most 1/128 of its value, so any quantile is accurate
+to within 1%, and histograms from different processes merge by adding
+counts.
+
+Recording an invocation is a single O_APPEND write of one sample line to
+.claude/logs/telemetry.samples; no lock, no read-modify-write, no folding.
+Folding happens on the read side: the persistent host, `report` and
+`export` fold the samples into the histograms in .claude/logs/telemetry.json
+once they are EXPORT_INTERVAL seconds stale, and export them as an
+OpenMetrics text file for a node-exporter textfile collector. Reports
+aggregate on read: the folded histograms plus every sample not yet folded.
+
+The dispatcher and the persistent host record every hook they run. A hook
+running on its own can record itself:
+
+    from hooklib.telemetry import instrument, phase
+
+    with instrument("pre-tool-use", "preToolUse") as span:
+        with phase("subprocess"):
+            subprocess.run(...)
+        span.outcome = "blocked"
+
+Command line:
+    python3 .claude/hooks/hooklib/telemetry.py report
+    python3 .claude/hooks/hooklib/telemetry.py export \
+        --output /var/lib/node_exporter/textfile
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TELEMETRY_PATH = Path(".claude/logs/telemetry.json")
+SAMPLES_PATH = Path(".claude/logs/telemetry.samples")
+LOCK_PATH = Path(".claude/logs/.telemetry.lock")
+TEXTFILE_DIR = os.environ.get("CLAUDE_HOOK_TEXTFILE_DIR", ".claude/logs")
+TEXTFILE_NAME = "claude_hooks.prom"
+EXPORT_INTERVAL = 10  # seconds between folding samples and exporting
+COMPACT_BYTES = 1024 * 1024  # ... or sooner once this many sample bytes are waiting
+ENABLE_TELEMETRY = os.environ.get("CLAUDE_HOOK_TELEMETRY", "1") != "0"
+
+SUB_BITS = 7  # 128 sub-buckets per power of two: <1% relative error
+EXPORT_BUCKETS = [
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+]
+QUANTILES = [0.5, 0.95, 0.99]
+PHASES = ("subprocess", "network")
+
+
+class Histogram:
+    """Sparse log-linear histogram of microsecond values"""
+
+    def __init__(
+        self,
+        counts: Optional[Dict[int, int]] = None,
+        total: int = 0,
+        sum_us: int = 0,
+        max_us: int = 0,
+    ):
+        self.counts = counts or {}
+        self.total = total
+        self.sum_us = sum_us
+        self.max_us = max_us
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < (1 << SUB_BITS):
+            return value
+        shift = value.bit_length() - SUB_BITS
+        return (shift << SUB_BITS) + (value >> shift)
+
+    @staticmethod
+    def _bounds(index: int) -> Tuple[int, int]:
+        shift, mantissa = index >> SUB_BITS, index & ((1 << SUB_BITS) - 1)
+        if shift == 0:
+            return mantissa, mantissa
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value
+        self.max_us = max(self.max_us, value)
+
+    def merge(self, other: "Histogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q, in seconds"""
+        if not self.total:
+            return 0.0
+        rank = max(1, round(q * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self._bounds(index)
+                return min((low + high) / 2, self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def cumulative(self, bounds: List[float]) -> List[int]:
+        """Counts at or below each bound (seconds), for exposition"""
+        result = []
+        items = sorted(self.counts.items())
+        for bound in bounds:
+            limit = bound * 1_000_000
+            # a bucket straddling the bound may hold values above it
+            result.append(sum(c for i, c in items if self._bounds(i)[1] <= limit))
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "c": {str(i): c for i, c in self.counts.items()},
+            "n": self.total,
+            "s": self.sum_us,
+            "max": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Histogram":
+        return cls(
+            {int(i): c for i, c in data.get("c", {}).items()},
+            data.get("n", 0),
+            data.get("s", 0),
+            data.get("max", 0),
+        )
+
+
+def _series_key(hook: str, event: str, outcome: str) -> str:
+    return f"{hook}\t{event}\t{outcome}"
+
+
+def _load_state() -> Dict:
+    try:
+        with open(TELEMETRY_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"series": {}, "exported": 0}
+
+
+def _claimed_samples() -> List[Path]:
+    """Sample files set aside by earlier compactions, oldest first"""
+    return sorted(SAMPLES_PATH.parent.glob(f".{SAMPLES_PATH.name}.*"))
+
+
+def _merge_samples(state: Dict, path: Path):
+    """Add every complete sample line in path to state's histograms"""
+    try:
+        with open(path, "rb") as f:
+            # a trailing partial line is still being written
+            lines = f.read().split(b"\n")[:-1]
+    except OSError:
+        return
+    histograms: Dict[Tuple[str, str], Histogram] = {}
+    for line in lines:
+        try:
+            sample = json.loads(line)
+            key = _series_key(sample["h"], sample["e"], sample["o"])
+            values = [("latency", sample["d"]), *sample.get("p", {}).items()]
+        except (ValueError, KeyError, TypeError):
+            continue
+        for metric, seconds in values:
+            if (key, metric) not in histograms:
+                series = state.setdefault("series", {}).get(key, {})
+                histograms[key, metric] = Histogram.from_dict(series.get(metric, {}))
+            histograms[key, metric].record(seconds)
+    for (key, metric), histogram in histograms.items():
+        state["series"].setdefault(key, {})[metric] = histogram.to_dict()
+
+
+def _load() -> Dict:
+    """Folded histograms plus every sample not folded yet"""
+    state = _load_state()
+    merged = set(state.get("merged", []))
+    for claimed in _claimed_samples():
+        if claimed.name not in merged:
+            _merge_samples(state, claimed)
+    _merge_samples(state, SAMPLES_PATH)
+    return state
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def record(
+    hook: str,
+    event: str,
+    outcome: str,
+    duration: float,
+    phases: Optional[Dict[str, float]] = None,
+):
+    """Append one hook invocation as a sample; folding is left to readers"""
+    if not ENABLE_TELEMETRY:
+        return
+    sample = {"h": hook, "e": event or "", "o": outcome, "d": round(duration, 6)}
+    if phases:
+        sample["p"] = {name: round(seconds, 6) for name, seconds in phases.items()}
+    try:
+        SAMPLES_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(SAMPLES_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(sample, separators=(",", ":")) + "\n").encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass  # telemetry must never break a hook
+
+
+def _state_age() -> float:
+    try:
+        return time.time() - TELEMETRY_PATH.stat().st_mtime
+    except OSError:
+        return float("inf")
+
+
+def compact_if_due() -> Optional[Dict]:
+    """Fold and export if the histograms are stale or samples have piled up"""
+    if not ENABLE_TELEMETRY:
+        return None
+    try:
+        waiting = SAMPLES_PATH.stat().st_size
+    except OSError:
+        waiting = 0
+    if waiting < COMPACT_BYTES and _state_age() < EXPORT_INTERVAL:
+        return None
+    try:
+        return compact()
+    except OSError:
+        return None
+
+
+def compact() -> Optional[Dict]:
+    """
+    Fold samples into telemetry.json and export; None if another process is at it
+
+    The live sample file is only renamed here. Its samples are folded by the
+    next compaction, once hooks that opened it just before the rename have
+    long finished their write.
+    """
+    TELEMETRY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        state = _load_state()
+        done = set(state.get("merged", []))
+        settled = [p for p in _claimed_samples() if p.name not in done]
+        for claimed in settled:
+            _merge_samples(state, claimed)
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(
+                SAMPLES_PATH,
+                SAMPLES_PATH.with_name(f".{SAMPLES_PATH.name}.{time.time_ns()}"),
+            )
+        # a crash before the unlinks can't count them twice
+        state["merged"] = [p.name for p in settled]
+        state["exported"] = time.time()
+        _write_atomic(TELEMETRY_PATH, json.dumps(state, separators=(",", ":")))
+        for claimed in _claimed_samples():
+            if claimed.name in done or claimed in settled:
+                claimed.unlink(missing_ok=True)
+    state = _load()
+    export_openmetrics(state)
+    return state
+
+
+class Span:
+    """One hook invocation being timed"""
+
+    def __init__(self, hook: str, event: str):
+        self.hook = hook
+        self.event = event
+        self.outcome = "ok"
+        self.phases: Dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def add(self, phase_name: str, seconds: float):
+        self.phases[phase_name] = self.phases.get(phase_name, 0.0) + seconds
+
+
+_local = threading.local()
+
+
+def current_span() -> Optional[Span]:
+    return getattr(_local, "span", None)
+
+
+@contextlib.contextmanager
+def instrument(hook: str, event: str = "") -> Iterator[Span]:
+    """Time a hook invocation; exit code 2 counts as blocked, others as errors"""
+    if current_span() is not None:
+        yield current_span()  # already timed by the host running this hook
+        return
+    span = Span(hook, event)
+    _local.span = span
+    try:
+        yield span
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if code == 2:
+            span.outcome = "blocked"
+        elif code != 0:
+            span.outcome = "error"
+        raise
+    except BaseException:
+        span.outcome = "error"
+        raise
+    finally:
+        _local.span = None
+        record(hook, event, span.outcome, time.perf_counter() - span.start, span.phases)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the enclosed time to a phase of the current span, if any"""
+    span = current_span()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if span is not None:
+            span.add(name, time.perf_counter() - start)
+
+
+def event_name(input_data: Dict) -> str:
+    """Event name from hook input, whichever key the caller used"""
+    return str(input_data.get("hook_event_name") or input_data.get("type") or "")
+
+
+# Export
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        k
+        + '="'
+        + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(
+    name: str, labels: Dict[str, str], histogram: Histogram
+) -> List[str]:
+    lines = []
+    for bound, count in zip(EXPORT_BUCKETS, histogram.cumulative(EXPORT_BUCKETS)):
+        lines.append(f"{name}_bucket{_labels(**labels, le=str(bound))} {count}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.total}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.total}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum_us / 1_000_000:.6f}")
+    return lines
+
+
+def render_openmetrics(state: Dict) -> str:
+    """OpenMetrics text exposition of all recorded series"""
+    duration = [
+        "# HELP claude_hook_duration_seconds Hook invocation latency, start to finish.",
+        "# TYPE claude_hook_duration_seconds histogram",
+        "# UNIT claude_hook_duration_seconds seconds",
+    ]
+    phases = [
+        "# HELP claude_hook_phase_seconds Time spent in subprocesses and network calls "
+        "per invocation.",
+        "# TYPE claude_hook_phase_seconds histogram",
+        "# UNIT claude_hook_phase_seconds seconds",
+    ]
+    quantiles = [
+        "# HELP claude_hook_duration_quantile_seconds Latency quantiles over all "
+        "recorded invocations.",
+        "# TYPE claude_hook_duration_quantile_seconds gauge",
+        "# UNIT claude_hook_duration_quantile_seconds seconds",
+    ]
+
+    for key, series in sorted(state.get("series", {}).items()):
+        hook, event, outcome = key.split("\t")
+        labels = {"hook": hook, "event": event, "outcome": outcome}
+        latency = Histogram.from_dict(series.get("latency", {}))
+        duration += _histogram_lines("claude_hook_duration_seconds", labels, latency)
+        for q in QUANTILES:
+            quantiles.append(
+                "claude_hook_duration_quantile_seconds"
+                f"{_labels(**labels, quantile=str(q))} "
+                f"{latency.quantile(q):.6f}"
+            )
+        for phase_name in PHASES:
+            if phase_name in series:
+                phases += _histogram_lines(
+                    "claude_hook_phase_seconds",
+                    {**labels, "phase": phase_name},
+                    Histogram.from_dict(series[phase_name]),
+                )
+
+    return "\n".join(duration + phases + quantiles + ["# EOF"]) + "\n"
+
+
+def export_openmetrics(
+    state: Optional[Dict] = None, directory: Optional[str] = None
+) -> Path:
+    """Write the textfile atomically (collectors must never see a partial file)"""
+    path = Path(directory or TEXTFILE_DIR) / TEXTFILE_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(path, render_openmetrics(state if state is not None else _load()))
+    return path
+
+
+def report(state: Dict) -> str:
+    """Per hook/event/outcome latency table"""
+    rows = [
+        f"{'hook':<22} {'event':<18} {'outcome':<9} {'count':>7} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'subproc':>8} {'network':>8}"
+    ]
+    for key, series in sorted(state.get("series", {}).items()):
+        hook, event, outcome = key.split("\t")
+        latency = Histogram.from_dict(series.get("latency", {}))
+        phase_share = []
+        for phase_name in PHASES:
+            total = Histogram.from_dict(series.get(phase_name, {})).sum_us
+            phase_share.append(
+                f"{100 * total / latency.sum_us:.0f}%"
+                if latency.sum_us and total
+                else "-"
+            )
+        rows.append(
+            f"{hook:<22} {event:<18} {outcome:<9} {latency.total:>7} "
+            f"{latency.quantile(0.5) * 1000:>8.1f} "
+            f"{latency.quantile(0.95) * 1000:>8.1f} "
+            f"{latency.quantile(0.99) * 1000:>8.1f} {latency.max_us / 1000:>8.1f} "
+            f"{phase_share[0]:>8} {phase_share[1]:>8}"
+        )
+    return "\n".join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hook latency telemetry")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Print latency percentiles per hook")
+    export = commands.add_parser("export", help="Write the OpenMetrics textfile")
+    export.add_argument(
+        "--output", default=TEXTFILE_DIR, help="textfile collector directory"
+    )
+    commands.add_parser("reset", help="Discard recorded telemetry")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        compact_if_due()
+        print(report(_load()))
+    elif args.command == "export":
+        compact_if_due()
+        print(export_openmetrics(directory=args.output))
+    else:
+        for path in [TELEMETRY_PATH, SAMPLES_PATH, *_claimed_samples()]:
+            path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Incremental, Parallel TODO Scan for the Stop Hook
+
+The stop hook runs after every Claude turn, so its cost has to track what
+changed in that turn rather than the size of the repository. This module:
+
+- Takes the candidate files from `git status` (or, outside git, from
+  modification times newer than the previous stop event)
+- Rescans only the candidates whose size or mtime changed since they were
+  last scanned; everything else is answered from .claude/cache/todo-scan.json
+- Scans in a thread pool with memory-mapped reads and one bytes regex, so
+  large files are never decoded or split into lines
+
+Usage from the stop hook:
+    from hooklib.todo_scan import scan
+    result = scan(session_id=input_data.get("session_id"))
+    for path, line, tag, text in result.findings: ...
+
+Command line:
+    python3 .claude/hooks/hooklib/todo_scan.py [--json] [--full]
+"""
+
+import json
+import mmap
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CACHE_PATH = Path(".claude/cache/todo-scan.json")
+TODO_TAGS = ["TODO", "FIXME", "HACK", "XXX", "NOTE"]
+MAX_SCAN_BYTES = 4 * 1024 * 1024  # larger files are treated as generated/binary
+BINARY_SNIFF_BYTES = 8192
+MAX_TEXT_CHARS = 120
+# Outside git, with no mark() for the session: files modified this recently
+FIRST_STOP_LOOKBACK = 3600
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # I/O bound: more threads than cores
+SKIP_DIRS = {
+    ".git",
+    ".claude",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "dist",
+    "build",
+    "target",
+}
+
+TODO_PATTERN = re.compile(
+    rb"\b(" + b"|".join(t.encode() for t in TODO_TAGS) + rb")\b[:\s]?([^\r\n]*)"
+)
+
+Finding = Tuple[str, int, str, str]  # path, line, tag, text
+
+
+@dataclass
+class ScanResult:
+    """Findings for the currently modified files"""
+
+    findings: List[Finding] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    scanned: int = 0
+    cached: int = 0
+    elapsed: float = 0.0
+
+
+def scan_file(path: str) -> List[Tuple[int, str, str]]:
+    """TODO-style comments in one file as (line, tag, text)"""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_SCAN_BYTES:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                    return []
+                findings = []
+                line, position = 1, 0
+                for match in TODO_PATTERN.finditer(data):
+                    line += data[position : match.start()].count(b"\n")
+                    position = match.start()
+                    text = (
+                        match.group(2)
+                        .decode("utf-8", "replace")
+                        .strip()[:MAX_TEXT_CHARS]
+                    )
+                    findings.append((line, match.group(1).decode(), text))
+                return findings
+    except (OSError, ValueError):
+        return []
+
+
+def _git(root: str, *args: str) -> Optional[bytes]:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=root, capture_output=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_modified(root: str) -> Optional[List[str]]:
+    """
+    Uncommitted (modified, added, untracked) files under root, relative to
+    root, or None outside git
+
+    git prints paths relative to the top of the work tree; root may be a
+    subdirectory of it, so the prefix up to root is stripped.
+    """
+    prefix = _git(root, "rev-parse", "--show-prefix")
+    status = _git(
+        root, "status", "--porcelain=v1", "-z", "--untracked-files=all", "--", "."
+    )
+    if prefix is None or status is None:
+        return None
+    prefix = prefix.decode("utf-8", "replace").strip()
+
+    paths = []
+    entries = iter(status.decode("utf-8", "replace").split("\0"))
+    for entry in entries:
+        if len(entry) < 4:
+            continue
+        code, path = entry[:2], entry[3:]
+        if "R" in code or "C" in code:
+            next(entries, None)  # -z prints the rename source as a separate entry
+        if not path.startswith(prefix):
+            continue
+        path = path[len(prefix) :]
+        if "D" in code or SKIP_DIRS.intersection(Path(path).parts[:-1]):
+            continue
+        paths.append(path)
+    return sorted(paths)
+
+
+def mtime_modified(root: str, since: float) -> List[str]:
+    """Files modified after `since`, skipping dependency and VCS directories"""
+    paths = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif (
+                        entry.is_file(follow_symlinks=False)
+                        and entry.stat().st_mtime > since
+                    ):
+                        paths.append(os.path.relpath(entry.path, root))
+        except OSError:
+            continue
+    return paths
+
+
+def _load_cache(path: Path) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: Path, cache: Dict):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache, separators=(",", ":")))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def mark(session_id: Optional[str] = None, cache_path: Path = CACHE_PATH):
+    """
+    Record the session start, so the first stop
+    outside git scans only this session's edits
+    """
+    _save_cache(
+        cache_path, {"session_id": session_id, "last_stop": time.time(), "files": {}}
+    )
+
+
+def scan(
+    root: str = ".",
+    session_id: Optional[str] = None,
+    full: bool = False,
+    cache_path: Path = CACHE_PATH,
+) -> ScanResult:
+    """
+    Scan files modified since the last stop event
+
+    Args:
+        root: Project root
+        session_id: Outside git, files modified earlier in the same session
+            stay in the report; a new session starts from scratch
+        full: Ignore the cache and rescan every candidate
+    """
+    start = time.perf_counter()
+    cache = {} if full else _load_cache(cache_path)
+    files: Dict[str, Dict] = cache.get("files", {})
+    now = time.time()
+
+    modified = git_modified(root)
+    if modified is None:
+        if session_id != cache.get("session_id"):
+            cache, files = {}, {}
+        candidates = mtime_modified(
+            root, cache.get("last_stop", now - FIRST_STOP_LOOKBACK)
+        )
+        retained = {p for p in files if os.path.exists(os.path.join(root, p))}
+        modified = sorted(set(candidates) | retained)
+    else:
+        candidates = modified
+
+    # Only files whose size or mtime changed since their last scan
+    stale = []
+    hits = len(set(modified) - set(candidates))  # earlier edits, still unchanged
+    for path in candidates:
+        try:
+            st = os.stat(os.path.join(root, path))
+        except OSError:
+            continue
+        signature = [st.st_mtime_ns, st.st_size]
+        entry = files.get(path)
+        if entry is None or entry.get("sig") != signature:
+            stale.append((path, signature))
+        else:
+            hits += 1
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(stale))) as pool:
+            results = pool.map(
+                lambda item: scan_file(os.path.join(root, item[0])), stale
+            )
+            for (path, signature), findings in zip(stale, results):
+                files[path] = {"sig": signature, "todos": findings}
+
+    current = set(modified)
+    files = {p: e for p, e in files.items() if p in current}
+    _save_cache(
+        cache_path, {"session_id": session_id, "last_stop": now, "files": files}
+    )
+
+    result = ScanResult(modified=modified, scanned=len(stale), cached=hits)
+    for path in modified:
+        for line, tag, text in files.get(path, {}).get("todos", []):
+            result.findings.append((path, line, tag, text))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def main():
+    result = scan(full="--full" in sys.argv[1:])
+    if "--json" in sys.argv[1:]:
+        print(
+            json.dumps(
+                {
+                    "modified": result.modified,
+                    "findings": [
+                        {"file": p, "line": n, "tag": t, "text": x}
+                        for p, n, t, x in result.findings
+                    ],
+                    "scanned": result.scanned,
+                    "cached": result.cached,
+                    "elapsed": round(result.elapsed, 4),
+                }
+            )
+        )
+        return
+
+    print(
+        f"📝 Modified files: {len(result.modified)} "
+        f"({result.scanned} scanned, {result.cached} cached, "
+        f"{result.elapsed * 1000:.1f} ms)"
+    )
+    if result.findings:
+        print(f"📌 TODO Comments Found: {len(result.findings)}")
+        for path, line, tag, text in result.findings:
+            print(f"   - {path}:{line}: {tag}: {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,12 @@ Entry point for the autonomous setup agent
 Usage:
     python scripts/setup-agent.py           # Run basic wizard
     python scripts/setup-agent.py --ai      # Run AI-powered wizard (requires SDK)
+    python scripts/setup-agent.py --ai --analysis map-reduce --concurrency 8
     python scripts/setup-agent.py --help    # Show help
 """
 
-import sys
-import os
 import argparse
+import sys
 from pathlib import Path
 
 # Add wizard module to path
@@ -21,7 +21,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 def check_sdk_available():
     """Check if Claude Agent SDK is available"""
     try:
-        import claude_agent_sdk
+        import claude_agent_sdk  # noqa: F401
+
         return True
     except ImportError:
         return False
@@ -38,6 +39,20 @@ def print_help():
     print("  python scripts/setup-agent.py --ai      Run AI-powered wizard")
     print("  python scripts/setup-agent.py --help    Show this help")
     print()
+    print("AI Wizard Options:")
+    print(
+        "  --analysis auto|single|map-reduce       Map-reduce splits large projects "
+        "into subsystems"
+    )
+    print(
+        "  --concurrency N                         Subsystem analyses in flight at "
+        "once (default: 4)"
+    )
+    print(
+        "  --stub                                  Use the local query stand-in (no "
+        "SDK or API key)"
+    )
+    print()
     print("Wizard Options:")
     print()
     print("  1. Basic Wizard (Default)")
@@ -60,19 +75,22 @@ def print_help():
 def run_basic_wizard():
     """Run the basic setup wizard"""
     try:
-        from wizard.setup_agent import main
         import asyncio
+
+        from wizard.setup_agent import main
+
         asyncio.run(main())
     except Exception as e:
         print(f"❌ Error running basic wizard: {e}")
         import traceback
+
         traceback.print_exc()
         sys.exit(1)
 
 
-def run_ai_wizard():
+def run_ai_wizard(wizard_args):
     """Run the AI-powered setup wizard"""
-    if not check_sdk_available():
+    if not check_sdk_available() and "--stub" not in wizard_args:
         print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
         print("❌ Claude Agent SDK not installed")
         print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -88,12 +106,15 @@ def run_ai_wizard():
         sys.exit(1)
 
     try:
-        from wizard.intelligent_setup_agent import main
         import asyncio
-        asyncio.run(main())
+
+        from wizard.intelligent_setup_agent import main
+
+        asyncio.run(main(wizard_args))
     except Exception as e:
         print(f"❌ Error running AI wizard: {e}")
         import traceback
+
         traceback.print_exc()
         sys.exit(1)
 
@@ -101,28 +122,26 @@ def run_ai_wizard():
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
-        description="Claude Code Starter Setup Wizard",
-        add_help=False
+        description="Claude Code Starter Setup Wizard", add_help=False
     )
     parser.add_argument(
         "--ai",
         action="store_true",
-        help="Use AI-powered wizard (requires claude-agent-sdk)"
-    )
-    parser.add_argument(
-        "--help",
-        action="store_true",
-        help="Show help message"
+        help="Use AI-powered wizard (requires claude-agent-sdk)",
     )
+    parser.add_argument("--help", action="store_true", help="Show help message")
 
-    args = parser.parse_args()
+    # Remaining options (--analysis, --concurrency, --stub) belong to the AI wizard
+    args, wizard_args = parser.parse_known_args()
+    if wizard_args and not args.ai and not args.help:
+        parser.error(f"unrecognized arguments: {' '.join(wizard_args)}")
 
     if args.help:
         print_help()
         sys.exit(0)
 
     if args.ai:
-        run_ai_wizard()
+        run_ai_wizard(wizard_args)
     else:
         run_basic_wizard()
 
@@ -136,5 +155,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
         import traceback
+
         traceback.print_exc()
         sys.exit(1)
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Map-Reduce Project Analysis
+
+The AI wizard's analysis used to be one prompt holding the whole project
+context, so on a large repository the file list was either cut short or
+the prompt outgrew the context window. This module
+analyzes a large project in pieces instead:
+
+- partition: the tree is split into subsystems. A directory holding a
+  package manifest (package.json, pyproject.toml, Cargo.toml, go.mod, ...)
+  is one subsystem, so workspace packages map one-to-one. Remaining files
+  are grouped by top-level directory. Oversized packages and groups are
+  split by subdirectory (sibling subdirectories packed together up to
+  MAX_PARTITION_FILES); tiny ones, and the smallest ones beyond
+  MAX_PARTITIONS, are pooled
+- map: one analysis query per subsystem, run concurrently under a limit
+- reduce: the per-subsystem summaries are combined into the final setup
+  plan, in rounds of REDUCE_FAN_IN when there are many of them
+
+Wall time then follows the slowest subsystem rather than the whole repo,
+and every subsystem's files are seen by some prompt.
+
+`query` is any callable with the Agent SDK's shape,
+query(prompt=..., options=...) -> async iterator of messages, so
+query_stub.py can stand in for it.
+
+Usage:
+    analysis = MapReduceAnalysis(query, make_options, concurrency=4)
+    plan = await analysis.run(partition_project(inventory), root, overview)
+
+Command line:
+    python3 scripts/wizard/analysis.py partitions [ROOT]
+    python3 scripts/wizard/analysis.py compare [ROOT] --concurrency 4   # vs query_stub
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scripts/, for hooklib
+from hooklib.inventory import Inventory  # noqa: E402
+
+MANIFESTS = (
+    "package.json",
+    "pyproject.toml",
+    "setup.py",
+    "Cargo.toml",
+    "go.mod",
+    "pom.xml",
+    "build.gradle",
+    "Gemfile",
+    "composer.json",
+)
+# "auto" uses map-reduce when a full listing would not fit
+SINGLE_PROMPT_MAX_CHARS = 32_000
+MAX_PARTITION_FILES = 400  # larger directory groups are split one level deeper
+MIN_PARTITION_FILES = 5  # smaller directory groups are pooled into "(other)"
+MAX_PARTITIONS = 24
+LISTED_FILES = 120  # paths shown per subsystem prompt, shallowest first
+# Manifests quoted per subsystem prompt (pooled packages can have many)
+LISTED_MANIFESTS = 8
+MANIFEST_CHARS = 1500
+MAP_CONCURRENCY = 4
+REDUCE_FAN_IN = 8  # partial analyses per reduce prompt
+SUMMARY_CHARS = 3000  # cap on each partial analysis fed to a reduce prompt
+
+MAP_SYSTEM_PROMPT = (
+    "You are analyzing one subsystem of a larger repository for a Claude Code setup. "
+    "Be brief and concrete."
+)
+REDUCE_SYSTEM_PROMPT = (
+    "You are a helpful setup assistant for Claude Code. Provide clear, concise "
+    "recommendations based on the project structure."
+)
+PLAN_REQUEST = """Please analyze my project and provide:
+1. What type of project this is
+2. What languages and frameworks you detect
+3. What Claude Code features would be most useful
+4. What hooks should be enabled
+5. What MCP servers would be helpful
+6. Any specific configuration recommendations
+
+Provide a concise, actionable setup plan."""
+
+QueryFn = Callable[..., Any]
+OptionsFactory = Callable[[str], Any]
+
+
+@dataclass
+class Partition:
+    """One subsystem of the project"""
+
+    name: str  # root-relative directory, or "(root)" / "(other)"
+    kind: str  # "package", "directory" or "pooled"
+    files: List[str] = field(default_factory=list)  # root-relative paths
+    manifests: List[str] = field(default_factory=list)
+
+    def extension_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for path in self.files:
+            ext = os.path.splitext(path)[1].lower()
+            counts[ext] = counts.get(ext, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+@dataclass
+class PartialResult:
+    """The map step's answer for one partition"""
+
+    partition: Partition
+    text: str = ""
+    error: str = ""
+    seconds: float = 0.0
+
+
+def message_text(message: Any) -> str:
+    """
+    Text of a streamed message: plain strings, or SDK messages with text content blocks
+    """
+    if isinstance(message, str):
+        return message
+    content = getattr(message, "content", None)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(getattr(block, "text", "") for block in content)
+    return ""
+
+
+def single_prompt_files(
+    paths: Iterable[str], context: Dict, max_chars: int = SINGLE_PROMPT_MAX_CHARS
+) -> Tuple[List[str], bool]:
+    """
+    The paths a single prompt over `context` can list within max_chars
+
+    Returns (paths, complete): complete is False when some paths had to be
+    left out, which is when map-reduce analysis is worth it.
+    """
+    # "[]" opened onto lines
+    budget = max_chars - len(single_prompt({**context, "files": []})) - 2
+    listed: List[str] = []
+    for path in paths:
+        # indentation, comma and newline in the JSON listing
+        budget -= len(json.dumps(path)) + 6
+        if budget < 0:
+            return listed, False
+        listed.append(path)
+    return listed, True
+
+
+def partition_project(
+    inventory: Inventory,
+    max_files: int = MAX_PARTITION_FILES,
+    min_files: int = MIN_PARTITION_FILES,
+    max_partitions: int = MAX_PARTITIONS,
+) -> List[Partition]:
+    """
+    Split the inventory's (non-hidden) files into at most max_partitions subsystems
+
+    Packages and top-level directories over max_files are split by
+    subdirectory; those under min_files are pooled into "(other)", and so
+    are the smallest remaining subsystems while there are too many.
+    """
+    files = sorted(inventory.paths())
+    package_roots = sorted(
+        {
+            os.path.dirname(p)
+            for p in files
+            if os.path.basename(p) in MANIFESTS and os.path.dirname(p)
+        },
+        key=lambda d: -d.count("/"),
+    )
+
+    packages: Dict[str, Partition] = {}
+    groups: Dict[str, List[str]] = {}
+    for path in files:
+        # Deepest enclosing package wins, so nested workspace packages stay separate
+        owner = next((r for r in package_roots if path.startswith(r + "/")), None)
+        if owner is not None:
+            partition = packages.setdefault(owner, Partition(owner, "package"))
+            partition.files.append(path)
+            if os.path.dirname(path) == owner and os.path.basename(path) in MANIFESTS:
+                partition.manifests.append(path)
+        else:
+            top = path.split("/", 1)[0] if "/" in path else ""
+            groups.setdefault(top, []).append(path)
+
+    partitions = []
+    for owner, package in sorted(packages.items()):
+        partitions.extend(
+            _split_directory(
+                owner, package.files, max_files, "package", package.manifests
+            )
+        )
+    root_files = groups.pop("", [])
+    for name, group in sorted(groups.items()):
+        partitions.extend(_split_directory(name, group, max_files))
+
+    pooled = Partition("(other)", "pooled")
+    kept = []
+    for partition in partitions:
+        if len(partition.files) < min_files:
+            _pool(pooled, partition)
+        else:
+            kept.append(partition)
+    # Too many subsystems: pool the smallest until the rest fit
+    reserved = 1 + bool(root_files)  # slots for "(root)" and "(other)"
+    kept.sort(key=lambda p: (len(p.files), p.kind == "package"), reverse=True)
+    while len(kept) + reserved > max_partitions and kept:
+        _pool(pooled, kept.pop())
+
+    if root_files:
+        kept.append(
+            Partition(
+                "(root)",
+                "directory",
+                root_files,
+                [p for p in root_files if p in MANIFESTS],
+            )
+        )
+    if pooled.files:
+        pooled.files.sort()
+        kept.append(pooled)
+    return sorted(kept, key=lambda p: p.name)
+
+
+def _pool(pooled: Partition, partition: Partition):
+    pooled.files.extend(partition.files)
+    pooled.manifests.extend(partition.manifests)
+
+
+def _split_directory(
+    name: str,
+    files: List[str],
+    max_files: int,
+    kind: str = "directory",
+    manifests: Iterable[str] = (),
+) -> List[Partition]:
+    """
+    A package or directory group, split by subdirectory while it is over max_files
+
+    Oversized subdirectories are split recursively; the others are packed
+    in name order into partitions of up to max_files, named like
+    "docs/[guides..reference]", so fifty small siblings do not become
+    fifty queries. Each manifest stays with the partition holding it.
+    """
+    result = _split_files(name, files, max_files, kind)
+    manifests = set(manifests)
+    for partition in result:
+        partition.manifests = [p for p in partition.files if p in manifests]
+    return result
+
+
+def _split_files(
+    name: str, files: List[str], max_files: int, kind: str
+) -> List[Partition]:
+    if len(files) <= max_files:
+        return [Partition(name, kind, files)]
+    children: Dict[str, List[str]] = {}
+    direct = []
+    for path in files:
+        rest = path[len(name) + 1 :]
+        if "/" in rest:
+            children.setdefault(rest.split("/", 1)[0], []).append(path)
+        else:
+            direct.append(path)
+    if not children:  # a flat directory cannot be split further
+        return [Partition(name, kind, files)]
+
+    result = []
+    pack: List[str] = []
+    pack_files: List[str] = list(direct)
+
+    def flush():
+        if not pack:
+            label = name
+        elif len(pack) == 1:
+            label = f"{name}/{pack[0]}"
+        else:
+            label = f"{name}/[{pack[0]}..{pack[-1]}]"
+        result.append(Partition(label, kind, list(pack_files)))
+        pack.clear()
+        pack_files.clear()
+
+    for child, child_files in sorted(children.items()):
+        if len(child_files) > max_files:
+            result.extend(_split_files(f"{name}/{child}", child_files, max_files, kind))
+            continue
+        if pack_files and len(pack_files) + len(child_files) > max_files:
+            flush()
+        pack.append(child)
+        pack_files.extend(child_files)
+    if pack_files:
+        flush()
+    return result
+
+
+def map_prompt(partition: Partition, root: Path) -> str:
+    """The per-subsystem analysis prompt"""
+    prefix = "" if partition.name.startswith("(") else partition.name + "/"
+    shown = sorted(partition.files, key=lambda p: (p.count("/"), p))[:LISTED_FILES]
+    file_types = ", ".join(
+        f"{ext or '(none)'} {count}"
+        for ext, count in list(partition.extension_counts().items())[:10]
+    )
+
+    manifest_text = []
+    for manifest in partition.manifests[:LISTED_MANIFESTS]:
+        try:
+            text = (root / manifest).read_text(errors="replace")[:MANIFEST_CHARS]
+        except OSError:
+            continue
+        manifest_text.append(f"--- {manifest} ---\n{text}")
+
+    listing = "\n".join(
+        p[len(prefix) :] if prefix and p.startswith(prefix) else p for p in shown
+    )
+    relative_to = prefix or "the project root"
+    return f"""
+I am setting up Claude Code for a large repository and analyzing it one subsystem
+at a time.
+
+Subsystem: {partition.name} ({partition.kind}, {len(partition.files)} files)
+File types: {file_types}
+{chr(10).join(manifest_text)}
+Files ({len(shown)} of {len(partition.files)}, relative to {relative_to}):
+{listing}
+
+Summarize this subsystem in at most 8 bullets:
+1. What it is, and which languages and frameworks it uses
+2. How it is built, tested and linted (commands, if visible)
+3. Which Claude Code hooks and MCP servers would help with it
+4. Anything unusual a setup plan should account for
+"""
+
+
+def _format_partials(partials: List[PartialResult]) -> str:
+    sections = []
+    for result in partials:
+        partition = result.partition
+        header = (
+            f"### {partition.name} ({partition.kind}, {len(partition.files)} files)"
+        )
+        if result.error:
+            body = (
+                f"(analysis failed: {result.error}; "
+                f"file types: {partition.extension_counts()})"
+            )
+        else:
+            body = result.text.strip()[:SUMMARY_CHARS]
+        sections.append(f"{header}\n{body}")
+    return "\n\n".join(sections)
+
+
+def merge_prompt(partials: List[PartialResult]) -> str:
+    """An intermediate reduce: several subsystem analyses into one"""
+    return f"""
+These are analyses of several subsystems of one repository:
+
+{_format_partials(partials)}
+
+Merge them into one analysis of these subsystems together, in at most 12 bullets.
+Keep languages, frameworks, build and test commands, and hook or MCP suggestions;
+drop repetition.
+"""
+
+
+def reduce_prompt(overview: Dict, partials: List[PartialResult]) -> str:
+    """The final reduce: subsystem analyses into the setup plan"""
+    return f"""
+I need help setting up Claude Code for my project. It is too large to describe in
+one message, so each subsystem was analyzed on its own.
+
+Project overview:
+{json.dumps(overview, indent=2)}
+
+Subsystem analyses:
+
+{_format_partials(partials)}
+
+{PLAN_REQUEST}
+"""
+
+
+class MapReduceAnalysis:
+    """Runs per-partition queries concurrently, then reduces them to one plan"""
+
+    def __init__(
+        self,
+        query: QueryFn,
+        make_options: OptionsFactory,
+        concurrency: int = MAP_CONCURRENCY,
+        fan_in: int = REDUCE_FAN_IN,
+    ):
+        self.query = query
+        self.make_options = make_options
+        self.concurrency = max(1, concurrency)
+        self.fan_in = max(2, fan_in)
+
+    async def ask(
+        self,
+        prompt: str,
+        system_prompt: str,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        parts = []
+        async for message in self.query(
+            prompt=prompt, options=self.make_options(system_prompt)
+        ):
+            text = message_text(message)
+            if on_text and text:
+                on_text(text)
+            parts.append(text)
+        return "".join(parts)
+
+    async def map(
+        self,
+        partitions: List[Partition],
+        root: Path,
+        on_done: Optional[Callable[[PartialResult], None]] = None,
+    ) -> List[PartialResult]:
+        """
+        Analyze every partition, at most `concurrency`
+        at a time; failures are kept, not raised
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def analyze(partition: Partition) -> PartialResult:
+            async with semaphore:
+                result = PartialResult(partition)
+                start = time.perf_counter()
+                try:
+                    result.text = await self.ask(
+                        map_prompt(partition, root), MAP_SYSTEM_PROMPT
+                    )
+                except Exception as e:
+                    result.error = str(e) or type(e).__name__
+                result.seconds = time.perf_counter() - start
+            if on_done:
+                on_done(result)
+            return result
+
+        return list(await asyncio.gather(*(analyze(p) for p in partitions)))
+
+    async def reduce(
+        self,
+        overview: Dict,
+        partials: List[PartialResult],
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Merge partial analyses in rounds of `fan_in`, then ask for the final plan"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def merge(group: List[PartialResult]) -> PartialResult:
+            if len(group) == 1:
+                return group[0]
+            merged = Partition(
+                ", ".join(r.partition.name for r in group),
+                "merged",
+                [f for r in group for f in r.partition.files],
+            )
+            async with semaphore:
+                text = await self.ask(merge_prompt(group), MAP_SYSTEM_PROMPT)
+            return PartialResult(merged, text)
+
+        while len(partials) > self.fan_in:
+            groups = [
+                partials[i : i + self.fan_in]
+                for i in range(0, len(partials), self.fan_in)
+            ]
+            partials = list(await asyncio.gather(*(merge(g) for g in groups)))
+        return await self.ask(
+            reduce_prompt(overview, partials), REDUCE_SYSTEM_PROMPT, on_text
+        )
+
+    async def run(
+        self,
+        partitions: List[Partition],
+        root: Path,
+        overview: Dict,
+        on_done: Optional[Callable[[PartialResult], None]] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        partials = await self.map(partitions, root, on_done)
+        if all(r.error for r in partials):
+            raise RuntimeError(
+                f"every subsystem analysis failed; first error: {partials[0].error}"
+            )
+        return await self.reduce(overview, partials, on_text)
+
+
+def single_prompt(context: Dict) -> str:
+    """The one-shot analysis prompt over the whole project context"""
+    return f"""
+I need help setting up Claude Code for my project. Here's what I have:
+
+Project Structure:
+{json.dumps(context, indent=2)}
+
+{PLAN_REQUEST}
+"""
+
+
+async def _compare(root: Path, args) -> Dict:
+    """Single prompt over every file vs map-reduce, both against the query stand-in"""
+    try:
+        from wizard.query_stub import StubQuery
+    except ImportError:
+        from query_stub import StubQuery
+
+    inventory = Inventory.open(str(root))
+    partitions = partition_project(inventory)
+
+    def make_options(system_prompt: str) -> Dict:
+        return {"system_prompt": system_prompt, "max_turns": 1}
+
+    report: Dict = {
+        "files": sum(len(p.files) for p in partitions),
+        "partitions": len(partitions),
+    }
+
+    stub = StubQuery(
+        latency_per_kb=args.latency_per_kb, context_chars=args.context_chars
+    )
+    start = time.perf_counter()
+    try:
+        await MapReduceAnalysis(stub, make_options).ask(
+            single_prompt({"files": list(inventory.paths())}), REDUCE_SYSTEM_PROMPT
+        )
+        report["single"] = {
+            "seconds": round(time.perf_counter() - start, 2),
+            "prompt_chars": stub.largest_prompt,
+        }
+    except ValueError as e:
+        report["single"] = {"error": str(e), "prompt_chars": stub.largest_prompt}
+
+    stub = StubQuery(
+        latency_per_kb=args.latency_per_kb, context_chars=args.context_chars
+    )
+    start = time.perf_counter()
+    await MapReduceAnalysis(stub, make_options, args.concurrency).run(
+        partitions, root, {"project_root": str(root)}
+    )
+    report["map_reduce"] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "queries": stub.calls,
+        "largest_prompt_chars": stub.largest_prompt,
+        "peak_concurrency": stub.peak_concurrency,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map-reduce project analysis")
+    sub = parser.add_subparsers(dest="command", required=True)
+    partitions_cmd = sub.add_parser(
+        "partitions", help="Show how the project would be partitioned"
+    )
+    partitions_cmd.add_argument("root", nargs="?", default=".")
+    compare = sub.add_parser(
+        "compare", help="Time single-prompt vs map-reduce analysis against the stand-in"
+    )
+    compare.add_argument("root", nargs="?", default=".")
+    compare.add_argument("--concurrency", type=int, default=MAP_CONCURRENCY)
+    compare.add_argument(
+        "--latency-per-kb",
+        type=float,
+        default=0.05,
+        help="Stand-in seconds per KB of prompt",
+    )
+    compare.add_argument(
+        "--context-chars", type=int, default=600_000, help="Stand-in context window"
+    )
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve()
+    if args.command == "partitions":
+        partitions = partition_project(Inventory.open(str(root)))
+        print(f"🧩 {len(partitions)} subsystem(s)")
+        for partition in partitions:
+            top = ", ".join(
+                f"{ext or '(none)'} {n}"
+                for ext, n in list(partition.extension_counts().items())[:3]
+            )
+            print(
+                f"   {partition.name:<40} {partition.kind:<9} "
+                f"{len(partition.files):>6} files   {top}"
+            )
+        return
+
+    report = asyncio.run(_compare(root, args))
+    single, mapped = report["single"], report["map_reduce"]
+    print(f"🧩 {report['files']} files in {report['partitions']} subsystem(s)")
+    if "error" in single:
+        print(f"   single prompt: ❌ {single['error']}")
+    else:
+        print(
+            f"   single prompt: {single['seconds']:.2f} s ({single['prompt_chars']:,} "
+            "chars)"
+        )
+    print(
+        f"   map-reduce:    {mapped['seconds']:.2f} s ({mapped['queries']} queries, "
+        "largest "
+        f"{mapped['largest_prompt_chars']:,} chars, {mapped['peak_concurrency']} at "
+        "once)"
+    )
+
+
+if __name__ == "__main__":
+    main()
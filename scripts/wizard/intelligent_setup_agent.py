@@ -10,18 +10,28 @@ This demonstrates the full potential of using Claude Agent SDK
 for an interactive, intelligent setup experience.
 """
 
-import os
-import json
+import argparse
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scripts/, for hooklib
+from hooklib.inventory import Inventory  # noqa: E402
+
+try:
+    from wizard import analysis
+except ImportError:  # run directly as scripts/wizard/intelligent_setup_agent.py
+    import analysis
 
 try:
-    from claude_agent_sdk import query, ClaudeAgentOptions
+    from claude_agent_sdk import ClaudeAgentOptions, query
+
     SDK_AVAILABLE = True
 except ImportError:
     SDK_AVAILABLE = False
-    print("⚠️  claude-agent-sdk not installed. Install with: pip install claude-agent-sdk")
+    print(
+        "⚠️  claude-agent-sdk not installed. Install with: pip install claude-agent-sdk"
+    )
 
 
 class IntelligentSetupAgent:
@@ -30,14 +40,27 @@ class IntelligentSetupAgent:
     context-aware project setup and configuration
     """
 
-    def __init__(self, project_root: str = "."):
+    def __init__(
+        self,
+        project_root: str = ".",
+        query_fn: Optional[Callable] = None,
+        analysis_mode: str = "auto",
+        concurrency: int = analysis.MAP_CONCURRENCY,
+    ):
         self.project_root = Path(project_root).resolve()
         self.project_context = {}
         self.setup_decisions = {}
+        self._inventory: Optional[Inventory] = None
+        # whether project_context["files"] lists every file
+        self._complete_listing = True
+        # Anything shaped like the SDK's query() works here, e.g. wizard/query_stub.py
+        self.query = query_fn or (query if SDK_AVAILABLE else None)
+        self.analysis_mode = analysis_mode  # "auto", "single" or "map-reduce"
+        self.concurrency = concurrency
 
     async def run(self):
         """Main entry point for intelligent setup"""
-        if not SDK_AVAILABLE:
+        if self.query is None:
             print("❌ Claude Agent SDK is required for this wizard")
             print("   Install with: pip install claude-agent-sdk")
             print("   Or use the basic wizard: python scripts/wizard/setup_agent.py")
@@ -69,11 +92,11 @@ class IntelligentSetupAgent:
 
         context = {
             "project_root": str(self.project_root),
-            "files": self._get_file_structure(),
             "existing_config": self._get_existing_config(),
             "detected_languages": self._detect_languages(),
             "detected_tools": self._detect_tools(),
         }
+        context["files"] = self._get_file_structure(context)
 
         self.project_context = context
         print(f"✅ Context gathered: {len(context['files'])} files analyzed")
@@ -82,40 +105,71 @@ class IntelligentSetupAgent:
         """Use Claude to intelligently analyze project and suggest setup"""
         print("\n🤖 Claude is analyzing your project...")
 
-        prompt = f"""
-I need help setting up Claude Code for my project. Here's what I have:
-
-Project Structure:
-{json.dumps(self.project_context, indent=2)}
-
-Please analyze my project and provide:
-1. What type of project this is
-2. What languages and frameworks you detect
-3. What Claude Code features would be most useful
-4. What hooks should be enabled
-5. What MCP servers would be helpful
-6. Any specific configuration recommendations
+        use_map_reduce = self.analysis_mode == "map-reduce" or (
+            self.analysis_mode == "auto" and not self._complete_listing
+        )
+        if use_map_reduce:
+            result = await self._map_reduce_analysis()
+        else:
+            result = await self._single_prompt_analysis()
 
-Provide a concise, actionable setup plan.
-"""
+        # Parse Claude's recommendations
+        self.setup_decisions = self._parse_recommendations(result)
 
-        options = ClaudeAgentOptions(
-            system_prompt="You are a helpful setup assistant for Claude Code. Provide clear, concise recommendations based on the project structure.",
-            max_turns=1
-        )
+    async def _single_prompt_analysis(self) -> str:
+        """One prompt holding the whole project context (as many files as fit)"""
+        prompt = analysis.single_prompt(self.project_context)
+        options = self._options(analysis.REDUCE_SYSTEM_PROMPT)
 
         print("\nClaude's Analysis:")
         print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-        analysis = []
-        async for message in query(prompt=prompt, options=options):
-            print(message, end='', flush=True)
-            analysis.append(message)
+        parts = []
+        async for message in self.query(prompt=prompt, options=options):
+            text = analysis.message_text(message)
+            print(text, end="", flush=True)
+            parts.append(text)
 
         print("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        return "".join(parts)
+
+    async def _map_reduce_analysis(self) -> str:
+        """
+        Analyze each subsystem separately and concurrently, then combine the results
+        """
+        partitions = analysis.partition_project(self.inventory)
+        print(
+            f"   {self.inventory.file_count} files in {len(partitions)} subsystems, "
+            f"analyzing {min(self.concurrency, len(partitions))} at a time"
+        )
 
-        # Parse Claude's recommendations
-        self.setup_decisions = self._parse_recommendations(''.join(analysis))
+        def on_done(result: analysis.PartialResult):
+            status = f"❌ {result.error}" if result.error else "✓"
+            print(
+                f"   {status} {result.partition.name} ({len(result.partition.files)} "
+                f"files, {result.seconds:.1f}s)"
+            )
+
+        overview = {
+            key: value for key, value in self.project_context.items() if key != "files"
+        }
+        overview["subsystems"] = {p.name: len(p.files) for p in partitions}
+
+        runner = analysis.MapReduceAnalysis(self.query, self._options, self.concurrency)
+        partials = await runner.map(partitions, self.project_root, on_done)
+        if all(r.error for r in partials):
+            print(
+                "⚠️  Every subsystem analysis failed; falling back to a single prompt"
+            )
+            return await self._single_prompt_analysis()
+
+        print("\nClaude's Analysis:")
+        print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        result = await runner.reduce(
+            overview, partials, on_text=lambda text: print(text, end="", flush=True)
+        )
+        print("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        return result
 
     async def _execute_setup(self):
         """Execute setup based on Claude's recommendations"""
@@ -145,49 +199,57 @@ Based on this project setup:
 - Languages: {', '.join(self.project_context.get('detected_languages', []))}
 - Tools: {', '.join(self.project_context.get('detected_tools', []))}
 
-Provide 3-5 specific, actionable tips for using Claude Code effectively with this project.
+Provide 3-5 specific, actionable tips for using Claude Code effectively with \
+this project.
 Focus on productivity, code quality, and best practices.
 """
 
-        options = ClaudeAgentOptions(
-            system_prompt="Provide concise, actionable productivity tips for Claude Code users.",
-            max_turns=1
+        options = self._options(
+            "Provide concise, actionable productivity tips for Claude Code users."
         )
 
         print("\nRecommendations:")
         print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-        async for message in query(prompt=prompt, options=options):
-            print(message, end='', flush=True)
+        async for message in self.query(prompt=prompt, options=options):
+            print(analysis.message_text(message), end="", flush=True)
 
         print("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
     # Helper methods
 
-    def _get_file_structure(self) -> List[str]:
+    def _options(self, system_prompt: str) -> Any:
+        """
+        Single-turn query options (a plain dict when the SDK is absent, for stand-ins)
+        """
+        if SDK_AVAILABLE:
+            return ClaudeAgentOptions(system_prompt=system_prompt, max_turns=1)
+        return {"system_prompt": system_prompt, "max_turns": 1}
+
+    @property
+    def inventory(self) -> Inventory:
+        """
+        File inventory, memory-mapped from .claude/cache/inventory.bin when current
+        """
+        if self._inventory is None:
+            self._inventory = Inventory.open(str(self.project_root))
+        return self._inventory
+
+    def _get_file_structure(self, context: Dict[str, Any]) -> List[str]:
         """Get simplified file structure"""
-        files = []
-        for path in self.project_root.rglob("*"):
-            if path.is_file():
-                # Skip common ignore patterns
-                if any(part.startswith('.') for part in path.parts):
-                    continue
-                if 'node_modules' in path.parts or '__pycache__' in path.parts:
-                    continue
-
-                rel_path = path.relative_to(self.project_root)
-                files.append(str(rel_path))
-
-                # Limit to prevent huge context
-                if len(files) >= 100:
-                    break
-
+        # Hidden files and dependency/cache directories are left out;
+        # limit to what fits in one prompt to prevent huge context
+        files, self._complete_listing = analysis.single_prompt_files(
+            self.inventory.paths(), context
+        )
         return files
 
     def _get_existing_config(self) -> Dict[str, bool]:
         """Check for existing configuration files"""
         config_files = {
-            "claude_settings": (self.project_root / ".claude" / "settings.json").exists(),
+            "claude_settings": (
+                self.project_root / ".claude" / "settings.json"
+            ).exists(),
             "git": (self.project_root / ".git").exists(),
             "package_json": (self.project_root / "package.json").exists(),
             "requirements_txt": (self.project_root / "requirements.txt").exists(),
@@ -208,14 +270,12 @@ Focus on productivity, code quality, and best practices.
             ".go": "Go",
             ".java": "Java",
             ".rb": "Ruby",
-            ".php": "PHP"
+            ".php": "PHP",
         }
 
-        for file in self.project_root.rglob("*"):
-            if file.is_file():
-                ext = file.suffix
-                if ext in ext_map:
-                    languages.add(ext_map[ext])
+        for ext in self.inventory.extension_counts(include_hidden=True):
+            if ext in ext_map:
+                languages.add(ext_map[ext])
 
         return list(languages)
 
@@ -229,7 +289,7 @@ Focus on productivity, code quality, and best practices.
             "Jest": ["jest.config.js", "jest.config.json"],
             "Pytest": ["pytest.ini", "pyproject.toml"],
             "Docker": ["Dockerfile", "docker-compose.yml"],
-            "GitHub Actions": [".github/workflows"]
+            "GitHub Actions": [".github/workflows"],
         }
 
         for tool, files in tool_indicators.items():
@@ -244,22 +304,56 @@ Focus on productivity, code quality, and best practices.
         """Parse Claude's recommendations into actionable decisions"""
         # Simple parsing - in a real implementation, this would be more sophisticated
         decisions = {
-            "install_dependencies": "dependencies" in analysis.lower() or "install" in analysis.lower(),
+            "install_dependencies": "dependencies" in analysis.lower()
+            or "install" in analysis.lower(),
             "setup_mcp": "mcp" in analysis.lower(),
             "enable_hooks": True,  # Default to true
-            "setup_github_actions": "github" in analysis.lower() or "actions" in analysis.lower()
+            "setup_github_actions": "github" in analysis.lower()
+            or "actions" in analysis.lower(),
         }
 
         return decisions
 
 
-async def main():
+async def main(argv: Optional[List[str]] = None):
     """Main entry point"""
-    import asyncio
-    agent = IntelligentSetupAgent()
+    parser = argparse.ArgumentParser(description="AI-powered setup wizard")
+    parser.add_argument(
+        "--analysis",
+        choices=["auto", "single", "map-reduce"],
+        default="auto",
+        help=f"map-reduce splits the project into subsystems; auto uses it when the "
+        f"file listing would push one prompt past "
+        f"{analysis.SINGLE_PROMPT_MAX_CHARS:,} characters",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=analysis.MAP_CONCURRENCY,
+        help="Subsystem analyses in flight at once",
+    )
+    parser.add_argument(
+        "--stub",
+        action="store_true",
+        help="Answer from the local stand-in (wizard/query_stub.py) instead of Claude",
+    )
+    args = parser.parse_args(argv)
+
+    query_fn = None
+    if args.stub:
+        try:
+            from wizard.query_stub import StubQuery
+        except ImportError:
+            from query_stub import StubQuery
+        query_fn = StubQuery()
+
+    agent = IntelligentSetupAgent(
+        query_fn=query_fn, analysis_mode=args.analysis, concurrency=args.concurrency
+    )
     await agent.run()
 
 
 if __name__ == "__main__":
     import asyncio
+
     asyncio.run(main())
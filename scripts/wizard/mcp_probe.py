@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+"""
+MCP Server Health and Startup Latency Probe
+
+Reads the MCP servers configured for a project (.mcp.json, plus the user
+and local scopes in ~/.claude.json) and probes all of them at once, the
+way a session starts them. For each server it measures:
+
+- cold start: launch (or connect) until the initialize response arrives
+- handshake: one ping round trip once initialized, i.e. protocol latency
+  without the startup cost
+- tools/list: time to fetch the full tool list (following cursors)
+- ready: launch until the tool list is in, which is what session startup
+  waits for
+- tool count, server name/version and negotiated protocol version
+
+Every probe runs under a timeout. Servers that fail, hang or exit are
+reported with the stage they reached and the tail of their stderr.
+Results are printed as a table, slowest first, and written to
+.claude/logs/mcp-health.json.
+
+Usage:
+    python3 scripts/wizard/mcp_probe.py                  # all configured servers
+    python3 scripts/wizard/mcp_probe.py --timeout 30 --server github --server archon
+    python3 scripts/wizard/mcp_probe.py --config path/to/.mcp.json --json out.json
+
+scripts/wizard/mcp_stub.py is a configurable stub server for trying this out.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import shutil
+import signal
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+PROTOCOL_VERSION = "2025-06-18"
+CLIENT_INFO = {"name": "claude-starter-mcp-probe", "version": "1.0.0"}
+USER_CONFIG = Path.home() / ".claude.json"
+REPORT_PATH = Path(".claude/logs/mcp-health.json")
+DEFAULT_TIMEOUT = 20.0  # seconds per server, launch to tool list
+SLOW_READY_MS = 2000  # servers slower than this are flagged
+CLOSE_GRACE = 2.0  # seconds a server gets to exit after stdin closes
+STDERR_TAIL_LINES = 20
+# Tool lists with large schemas exceed asyncio's 64 KiB default
+STREAM_LIMIT = 32 * 1024 * 1024
+
+_ENV_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+
+class McpError(Exception):
+    """A JSON-RPC error response"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{message} ({code})")
+        self.code = code
+
+
+def expand(value: Any, env: Optional[Dict[str, str]] = None) -> Any:
+    """Expand ${VAR} and ${VAR:-default} in strings, lists and dict values"""
+    env = os.environ if env is None else env
+    if isinstance(value, str):
+        return _ENV_PATTERN.sub(lambda m: env.get(m.group(1), m.group(2) or ""), value)
+    if isinstance(value, list):
+        return [expand(v, env) for v in value]
+    if isinstance(value, dict):
+        return {k: expand(v, env) for k, v in value.items()}
+    return value
+
+
+def transport_of(spec: Dict) -> str:
+    return spec.get("type") or ("stdio" if "command" in spec else "http")
+
+
+def load_servers(
+    project_root: Path,
+    user_config: Path = USER_CONFIG,
+    extra_configs: Optional[List[Path]] = None,
+) -> Dict[str, Dict]:
+    """
+    Configured MCP servers by name, each with a "scope" key
+
+    Later scopes override earlier ones: user, then project (.mcp.json),
+    then local (this project's entry in ~/.claude.json), then extra_configs.
+    """
+    servers: Dict[str, Dict] = {}
+
+    def merge(entries: Any, scope: str):
+        if isinstance(entries, dict):
+            for name, spec in entries.items():
+                if isinstance(spec, dict):
+                    servers[name] = {**spec, "scope": scope}
+
+    try:
+        user = json.loads(user_config.read_text())
+    except (OSError, ValueError):
+        user = {}
+    merge(user.get("mcpServers"), "user")
+    try:
+        merge(
+            json.loads((project_root / ".mcp.json").read_text()).get("mcpServers"),
+            "project",
+        )
+    except (OSError, ValueError):
+        pass
+    merge(
+        user.get("projects", {}).get(str(project_root), {}).get("mcpServers"), "local"
+    )
+    for path in extra_configs or []:
+        merge(json.loads(path.read_text()).get("mcpServers"), str(path))
+    return servers
+
+
+class StdioConnection:
+    """JSON-RPC over a server process's stdin/stdout (newline-delimited)"""
+
+    def __init__(
+        self,
+        command: str,
+        args: List[str],
+        env: Optional[Dict[str, str]] = None,
+        cwd: Optional[Path] = None,
+    ):
+        self.command = command
+        self.args = args
+        self.env = env or {}
+        self.cwd = cwd
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        self.on_notification = None  # callable(message) for server notifications
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    async def start(self):
+        executable = shutil.which(self.command)
+        if executable is None:
+            raise FileNotFoundError(f"command not found: {self.command}")
+        self.process = await asyncio.create_subprocess_exec(
+            executable,
+            *self.args,
+            cwd=self.cwd,
+            env={**os.environ, **self.env},
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+            start_new_session=True,  # own process group: npx wrappers die with it
+        )
+        self._tasks = [
+            asyncio.create_task(self._read_stdout()),
+            asyncio.create_task(self._read_stderr()),
+        ]
+
+    async def _read_stdout(self):
+        while True:
+            try:
+                line = await self.process.stdout.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                continue  # an oversized line; its request will time out
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # servers that log to stdout
+            if not isinstance(message, dict):
+                continue
+            if "method" in message and "id" in message:
+                # Server-to-client request (sampling, roots, ...): we declare none
+                await self._send(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": message["id"],
+                        "error": {"code": -32601, "message": "Method not found"},
+                    }
+                )
+            elif "method" in message:
+                if self.on_notification:
+                    self.on_notification(message)
+            else:
+                future = self._pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        code = await self.process.wait()
+        error = ConnectionError(f"server exited with code {code}")
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def _read_stderr(self):
+        try:
+            async for line in self.process.stderr:
+                self.stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+        except ValueError:
+            pass  # a line over STREAM_LIMIT; the tail is only diagnostics
+
+    async def _send(self, message: Dict):
+        if self.process is None or self.process.stdin.is_closing():
+            raise ConnectionError("server is not running")
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        await self.process.stdin.drain()
+
+    async def request(self, method: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Send a request and wait for its result; raises McpError for error responses
+        """
+        if self.process is not None and self.process.returncode is not None:
+            raise ConnectionError(f"server exited with code {self.process.returncode}")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            await self._send(message)
+            reply = await future
+        finally:
+            self._pending.pop(request_id, None)
+        if "error" in reply:
+            error = reply["error"] or {}
+            raise McpError(error.get("code", 0), error.get("message", "error"))
+        return reply.get("result") or {}
+
+    async def notify(self, method: str, params: Optional[Dict] = None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+
+    async def close(self, grace: float = CLOSE_GRACE):
+        """Close stdin, then escalate to SIGTERM and SIGKILL on the process group"""
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+            except (OSError, RuntimeError):
+                pass
+            for sig in (None, signal.SIGTERM, signal.SIGKILL):
+                if sig is not None:
+                    try:
+                        os.killpg(self.process.pid, sig)
+                    except OSError:
+                        pass
+                try:
+                    await asyncio.wait_for(self.process.wait(), grace)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class HttpConnection:
+    """
+    MCP over Streamable HTTP (JSON or SSE responses), or the legacy HTTP+SSE transport
+    """
+
+    pid = None  # no local process
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        legacy_sse: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.url = url
+        self.headers = headers or {}
+        self.legacy_sse = legacy_sse
+        self.timeout = timeout
+        self.session_id: Optional[str] = None
+        self.stderr_tail: Deque[
+            str
+        ] = deque()  # nothing to tail; same shape as StdioConnection
+        self._ids = itertools.count(1)
+        self._stream = None  # legacy SSE: the long-lived GET response
+        self._endpoint: Optional[str] = None
+
+    async def start(self):
+        if self.legacy_sse:
+            await asyncio.to_thread(self._open_sse)
+
+    def _open_sse(self):
+        request = urllib.request.Request(
+            self.url, headers={**self.headers, "Accept": "text/event-stream"}
+        )
+        self._stream = urllib.request.urlopen(request, timeout=self.timeout)
+        for event, data in _sse_events(self._stream):
+            if event == "endpoint":
+                self._endpoint = urllib.parse.urljoin(self.url, data.strip())
+                return
+        raise ConnectionError("SSE stream closed before the endpoint event")
+
+    def _post(self, message: Dict) -> Optional[Dict]:
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+            "MCP-Protocol-Version": PROTOCOL_VERSION,
+        }
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        request = urllib.request.Request(
+            self._endpoint or self.url,
+            data=json.dumps(message).encode(),
+            headers=headers,
+            method="POST",
+        )
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise ConnectionError(f"HTTP {e.code} {e.reason}") from None
+        with response:
+            self.session_id = response.headers.get("Mcp-Session-Id") or self.session_id
+            if "id" not in message:
+                return None  # notification: 202 Accepted, or a body nobody reads
+            if self.legacy_sse:
+                stream = self._stream  # the reply arrives on the GET stream
+            elif response.headers.get_content_type() == "text/event-stream":
+                stream = response
+            else:
+                return json.loads(response.read() or b"{}")
+            for event, data in _sse_events(stream):
+                try:
+                    reply = json.loads(data)
+                except ValueError:
+                    continue
+                if isinstance(reply, dict) and reply.get("id") == message["id"]:
+                    return reply
+        raise ConnectionError("stream ended without a response")
+
+    async def request(self, method: str, params: Optional[Dict] = None) -> Dict:
+        message = {"jsonrpc": "2.0", "id": next(self._ids), "method": method}
+        if params is not None:
+            message["params"] = params
+        reply = await asyncio.to_thread(self._post, message)
+        if "error" in reply:
+            error = reply["error"] or {}
+            raise McpError(error.get("code", 0), error.get("message", "error"))
+        return reply.get("result") or {}
+
+    async def notify(self, method: str, params: Optional[Dict] = None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            await asyncio.to_thread(self._post, message)
+        except (OSError, ConnectionError):
+            pass  # servers may reject notifications they don't handle
+
+    async def close(self, grace: float = CLOSE_GRACE):
+        if self._stream is not None:
+            self._stream.close()
+        elif self.session_id:
+            request = urllib.request.Request(
+                self.url,
+                method="DELETE",
+                headers={**self.headers, "Mcp-Session-Id": self.session_id},
+            )
+            try:
+                await asyncio.to_thread(urllib.request.urlopen, request, timeout=grace)
+            except (OSError, urllib.error.HTTPError):
+                pass
+
+
+def _sse_events(stream):
+    """(event, data) pairs from a text/event-stream response"""
+    event, data = "message", []
+    for raw in stream:
+        line = raw.decode("utf-8", "replace").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+def connect(spec: Dict, cwd: Optional[Path] = None, timeout: float = DEFAULT_TIMEOUT):
+    """A connection for a server spec (not yet started)"""
+    spec = expand(spec)
+    transport = transport_of(spec)
+    if transport == "stdio":
+        return StdioConnection(
+            spec["command"],
+            [str(a) for a in spec.get("args", [])],
+            {k: str(v) for k, v in spec.get("env", {}).items()},
+            cwd,
+        )
+    if transport in ("http", "sse"):
+        return HttpConnection(
+            spec["url"],
+            spec.get("headers"),
+            legacy_sse=transport == "sse",
+            timeout=timeout,
+        )
+    raise ValueError(f"unsupported transport: {transport}")
+
+
+async def initialize(connection) -> Dict:
+    """
+    The initialize request and initialized notification; returns the initialize result
+    """
+    result = await connection.request(
+        "initialize",
+        {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": CLIENT_INFO,
+        },
+    )
+    await connection.notify("notifications/initialized")
+    return result
+
+
+async def list_tools(connection) -> List[Dict]:
+    """Every tool the server advertises, following nextCursor"""
+    tools: List[Dict] = []
+    cursor = None
+    while True:
+        result = await connection.request(
+            "tools/list", {"cursor": cursor} if cursor else {}
+        )
+        tools.extend(result.get("tools", []))
+        cursor = result.get("nextCursor")
+        if not cursor:
+            return tools
+
+
+@dataclass
+class ProbeResult:
+    """Startup measurements for one server; times in milliseconds"""
+
+    name: str
+    scope: str = ""
+    transport: str = ""
+    status: str = "error"  # ok, error, timeout
+    stage: str = "launch"  # how far the probe got
+    cold_start_ms: Optional[float] = None
+    handshake_ms: Optional[float] = None
+    tools_list_ms: Optional[float] = None
+    ready_ms: Optional[float] = None
+    tool_count: Optional[int] = None
+    tools: List[str] = field(default_factory=list)
+    server: str = ""
+    protocol_version: str = ""
+    error: str = ""
+    stderr_tail: List[str] = field(default_factory=list)
+
+    @property
+    def slow(self) -> bool:
+        return self.status != "ok" or (self.ready_ms or 0) > SLOW_READY_MS
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+async def probe_server(
+    name: str, spec: Dict, cwd: Optional[Path] = None, timeout: float = DEFAULT_TIMEOUT
+) -> ProbeResult:
+    """Launch or connect, handshake and list tools, under one timeout"""
+    result = ProbeResult(
+        name, scope=spec.get("scope", ""), transport=transport_of(spec)
+    )
+    connection = None
+
+    async def steps():
+        nonlocal connection
+        start = time.perf_counter()
+        connection = connect(spec, cwd, timeout)
+        await connection.start()
+        result.stage = "initialize"
+        info = await initialize(connection)
+        result.cold_start_ms = _ms(start)
+        server = info.get("serverInfo", {})
+        result.server = f"{server.get('name', '?')} {server.get('version', '')}".strip()
+        result.protocol_version = info.get("protocolVersion", "")
+
+        result.stage = "ping"
+        ping = time.perf_counter()
+        try:
+            await connection.request("ping")
+        except McpError:
+            pass  # an error reply is still a round trip
+        result.handshake_ms = _ms(ping)
+
+        result.stage = "tools/list"
+        listing = time.perf_counter()
+        tools = (
+            await list_tools(connection)
+            if "tools" in info.get("capabilities", {"tools": {}})
+            else []
+        )
+        result.tools_list_ms = _ms(listing)
+        result.tool_count = len(tools)
+        result.tools = [t.get("name", "") for t in tools]
+        result.ready_ms = _ms(start)
+        result.stage = "ready"
+        result.status = "ok"
+
+    try:
+        await asyncio.wait_for(steps(), timeout)
+    except asyncio.TimeoutError:
+        result.status = "timeout"
+        result.error = f"no response to {result.stage} within {timeout:.0f}s"
+    except (OSError, ConnectionError, McpError, ValueError, KeyError) as e:
+        result.error = str(e) or type(e).__name__
+    finally:
+        if connection is not None:
+            await connection.close()
+            result.stderr_tail = list(connection.stderr_tail)
+    return result
+
+
+async def probe_all(
+    servers: Dict[str, Dict],
+    cwd: Optional[Path] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: Optional[int] = None,
+) -> List[ProbeResult]:
+    """Probe every server at once (or `concurrency` at a time); slowest first"""
+    semaphore = asyncio.Semaphore(concurrency or max(1, len(servers)))
+
+    async def limited(name: str, spec: Dict) -> ProbeResult:
+        async with semaphore:
+            return await probe_server(name, spec, cwd, timeout)
+
+    results = await asyncio.gather(*(limited(n, s) for n, s in servers.items()))
+    return sorted(results, key=lambda r: (r.status == "ok", -(r.ready_ms or 0)))
+
+
+def render_table(results: List[ProbeResult]) -> str:
+    """Fixed-width table, one row per server"""
+
+    def cell(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.0f}"
+
+    headers = [
+        "Server",
+        "Scope",
+        "Transport",
+        "Status",
+        "Cold start",
+        "Handshake",
+        "tools/list",
+        "Ready",
+        "Tools",
+    ]
+    rows = [
+        [
+            ("⚠️ " if r.slow else "") + r.name,
+            r.scope,
+            r.transport,
+            r.status,
+            cell(r.cold_start_ms),
+            cell(r.handshake_ms),
+            cell(r.tools_list_ms),
+            cell(r.ready_ms),
+            "-" if r.tool_count is None else str(r.tool_count),
+        ]
+        for r in results
+    ]
+    widths = [
+        max(len(str(row[i])) for row in [headers] + rows) for i in range(len(headers))
+    ]
+    lines = [
+        "  ".join(
+            h.ljust(w) if i < 4 else h.rjust(w)
+            for i, (h, w) in enumerate(zip(headers, widths))
+        )
+    ]
+    lines.append("  ".join("-" * w for w in widths))
+    for row in rows:
+        lines.append(
+            "  ".join(
+                c.ljust(w) if i < 4 else c.rjust(w)
+                for i, (c, w) in enumerate(zip(row, widths))
+            )
+        )
+    lines.append("(times in ms)")
+    return "\n".join(lines)
+
+
+def summarize(results: List[ProbeResult]) -> List[str]:
+    """Findings worth printing under the table"""
+    lines = []
+    ready = [r for r in results if r.status == "ok"]
+    if ready:
+        slowest = max(ready, key=lambda r: r.ready_ms)
+        lines.append(
+            f"Session startup waits ~{slowest.ready_ms:.0f} ms for the slowest server "
+            f"({slowest.name}); "
+            f"{sum(r.tool_count for r in ready)} tools from {len(ready)} server(s)"
+        )
+    for r in results:
+        if r.status != "ok":
+            lines.append(f"{r.name}: {r.status} at {r.stage}: {r.error}")
+            lines.extend(f"    {line}" for line in r.stderr_tail[-3:])
+        elif r.ready_ms > SLOW_READY_MS:
+            lines.append(
+                f"{r.name}: ready after {r.ready_ms:.0f} ms (cold start "
+                f"{r.cold_start_ms:.0f} ms)"
+            )
+    return lines
+
+
+def write_report(
+    results: List[ProbeResult],
+    path: Path = REPORT_PATH,
+    timeout: float = DEFAULT_TIMEOUT,
+):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "timeout_s": timeout,
+        "slow_ready_ms": SLOW_READY_MS,
+        "servers": [asdict(r) for r in results],
+    }
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(report, indent=2))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Probe configured MCP servers concurrently"
+    )
+    parser.add_argument("--project", type=Path, default=Path("."))
+    parser.add_argument(
+        "--config", type=Path, action="append", help="extra file with an mcpServers map"
+    )
+    parser.add_argument("--server", action="append", help="only these servers")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="probe at most N servers at a time (default: all)",
+    )
+    parser.add_argument("--json", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+
+    project = args.project.resolve()
+    servers = load_servers(project, extra_configs=args.config)
+    if args.server:
+        servers = {n: s for n, s in servers.items() if n in args.server}
+    if not servers:
+        print("No MCP servers configured (.mcp.json, ~/.claude.json)")
+        return
+
+    results = asyncio.run(probe_all(servers, project, args.timeout, args.concurrency))
+    print(render_table(results))
+    for line in summarize(results):
+        print(line)
+    write_report(results, args.json, args.timeout)
+    print(f"Report: {args.json}")
+    sys.exit(0 if all(r.status == "ok" for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Lazy-Start MCP Multiplexing Proxy
+
+Claude Code starts every configured MCP server when a session begins, even
+the ones that session never uses. With this proxy, the session starts one
+process instead:
+
+- The proxy is the only entry in .mcp.json. The real servers are listed in
+  .claude/mcp/servers.json (same "mcpServers" format)
+- tools/list is answered from cached tool manifests
+  (.claude/mcp/manifests.json), so no real server is started at session
+  start. Each tool is exposed as <server>__<tool>
+- A real server is launched on the first call to one of its tools, and
+  stopped again after it has been idle for idleTimeout seconds
+- A server with no cached manifest (new, or its config changed) is started
+  once to fetch its tool list, then cached
+
+Startup time and idle memory then grow with the servers a session actually
+uses, not with the number configured. Only tools are proxied; servers
+whose resources or prompts you rely on should stay in .mcp.json.
+
+Installed by the setup wizard (scripts/wizard/setup_agent.py). By hand:
+    mkdir -p .claude/mcp
+    cp scripts/wizard/mcp_proxy.py scripts/wizard/mcp_probe.py .claude/mcp/
+    # move the stdio servers from .mcp.json into .claude/mcp/servers.json, then:
+    # .mcp.json: {"mcpServers": {"proxy": {"command": "python3",
+    #             "args": [".claude/mcp/mcp_proxy.py"]}}}
+    python3 .claude/mcp/mcp_proxy.py refresh    # fetch every manifest now
+
+Settings in servers.json:
+    {"mcpServers": {...}, "proxy": {"idleTimeout": 300, "startTimeout": 60}}
+
+Command line:
+    python3 .claude/mcp/mcp_proxy.py [serve]    # stdio MCP server (.mcp.json runs this)
+    python3 .claude/mcp/mcp_proxy.py refresh    # start each server, cache its tools
+    python3 .claude/mcp/mcp_proxy.py status     # servers and cached manifests
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# mcp_probe.py is installed alongside
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mcp_probe import (  # noqa: E402
+    McpError,
+    connect,
+    initialize,
+    list_tools,
+    transport_of,
+)
+
+CONFIG_DIR = Path(".claude/mcp")
+SERVERS_FILE = "servers.json"
+MANIFESTS_FILE = "manifests.json"
+PROTOCOL_VERSION = "2025-06-18"
+SERVER_INFO = {"name": "claude-starter-mcp-proxy", "version": "1.0.0"}
+IDLE_TIMEOUT = 300.0  # seconds without a call before a server is stopped
+START_TIMEOUT = 60.0  # seconds for a server to start and list its tools
+# Seconds before a server that failed discovery is tried again at tools/list
+FAILED_RETRY = 600.0
+REAP_INTERVAL = 5.0
+SEPARATOR = "__"
+# Anthropic API limit on tool names (before Claude Code's mcp__proxy__ prefix)
+MAX_TOOL_NAME = 64
+
+
+def log(message: str):
+    """Diagnostics go to stderr; stdout carries the protocol"""
+    print(f"[mcp-proxy] {message}", file=sys.stderr, flush=True)
+
+
+def fingerprint(spec: Dict) -> str:
+    """Changes when anything that affects the server's tools changes"""
+    relevant = {
+        k: spec.get(k) for k in ("type", "command", "args", "env", "url", "headers")
+    }
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def exposed_name(server: str, tool: str) -> str:
+    """<server>__<tool>, restricted to [A-Za-z0-9_-] and MAX_TOOL_NAME characters"""
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", f"{server}{SEPARATOR}{tool}")
+    if len(name) > MAX_TOOL_NAME:
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+        name = f"{name[:MAX_TOOL_NAME - 9]}_{digest}"
+    return name
+
+
+class Backend:
+    """One real server, started on demand and stopped when idle"""
+
+    def __init__(self, name: str, spec: Dict, cwd: Path, start_timeout: float):
+        self.name = name
+        self.spec = spec
+        self.cwd = cwd
+        self.start_timeout = start_timeout
+        self.fingerprint = fingerprint(spec)
+        self.connection = None
+        self.tools: Optional[List[Dict]] = None  # manifest; None until known
+        self.error = ""  # why the last discovery failed
+        self.failed_at = 0.0
+        self.last_used = 0.0
+        self.in_flight = 0
+        self.on_tools_changed = None  # callable(backend), set by the proxy
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.connection is not None
+
+    async def ensure_started(self):
+        """
+        Start and initialize the server if it isn't
+        running; concurrent callers share one start
+        """
+        async with self._lock:
+            if self.connection is not None:
+                process = getattr(self.connection, "process", None)
+                if process is None or process.returncode is None:
+                    return self.connection
+                log(f"{self.name} exited with code {process.returncode}; restarting")
+                await self._close()
+
+            started = time.perf_counter()
+            connection = connect(self.spec, self.cwd, self.start_timeout)
+            try:
+                await asyncio.wait_for(self._start(connection), self.start_timeout)
+            except BaseException:
+                await connection.close()
+                raise
+            self.connection = connection
+            self.last_used = time.time()
+            log(
+                f"started {self.name} in {(time.perf_counter() - started) * 1000:.0f} "
+                "ms" + (f" (pid {connection.pid})" if connection.pid else "")
+            )
+            return connection
+
+    async def _start(self, connection):
+        await connection.start()
+        connection.on_notification = self._notification
+        info = await initialize(connection)
+        if "tools" in info.get("capabilities", {"tools": {}}):
+            tools = await list_tools(connection)
+        else:
+            tools = []
+        if tools != self.tools:
+            self.tools = tools
+            if self.on_tools_changed:
+                self.on_tools_changed(self)
+
+    def _notification(self, message: Dict):
+        if message.get("method") == "notifications/tools/list_changed":
+            asyncio.get_running_loop().create_task(self._refresh_tools())
+
+    async def _refresh_tools(self):
+        try:
+            self.tools = await list_tools(self.connection)
+        except (OSError, ConnectionError, McpError):
+            return
+        if self.on_tools_changed:
+            self.on_tools_changed(self)
+
+    async def call(self, tool: str, arguments: Dict) -> Dict:
+        self.in_flight += 1
+        try:
+            connection = await self.ensure_started()
+            return await connection.request(
+                "tools/call", {"name": tool, "arguments": arguments}
+            )
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.time()
+
+    async def stop(self, reason: str = ""):
+        async with self._lock:
+            if self.connection is not None:
+                await self._close()
+                if reason:
+                    log(f"stopped {self.name} ({reason})")
+
+    async def _close(self):
+        connection, self.connection = self.connection, None
+        await connection.close()
+
+
+class McpProxy:
+    """Serves the union of the backends' tools over stdio"""
+
+    def __init__(self, config_dir: Path = CONFIG_DIR, cwd: Optional[Path] = None):
+        self.config_dir = config_dir
+        self.cwd = cwd or Path.cwd()
+        try:
+            config = json.loads((config_dir / SERVERS_FILE).read_text())
+        except (OSError, ValueError) as e:
+            log(f"cannot read {config_dir / SERVERS_FILE}: {e}")
+            config = {}
+        settings = config.get("proxy", {})
+        self.idle_timeout = float(settings.get("idleTimeout", IDLE_TIMEOUT))
+        start_timeout = float(settings.get("startTimeout", START_TIMEOUT))
+        self.backends: Dict[str, Backend] = {}
+        for name, spec in config.get("mcpServers", {}).items():
+            if isinstance(spec, dict) and not spec.get("disabled"):
+                backend = Backend(name, spec, self.cwd, start_timeout)
+                backend.on_tools_changed = self._tools_changed
+                self.backends[name] = backend
+        self._routes: Dict[str, Tuple[Backend, str]] = {}
+        self._client_ready = False
+        self._discovering = 0
+        self._load_manifests()
+
+    # Manifest cache
+
+    def _load_manifests(self):
+        try:
+            manifests = json.loads((self.config_dir / MANIFESTS_FILE).read_text())
+        except (OSError, ValueError):
+            manifests = {}
+        for name, backend in self.backends.items():
+            entry = manifests.get(name, {})
+            if entry.get("fingerprint") == backend.fingerprint:
+                backend.tools = entry.get("tools")
+                backend.error = entry.get("error", "")
+                backend.failed_at = entry.get("failed_at", 0.0)
+
+    def save_manifests(self):
+        manifests = {}
+        for name, b in self.backends.items():
+            if b.tools is not None:
+                manifests[name] = {
+                    "fingerprint": b.fingerprint,
+                    "tools": b.tools,
+                    "updated": time.time(),
+                }
+            elif b.failed_at:
+                manifests[name] = {
+                    "fingerprint": b.fingerprint,
+                    "error": b.error,
+                    "failed_at": b.failed_at,
+                }
+        path = self.config_dir / MANIFESTS_FILE
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(manifests, indent=1))
+            os.replace(tmp, path)
+        except OSError as e:
+            log(f"cannot write {path}: {e}")
+
+    def _tools_changed(self, backend: Backend):
+        if self._discovering:
+            # discover() saves once at the end; the client is waiting for the list
+            return
+        self.save_manifests()
+        if self._client_ready:
+            self._write(
+                {"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}
+            )
+
+    async def discover(self, backends: List[Backend]) -> Dict[str, str]:
+        """
+        Start the given servers concurrently to
+        learn their tools; returns errors by server
+        """
+
+        async def one(backend: Backend) -> Optional[str]:
+            try:
+                await backend.ensure_started()
+            except asyncio.TimeoutError:
+                return f"no tool list within {backend.start_timeout:.0f}s"
+            except (OSError, ConnectionError, McpError, ValueError, KeyError) as e:
+                return str(e) or type(e).__name__
+            return None
+
+        self._discovering += 1
+        try:
+            errors = await asyncio.gather(*(one(b) for b in backends))
+        finally:
+            self._discovering -= 1
+        failed = {}
+        for backend, error in zip(backends, errors):
+            backend.error = error or ""
+            backend.failed_at = time.time() if error else 0.0
+            if error:
+                failed[backend.name] = error
+                log(f"{backend.name}: {error}")
+        self.save_manifests()
+        return failed
+
+    # Protocol
+
+    def tool_list(self) -> List[Dict]:
+        tools, routes = [], {}
+        for name, backend in self.backends.items():
+            for tool in backend.tools or []:
+                exposed = exposed_name(name, tool.get("name", ""))
+                routes[exposed] = (backend, tool.get("name", ""))
+                description = tool.get("description", "")
+                tools.append(
+                    {
+                        **tool,
+                        "name": exposed,
+                        "description": f"[{name}] {description}".strip(),
+                    }
+                )
+        self._routes = routes
+        return tools
+
+    async def handle(self, message: Dict) -> Optional[Dict]:
+        method = message.get("method")
+        params = message.get("params") or {}
+        reply = {"jsonrpc": "2.0", "id": message.get("id")}
+
+        if method == "initialize":
+            reply["result"] = {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": SERVER_INFO,
+            }
+        elif method == "notifications/initialized":
+            self._client_ready = True
+            return None
+        elif method == "ping":
+            reply["result"] = {}
+        elif method == "tools/list":
+            retry = time.time() - FAILED_RETRY
+            unknown = [
+                b
+                for b in self.backends.values()
+                if b.tools is None and b.failed_at < retry
+            ]
+            if unknown:  # first use of these servers: fetch their manifests once
+                await self.discover(unknown)
+            reply["result"] = {"tools": self.tool_list()}
+        elif method == "tools/call":
+            route = self._routes.get(params.get("name", ""))
+            if route is None:
+                self.tool_list()  # a tool added since the client last listed
+                route = self._routes.get(params.get("name", ""))
+            if route is None:
+                reply["error"] = {
+                    "code": -32602,
+                    "message": f"Unknown tool: {params.get('name')}",
+                }
+            else:
+                backend, tool = route
+                try:
+                    reply["result"] = await backend.call(
+                        tool, params.get("arguments") or {}
+                    )
+                except McpError as e:
+                    reply["error"] = {"code": e.code, "message": str(e)}
+                except (
+                    asyncio.TimeoutError,
+                    OSError,
+                    ConnectionError,
+                    ValueError,
+                    KeyError,
+                ) as e:
+                    # The model should see why, not a transport failure
+                    reply["result"] = {
+                        "isError": True,
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": f"MCP server '{backend.name}' is unavailable: "
+                                f"{e or type(e).__name__}",
+                            }
+                        ],
+                    }
+        elif "id" not in message:
+            return None  # other notifications
+        else:
+            reply["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+        return reply
+
+    def _write(self, message: Dict):
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    async def _respond(self, message: Dict):
+        reply = await self.handle(message)
+        if reply is not None:
+            self._write(reply)
+
+    async def reap(self):
+        """Stop servers idle for longer than idle_timeout"""
+        while True:
+            await asyncio.sleep(min(REAP_INTERVAL, self.idle_timeout))
+            now = time.time()
+            for backend in self.backends.values():
+                if (
+                    backend.running
+                    and not backend.in_flight
+                    and now - backend.last_used > self.idle_timeout
+                ):
+                    await backend.stop(f"idle {now - backend.last_used:.0f}s")
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=32 * 1024 * 1024)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        reaper = asyncio.create_task(self.reap())
+        tasks = set()
+        cached = sum(1 for b in self.backends.values() if b.tools is not None)
+        log(f"serving {len(self.backends)} server(s), {cached} with cached manifests")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(message, dict) and "method" in message:
+                    # calls to slow servers don't block others
+                    task = asyncio.create_task(self._respond(message))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        finally:
+            reaper.cancel()
+            if tasks:
+                await asyncio.wait(tasks, timeout=5)
+            await asyncio.gather(
+                *(b.stop() for b in self.backends.values()), return_exceptions=True
+            )
+
+
+def status(proxy: McpProxy) -> str:
+    lines = [
+        f"{len(proxy.backends)} server(s) in {proxy.config_dir / SERVERS_FILE}, "
+        f"idle timeout {proxy.idle_timeout:.0f}s"
+    ]
+    for name, backend in proxy.backends.items():
+        if backend.tools is not None:
+            manifest = f"{len(backend.tools)} tools cached"
+        else:
+            manifest = f"failed: {backend.error}" if backend.failed_at else "not cached"
+        lines.append(f"  {name:<24} {transport_of(backend.spec):<6} {manifest}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy-start MCP multiplexing proxy")
+    parser.add_argument(
+        "command", nargs="?", default="serve", choices=["serve", "refresh", "status"]
+    )
+    parser.add_argument("--config-dir", type=Path, default=CONFIG_DIR)
+    parser.add_argument(
+        "--start-timeout",
+        type=float,
+        help="refresh: seconds per server (first npx runs download)",
+    )
+    args = parser.parse_args()
+
+    proxy = McpProxy(args.config_dir)
+    if args.start_timeout:
+        for backend in proxy.backends.values():
+            backend.start_timeout = args.start_timeout
+    if args.command == "status":
+        print(status(proxy))
+    elif args.command == "refresh":
+
+        async def refresh():
+            failed = await proxy.discover(list(proxy.backends.values()))
+            await asyncio.gather(*(b.stop() for b in proxy.backends.values()))
+            return failed
+
+        failed = asyncio.run(refresh())
+        print(status(proxy))
+        sys.exit(1 if failed else 0)
+    else:
+        try:
+            asyncio.run(proxy.serve())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Stub MCP Server (stdio)
+
+A dependency-free MCP server speaking newline-delimited JSON-RPC on stdin/
+stdout, for checking the MCP probe and proxy without real servers. Startup
+time, per-request latency, tool count and failure modes are configurable,
+so one .mcp.json can imitate a mix of fast, slow, broken and hung servers.
+
+Usage in .mcp.json:
+    {
+      "mcpServers": {
+        "fast": {"command": "python3",
+                 "args": ["scripts/wizard/mcp_stub.py", "--tools", "5"]},
+        "slow": {"command": "python3",
+                 "args": ["scripts/wizard/mcp_stub.py", "--startup", "2.5"]},
+        "hung": {"command": "python3",
+                 "args": ["scripts/wizard/mcp_stub.py", "--hang"]}
+      }
+    }
+
+Options:
+    --name NAME        serverInfo name (default: stub)
+    --tools N          tools advertised, as stub_tool_0..N-1 (default: 3)
+    --page-size N      tools per tools/list page, to exercise cursors (default: all)
+    --startup S        seconds to sleep before reading stdin (cold start)
+    --latency S        seconds added to every response
+    --hang             never answer initialize
+    --exit-code N      exit immediately with this code (broken server)
+    --memory MB        allocate this much at startup (idle footprint)
+
+For MCP over HTTP, examples/rag-integration/benchmarks/archon_stub.py serves
+the same methods at POST /mcp.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+PROTOCOL_VERSION = "2025-06-18"
+
+
+def tool(index: int) -> dict:
+    return {
+        "name": f"stub_tool_{index}",
+        "description": f"Stub tool {index}: echoes its arguments",
+        "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}},
+    }
+
+
+def handle(message: dict, args) -> dict:
+    """The JSON-RPC response for one request"""
+    method = message.get("method")
+    params = message.get("params") or {}
+    reply = {"jsonrpc": "2.0", "id": message.get("id")}
+
+    if method == "initialize":
+        reply["result"] = {
+            "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": args.name, "version": "1.0.0"},
+        }
+    elif method == "ping":
+        reply["result"] = {}
+    elif method == "tools/list":
+        start = int(params.get("cursor") or 0)
+        end = (
+            args.tools
+            if not args.page_size
+            else min(args.tools, start + args.page_size)
+        )
+        reply["result"] = {"tools": [tool(i) for i in range(start, end)]}
+        if end < args.tools:
+            reply["result"]["nextCursor"] = str(end)
+    elif method == "tools/call":
+        name = params.get("name", "")
+        if (
+            not name.startswith("stub_tool_")
+            or int(name.rsplit("_", 1)[1]) >= args.tools
+        ):
+            reply["error"] = {"code": -32602, "message": f"Unknown tool: {name}"}
+        else:
+            text = json.dumps(
+                {
+                    "tool": name,
+                    "arguments": params.get("arguments", {}),
+                    "pid": os.getpid(),
+                }
+            )
+            reply["result"] = {
+                "content": [{"type": "text", "text": text}],
+                "isError": False,
+            }
+    else:
+        reply["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+    return reply
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub MCP server (stdio)")
+    parser.add_argument("--name", default="stub")
+    parser.add_argument("--tools", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument("--startup", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--hang", action="store_true")
+    parser.add_argument("--exit-code", type=int)
+    parser.add_argument("--memory", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.exit_code is not None:
+        print(
+            f"{args.name}: exiting with {args.exit_code} as configured", file=sys.stderr
+        )
+        sys.exit(args.exit_code)
+    # Touched, so it counts toward RSS
+    ballast = b"\x01" * (args.memory * 1024 * 1024)  # noqa: F841
+    time.sleep(args.startup)
+    print(f"{args.name}: ready", file=sys.stderr)
+
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if "id" not in message or "method" not in message:
+            continue  # notifications and responses
+        if args.hang:
+            continue
+        time.sleep(args.latency)
+        sys.stdout.write(json.dumps(handle(message, args)) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Agent SDK's query()
+
+An async generator with the call shape of claude_agent_sdk.query(prompt=...,
+options=...), for running the AI-powered wizard and its map-reduce analysis
+without the SDK or an API key. It answers from the prompt itself: the
+languages, tools and files a prompt mentions become a short bullet list.
+
+Latency grows with prompt size (latency_base + latency_per_kb per KB) and
+the answer is streamed in small chunks, so single-prompt and map-reduce
+timings can be compared. A prompt longer than context_chars fails the way
+an over-long request does. Calls, the largest prompt and the peak number
+of concurrent calls are recorded for inspection.
+
+Usage:
+    from wizard.query_stub import StubQuery
+    agent = IntelligentSetupAgent(".", query_fn=StubQuery(latency_per_kb=0.05))
+
+    python3 scripts/wizard/intelligent_setup_agent.py --stub
+"""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Dict, List
+
+LANGUAGES = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".ts": "TypeScript",
+    ".tsx": "TypeScript",
+    ".rs": "Rust",
+    ".go": "Go",
+    ".java": "Java",
+    ".rb": "Ruby",
+    ".php": "PHP",
+}
+TOOLS = {
+    "pytest": "pytest",
+    "pyproject.toml": "pytest",
+    "jest": "Jest",
+    "eslint": "ESLint",
+    "prettier": "Prettier",
+    "Dockerfile": "Docker",
+    "docker-compose": "Docker",
+    ".github/workflows": "GitHub Actions",
+    "Cargo.toml": "Cargo",
+    "go.mod": "go test",
+}
+CHUNK_CHARS = 40
+
+
+class StubQuery:
+    """Callable like query(prompt=..., options=...); see the module docstring"""
+
+    def __init__(
+        self,
+        latency_base: float = 0.3,
+        latency_per_kb: float = 0.05,
+        context_chars: int = 600_000,
+    ):
+        self.latency_base = latency_base
+        self.latency_per_kb = latency_per_kb
+        self.context_chars = context_chars
+        self.calls = 0
+        self.largest_prompt = 0
+        self.peak_concurrency = 0
+        self._active = 0
+
+    def __call__(self, prompt: str, options: Any = None) -> AsyncIterator[str]:
+        return self._answer(prompt)
+
+    async def _answer(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        self.largest_prompt = max(self.largest_prompt, len(prompt))
+        if len(prompt) > self.context_chars:
+            raise ValueError(
+                f"prompt is too long: {len(prompt):,} characters, "
+                f"context window is {self.context_chars:,}"
+            )
+        self._active += 1
+        self.peak_concurrency = max(self.peak_concurrency, self._active)
+        try:
+            text = answer(prompt)
+            chunks = [
+                text[i : i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)
+            ] or [""]
+            delay = (
+                self.latency_base + self.latency_per_kb * len(prompt) / 1024
+            ) / len(chunks)
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                yield chunk
+        finally:
+            self._active -= 1
+
+
+def answer(prompt: str) -> str:
+    """A deterministic, prompt-derived analysis"""
+    languages = _ranked(prompt)
+    tools = sorted(
+        {name for marker, name in TOOLS.items() if marker in prompt or name in prompt}
+    )
+    subsystems = re.findall(r"^### (.+) \(", prompt, re.MULTILINE)
+    lines: List[str] = []
+    if subsystems:
+        lines.append(f"- Subsystems: {', '.join(subsystems)}")
+    lines.append(f"- Languages: {', '.join(languages) or 'none detected'}")
+    lines.append(f"- Tools: {', '.join(tools) or 'none detected'}")
+    if languages:
+        lines.append(
+            "- Enable post-tool-use formatting and linting for "
+            f"{', '.join(languages[:3])}"
+        )
+    lines.append(
+        "- Enable the pre-tool-use safety hook and the session-start context hook"
+    )
+    if "GitHub Actions" in tools:
+        lines.append("- Add the GitHub MCP server for workflow and PR context")
+    if any(word in prompt for word in ("install", "requirements", "package.json")):
+        lines.append("- Install project dependencies before the first session")
+    return "\n".join(lines) + "\n"
+
+
+def _ranked(prompt: str) -> List[str]:
+    """
+    Languages named in the prompt or implied by file extensions, most mentioned first
+    """
+    counts: Dict[str, int] = {}
+    for token in re.findall(r"\.[A-Za-z]+\b", prompt):
+        name = LANGUAGES.get(token.lower())
+        if name:
+            counts[name] = counts.get(name, 0) + 1
+    for name in set(LANGUAGES.values()):
+        mentions = len(re.findall(rf"\b{name}\b", prompt))
+        if mentions:
+            counts[name] = counts.get(name, 0) + mentions
+    return sorted(counts, key=lambda name: -counts[name])
@@ -4,13 +4,53 @@ Claude Code Starter - Intelligent Setup Agent
 Using Claude Agent SDK for autonomous project setup and configuration
 """
 
-import os
+import asyncio
 import json
-import sys
+import os
+import shutil
 import subprocess
+import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import asyncio
+from typing import Any, Dict, List, Optional
+
+try:
+    from wizard import mcp_probe
+except ImportError:  # run directly as scripts/wizard/setup_agent.py
+    import mcp_probe
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scripts/, for hooklib
+from hooklib.fingerprint import Fingerprint  # noqa: E402
+
+# Written to .mcp.json when no MCP servers are configured anywhere (no API keys needed)
+RECOMMENDED_MCP_SERVERS = {
+    "sequential-thinking": {
+        "type": "stdio",
+        "command": "npx",
+        "args": ["-y", "@modelcontextprotocol/server-sequential-thinking"],
+    },
+    "filesystem": {
+        "type": "stdio",
+        "command": "npx",
+        "args": ["-y", "@modelcontextprotocol/server-filesystem", "."],
+    },
+}
+# .mcp.json entry for the lazy-start proxy (scripts/wizard/mcp_proxy.py, installed
+# into .claude/mcp/)
+MCP_PROXY_SERVER = {
+    "type": "stdio",
+    "command": "python3",
+    "args": [".claude/mcp/mcp_proxy.py"],
+}
+# Download the server package on first launch
+PACKAGE_RUNNERS = ("npx", "pnpx", "bunx", "uvx")
+MCP_INSTALL_TIMEOUT = 300.0  # seconds per server for the first (downloading) launch
+# Detection results, keyed by the root digest of a fingerprint of the project's
+# top level, which is all that detection reads
+DISCOVERY_CACHE_PATH = Path(".claude/cache/discovery.json")
+DISCOVERY_FINGERPRINT_PATH = Path(".claude/cache/discovery-fingerprint.json")
+DISCOVERY_DEPTH = 1
+# Top-level files whose contents (not just presence) detection reads
+DISCOVERY_CONTENT_FILES = {"package.json", "requirements.txt"}
 
 
 class SetupWizardAgent:
@@ -20,6 +60,7 @@ class SetupWizardAgent:
         self.project_root = Path(project_root).resolve()
         self.config = {}
         self.detected_info = {}
+        self.fingerprint: Optional[Fingerprint] = None
 
     async def run(self):
         """Main entry point for the setup wizard"""
@@ -63,36 +104,101 @@ class SetupWizardAgent:
         print()
         print("🔍 Analyzing project structure...")
 
-        # Detect languages
-        languages = self._detect_languages()
-        print(f"✅ Detected languages: {', '.join(languages) if languages else 'None detected'}")
-
-        # Detect package managers
-        package_managers = self._detect_package_managers()
-        print(f"✅ Detected package managers: {', '.join(package_managers) if package_managers else 'None detected'}")
-
-        # Detect frameworks
-        frameworks = self._detect_frameworks()
-        print(f"✅ Detected frameworks: {', '.join(frameworks) if frameworks else 'None detected'}")
-
-        # Detect existing tools
-        tools = self._detect_existing_tools()
+        detected = self._cached_discovery()
+        if detected is None:
+            detected = {
+                "languages": self._detect_languages(),
+                "package_managers": self._detect_package_managers(),
+                "frameworks": self._detect_frameworks(),
+                "tools": self._detect_existing_tools(),
+            }
+            self._save_discovery(detected)
+
+        languages = detected["languages"]
+        print(
+            "✅ Detected languages: "
+            f"{', '.join(languages) if languages else 'None detected'}"
+        )
+        package_managers = detected["package_managers"]
+        print(
+            "✅ Detected package managers: "
+            f"{', '.join(package_managers) if package_managers else 'None detected'}"
+        )
+        frameworks = detected["frameworks"]
+        print(
+            "✅ Detected frameworks: "
+            f"{', '.join(frameworks) if frameworks else 'None detected'}"
+        )
+        tools = detected["tools"]
         print(f"✅ Detected tools: {', '.join(tools) if tools else 'None detected'}")
 
-        # Check git status
+        # Check git status (one stat, so not worth caching)
         git_initialized = self._check_git()
-        print(f"✅ Git repository: {'Initialized' if git_initialized else 'Not initialized'}")
-
-        self.detected_info = {
-            "languages": languages,
-            "package_managers": package_managers,
-            "frameworks": frameworks,
-            "tools": tools,
-            "git_initialized": git_initialized
-        }
+        print(
+            "✅ Git repository: "
+            f"{'Initialized' if git_initialized else 'Not initialized'}"
+        )
+
+        self.detected_info = {**detected, "git_initialized": git_initialized}
 
         print()
 
+    def _cached_discovery(self) -> Optional[Dict[str, Any]]:
+        """
+        Detection results from the last run, if nothing they depend on changed
+
+        Detection only globs and reads the top level of the project, so the
+        fingerprint covers that level alone. Equal root digests are an O(1)
+        check; otherwise the diff says whether an entry came or went, or one
+        of the files whose contents detection reads was edited.
+        """
+        previous, self.fingerprint = Fingerprint.update(
+            str(self.project_root),
+            self.project_root / DISCOVERY_FINGERPRINT_PATH,
+            DISCOVERY_DEPTH,
+        )
+        try:
+            cached = json.loads((self.project_root / DISCOVERY_CACHE_PATH).read_text())
+        except (OSError, ValueError):
+            return None
+        if previous is None or cached.get("digest") != previous.digest:
+            return None
+
+        detected = cached.get("detected")
+        if self.fingerprint.digest == previous.digest:
+            print("   Top-level project files unchanged since the last run")
+            return detected
+
+        # A digest change with no file in the diff is a directory coming or
+        # going (such as .claude itself), which detection does not look at
+        changes = previous.diff(self.fingerprint)
+        if changes.added or changes.removed:
+            return None
+        if DISCOVERY_CONTENT_FILES.intersection(changes.modified):
+            return None
+        if changes.modified:
+            print(
+                f"   {len(changes.modified)} top-level file(s) edited since the "
+                "last run, none affecting detection"
+            )
+        else:
+            print("   Only top-level directories changed since the last run")
+        if detected:
+            self._save_discovery(detected)  # still valid for the new digest
+        return detected
+
+    def _save_discovery(self, detected: Dict[str, Any]):
+        path = self.project_root / DISCOVERY_CACHE_PATH
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"digest": self.fingerprint.digest, "detected": detected})
+            )
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
     async def phase_configuration(self):
         """Phase 2: Interactive configuration with user"""
         print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -208,7 +314,7 @@ class SetupWizardAgent:
         # Check MCP servers if configured
         if self.config.get("mcp_servers", {}).get("enabled"):
             print("🔌 Checking MCP servers...")
-            self._validate_mcp_servers()
+            await self._validate_mcp_servers()
 
         print()
 
@@ -223,7 +329,10 @@ class SetupWizardAgent:
         print()
 
         # Language-specific recommendations
-        if "JavaScript" in self.detected_info["languages"] or "TypeScript" in self.detected_info["languages"]:
+        if (
+            "JavaScript" in self.detected_info["languages"]
+            or "TypeScript" in self.detected_info["languages"]
+        ):
             print("📦 JavaScript/TypeScript:")
             print("   • Use /quality:lint with ESLint for code quality")
             print("   • Use /quality:format with Prettier for consistent formatting")
@@ -301,7 +410,7 @@ class SetupWizardAgent:
             "Ruby": ["Gemfile", "*.rb"],
             "PHP": ["composer.json", "*.php"],
             "C++": ["CMakeLists.txt", "*.cpp"],
-            "C": ["Makefile", "*.c"]
+            "C": ["Makefile", "*.c"],
         }
 
         for lang, indicators in language_indicators.items():
@@ -326,7 +435,7 @@ class SetupWizardAgent:
             "cargo": "Cargo.toml",
             "go": "go.mod",
             "maven": "pom.xml",
-            "gradle": "build.gradle"
+            "gradle": "build.gradle",
         }
 
         for manager, file in manager_files.items():
@@ -345,7 +454,10 @@ class SetupWizardAgent:
             try:
                 with open(package_json) as f:
                     data = json.load(f)
-                    deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
+                    deps = {
+                        **data.get("dependencies", {}),
+                        **data.get("devDependencies", {}),
+                    }
 
                     framework_mapping = {
                         "react": "React",
@@ -353,13 +465,13 @@ class SetupWizardAgent:
                         "angular": "Angular",
                         "next": "Next.js",
                         "express": "Express",
-                        "nestjs": "NestJS"
+                        "nestjs": "NestJS",
                     }
 
                     for pkg, framework in framework_mapping.items():
                         if any(pkg in dep for dep in deps.keys()):
                             frameworks.append(framework)
-            except:
+            except Exception:
                 pass
 
         # Check Python frameworks
@@ -373,7 +485,7 @@ class SetupWizardAgent:
                     frameworks.append("Flask")
                 if "fastapi" in content.lower():
                     frameworks.append("FastAPI")
-            except:
+            except Exception:
                 pass
 
         return frameworks
@@ -389,7 +501,7 @@ class SetupWizardAgent:
             "Pytest": "pytest.ini",
             "Jest": "jest.config.js",
             "Docker": "Dockerfile",
-            "Docker Compose": "docker-compose.yml"
+            "Docker Compose": "docker-compose.yml",
         }
 
         for tool, file in tool_files.items():
@@ -406,26 +518,20 @@ class SetupWizardAgent:
         """Check Python version"""
         try:
             result = subprocess.run(
-                ["python3", "--version"],
-                capture_output=True,
-                text=True,
-                check=True
+                ["python3", "--version"], capture_output=True, text=True, check=True
             )
             return result.stdout.strip().replace("Python ", "")
-        except:
+        except Exception:
             return None
 
     def _check_git_version(self) -> Optional[str]:
         """Check Git version"""
         try:
             result = subprocess.run(
-                ["git", "--version"],
-                capture_output=True,
-                text=True,
-                check=True
+                ["git", "--version"], capture_output=True, text=True, check=True
             )
             return result.stdout.strip().replace("git version ", "")
-        except:
+        except Exception:
             return None
 
     def _configure_hooks(self) -> Dict[str, Any]:
@@ -440,8 +546,17 @@ class SetupWizardAgent:
 
     def _configure_mcp_servers(self) -> Dict[str, Any]:
         """Configure MCP servers"""
-        response = input("   Would you like to configure MCP servers? (y/N): ").strip().lower()
-        return {"enabled": response == "y"}
+        response = (
+            input("   Would you like to configure MCP servers? (y/N): ").strip().lower()
+        )
+        if response != "y":
+            return {"enabled": False}
+        proxy = (
+            input("   Start MCP servers on first use, through a local proxy? (y/N): ")
+            .strip()
+            .lower()
+        )
+        return {"enabled": True, "proxy": proxy == "y"}
 
     def _configure_github_actions(self) -> Dict[str, Any]:
         """Configure GitHub Actions"""
@@ -450,7 +565,11 @@ class SetupWizardAgent:
 
     def _configure_rag(self) -> Dict[str, Any]:
         """Configure RAG integration"""
-        response = input("   Enable RAG integration with Archon? (advanced, y/N): ").strip().lower()
+        response = (
+            input("   Enable RAG integration with Archon? (advanced, y/N): ")
+            .strip()
+            .lower()
+        )
         return {"enabled": response == "y"}
 
     def _configure_skills(self) -> Dict[str, Any]:
@@ -488,12 +607,104 @@ class SetupWizardAgent:
         print("✅ Dependencies installed")
 
     async def _install_mcp_servers(self):
-        """Install recommended MCP servers"""
+        """Install recommended MCP servers and pre-fetch their packages"""
         print("🔌 Installing MCP servers...")
-        # This would install MCP servers based on configuration
-        print("   (MCP server installation would happen here)")
+        servers = mcp_probe.load_servers(self.project_root)
+        if not servers:
+            mcp_json = self.project_root / ".mcp.json"
+            with open(mcp_json, "w") as f:
+                json.dump({"mcpServers": RECOMMENDED_MCP_SERVERS}, f, indent=2)
+                f.write("\n")
+            print(f"   Created .mcp.json with: {', '.join(RECOMMENDED_MCP_SERVERS)}")
+            servers = mcp_probe.load_servers(self.project_root)
+
+        if self.config.get("mcp_servers", {}).get("proxy"):
+            await self._install_mcp_proxy()
+            servers = mcp_probe.load_servers(self.project_root)
+
+        # npx/uvx servers download their package on first launch. Do that now,
+        # all at once, rather than during the first session's startup
+        fetch = {
+            name: spec
+            for name, spec in servers.items()
+            if mcp_probe.transport_of(spec) == "stdio"
+            and Path(spec.get("command", "")).name in PACKAGE_RUNNERS
+        }
+        if fetch:
+            print(f"   Pre-fetching {len(fetch)} server package(s)...")
+            results = await mcp_probe.probe_all(
+                fetch, self.project_root, timeout=MCP_INSTALL_TIMEOUT
+            )
+            for result in sorted(results, key=lambda r: r.name):
+                if result.status == "ok":
+                    print(f"   ✓ {result.name} ({result.tool_count} tools)")
+                else:
+                    print(f"   ✗ {result.name}: {result.error}")
         print("✅ MCP servers configured")
 
+    async def _install_mcp_proxy(self):
+        """Move the project's stdio MCP servers behind the lazy-start proxy"""
+        mcp_dir = self.project_root / ".claude" / "mcp"
+        mcp_dir.mkdir(parents=True, exist_ok=True)
+        wizard_dir = Path(__file__).resolve().parent
+        for name in ("mcp_proxy.py", "mcp_probe.py"):
+            shutil.copy2(wizard_dir / name, mcp_dir / name)
+
+        mcp_json = self.project_root / ".mcp.json"
+        servers_json = mcp_dir / "servers.json"
+        try:
+            project = json.loads(mcp_json.read_text())
+        except (OSError, ValueError):
+            project = {}
+        try:
+            proxied = json.loads(servers_json.read_text())
+        except (OSError, ValueError):
+            proxied = {
+                "mcpServers": {},
+                "proxy": {"idleTimeout": 300, "startTimeout": 60},
+            }
+
+        # HTTP servers cost nothing while idle, so only stdio servers move
+        entries = project.setdefault("mcpServers", {})
+        moved = [
+            name
+            for name, spec in entries.items()
+            if name != "proxy" and mcp_probe.transport_of(spec) == "stdio"
+        ]
+        for name in moved:
+            proxied["mcpServers"][name] = entries.pop(name)
+        entries["proxy"] = MCP_PROXY_SERVER
+
+        with open(servers_json, "w") as f:
+            json.dump(proxied, f, indent=2)
+            f.write("\n")
+        with open(mcp_json, "w") as f:
+            json.dump(project, f, indent=2)
+            f.write("\n")
+        print(
+            f"   Proxying {len(proxied['mcpServers'])} server(s) via "
+            ".claude/mcp/servers.json"
+            + (f" (moved from .mcp.json: {', '.join(moved)})" if moved else "")
+        )
+
+        # Cache every tool manifest now, so sessions start no real server
+        print("   Caching tool manifests...")
+        result = await asyncio.to_thread(
+            subprocess.run,
+            [
+                sys.executable,
+                ".claude/mcp/mcp_proxy.py",
+                "refresh",
+                "--start-timeout",
+                str(MCP_INSTALL_TIMEOUT),
+            ],
+            cwd=self.project_root,
+            capture_output=True,
+            text=True,
+        )
+        for line in result.stdout.splitlines()[1:]:
+            print(f"   {line.strip()}")
+
     def _setup_github_actions(self):
         """Setup GitHub Actions"""
         print("🤖 Setting up GitHub Actions...")
@@ -516,16 +727,38 @@ class SetupWizardAgent:
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
                 check=True,
-                timeout=5
+                timeout=5,
             )
             return True
-        except:
+        except Exception:
             return False
 
-    def _validate_mcp_servers(self):
-        """Validate MCP server configuration"""
-        print("   (MCP server validation would happen here)")
-        print("✅ MCP servers validated")
+    async def _validate_mcp_servers(self):
+        """Probe all configured MCP servers concurrently and report startup latency"""
+        servers = mcp_probe.load_servers(self.project_root)
+        if not servers:
+            print("   No MCP servers configured (.mcp.json or ~/.claude.json)")
+            return
+
+        print(f"   Starting {len(servers)} server(s) concurrently...")
+        results = await mcp_probe.probe_all(servers, self.project_root)
+        print()
+        for line in mcp_probe.render_table(results).splitlines():
+            print(f"   {line}")
+        print()
+        for line in mcp_probe.summarize(results):
+            print(f"   {line}")
+
+        report = self.project_root / mcp_probe.REPORT_PATH
+        mcp_probe.write_report(results, report)
+        failed = [r for r in results if r.status != "ok"]
+        if failed:
+            print(
+                f"⚠️  {len(failed)} of {len(results)} MCP server(s) failed to start "
+                f"(details in {mcp_probe.REPORT_PATH})"
+            )
+        else:
+            print(f"✅ MCP servers validated (report: {mcp_probe.REPORT_PATH})")
 
     def _run_command(self, command: str, shell: bool = True):
         """Run shell command"""
@@ -536,7 +769,7 @@ class SetupWizardAgent:
                 check=True,
                 cwd=self.project_root,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stderr=subprocess.PIPE,
             )
         except subprocess.CalledProcessError as e:
             print(f"   ⚠️  Command failed: {command}")
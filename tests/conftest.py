@@ -0,0 +1,14 @@
+"""
+Shared test setup: make scripts/ (hooklib, wizard) and the RAG example's
+modules importable the way the tools import each other at runtime.
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RAG_DIR = REPO_ROOT / "examples" / "rag-integration"
+
+for path in (REPO_ROOT / "scripts", RAG_DIR / "benchmarks", RAG_DIR / "ingest"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,148 @@
+"""
+Tests for the wizard's map-reduce project analysis (scripts/wizard/analysis.py),
+run against the query stand-in (scripts/wizard/query_stub.py).
+"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from hooklib.inventory import Inventory
+from wizard import analysis
+from wizard.query_stub import StubQuery
+
+
+def make_tree(root: Path, layout: dict):
+    """layout maps directories to file counts; a "!" suffix adds a package.json"""
+    for directory, count in layout.items():
+        manifest = directory.endswith("!")
+        directory = root / directory.rstrip("!")
+        directory.mkdir(parents=True, exist_ok=True)
+        if manifest:
+            (directory / "package.json").write_text('{"name": "pkg"}')
+        for i in range(count):
+            (directory / f"f{i}.js").write_text("")
+    return Inventory.build(str(root))
+
+
+class RecordingStub(StubQuery):
+    """StubQuery that also keeps every prompt it was sent"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def __call__(self, prompt, options=None):
+        self.prompts.append(prompt)
+        return super().__call__(prompt, options)
+
+
+def partitions_of(count: int):
+    return [
+        analysis.Partition(f"part{i}", "directory", [f"part{i}/f.py"])
+        for i in range(count)
+    ]
+
+
+def test_large_packages_are_split(tmp_path):
+    """A package over the file limit is split by subdirectory and keeps its manifest"""
+    inventory = make_tree(
+        tmp_path, {"app!": 2, "app/src/a": 30, "app/src/b": 30, "app/test": 30}
+    )
+
+    partitions = analysis.partition_project(inventory, max_files=40)
+
+    assert len(partitions) > 1
+    assert all(p.kind == "package" for p in partitions)
+    assert all(len(p.files) <= 40 for p in partitions)
+    assert sum(len(p.manifests) for p in partitions) == 1
+    assert sum(len(p.files) for p in partitions) == inventory.file_count
+
+
+def test_small_packages_are_pooled_with_their_manifests(tmp_path):
+    """Packages under the minimum size join "(other)" instead of getting a query each"""
+    inventory = make_tree(tmp_path, {"big!": 20, "tiny1!": 1, "tiny2!": 1})
+
+    partitions = {p.name: p for p in analysis.partition_project(inventory, min_files=5)}
+
+    assert set(partitions) == {"big", "(other)"}
+    assert sorted(partitions["(other)"].manifests) == [
+        "tiny1/package.json",
+        "tiny2/package.json",
+    ]
+
+
+def test_partition_cap_applies_to_packages(tmp_path):
+    """A monorepo with many packages still yields at most max_partitions subsystems"""
+    inventory = make_tree(tmp_path, {f"packages/p{i:02}!": 5 + i for i in range(30)})
+
+    partitions = analysis.partition_project(inventory, max_partitions=10)
+
+    assert len(partitions) <= 10
+    assert sum(len(p.files) for p in partitions) == inventory.file_count
+    kept = [p for p in partitions if p.kind == "package"]
+    assert min(len(p.files) for p in kept) > max(5 + i for i in range(30)) - 10
+
+
+def test_single_prompt_listing_is_bounded_by_size():
+    """The one-prompt listing stops at the size budget and reports that it is partial"""
+    short = [f"src/module_{i}.py" for i in range(50)]
+    long = [f"src/package_{i // 100}/module_{i}.py" for i in range(5000)]
+
+    listed, complete = analysis.single_prompt_files(short, {})
+    assert complete and listed == short
+
+    listed, complete = analysis.single_prompt_files(long, {})
+    assert not complete and 0 < len(listed) < len(long)
+    assert (
+        len(analysis.single_prompt({"files": listed}))
+        <= analysis.SINGLE_PROMPT_MAX_CHARS
+    )
+
+
+@pytest.mark.parametrize("concurrency", [1, 3, 8])
+def test_map_respects_the_concurrency_limit(tmp_path, concurrency):
+    """No more than `concurrency` subsystem queries are in flight at once"""
+    stub = StubQuery(latency_base=0.02, latency_per_kb=0)
+    runner = analysis.MapReduceAnalysis(
+        stub, lambda system_prompt: None, concurrency=concurrency
+    )
+
+    partials = asyncio.run(runner.map(partitions_of(12), tmp_path))
+
+    assert stub.calls == 12
+    assert stub.peak_concurrency == concurrency
+    assert not any(p.error for p in partials)
+
+
+def test_reduce_merges_in_rounds_of_fan_in(tmp_path):
+    """20 partials with fan-in 4: 5 merges, then 1 more, then the final plan"""
+    stub = RecordingStub(latency_base=0.0, latency_per_kb=0)
+    runner = analysis.MapReduceAnalysis(
+        stub, lambda system_prompt: None, concurrency=4, fan_in=4
+    )
+    partials = [
+        analysis.PartialResult(p, f"- Languages: Python ({p.name})")
+        for p in partitions_of(20)
+    ]
+
+    plan = asyncio.run(runner.reduce({"project_root": str(tmp_path)}, partials))
+
+    assert stub.calls == 5 + 1 + 1
+    assert all(prompt.count("\n### ") <= 4 for prompt in stub.prompts)
+    assert "Python" in plan
+
+
+def test_failed_subsystems_are_kept_not_raised(tmp_path):
+    """
+    A subsystem whose prompt is too long fails alone; the run still produces a plan
+    """
+    stub = StubQuery(latency_base=0.0, latency_per_kb=0, context_chars=1200)
+    runner = analysis.MapReduceAnalysis(stub, lambda system_prompt: None)
+    partitions = partitions_of(3)
+    partitions[0].files = [f"part0/{'x' * 40}{i}.py" for i in range(100)]
+
+    partials = asyncio.run(runner.map(partitions, tmp_path))
+
+    assert [bool(p.error) for p in partials] == [True, False, False]
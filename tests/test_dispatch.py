@@ -0,0 +1,175 @@
+"""
+Tests for the concurrent hook dispatcher (scripts/hooklib/dispatch.py).
+"""
+
+import sys
+import time
+
+import pytest
+
+from hooklib import dispatch
+from hooklib.dispatch import ConfigError, Dispatcher, HookOutcome, HookSpec
+
+# Each hook is a small Python program: reads the event JSON, appends its name
+# to order.log, optionally sleeps, then prints the reply expression and exits
+HOOK = """
+import json, sys, time
+data = json.load(sys.stdin)
+with open("order.log", "a") as f:
+    f.write({name!r} + " start\\n")
+time.sleep({sleep})
+with open("order.log", "a") as f:
+    f.write({name!r} + " end\\n")
+print(json.dumps({reply}))
+sys.exit({exit_code})
+"""
+
+
+def _spec(name, sleep=0.0, reply="{}", exit_code=0, after=(), blocking=True):
+    code = HOOK.format(name=name, sleep=sleep, reply=reply, exit_code=exit_code)
+    return HookSpec(
+        name, [sys.executable, "-c", code], after=list(after), blocking=blocking
+    )
+
+
+def _order(tmp_path):
+    return (tmp_path / "order.log").read_text().splitlines()
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_parse_specs_validates_the_graph():
+    config = {
+        "scripts": [
+            {"name": "a", "command": "true"},
+            {"name": "off", "command": "true", "enabled": False},
+            {"name": "b", "script": "b.py", "after": ["a"], "blocking": False},
+        ]
+    }
+
+    specs = dispatch.parse_specs(config, event_blocking=True)
+
+    assert [(s.name, s.shell, s.after, s.blocking) for s in specs] == [
+        ("a", True, [], True),
+        ("b", False, ["a"], False),
+    ]
+    cycle = {
+        "scripts": [
+            {"name": "a", "command": "true", "after": ["b"]},
+            {"name": "b", "command": "true", "after": ["a"]},
+        ]
+    }
+    with pytest.raises(ConfigError, match="cycle"):
+        dispatch.parse_specs(cycle, event_blocking=True)
+    unknown = {"scripts": [{"name": "a", "command": "true", "after": ["x"]}]}
+    with pytest.raises(ConfigError, match="unknown hook"):
+        dispatch.parse_specs(unknown, event_blocking=True)
+
+
+@pytest.mark.integration
+def test_dependencies_run_in_order_and_see_prompt_changes(tmp_path):
+    """Independent hooks overlap; a dependent starts after, with the new prompt"""
+    specs = [
+        _spec("rewrite", sleep=0.3, reply='{"prompt": data["prompt"] + "!"}'),
+        _spec("audit", sleep=0.3),
+        _spec("check", reply='{"seen": data["prompt"]}', after=["rewrite", "audit"]),
+    ]
+
+    start = time.monotonic()
+    outcomes = Dispatcher(specs, timeout=10).run({"prompt": "hi"})
+    elapsed = time.monotonic() - start
+
+    assert [(o.name, o.status) for o in outcomes] == [
+        ("rewrite", "ok"),
+        ("audit", "ok"),
+        ("check", "ok"),
+    ]
+    assert outcomes[2].output == {"seen": "hi!"}
+    order = _order(tmp_path)
+    assert set(order[:2]) == {"rewrite start", "audit start"}
+    assert order[-2:] == ["check start", "check end"]
+    assert elapsed < 1.5
+
+
+@pytest.mark.integration
+def test_block_exit_code_cancels_siblings(tmp_path):
+    """Exit code 2 from a blocking hook stops the running and pending hooks"""
+    specs = [
+        _spec("guard", reply='{"reason": "dangerous"}', exit_code=2),
+        _spec("slow", sleep=5),
+        _spec("later", after=["slow"]),
+    ]
+
+    start = time.monotonic()
+    outcomes = Dispatcher(specs, timeout=10).run({})
+    merged, blocked = dispatch.merge_outputs(outcomes, specs, event_blocking=True)
+
+    assert time.monotonic() - start < 3
+    assert {o.name: o.status for o in outcomes} == {
+        "guard": "blocked",
+        "slow": "cancelled",
+        "later": "cancelled",
+    }
+    assert "slow end" not in _order(tmp_path)
+    assert (merged, blocked) == ({"block": True, "reason": "dangerous"}, True)
+
+
+@pytest.mark.integration
+def test_non_blocking_hook_only_reports_its_block(tmp_path):
+    specs = [
+        _spec("advice", reply='{"reason": "style"}', exit_code=2, blocking=False),
+        _spec("slow", sleep=0.3, reply='{"message": "done"}'),
+    ]
+
+    outcomes = Dispatcher(specs, timeout=10).run({})
+    merged, blocked = dispatch.merge_outputs(outcomes, specs, event_blocking=True)
+
+    assert [o.status for o in outcomes] == ["blocked", "ok"]
+    assert not blocked
+    assert merged == {"message": "advice: style (non-blocking hook)\ndone"}
+
+
+@pytest.mark.integration
+def test_timeout_kills_the_hook_and_skips_its_dependents(tmp_path):
+    specs = [
+        _spec("hang", sleep=30),
+        _spec("fast", reply='{"message": "fast"}'),
+        _spec("after_hang", after=["hang"]),
+    ]
+
+    start = time.monotonic()
+    outcomes = Dispatcher(specs, timeout=1).run({})
+
+    assert time.monotonic() - start < 5
+    assert {o.name: o.status for o in outcomes} == {
+        "hang": "timeout",
+        "fast": "ok",
+        "after_hang": "skipped",
+    }
+    assert "hang end" not in _order(tmp_path)
+
+
+def test_merge_outputs_in_declaration_order():
+    specs = [HookSpec(n, []) for n in ("a", "b", "c")]
+    outcomes = [
+        HookOutcome("a", "ok", output={"message": "one", "metadata": {"x": 1}}),
+        HookOutcome("b", "error", output={"prompt": "p1", "extra": "b"}),
+        HookOutcome(
+            "c",
+            "ok",
+            output={"message": "two", "prompt": "p2", "metadata": {"y": 2}},
+        ),
+    ]
+
+    merged, blocked = dispatch.merge_outputs(outcomes, specs, event_blocking=True)
+
+    assert not blocked
+    assert merged == {
+        "message": "one\ntwo",
+        "metadata": {"x": 1, "y": 2},
+        "prompt": "p2",
+        "extra": "b",
+    }
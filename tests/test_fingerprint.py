@@ -0,0 +1,146 @@
+"""
+Tests for the Merkle-tree project fingerprint (scripts/hooklib/fingerprint.py)
+and the setup wizard's discovery cache built on it.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from hooklib.fingerprint import Fingerprint
+from wizard.setup_agent import SetupWizardAgent
+
+OLD = time.time() - 3600  # mtime well outside the racy window
+
+
+def _write(path, text, mtime=OLD):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    _write(root / "README.md", "readme")
+    _write(root / "src" / "app.py", "app")
+    _write(root / "src" / "api" / "views.py", "views")
+    _write(root / "docs" / "guide.md", "guide")
+    _write(root / "node_modules" / "dep" / "index.js", "ignored")
+    return root
+
+
+def test_digest_tracks_content_not_mtime(project):
+    first = Fingerprint.compute(str(project))
+    os.utime(project / "README.md", (OLD + 10, OLD + 10))
+
+    assert Fingerprint.compute(str(project)).digest == first.digest
+    _write(project / "README.md", "README")
+    assert Fingerprint.compute(str(project)).digest != first.digest
+
+
+def test_diff_lists_added_removed_and_modified(project):
+    before = Fingerprint.compute(str(project))
+    _write(project / "src" / "api" / "views.py", "views, edited")
+    _write(project / "src" / "new.py", "new")
+    os.unlink(project / "docs" / "guide.md")
+    (project / "docs").rmdir()
+    _write(project / "docs", "now a file")
+
+    changes = before.diff(Fingerprint.compute(str(project)))
+
+    assert changes.added == ["docs", "src/new.py"]
+    assert changes.removed == ["docs/guide.md"]
+    assert changes.modified == ["src/api/views.py"]
+
+
+def test_diff_skips_unchanged_subtrees(project):
+    before = Fingerprint.compute(str(project))
+    _write(project / "src" / "api" / "views.py", "views, edited")
+    after = Fingerprint.compute(str(project))
+
+    changes = before.diff(after)
+
+    assert changes.paths == ["src/api/views.py"]
+    assert changes.dirs_visited == 3  # root, src, src/api; never docs
+    assert before.digest_of("docs") == after.digest_of("docs")
+    assert not after.diff(after)
+
+
+def test_unchanged_files_reuse_their_hash(project):
+    previous = Fingerprint.compute(str(project))
+    _write(project / "src" / "app.py", "app, edited")
+
+    current = Fingerprint.compute(str(project), previous)
+
+    assert (current.hashed, current.reused) == (1, 3)
+    assert current.diff(Fingerprint.compute(str(project))).paths == []
+
+
+def test_racy_files_are_rehashed(project):
+    """A same-size rewrite within the mtime tick of the last build is still seen"""
+    now = time.time()
+    _write(project / "README.md", "first", mtime=now)
+    previous = Fingerprint.compute(str(project))
+    _write(project / "README.md", "secon", mtime=now)  # same size and mtime
+
+    current = Fingerprint.compute(str(project), previous)
+
+    assert current.hashed == 1
+    assert previous.diff(current).modified == ["README.md"]
+
+
+def test_update_saves_and_reloads(project, tmp_path):
+    path = tmp_path / "fingerprint.json"
+
+    first_previous, first = Fingerprint.update(str(project), path)
+    previous, current = Fingerprint.update(str(project), path)
+
+    assert first_previous is None
+    assert previous.digest == first.digest == current.digest
+    assert (current.hashed, current.reused) == (0, 4)
+
+
+def test_depth_limits_the_walk(project, tmp_path):
+    path = tmp_path / "fingerprint.json"
+    Fingerprint.update(str(project), path, depth=1)
+    _write(project / "src" / "app.py", "app, edited")
+
+    previous, current = Fingerprint.update(str(project), path, depth=1)
+    whole_previous, _ = Fingerprint.update(str(project), path)
+
+    assert sorted(current.tree["c"]) == ["README.md", "docs", "src"]
+    assert current.tree["c"]["src"]["c"] == {}
+    assert previous.digest == current.digest
+    assert whole_previous is None  # a depth-1 fingerprint is not comparable
+
+
+def _discover(root):
+    agent = SetupWizardAgent(str(root))
+    asyncio.run(agent.phase_discovery())
+    return agent
+
+
+def test_discovery_cache_follows_the_top_level(tmp_path, capsys):
+    root = tmp_path / "project"
+    _write(root / "requirements.txt", "flask\n")
+    _write(root / "main.py", "print()\n")
+
+    assert _discover(root).detected_info["frameworks"] == ["Flask"]
+    _discover(root)  # .claude/ appeared: a directory, not a file detection reads
+    assert "Only top-level directories changed" in capsys.readouterr().out
+    _discover(root)
+    assert "unchanged since the last run" in capsys.readouterr().out
+
+    _write(root / "main.py", "print('edited')\n", mtime=time.time())
+    _write(root / "src" / "deep.go", "package deep\n")
+    _discover(root)
+    assert "1 top-level file(s) edited" in capsys.readouterr().out
+
+    _write(root / "requirements.txt", "django\n", mtime=time.time())
+    assert _discover(root).detected_info["frameworks"] == ["Django"]
+
+    _write(root / "lib.rs", "fn main() {}\n")
+    assert "Rust" in _discover(root).detected_info["languages"]
@@ -0,0 +1,102 @@
+"""
+Tests for the batched post-tool-use formatter (scripts/hooklib/formatting.py).
+"""
+
+import pytest
+
+from hooklib import formatting
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(formatting, "RUN_DIR", tmp_path / ".claude/run")
+    monkeypatch.setattr(formatting, "QUEUE_PATH", tmp_path / ".claude/run/format-queue")
+    monkeypatch.setattr(formatting, "LOCK_PATH", tmp_path / ".claude/run/format.lock")
+    monkeypatch.setattr(formatting, "ENABLE_QUALITY_CACHE", False)
+    return tmp_path
+
+
+def test_findings_are_attributed_per_line(workdir):
+    """Findings in unix/parseable/emacs formats land on the file they name"""
+    app = str(workdir / "src/app.js")
+    util = str(workdir / "src/util.py")
+    output = "\n".join(
+        [
+            f"{app}:3:7: 'x' is assigned a value but never used. "
+            "[Error/no-unused-vars]",
+            "src/util.py:12: [C0114(missing-module-docstring), ] Missing module "
+            "docstring",
+            f"[WARN] {util}:4:1: Line is longer than 100 characters [LineLength]",
+            "  ./src/app.js:9:1: Expected indentation of 2 spaces",
+            "2 problems",
+            "src/other.py:1:1: E302 expected 2 blank lines",
+        ]
+    )
+
+    findings = formatting.attribute_findings(output, [app, util])
+
+    assert len(findings[app]) == 2
+    assert len(findings[util]) == 2
+
+
+def test_package_linters_get_directories(workdir):
+    """go vet and golangci-lint are pointed at packages, cargo clippy at the crate"""
+    files = [
+        str(workdir / "cmd/a.go"),
+        str(workdir / "cmd/b.go"),
+        str(workdir / "main.go"),
+    ]
+
+    assert formatting._lint_targets(["go", "vet"], files) == ["./cmd", "."]
+    assert formatting._lint_targets(["cargo", "clippy"], files) == []
+    assert formatting._lint_targets(["flake8"], files) == files
+
+
+@pytest.mark.skipif(formatting.tomllib is None, reason="needs tomllib or tomli")
+def test_blackd_headers_follow_tool_black(workdir):
+    """blackd is sent the nearest pyproject's [tool.black] settings"""
+    (workdir / "pyproject.toml").write_text(
+        '[tool.black]\nline-length = 100\ntarget-version = ["py38", "py39"]\n'
+        "skip-string-normalization = true\n"
+    )
+    (workdir / "pkg").mkdir()
+
+    headers = formatting._black_headers(str(workdir / "pkg/mod.py"))
+
+    assert headers == {
+        "X-Line-Length": "100",
+        "X-Python-Variant": "py38,py39",
+        "X-Skip-String-Normalization": "1",
+    }
+
+
+def test_flush_picks_up_edits_queued_while_releasing(workdir, monkeypatch):
+    """A file queued between the last drain and the unlock is still formatted"""
+    first, late = workdir / "first.py", workdir / "late.py"
+    first.write_text("x = 1\n")
+    late.write_text("y = 2\n")
+    processed = []
+    monkeypatch.setattr(
+        formatting,
+        "process_batch",
+        lambda paths, cache=None: processed.extend(paths) or paths,
+    )
+
+    take_queue = formatting._take_queue
+    raced = []
+
+    def take_queue_then_race():
+        paths = take_queue()
+        if not paths and not raced:
+            # enqueue() runs now: it sees the lock held and starts no flusher
+            raced.append(True)
+            formatting.QUEUE_PATH.write_text(f"{late}\n")
+        return paths
+
+    monkeypatch.setattr(formatting, "_take_queue", take_queue_then_race)
+    formatting.RUN_DIR.mkdir(parents=True)
+    formatting.QUEUE_PATH.write_text(f"{first}\n")
+
+    assert formatting.flush() == 2
+    assert processed == [str(first), str(late)]
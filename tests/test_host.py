@@ -0,0 +1,153 @@
+"""
+Tests for the persistent hook host and its client shim
+(scripts/hooklib/host.py, scripts/hooklib/client.py).
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hooklib import client, host
+
+SLOW_HOOK = """
+import sys, json, time
+{flag}
+
+def main():
+    data = json.load(sys.stdin)
+    with open("calls.log", "a") as f:
+        f.write(data["id"] + "\\n")
+    time.sleep(data.get("sleep", 0))
+    print(json.dumps({{"id": data["id"], "argv": sys.argv[1:]}}))
+"""
+
+
+@pytest.fixture
+def running_host(tmp_path, monkeypatch):
+    """
+    A host serving tmp_path/hooks on a socket, with process globals restored afterwards
+    """
+    for name in ("stdin", "stdout", "stderr", "argv"):
+        monkeypatch.setattr(sys, name, getattr(sys, name))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CLAUDE_HOOK_TELEMETRY", "0")
+    hooks = tmp_path / "hooks"
+    hooks.mkdir()
+    (hooks / "slow.py").write_text(SLOW_HOOK.format(flag=""))
+    (hooks / "other.py").write_text(SLOW_HOOK.format(flag=""))
+    (hooks / "shared.py").write_text(SLOW_HOOK.format(flag="HOST_CONCURRENT = True"))
+    socket_path = str(tmp_path / "h.sock")
+    server = host._HostServer(socket_path, host.HookHost(str(hooks)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield hooks, socket_path
+    server.shutdown()
+    server.server_close()
+
+
+def _send(socket_path, script, event_id, sleep=0.0, args=()):
+    stdin = f'{{"id": "{event_id}", "sleep": {sleep}}}'
+    return client.send_request(
+        {"script": str(script), "args": list(args), "stdin": stdin}, socket_path
+    )
+
+
+def _timed(socket_path, requests):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(requests)) as pool:
+        replies = list(pool.map(lambda r: _send(socket_path, *r), requests))
+    return replies, time.perf_counter() - start
+
+
+def test_different_hooks_run_concurrently(running_host):
+    """Events for different hooks overlap instead of queueing"""
+    hooks, socket_path = running_host
+
+    replies, elapsed = _timed(
+        socket_path, [(hooks / "slow.py", "a", 0.5), (hooks / "other.py", "b", 0.5)]
+    )
+
+    assert [r["exit_code"] for r in replies] == [0, 0]
+    assert elapsed < 0.9
+
+
+def test_same_hook_is_serialized(running_host):
+    """A hook without HOST_CONCURRENT handles one event at a time"""
+    hooks, socket_path = running_host
+
+    _, elapsed = _timed(
+        socket_path, [(hooks / "slow.py", "a", 0.4), (hooks / "slow.py", "b", 0.4)]
+    )
+
+    assert elapsed >= 0.8
+
+
+def test_concurrent_hook_overlaps_itself(running_host):
+    """HOST_CONCURRENT = True lets one hook run several events at once"""
+    hooks, socket_path = running_host
+
+    _, elapsed = _timed(
+        socket_path, [(hooks / "shared.py", "a", 0.5), (hooks / "shared.py", "b", 0.5)]
+    )
+
+    assert elapsed < 0.9
+
+
+def test_output_and_argv_stay_per_event(running_host):
+    """Concurrent events never see each other's stdin, stdout or argv"""
+    hooks, socket_path = running_host
+    requests = [(hooks / "shared.py", str(i), 0.05, [f"arg{i}"]) for i in range(8)]
+
+    replies, _ = _timed(socket_path, requests)
+
+    for i, reply in enumerate(replies):
+        assert reply["stdout"] == f'{{"id": "{i}", "argv": ["arg{i}"]}}\n'
+
+
+def test_timeout_does_not_rerun_the_hook(running_host, monkeypatch, capsys):
+    """A reply that never comes is a non-blocking error, not a second run"""
+    hooks, socket_path = running_host
+    monkeypatch.setattr(client, "REPLY_TIMEOUT", 0.2)
+    monkeypatch.setattr(client, "default_socket_path", lambda: socket_path)
+    monkeypatch.setattr(sys, "argv", ["client.py", str(hooks / "slow.py")])
+    monkeypatch.setattr(sys, "stdin", _Stdin('{"id": "late", "sleep": 0.6}'))
+
+    with pytest.raises(SystemExit) as exit_info:
+        client.main()
+    time.sleep(0.6)  # let the host finish the event
+
+    assert exit_info.value.code == 1
+    assert "no reply from the hook host" in capsys.readouterr().err
+    assert (hooks.parent / "calls.log").read_text() == "late\n"
+
+
+def test_no_host_runs_in_process(tmp_path, monkeypatch):
+    """Without a host the shim runs the hook itself"""
+    monkeypatch.setattr(
+        client, "default_socket_path", lambda: str(tmp_path / "missing.sock")
+    )
+    monkeypatch.chdir(tmp_path)
+    script = tmp_path / "hook.py"
+    script.write_text(SLOW_HOOK.format(flag="") + "\nmain()\n")
+    monkeypatch.setattr(sys, "argv", ["client.py", str(script)])
+    monkeypatch.setattr(sys, "stdin", _Stdin('{"id": "local"}'))
+
+    with pytest.raises(SystemExit) as exit_info:
+        client.main()
+
+    assert exit_info.value.code == 0
+    assert (tmp_path / "calls.log").read_text() == "local\n"
+
+
+class _Stdin:
+    def __init__(self, text):
+        self.text = text
+
+    def isatty(self):
+        return False
+
+    def read(self):
+        return self.text
@@ -0,0 +1,91 @@
+"""
+Tests for test-impact selection (scripts/hooklib/impact.py and its pytest
+plugin, scripts/hooklib/impact_pytest.py).
+"""
+
+import json
+
+import pytest
+
+from hooklib import impact
+from hooklib.impact_pytest import FileTracer
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "app.py").write_text("def double(x):\n    return 2 * x\n")
+    tests = tmp_path / "tests"
+    tests.mkdir()
+    (tests / "test_app.py").write_text(
+        "import sys\n"
+        "sys.path.insert(0, '.')\n"
+        "from app import double\n\n"
+        "def test_double():\n"
+        "    assert double(2) == 4\n\n"
+        "def test_eval():\n"
+        "    assert eval('1 + 1') == 2\n"
+    )
+    (tests / "test_other.py").write_text("def test_other():\n    assert True\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "filename", ["<string>", "<frozen importlib._bootstrap>", "<stdin>"]
+)
+def test_tracer_skips_pseudo_files(tmp_path, monkeypatch, filename):
+    """
+    Code without a file on disk is never mapped, even when run from the project root
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / filename).write_text("")  # a same-named real file must not matter
+
+    assert not FileTracer(str(tmp_path))._keep(filename)
+
+
+def test_changed_test_file_is_listed_once(project):
+    """Node IDs of a changed test file are folded into the file itself"""
+    runner = impact.PytestRunner(project)
+    state = {
+        "tests": {
+            "tests/test_app.py::test_double": {
+                "files": ["app.py", "tests/test_app.py"]
+            },
+            "tests/test_other.py::test_other": {
+                "files": ["app.py", "tests/test_other.py"]
+            },
+        }
+    }
+
+    selection = runner.select(["app.py", "tests/test_app.py"], state)
+
+    assert selection.files == ["tests/test_app.py"]
+    assert selection.tests == ["tests/test_other.py::test_other"]
+
+
+def test_selector_runs_only_selected_tests(project):
+    """The plugin deselects everything outside the selection and records the rest"""
+    runner = impact.PytestRunner(project)
+    record = project / "record.json"
+    selection = impact.Selection(tests=["tests/test_app.py::test_eval"])
+
+    code = runner.run(selection, record, ["-q", "-p", "no:cacheprovider"])
+
+    results = runner.load_record(record)
+    assert code == 0
+    assert list(results) == ["tests/test_app.py::test_eval"]
+    assert all(
+        not f.startswith("<") for f in results["tests/test_app.py::test_eval"]["files"]
+    )
+
+
+def test_full_run_maps_tests_to_files(project):
+    """A full run records the project files each test's code touched"""
+    runner = impact.PytestRunner(project)
+    record = project / "record.json"
+
+    runner.run(impact.Selection(full=True), record, ["-q", "-p", "no:cacheprovider"])
+
+    tests = json.loads(record.read_text())["tests"]
+    assert "app.py" in tests["tests/test_app.py::test_double"]["files"]
+    assert "app.py" not in tests["tests/test_other.py::test_other"]["files"]
@@ -0,0 +1,182 @@
+"""
+Tests for the compact, memory-mapped file inventory (scripts/hooklib/inventory.py).
+"""
+
+import array
+import os
+import sys
+
+import pytest
+
+from hooklib import inventory as inventory_module
+from hooklib.inventory import COLUMNS, HEADER, Inventory, _align
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "project"
+    _write(root / "README.md", "readme")
+    _write(root / "src" / "app.py", "print('app')\n")
+    _write(root / "src" / "café.PY", "x = 1\n")
+    _write(root / ".github" / "workflows" / "ci.yml", "on: push\n")
+    _write(root / "node_modules" / "dep" / "index.js", "skipped")
+    _write(root / ".claude" / "cache" / "state.json", "{}")
+    return root
+
+
+def _snapshot(inventory):
+    return (
+        list(inventory.paths(include_hidden=True)),
+        [inventory.size[i] for i in range(len(inventory))],
+        inventory.extension_counts(include_hidden=True),
+        inventory.built_at,
+    )
+
+
+def test_build_skips_dependency_and_cache_directories(tree):
+    inventory = Inventory.build(str(tree))
+
+    assert list(inventory.paths(include_hidden=True)) == [
+        "README.md",
+        ".github/workflows/ci.yml",
+        "src/app.py",
+        "src/café.PY",
+    ]
+    assert list(inventory.paths()) == ["README.md", "src/app.py", "src/café.PY"]
+    assert inventory.extension_counts() == {".md": 1, ".py": 2}
+
+
+def test_save_and_load_round_trip(tree, tmp_path):
+    built = Inventory.build(str(tree))
+    path = tmp_path / "inventory.bin"
+    built.save(path)
+
+    loaded = Inventory.load(path)
+
+    assert loaded.root == str(tree)
+    assert _snapshot(loaded) == _snapshot(built)
+    assert loaded.file_count == built.file_count == 4
+    loaded.close()
+
+
+def test_loaded_columns_and_strings_are_views_of_the_file(tree, tmp_path):
+    path = tmp_path / "inventory.bin"
+    Inventory.build(str(tree)).save(path)
+
+    loaded = Inventory.load(path)
+
+    assert all(isinstance(getattr(loaded, name), memoryview) for name, _ in COLUMNS)
+    assert isinstance(loaded._strings, inventory_module._StringTable)
+    assert loaded._strings[loaded.name[len(loaded) - 1]] == "café.PY"
+    assert loaded.nbytes() < os.path.getsize(path)
+    loaded.close()
+    assert loaded._mmap is None
+
+
+def _byte_swapped(path, target):
+    """Rewrite a saved inventory as if written on a machine of the other byte order"""
+    data = path.read_bytes()
+    fields = list(HEADER.unpack_from(data))
+    n_strings, blob_len, ext_len, n_entries = fields[2:6]
+    fields[1] = not fields[1]
+    sections = [("I", n_strings + 1), (None, blob_len), (None, ext_len)]
+    sections += [(code, n_entries) for _, code in COLUMNS]
+
+    out = bytearray(HEADER.pack(*fields))
+    position = HEADER.size
+    for code, count in sections:
+        start = _align(position)
+        length = count * (array.array(code).itemsize if code else 1)
+        raw = data[start : start + length]
+        if code:
+            column = array.array(code, raw)
+            column.byteswap()
+            raw = column.tobytes()
+        out += b"\0" * (start - position) + raw
+        position = start + length
+    target.write_bytes(bytes(out))
+
+
+def test_inventory_from_the_other_byte_order(tree, tmp_path):
+    native = tmp_path / "native.bin"
+    built = Inventory.build(str(tree))
+    built.save(native)
+    foreign = tmp_path / "foreign.bin"
+    _byte_swapped(native, foreign)
+
+    loaded = Inventory.load(foreign)
+
+    assert foreign.read_bytes() != native.read_bytes()
+    assert isinstance(loaded.size, array.array)  # swapped copies, not views
+    assert _snapshot(loaded) == _snapshot(built)
+    loaded.close()
+
+
+@pytest.mark.parametrize("keep", [0, 10, HEADER.size, 0.5, -1])
+def test_truncated_files_are_rejected(tree, tmp_path, keep):
+    path = tmp_path / "inventory.bin"
+    Inventory.build(str(tree)).save(path)
+    data = path.read_bytes()
+    cut = int(len(data) * keep) if isinstance(keep, float) else keep
+    path.write_bytes(data[:cut])
+
+    assert Inventory.load(path) is None
+
+
+def test_bad_magic_is_rejected(tree, tmp_path):
+    path = tmp_path / "inventory.bin"
+    Inventory.build(str(tree)).save(path)
+    path.write_bytes(b"NOTANINV" + path.read_bytes()[8:])
+
+    assert Inventory.load(path) is None
+
+
+def test_changed_detects_added_and_removed_entries(tree):
+    inventory = Inventory.build(str(tree))
+    assert not inventory.changed()
+
+    (tree / "src" / "app.py").write_text("edited in place\n")
+    assert not inventory.changed()  # directory mtimes only see adds and removes
+
+    _write(tree / "src" / "new.py")
+    assert inventory.changed()
+
+    inventory = Inventory.build(str(tree))
+    os.unlink(tree / ".github" / "workflows" / "ci.yml")
+    assert inventory.changed()
+
+
+def test_open_rebuilds_a_stale_inventory(tree):
+    first = Inventory.open(str(tree))
+    path = tree / inventory_module.INVENTORY_PATH
+    reopened = Inventory.open(str(tree))
+    built_at = reopened.built_at
+    reopened.close()
+    _write(tree / "docs" / "guide.md")
+
+    rebuilt = Inventory.open(str(tree))
+
+    assert path.exists()
+    assert built_at == first.built_at
+    assert "docs/guide.md" in list(rebuilt.paths())
+    assert Inventory.load(path).file_count == 5
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file names")
+def test_undecodable_names_round_trip(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    name = os.fsdecode(b"bad\xffname.txt")
+    (root / name).write_text("x")
+    path = tmp_path / "inventory.bin"
+    Inventory.build(str(root)).save(path)
+
+    loaded = Inventory.load(path)
+
+    assert list(loaded.paths()) == [name]
+    loaded.close()
@@ -0,0 +1,146 @@
+"""
+Tests for the bulk ingestion pipeline
+(examples/rag-integration/ingest/knowledge_ingest.py) against the Archon
+stand-in server.
+"""
+
+import pytest
+
+import knowledge_ingest
+from archon_stub import ArchonStub
+
+pytestmark = pytest.mark.integration
+
+SHARED = (
+    "Licensed for internal use only. Do not share outside the company without approval."
+)
+
+
+def write_docs(root, count, words=300):
+    """Markdown pages with distinct bodies and a shared footer"""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        body = " ".join(f"page{i}word{w}" for w in range(words))
+        (root / f"page-{i}.md").write_text(
+            f"# Page {i}\n\n{body}\n\n## Footer\n\n{SHARED}\n"
+        )
+
+
+def run(stub, docs, state, **kwargs):
+    options = dict(
+        api_base=stub.api_base, state_path=state, workers=1, uploaders=2, progress=False
+    )
+    options.update(kwargs)
+    return knowledge_ingest.ingest([str(docs)], [], "test-docs", **options)
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(knowledge_ingest, "MAX_RETRIES", 1)
+
+
+def test_every_chunk_is_uploaded_once(tmp_path):
+    """A fresh run uploads each chunk once and finishes every source"""
+    write_docs(tmp_path / "docs", 12)
+
+    with ArchonStub() as stub:
+        stats = run(stub, tmp_path / "docs", tmp_path / "state.json")
+
+    assert stats.sources_parsed == 12
+    assert stats.chunks_uploaded == stats.chunks_total == len(stub.chunks)
+    assert stub.ingest_duplicates == 0
+    assert stats.batches_failed == 0
+
+
+def test_shared_passages_keep_their_sources(tmp_path):
+    """
+    Identical footers in two pages are stored once per page, each with its own source
+    """
+    write_docs(tmp_path / "docs", 2, words=10)
+
+    with ArchonStub() as stub:
+        run(stub, tmp_path / "docs", tmp_path / "state.json")
+
+    sources = {
+        c["metadata"]["source"] for c in stub.chunks.values() if SHARED in c["content"]
+    }
+    assert len(sources) == 2
+
+
+def test_source_listed_twice_is_uploaded_once(tmp_path):
+    """The same chunk queued twice in one run is sent once"""
+    write_docs(tmp_path / "docs", 3)
+    page = str(tmp_path / "docs" / "page-0.md")
+
+    with ArchonStub() as stub:
+        stats = knowledge_ingest.ingest(
+            [page, page],
+            [],
+            "test-docs",
+            api_base=stub.api_base,
+            state_path=tmp_path / "state.json",
+            workers=1,
+            progress=False,
+        )
+
+    assert stats.chunks_duplicate == stats.chunks_total // 2
+    assert stats.chunks_uploaded == len(stub.chunks)
+    assert stub.ingest_duplicates == 0
+
+
+def test_rerun_only_sends_what_changed(tmp_path):
+    """Unchanged sources are skipped before parsing; an edited one is re-sent"""
+    docs, state = tmp_path / "docs", tmp_path / "state.json"
+    write_docs(docs, 10)
+
+    with ArchonStub() as stub:
+        first = run(stub, docs, state)
+        (docs / "page-3.md").write_text("# Page 3\n\nRewritten from scratch.\n")
+        second = run(stub, docs, state)
+
+    assert first.sources_parsed == 10
+    assert second.sources_parsed == 1 and second.sources_skipped == 9
+    assert second.chunks_uploaded == 1
+    assert stub.ingest_duplicates == 0
+
+
+def test_interrupted_run_resumes_without_resending(tmp_path, fast_retries):
+    """After failed batches, a re-run sends exactly the chunks that never made it"""
+    docs, state = tmp_path / "docs", tmp_path / "state.json"
+    write_docs(docs, 40)
+
+    with ArchonStub(error_rate=0.5, seed=3) as stub:
+        first = run(stub, docs, state, batch_chunks=4)
+        stub.error_rate = 0.0
+        second = run(stub, docs, state, batch_chunks=4)
+
+    assert first.batches_failed > 0 and first.chunks_uploaded > 0
+    assert first.chunks_uploaded + second.chunks_uploaded == first.chunks_total
+    assert stub.ingest_duplicates == 0
+    assert len(stub.chunks) == first.chunks_total
+
+
+def test_oversized_batches_are_split_on_413(tmp_path):
+    """A server limit below ours halves batches until they fit"""
+    write_docs(tmp_path / "docs", 8)
+
+    with ArchonStub(max_batch_bytes=6 * 1024) as stub:
+        stats = run(
+            stub, tmp_path / "docs", tmp_path / "state.json", batch_bytes=64 * 1024
+        )
+
+    assert stats.batches_failed == 0
+    assert stats.chunks_uploaded == stats.chunks_total == len(stub.chunks)
+    assert stub.ingest_batches > stats.batches_uploaded
+
+
+def test_dry_run_sends_nothing(tmp_path):
+    """--dry-run parses and counts without touching the server or the state"""
+    write_docs(tmp_path / "docs", 4)
+
+    with ArchonStub() as stub:
+        stats = run(stub, tmp_path / "docs", tmp_path / "state.json", dry_run=True)
+
+    assert stats.chunks_total > 0
+    assert stub.requests_served == 0
+    assert not (tmp_path / "state.json").exists()
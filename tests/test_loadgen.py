@@ -0,0 +1,90 @@
+"""
+Tests for the concurrent-session hook load generator's reporting
+(scripts/hooklib/loadgen.py): per-event percentiles and knee detection.
+"""
+
+import random
+
+import pytest
+
+from hooklib import loadgen
+from hooklib.loadgen import EventStats, Recorder
+
+
+def _level(sessions, mean_ms):
+    return {"sessions": sessions, "total": {"mean_ms": mean_ms}}
+
+
+def test_event_stats_percentiles():
+    stats = EventStats()
+    latencies = [i / 1000 for i in range(1, 1001)]  # 1..1000 ms
+    random.Random(7).shuffle(latencies)
+    for seconds in latencies:
+        stats.latency.record(seconds)
+
+    summary = stats.to_dict()
+
+    assert summary["count"] == 1000
+    assert summary["p50_ms"] == pytest.approx(500, rel=0.01)
+    assert summary["p95_ms"] == pytest.approx(950, rel=0.01)
+    assert summary["p99_ms"] == pytest.approx(990, rel=0.01)
+    assert summary["max_ms"] == 1000
+    assert summary["mean_ms"] == pytest.approx(500.5, rel=0.001)
+
+
+def test_empty_event_stats():
+    summary = EventStats().to_dict()
+
+    assert summary["count"] == 0
+    assert summary["p99_ms"] == summary["mean_ms"] == 0
+
+
+def test_recorder_totals_merge_events():
+    recorder = Recorder()
+    recorder.record("preToolUse", "ok", 0.010, cpu=0.004, rss_kb=10_240)
+    recorder.record("preToolUse", "blocked", 0.030, cpu=0.006, rss_kb=20_480)
+    recorder.record("stop", "error", 0.020, cpu=0.002, rss_kb=5_120, error="boom")
+
+    total = recorder.total().to_dict()
+
+    assert total["count"] == 3
+    assert total["outcomes"] == {"ok": 1, "blocked": 1, "error": 1}
+    assert total["cpu_ms"] == pytest.approx(4.0)
+    assert total["rss_mb_max"] == 20.0
+    assert recorder.events["stop"].last_error == "boom"
+
+
+def test_knee_is_the_first_superlinear_level():
+    """Overhead grows linearly while latency is flat, then faster than n^1.2"""
+    levels = [_level(1, 50), _level(2, 50), _level(4, 55), _level(8, 120)]
+
+    knee = loadgen.find_knee(levels)
+
+    assert knee == {"sessions": 8, "after": 4, "growth_exponent": 2.13}
+    assert [level.get("growth_exponent") for level in levels] == [
+        None,
+        1.0,
+        1.14,
+        2.13,
+    ]
+
+
+def test_no_knee_when_latency_stays_flat():
+    levels = [_level(n, 40) for n in (1, 2, 4, 8, 16)]
+
+    assert loadgen.find_knee(levels) is None
+    assert {level.get("growth_exponent") for level in levels[1:]} == {1.0}
+
+
+def test_knee_threshold_and_unusable_levels():
+    """Levels with no measurements or no more sessions are skipped"""
+    levels = [_level(1, 50), _level(2, 0), _level(2, 60), _level(4, 70)]
+
+    assert loadgen.find_knee(levels, exponent=1.5) is None
+    assert loadgen.find_knee(levels, exponent=1.1) == {
+        "sessions": 4,
+        "after": 2,
+        "growth_exponent": 1.22,
+    }
+    assert "growth_exponent" not in levels[1]
+    assert "growth_exponent" not in levels[2]
@@ -0,0 +1,138 @@
+"""
+Tests for the buffered, rotating, indexed log store (scripts/hooklib/logstore.py).
+"""
+
+import gzip
+import json
+
+import pytest
+
+from hooklib.logstore import LogStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LogStore(
+        "security", tmp_path, hook="pre-tool-use", rotate_age=0, buffer_records=2
+    )
+
+
+def _fill(store, count, start=1_700_000_000):
+    for i in range(count):
+        store.append(
+            {"timestamp": start + i * 60, "i": i, "tool": "Bash" if i % 2 else "Edit"}
+        )
+    store.flush()
+
+
+def test_rotated_segment_is_one_gzip_member_per_block(store):
+    """Each index block is compressed on its own and the member index points at it"""
+    _fill(store, 10)
+    blocks = len(store.index_path.read_text().splitlines())
+
+    store.compress(store.rotate())
+
+    segment = store.segments()[0]
+    members = [json.loads(line) for line in open(f"{segment}.idx")]
+    raw = segment.read_bytes()
+    assert segment.suffix == ".gz"
+    assert len(members) == blocks
+    first = json.loads(
+        gzip.decompress(
+            raw[members[0]["o"] : members[0]["o"] + members[0]["l"]]
+        ).splitlines()[0]
+    )
+    assert first["i"] == 0
+    with gzip.open(segment) as f:
+        assert len(f.read().splitlines()) == 10  # still a valid gzip file as a whole
+
+
+def test_query_decompresses_only_matching_members(store, monkeypatch):
+    """
+    A time-bounded query over a rotated segment skips the members outside the range
+    """
+    _fill(store, 10)
+    store.compress(store.rotate())
+    inflated = []
+    real = gzip.decompress
+    monkeypatch.setattr(
+        gzip, "decompress", lambda data: inflated.append(len(data)) or real(data)
+    )
+
+    records = list(store.query(since=1_700_000_000 + 8 * 60))
+
+    assert [r["i"] for r in records] == [8, 9]
+    assert len(inflated) == 1
+
+
+def test_query_spans_rotated_and_active_segments(store):
+    """Records come back oldest first across compressed, pending and active segments"""
+    _fill(store, 4)
+    store.compress(store.rotate())
+    _fill(store, 4, start=1_800_000_000)
+    store.rotate()  # moved aside, not compressed yet
+    _fill(store, 2, start=1_900_000_000)
+
+    records = list(store.query(where={"tool": "Bash"}))
+
+    assert [r["timestamp"] for r in records] == [
+        1_700_000_060,
+        1_700_000_180,
+        1_800_000_060,
+        1_800_000_180,
+        1_900_000_060,
+    ]
+
+
+def test_unindexed_lines_survive_compression(store):
+    """Lines appended by another writer without an index entry are kept and found"""
+    _fill(store, 2)
+    with open(store.path, "ab") as f:
+        f.write(b'{"timestamp": 1700009999, "tool": "Write"}\n')
+
+    store.compress(store.rotate())
+
+    assert [r["tool"] for r in store.query(where={"tool": "Write"})] == ["Write"]
+
+
+def test_segment_without_member_index_is_scanned(store):
+    """A rotated file whose member index is gone is decompressed in full"""
+    _fill(store, 6)
+    store.compress(store.rotate())
+    segment = store.segments()[0]
+    (segment.parent / f"{segment.name}.idx").unlink()
+
+    assert len(list(store.query())) == 6
+
+
+@pytest.mark.parametrize("value", ['rm -rf "$HOME"', "C:\\temp", "caf\u00e9"])
+def test_where_matches_values_that_json_escapes(store, value):
+    """The byte prefilter looks for the value as JSON encodes it"""
+    store.append({"timestamp": 1_700_000_000, "command": value})
+    store.append({"timestamp": 1_700_000_001, "command": "ls"})
+
+    assert [r["command"] for r in store.query(where={"command": value})] == [value]
+
+
+def test_old_segments_are_pruned(tmp_path):
+    """Only the newest `keep` rotated segments remain, with their indexes"""
+    store = LogStore("quality", tmp_path, rotate_age=0, keep=2)
+    for n in range(4):
+        _fill(store, 1, start=1_700_000_000 + n)
+        store.compress(store.rotate())
+
+    assert len(list(tmp_path.glob("quality.log.*.gz"))) == 2
+    assert len(list(tmp_path.glob("quality.log.*.gz.idx"))) == 2
+
+
+def test_flush_rotates_and_compresses_old_segments(tmp_path):
+    """
+    A segment whose first record is past rotate_age is compressed on the next flush
+    """
+    store = LogStore("completion", tmp_path, buffer_records=100)
+    _fill(store, 3)
+    _fill(store, 3, start=1_700_100_000)
+
+    assert [p.suffix for p in store.segments()] == [".gz", ".log"]
+    assert len(list(store.query())) == 6
+    assert not list(tmp_path.glob("*.tmp"))
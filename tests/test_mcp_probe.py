@@ -0,0 +1,160 @@
+"""
+Tests for the MCP startup probe (scripts/wizard/mcp_probe.py) against the
+stub server (scripts/wizard/mcp_stub.py) in its fast, slow, hung, exiting
+and paged configurations.
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+from archon_stub import ArchonStub
+from conftest import REPO_ROOT
+from wizard import mcp_probe
+
+pytestmark = pytest.mark.integration
+
+STUB = str(REPO_ROOT / "scripts" / "wizard" / "mcp_stub.py")
+
+
+def stub(name, *args):
+    return {
+        "command": sys.executable,
+        "args": [STUB, "--name", name, *args],
+        "scope": "project",
+    }
+
+
+SERVERS = {
+    "fast": stub("fast", "--tools", "5"),
+    "slow": stub("slow", "--startup", "0.6"),
+    "hung": stub("hung", "--hang"),
+    "exiting": stub("exiting", "--exit-code", "3"),
+    "paged": stub("paged", "--tools", "7", "--page-size", "3"),
+}
+
+
+def probe(name, timeout=10.0):
+    return asyncio.run(mcp_probe.probe_server(name, SERVERS[name], REPO_ROOT, timeout))
+
+
+def test_fast_server_is_ready():
+    """A healthy server reports every stage and its tools"""
+    result = probe("fast")
+
+    assert (result.status, result.stage) == ("ok", "ready")
+    assert result.server == "fast 1.0.0"
+    assert result.tool_count == 5
+    assert result.cold_start_ms <= result.ready_ms
+    assert result.handshake_ms is not None and result.tools_list_ms is not None
+
+
+def test_slow_server_cold_start_is_measured():
+    """Startup time shows up in the cold start, not in the handshake"""
+    result = probe("slow")
+
+    assert result.status == "ok"
+    assert result.cold_start_ms >= 600
+    assert result.handshake_ms < 600
+
+
+def test_hung_server_times_out_at_initialize():
+    """A server that never answers is cut off at the timeout, with its stderr kept"""
+    start = time.perf_counter()
+    result = probe("hung", timeout=1.0)
+
+    assert time.perf_counter() - start < 5
+    assert (result.status, result.stage) == ("timeout", "initialize")
+    assert "hung: ready" in result.stderr_tail
+    assert result.slow
+
+
+def test_exiting_server_is_an_error():
+    """A server that exits on launch is reported as an error with its last words"""
+    result = probe("exiting")
+
+    assert (result.status, result.stage) == ("error", "initialize")
+    assert result.error
+    assert any("exiting with 3" in line for line in result.stderr_tail)
+
+
+def test_paged_tool_list_follows_cursors():
+    """Every page of tools/list is fetched"""
+    result = probe("paged")
+
+    assert result.status == "ok"
+    assert result.tools == [f"stub_tool_{i}" for i in range(7)]
+
+
+def test_probe_all_runs_servers_concurrently():
+    """
+    Servers are probed at once, so the wall time
+    follows the slowest one; failures sort first
+    """
+    start = time.perf_counter()
+    results = asyncio.run(mcp_probe.probe_all(SERVERS, REPO_ROOT, timeout=1.5))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 4
+    assert {r.name for r in results[:2]} == {"hung", "exiting"}
+    assert all(r.status == "ok" for r in results[2:])
+
+
+def test_http_server_is_probed():
+    """Streamable HTTP servers go through the same stages"""
+    with ArchonStub() as archon:
+        spec = {"type": "http", "url": f"{archon.mcp_base}/mcp"}
+        result = asyncio.run(mcp_probe.probe_server("archon", spec, timeout=5))
+
+    assert (result.status, result.transport) == ("ok", "http")
+    assert result.tools == ["perform_rag_query"]
+
+
+def test_load_servers_merges_scopes(tmp_path, monkeypatch):
+    """
+    Project entries override user entries; ${VAR:-default} is expanded at connect time
+    """
+    user_config = tmp_path / "claude.json"
+    user_config.write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "shared": {"command": "user-cmd"},
+                    "mine": {"command": "mine"},
+                },
+                "projects": {
+                    str(tmp_path): {
+                        "mcpServers": {"local": {"url": "http://localhost:1/mcp"}}
+                    }
+                },
+            }
+        )
+    )
+    (tmp_path / ".mcp.json").write_text(
+        json.dumps(
+            {
+                "mcpServers": {
+                    "shared": {
+                        "command": "${STUB_CMD:-fallback}",
+                        "args": ["${STUB_ARG}"],
+                    }
+                },
+            }
+        )
+    )
+    monkeypatch.setenv("STUB_ARG", "value")
+    monkeypatch.delenv("STUB_CMD", raising=False)
+
+    servers = mcp_probe.load_servers(tmp_path, user_config)
+
+    assert {n: s["scope"] for n, s in servers.items()} == {
+        "shared": "project",
+        "mine": "user",
+        "local": "local",
+    }
+    assert mcp_probe.expand(servers["shared"])["command"] == "fallback"
+    assert mcp_probe.expand(servers["shared"])["args"] == ["value"]
+    assert mcp_probe.transport_of(servers["local"]) == "http"
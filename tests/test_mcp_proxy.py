@@ -0,0 +1,139 @@
+"""
+Tests for the lazy-start MCP multiplexing proxy (scripts/wizard/mcp_proxy.py)
+against stub servers (scripts/wizard/mcp_stub.py).
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT
+from wizard import mcp_proxy
+from wizard.mcp_proxy import McpProxy
+
+pytestmark = pytest.mark.integration
+
+STUB = str(REPO_ROOT / "scripts" / "wizard" / "mcp_stub.py")
+
+
+def stub(name, *args):
+    return {"command": sys.executable, "args": [STUB, "--name", name, *args]}
+
+
+def _configure(config_dir, servers, idle_timeout=300):
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / mcp_proxy.SERVERS_FILE).write_text(
+        json.dumps({"mcpServers": servers, "proxy": {"idleTimeout": idle_timeout}})
+    )
+
+
+def _request(proxy, method, params=None):
+    message = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+    return proxy.handle(message)
+
+
+def _names(reply):
+    return [t["name"] for t in reply["result"]["tools"]]
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    return tmp_path / "mcp"
+
+
+def test_tools_list_comes_from_the_cache(config_dir, tmp_path):
+    """With every manifest cached, tools/list starts no server at all"""
+    servers = {"alpha": stub("alpha", "--tools", "2"), "beta": stub("beta")}
+    _configure(config_dir, servers)
+
+    async def scenario():
+        first = McpProxy(config_dir, tmp_path)
+        await first.discover(list(first.backends.values()))
+        await asyncio.gather(*(b.stop() for b in first.backends.values()))
+
+        proxy = McpProxy(config_dir, tmp_path)
+        reply = await _request(proxy, "tools/list")
+        return proxy, reply
+
+    proxy, reply = asyncio.run(scenario())
+
+    assert _names(reply) == [
+        "alpha__stub_tool_0",
+        "alpha__stub_tool_1",
+        "beta__stub_tool_0",
+        "beta__stub_tool_1",
+        "beta__stub_tool_2",
+    ]
+    assert reply["result"]["tools"][0]["description"].startswith("[alpha] ")
+    assert not any(b.running for b in proxy.backends.values())
+
+
+def test_first_call_starts_only_its_server(config_dir, tmp_path):
+    _configure(config_dir, {"alpha": stub("alpha"), "beta": stub("beta")})
+
+    async def scenario():
+        seed = McpProxy(config_dir, tmp_path)
+        await seed.discover(list(seed.backends.values()))
+        await asyncio.gather(*(b.stop() for b in seed.backends.values()))
+
+        proxy = McpProxy(config_dir, tmp_path)
+        await _request(proxy, "tools/list")
+        reply = await _request(
+            proxy,
+            "tools/call",
+            {"name": "beta__stub_tool_1", "arguments": {"text": "hi"}},
+        )
+        running = {name: b.running for name, b in proxy.backends.items()}
+        await asyncio.gather(*(b.stop() for b in proxy.backends.values()))
+        return reply, running
+
+    reply, running = asyncio.run(scenario())
+
+    payload = json.loads(reply["result"]["content"][0]["text"])
+    assert payload["tool"] == "stub_tool_1"
+    assert payload["arguments"] == {"text": "hi"}
+    assert running == {"alpha": False, "beta": True}
+
+
+def test_idle_servers_are_reaped(config_dir, tmp_path):
+    _configure(config_dir, {"alpha": stub("alpha")}, idle_timeout=0.2)
+
+    async def scenario():
+        proxy = McpProxy(config_dir, tmp_path)
+        await _request(proxy, "tools/list")
+        await _request(proxy, "tools/call", {"name": "alpha__stub_tool_0"})
+        backend = proxy.backends["alpha"]
+        started = backend.running
+        reaper = asyncio.create_task(proxy.reap())
+        await asyncio.sleep(0.6)
+        reaper.cancel()
+        return started, backend.running
+
+    started, still_running = asyncio.run(scenario())
+
+    assert started
+    assert not still_running
+
+
+def test_changed_config_is_rediscovered(config_dir, tmp_path):
+    """A server whose config changed has its cached manifest ignored"""
+    _configure(config_dir, {"alpha": stub("alpha", "--tools", "1")})
+
+    async def discover_all():
+        proxy = McpProxy(config_dir, tmp_path)
+        reply = await _request(proxy, "tools/list")
+        await asyncio.gather(*(b.stop() for b in proxy.backends.values()))
+        return proxy, reply
+
+    _, before = asyncio.run(discover_all())
+    _configure(config_dir, {"alpha": stub("alpha", "--tools", "2")})
+    proxy = McpProxy(config_dir, tmp_path)
+    assert proxy.backends["alpha"].tools is None
+    _, after = asyncio.run(discover_all())
+
+    assert _names(before) == ["alpha__stub_tool_0"]
+    assert _names(after) == ["alpha__stub_tool_0", "alpha__stub_tool_1"]
+    manifests = json.loads((config_dir / mcp_proxy.MANIFESTS_FILE).read_text())
+    assert len(manifests["alpha"]["tools"]) == 2
@@ -0,0 +1,152 @@
+"""
+Tests for the parallel multi-language test orchestrator
+(scripts/hooklib/orchestrator.py).
+"""
+
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from hooklib import orchestrator
+from hooklib.orchestrator import Case, Job, PythonSuite
+
+
+def _write(path: Path, text: str = ""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def project(tmp_path):
+    _write(tmp_path / "pytest.ini", "[pytest]\ntestpaths = tests\n")
+    _write(tmp_path / "tests" / "conftest.py")
+    _write(tmp_path / "tests" / "unit" / "conftest.py")
+    _write(tmp_path / "plugins" / "extra" / "pytest.ini", "[pytest]\n")
+    _write(tmp_path / "service" / "go.mod", "module example.com/service\n")
+    _write(tmp_path / "node_modules" / "pkg" / "pytest.ini", "[pytest]\n")
+    return tmp_path
+
+
+def test_conftest_inside_a_suite_is_not_a_suite(project):
+    """Only config files start a nested Python suite; conftest.py files don't"""
+    suites = orchestrator.discover(project)
+
+    assert [s.key for s in suites] == ["python:.", "python:plugins/extra", "go:service"]
+    assert suites[0].nested == [project / "plugins" / "extra"]
+
+
+def test_top_level_conftest_is_a_suite(tmp_path):
+    """A project with a conftest.py and no config file still has a suite"""
+    _write(tmp_path / "tests" / "conftest.py")
+    _write(tmp_path / "tests" / "deep" / "conftest.py")
+
+    assert [s.key for s in orchestrator.discover(tmp_path)] == ["python:tests"]
+
+
+def test_kind_filter(project):
+    assert [s.key for s in orchestrator.discover(project, ["go"])] == ["go:service"]
+
+
+def test_shards_are_balanced_longest_first(tmp_path):
+    """Every test lands in exactly one shard, longest tests spread across shards"""
+    suite = PythonSuite(tmp_path, tmp_path)
+    suite.durations = {
+        "tests/test_a.py::test_slow": 4.0,
+        "tests/test_b.py::test_slow": 3.0,
+        "tests/test_a.py::test_fast": 1.0,
+        "tests/test_b.py::test_fast": 1.0,
+        "tests/test_c.py::test_fast": 1.0,
+    }
+    suite.tests = list(suite.durations)
+    suite.estimate = sum(suite.durations.values())
+    suite.max_slots = 5
+
+    jobs = suite.jobs(2, tmp_path)
+
+    selections = [
+        json.loads(Path(j.env["CLAUDE_IMPACT_SELECT"]).read_text())["tests"]
+        for j in jobs
+    ]
+    assert sorted(t for s in selections for t in s) == sorted(suite.tests)
+    assert sorted(j.estimate for j in jobs) == [5.0, 5.0]
+    assert [j.shards for j in jobs] == [2, 2]
+    for job, tests in zip(jobs, selections):
+        files = sorted({t.split("::")[0] for t in tests})
+        assert job.argv[-len(files) :] == files
+
+
+def test_shards_never_exceed_the_suite_limit(tmp_path):
+    suite = PythonSuite(tmp_path, tmp_path)
+    suite.tests = ["tests/test_a.py::test_one"]
+    suite.durations = {suite.tests[0]: 0.1}
+    suite.estimate = 0.1
+    suite.max_slots = 1
+
+    jobs = suite.jobs(8, tmp_path)
+
+    assert len(jobs) == 1
+    assert "CLAUDE_IMPACT_SELECT" not in jobs[0].env
+
+
+def _job(suite, index, exit_code, cases, log_text=""):
+    log = suite.directory / f"shard-{index}.log"
+    log.write_text(log_text)
+    job = Job(suite, [], slots=1, estimate=1.0, index=index, shards=2, log=log)
+    job.exit_code = exit_code
+    job.elapsed = 1.5 + index
+    job.cases = cases
+    return job
+
+
+def test_reports_merge_shards_and_runner_failures(tmp_path):
+    """Shards merge into one testsuite; a runner failure with no cases is an error"""
+    python = PythonSuite(tmp_path, tmp_path)
+    go = orchestrator.GoSuite(tmp_path, tmp_path / "service")
+    (tmp_path / "service").mkdir()
+    jobs = [
+        _job(python, 1, 1, [Case("tests.test_b", "test_two", 0.2, "failed", "boom")]),
+        _job(python, 0, 0, [Case("tests.test_a", "test_one", 0.1)]),
+        _job(go, 0, 2, [], log_text="build failed: undefined: Foo\n"),
+    ]
+    junit, report_path = tmp_path / "report.xml", tmp_path / "report.json"
+
+    report = orchestrator.write_reports(jobs, 3.0, junit, report_path)
+
+    assert (report["tests"], report["failures"], report["errors"]) == (3, 1, 1)
+    by_name = {s["name"]: s for s in report["suites"]}
+    assert by_name["python:."]["shards"] == 2
+    assert by_name["python:."]["wall"] == 2.5
+    assert [c["name"] for c in by_name["python:."]["cases"]] == ["test_one", "test_two"]
+    assert by_name["go:service"]["status"] == "failed"
+    assert "undefined: Foo" in by_name["go:service"]["cases"][0]["output"]
+    root = ET.parse(junit).getroot()
+    assert root.get("tests") == "3"
+    assert len(root.findall("testsuite")) == 2
+    assert json.loads(report_path.read_text())["failures"] == 1
+
+
+@pytest.mark.integration
+def test_sharded_run_matches_a_plain_run(tmp_path, monkeypatch):
+    """Each test runs once across shards, and failures are reported"""
+    _write(tmp_path / "pytest.ini", "[pytest]\ntestpaths = tests\n")
+    _write(tmp_path / "tests" / "conftest.py")
+    for name in ("a", "b", "c"):
+        _write(
+            tmp_path / "tests" / f"test_{name}.py",
+            "def test_pass():\n    pass\n\n"
+            f"def test_{name}():\n    assert {name!r} != 'b'\n",
+        )
+    monkeypatch.setattr(orchestrator, "MIN_SHARD_SECONDS", 0.05)
+    runner = orchestrator.Orchestrator(str(tmp_path))
+    suites = orchestrator.discover(runner.root, ["python"])
+
+    jobs = runner.run(runner.plan(suites, 2))
+    report = orchestrator.write_reports(
+        jobs, 1.0, tmp_path / "r.xml", tmp_path / "r.json"
+    )
+
+    assert [s.key for s in suites] == ["python:."]
+    assert len(jobs) == 2
+    assert (report["tests"], report["failures"]) == (6, 1)
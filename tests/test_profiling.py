@@ -0,0 +1,83 @@
+"""
+Tests for on-demand hook profiling (scripts/hooklib/profiling.py).
+"""
+
+import sys
+import threading
+import tracemalloc
+
+import pytest
+
+from hooklib import profiling
+
+ALWAYS = {"enabled": True, "sampleRate": 1.0, "tracemalloc": False}
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+def _capture(hook):
+    with profiling.profile(hook, ALWAYS) as sampled:
+        sum(range(1000))
+    assert sampled
+
+
+def test_captures_in_the_same_second_do_not_collide(profiles):
+    """
+    The host profiles many invocations per second in one process; each keeps its file
+    """
+    for _ in range(5):
+        _capture("safety")
+
+    assert len(list(profiles.glob("safety-*.prof"))) == 5
+
+
+def test_summary_matches_the_hook_name_exactly(profiles):
+    """A hook's summary ignores hooks whose names start with it"""
+    _capture("safety")
+    _capture("safety-audit")
+    _capture("safety-audit")
+
+    assert [p.name.split("-2")[0] for p in profiling._captures("safety", 0.0)] == [
+        "safety"
+    ]
+    assert len(profiling._captures("safety-audit", 0.0)) == 2
+    assert "1 profile(s) merged" in profiling.summarize("safety")
+
+
+def test_nested_invocation_is_not_profiled_again(profiles):
+    with profiling.profile("outer", ALWAYS) as outer:
+        with profiling.profile("inner", ALWAYS) as inner:
+            pass
+
+    assert (outer, inner) == (True, False)
+    assert [p.name.split("-")[0] for p in profiles.glob("*.prof")] == ["outer"]
+
+
+def test_concurrent_captures_share_tracemalloc_safely(profiles):
+    """Threads of the host profile at once; only one of them traces memory"""
+    threads = 4
+    barrier = threading.Barrier(threads)
+    sampled = []
+
+    def invocation(index):
+        with profiling.profile(f"hook{index}", {**ALWAYS, "tracemalloc": True}) as on:
+            barrier.wait(5)  # every capture is running at this point
+            sampled.append(on)
+            barrier.wait(5)
+
+    workers = [threading.Thread(target=invocation, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # Python 3.12+ runs one profiler per process; earlier versions one per thread
+    assert sampled.count(True) == (1 if sys.version_info >= (3, 12) else threads)
+    assert len(list(profiles.glob("*.prof"))) == sampled.count(True)
+    assert len(list(profiles.glob("*.mem.json"))) == 1
+    assert not tracemalloc.is_tracing()
+    assert not profiling._active
@@ -0,0 +1,111 @@
+"""
+Tests for the content-hash keyed format/lint result cache
+(scripts/hooklib/quality_cache.py).
+"""
+
+import multiprocessing
+import os
+import stat
+
+import pytest
+
+from hooklib.quality_cache import QualityCache
+
+TOOL = "fakefmt"
+WRITERS = 4
+ENTRIES_PER_WRITER = 50
+
+
+def _install_tool(bin_dir, version, mtime):
+    """A stand-in formatter on PATH whose --version prints `version`"""
+    path = bin_dir / TOOL
+    path.write_text(f"#!/bin/sh\necho '{TOOL} {version}'\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    _install_tool(bin_dir, "1.0", mtime=1_000_000)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    cache = QualityCache(tmp_path / "quality.sqlite3")
+    yield cache
+    cache.close()
+
+
+def test_hit_after_put_and_miss_after_an_edit(cache):
+    source, formatted = b"x=1\n", b"x = 1\n"
+    cache.put_formatted(source, formatted, TOOL, "python")
+    cache.put_findings(formatted, ["E1 bad"], TOOL, "python")
+
+    assert cache.get_formatted(source, TOOL, "python") == formatted
+    assert cache.get_formatted(formatted, TOOL, "python") == formatted
+    assert cache.get_findings(formatted, TOOL, "python") == ["E1 bad"]
+    assert cache.get_formatted(b"x=2\n", TOOL, "python") is None
+    assert cache.get_findings(source, TOOL, "python") is None
+
+
+def test_tool_upgrade_invalidates_entries(cache, tmp_path):
+    cache.put_formatted(b"x=1\n", b"x = 1\n", TOOL, "python")
+
+    _install_tool(tmp_path / "bin", "2.0", mtime=2_000_000)
+
+    assert cache.tool_version(TOOL) == f"{TOOL} 2.0"
+    assert cache.get_formatted(b"x=1\n", TOOL, "python") is None
+
+
+def test_config_change_invalidates_entries(cache, tmp_path):
+    """Config hashes are read once per process; a new hook process sees edits"""
+    cache.put_findings(b"x = 1\n", [], TOOL, "python")
+    (tmp_path / "pyproject.toml").write_text("[tool.black]\nline-length = 100\n")
+
+    fresh = QualityCache(tmp_path / "quality.sqlite3")
+    try:
+        assert fresh.get_findings(b"x = 1\n", TOOL, "python") is None
+        assert cache.get_findings(b"x = 1\n", TOOL, "python") == []
+    finally:
+        fresh.close()
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.max_bytes = 1000  # room for about five of these entries
+    for i in range(10):
+        cache.put_findings(f"v{i}".encode(), ["x" * 100], TOOL, "python")
+        cache.get_findings(b"v0", TOOL, "python")  # keep the first entry warm
+
+    assert cache.get_findings(b"v0", TOOL, "python") == ["x" * 100]
+    assert cache.get_findings(b"v1", TOOL, "python") is None
+    assert cache.get_findings(b"v9", TOOL, "python") is not None
+
+
+def _write_entries(path, writer):
+    cache = QualityCache(path)
+    try:
+        for i in range(ENTRIES_PER_WRITER):
+            data = f"{writer}:{i}".encode()
+            cache.put_formatted(data, data.upper(), TOOL, "python")
+    finally:
+        cache.close()
+
+
+@pytest.mark.integration
+def test_concurrent_writers(cache, tmp_path):
+    """Hook processes writing at once neither fail nor lose entries"""
+    path = tmp_path / "quality.sqlite3"
+    context = multiprocessing.get_context("fork")
+    writers = [
+        context.Process(target=_write_entries, args=(path, w)) for w in range(WRITERS)
+    ]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(30)
+
+    assert [p.exitcode for p in writers] == [0] * WRITERS
+    for w in range(WRITERS):
+        for i in range(ENTRIES_PER_WRITER):
+            data = f"{w}:{i}".encode()
+            assert cache.get_formatted(data, TOOL, "python") == data.upper()
@@ -0,0 +1,448 @@
+"""
+Tests for the RAG prompt hook (examples/rag-integration/hooks/rag-prompt-enhance.py),
+partly against the Archon stand-in server.
+"""
+
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from archon_stub import ArchonStub
+from conftest import RAG_DIR
+
+PROMPT = "Why does the token refresh middleware reject expired sessions?"
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    """A fresh copy of the hook module, with its caches under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location(
+        "rag_prompt_enhance", RAG_DIR / "hooks" / "rag-prompt-enhance.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.GATE_EXPLORE_RATE = 0.0
+    return module
+
+
+def use_stub(rag, stub):
+    rag.ARCHON_API_BASE = stub.api_base
+    rag.ARCHON_MCP_BASE = stub.mcp_base
+
+
+def gate_state():
+    with open(".claude/cache/rag-gate.json") as f:
+        return json.load(f)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("backend", ["search_knowledge", "search_archon_mcp"])
+def test_backend_failure_is_not_an_empty_answer(rag, backend):
+    """A 5xx from Archon is reported as None, a real empty answer as []"""
+    with ArchonStub(error_rate=1.0) as failing:
+        use_stub(rag, failing)
+        assert getattr(rag, backend)("token refresh") is None
+
+    with ArchonStub(payload=[]) as empty:
+        use_stub(rag, empty)
+        assert getattr(rag, backend)("token refresh") == []
+
+
+@pytest.mark.integration
+def test_unreachable_backends_return_none(rag):
+    """With nothing listening, the fan-out reports that no backend answered"""
+    with ArchonStub() as stub:
+        use_stub(rag, stub)
+    # the stub is stopped: its port now refuses connections
+
+    assert rag.search_all_backends("token refresh") is None
+    assert rag.search_queries(["token refresh", "expired sessions"]) is None
+
+
+@pytest.mark.integration
+def test_outage_is_not_learned_by_the_gate(rag):
+    """The lookup gate and result cache only learn from answered lookups"""
+    with ArchonStub(error_rate=1.0) as stub:
+        use_stub(rag, stub)
+        enhanced, status = rag.enhance_prompt(PROMPT)
+
+    assert enhanced == PROMPT and status is None
+    assert rag.LookupGate.load().observations == 0
+    assert rag.load_result_cache() == []
+
+
+@pytest.mark.integration
+def test_empty_answer_is_learned_as_a_miss(rag):
+    """A lookup that was answered with nothing feeds the negative cache"""
+    with ArchonStub(payload=[]) as stub:
+        use_stub(rag, stub)
+        rag.enhance_prompt(PROMPT)
+
+    state = gate_state()
+    assert state["observations"] == 1
+    assert state["negative_cache"]
+
+
+@pytest.mark.integration
+def test_answered_lookup_adds_context(rag):
+    """Results from the stub are injected and recorded as a hit"""
+    with ArchonStub() as stub:
+        use_stub(rag, stub)
+        enhanced, status = rag.enhance_prompt(PROMPT)
+
+    assert enhanced.startswith(PROMPT) and len(enhanced) > len(PROMPT)
+    assert status.startswith("✨ Added")
+    state = gate_state()
+    assert state["observations"] == 1
+    assert not state["negative_cache"]
+
+
+def test_concurrent_gate_updates_are_all_kept(rag):
+    """Hook runs that loaded the same state each add their outcome"""
+    topics = ["alpha", "bravo", "charlie", "delta", "echo", "golf", "hotel", "kilo"]
+    gates = [rag.LookupGate.load() for _ in topics]
+
+    threads = [
+        threading.Thread(target=gate.update, args=(f"{PROMPT} {topic}", i % 2 == 0))
+        for i, (gate, topic) in enumerate(zip(gates, topics))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    state = gate_state()
+    assert state["observations"] == 8
+    assert len(state["negative_cache"]) == 4
+
+
+@pytest.mark.parametrize(
+    "prompt, served",
+    [
+        ("why does the auth refresh fail for users?", True),
+        ("user auth refresh", True),
+        (
+            "Write tests for src/auth/session.py: cover user refresh, expired "
+            "sessions, rotated signing keys and the audit log export",
+            False,
+        ),
+        ("how do I configure the build cache?", False),
+    ],
+)
+def test_cache_match_is_symmetric(rag, prompt, served):
+    """
+    A cached query serves prompts about the same
+    thing, not every prompt containing its words
+    """
+    cached = [{"title": "Auth refresh", "source": "docs/auth.md", "score": 0.9}]
+    rag.store_results([("user auth refresh", cached)])
+
+    results = rag.lookup_cached_results(rag.build_queries(prompt))
+
+    assert (results == cached) is served
+
+
+def _pasted_log(lines):
+    return "".join(
+        f"2024-05-01 12:00:{i % 60:02d} INFO worker-{i} handled job {i}\n"
+        for i in range(lines)
+    )
+
+
+def test_huge_prompt_becomes_a_few_short_queries(rag):
+    """A question around a large paste is searched by its salient parts"""
+    prompt = (
+        "Why does the token refresh fail after deploy?\n"
+        + _pasted_log(100_000)
+        + "File src/auth/session.py, line 42, in refresh_token\n"
+        + "SessionExpiredError: token 0x7f3a expired at 1714567200\n"
+        + "Can you fix the SessionStore so it retries?\n"
+    )
+
+    start = time.perf_counter()
+    queries = rag.build_queries(prompt)
+
+    assert time.perf_counter() - start < 1
+    assert len(prompt) > 5_000_000
+    assert len(queries) == rag.MAX_SUB_QUERIES
+    assert all(len(q) <= rag.MAX_QUERY_CHARS for q in queries)
+    assert queries[0] == (
+        "Why does the token refresh fail after deploy? "
+        "Can you fix the SessionStore so it retries?"
+    )
+    assert queries[1].startswith("SessionExpiredError: token")
+    assert "src/auth/session.py" in queries[2] and "refresh_token" in queries[2]
+
+
+def test_salient_spans_come_from_the_head_and_tail_only(rag):
+    middle = "RuntimeError: buried in the middle of the paste\n"
+    noise = _pasted_log(2_000)
+    errors = "".join(f"ValueError: bad row {i}\n" for i in range(5))
+    prompt = "What broke here?\n" + noise + middle + noise + errors
+
+    spans = rag.extract_salient_spans(prompt)
+
+    assert spans["question"] == ["What broke here?"]
+    assert spans["errors"] == ["ValueError: bad row 0"]  # numbers don't count
+    assert not any("buried" in e for e in spans["errors"])
+
+
+def test_short_prompt_is_its_own_query(rag):
+    assert rag.build_queries("  how is the cache keyed?  ") == [
+        "how is the cache keyed?"
+    ]
+
+
+def test_stdin_over_the_cap_is_drained_and_passed_through(rag):
+    data = json.dumps({"prompt": "x" * 300_000}).encode()
+    stream = io.BytesIO(data)
+
+    assert rag.read_hook_input(stream, max_bytes=100_000) is None
+    assert stream.read() == b""
+    assert rag.read_hook_input(io.BytesIO(data), max_bytes=len(data)) == {
+        "prompt": "x" * 300_000
+    }
+
+
+@pytest.mark.integration
+def test_truncated_input_leaves_the_prompt_alone(rag, tmp_path):
+    """A JSON document cut off mid-stream is not enhanced and does not fail"""
+    truncated = json.dumps({"prompt": "How are sessions refreshed?"})[:-5]
+
+    with pytest.raises(ValueError):
+        rag.read_hook_input(io.BytesIO(truncated.encode()))
+    hook = subprocess.run(
+        [sys.executable, str(RAG_DIR / "hooks" / "rag-prompt-enhance.py")],
+        input=truncated,
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        timeout=30,
+    )
+
+    assert (hook.returncode, hook.stdout.strip()) == (0, "{}")
+
+
+def _result(title, text, score, **extra):
+    return {
+        "title": title,
+        "source": f"{title}.md",
+        "excerpt": text,
+        "score": score,
+        **extra,
+    }
+
+
+def test_dedupe_keeps_the_best_copy(rag):
+    """A slice of a longer excerpt is a duplicate; the higher-scored copy stays"""
+    long = "The refresh middleware rejects sessions whose token expired an hour ago."
+    results = [
+        _result("slice", "rejects sessions whose token expired an hour ago", 0.6),
+        _result("full", long, 0.9),
+        _result("other", "Build caches live under the .cache directory.", 0.7),
+    ]
+
+    kept = rag.dedupe_results(results)
+
+    assert [r["title"] for r in kept] == ["full", "other"]
+
+
+def test_trim_cuts_prose_at_a_sentence(rag):
+    text = "First sentence here. Second sentence is longer than the first one."
+
+    assert rag._trim_to_budget(text, 100) == text
+    assert rag._trim_to_budget(text, 6) == "First sentence here."
+
+
+def test_trim_never_cuts_a_code_block(rag):
+    code = "```python\nprint('a very long line of example code')\n```"
+    text = "Intro. " + code + " Outro."
+
+    assert rag._trim_to_budget(text, 10) == "Intro."
+    assert code in rag._trim_to_budget(text, 16)
+
+
+def test_pack_context_fits_the_budget(rag):
+    results = [
+        _result(f"doc{i}", f"Topic {i}. " + "Some words about it. " * 40, 0.9 - i / 10)
+        for i in range(4)
+    ]
+
+    context, documents, tokens = rag.pack_context(results, token_budget=300)
+
+    assert context.startswith("[Relevant context from project knowledge base]")
+    assert 1 <= documents <= 4
+    assert tokens <= 300
+
+
+def test_pack_context_trims_the_top_result_instead_of_dropping_it(rag):
+    """With room for one entry, it is the most relevant one, using the whole budget"""
+    results = [
+        _result(name, " ".join(f"{name}word{i}." for i in range(150)), score)
+        for name, score in (("A", 0.9), ("B", 0.8), ("C", 0.7))
+    ]
+
+    context, documents, tokens = rag.pack_context(results, token_budget=60)
+
+    assert documents == 1
+    assert "1. A (A.md" in context
+    assert 50 < tokens <= 60
+
+
+def test_pack_context_passes_unused_budget_down(rag):
+    """A short top result leaves the rest of its share to the next one"""
+    results = [
+        _result("A", "Short.", 0.9),
+        _result("B", "Some words about the topic. " * 60, 0.1),
+    ]
+
+    context, documents, _ = rag.pack_context(results, token_budget=400)
+
+    entry = context.split("2. B")[1]
+    assert documents == 2
+    assert rag.estimate_tokens(entry) > 200  # its own share would be about 35
+
+
+def test_pack_context_with_nothing_to_pack(rag):
+    assert rag.pack_context([]) == ("", 0, 0)
+
+
+def _turn(rag, session_id, results):
+    ledger = rag.SessionLedger.load(session_id)
+    context, documents, _ = rag.pack_context(results, ledger=ledger)
+    ledger.save()
+    return context, documents, ledger
+
+
+def test_session_ledger_does_not_reinject_seen_excerpts(rag):
+    """An excerpt from an earlier turn is referenced by name, not sent again"""
+    first = _result("A", "Tokens expire after one hour.", 0.9)
+    _turn(rag, "s1", [first, _result("B", "Sessions live in Redis.", 0.8)])
+
+    again = _result("A", "  tokens EXPIRE after one hour. ", 0.9)
+    fresh = _result("C", "Refresh tokens rotate on use.", 0.7)
+    context, documents, ledger = _turn(rag, "s1", [again, fresh])
+
+    assert documents == 1
+    assert "1. C (C.md" in context
+    assert "Tokens expire" not in context
+    assert "already provided earlier in this session: A (A.md)" in context
+    assert (ledger.turn, ledger.repeated) == (2, 1)
+
+
+def test_session_ledgers_are_per_session(rag):
+    result = _result("A", "Tokens expire after one hour.", 0.9)
+    _turn(rag, "s1", [result])
+
+    context, documents, _ = _turn(rag, "s2", [result])
+
+    assert documents == 1
+    assert "Tokens expire after one hour." in context
+
+
+def test_session_ledgers_expire_and_can_be_forgotten(rag):
+    result = _result("A", "Tokens expire after one hour.", 0.9)
+    _turn(rag, "old", [result])
+    _turn(rag, "cleared", [result])
+    stale = time.time() - rag.SESSION_LEDGER_TTL - 60
+    os.utime(rag.SessionLedger.path_for("old"), (stale, stale))
+
+    _turn(rag, "other", [result])  # saving prunes expired ledgers
+    rag.SessionLedger.forget("cleared")
+
+    assert not os.path.exists(rag.SessionLedger.path_for("old"))
+    assert rag.SessionLedger.load("old").chunks == {}
+    assert rag.SessionLedger.load("cleared").chunks == {}
+    assert rag.SessionLedger.load("other").turn == 1
+
+
+@pytest.mark.integration
+def test_mcp_session_is_initialized_and_ended(rag):
+    """The MCP backend completes the handshake and does not leak its session"""
+    with ArchonStub() as stub:
+        use_stub(rag, stub)
+        results = rag.search_archon_mcp("token refresh middleware")
+
+        assert results and results[0]["title"].startswith("Token Refresh")
+        assert stub.mcp_sessions_opened == 1
+        assert stub.mcp_sessions == {}
+
+
+def test_fuse_results_ranks_by_reciprocal_rank(rag):
+    """Documents several backends agree on rise; copies merge by URL"""
+    rest = [
+        {"title": "A", "url": "http://kb/a", "score": 0.7},
+        {"title": "B", "url": "http://kb/b", "score": 0.9},
+    ]
+    mcp = [
+        {"title": "B (mcp)", "url": "http://KB/b/", "score": 0.95},
+        {"title": "C", "url": "http://kb/c", "score": 0.8},
+    ]
+    local = [{"title": "D", "source": "notes.md", "score": 1.0}]
+
+    fused = rag.fuse_results([rest, mcp, local], max_results=3)
+
+    assert [r["title"] for r in fused] == ["B (mcp)", "A", "D"]
+    assert len(rag.fuse_results([rest, mcp, local], max_results=10)) == 4
+
+
+def _backend(results, delay=0.0):
+    def search(query, max_results):
+        time.sleep(delay)
+        return results
+
+    return search
+
+
+def _fan_out(rag, monkeypatch, backends, deadline=1.0):
+    monkeypatch.setattr(rag, "BACKENDS", backends)
+    monkeypatch.setattr(rag, "ENABLED_BACKENDS", list(backends))
+    monkeypatch.setattr(rag, "FANOUT_DEADLINE", deadline)
+    monkeypatch.setattr(rag, "FANOUT_GRACE", 0.05)
+    start = time.perf_counter()
+    results = rag.search_all_backends("token refresh")
+    return results, time.perf_counter() - start
+
+
+def test_fan_out_does_not_wait_for_a_backend_that_times_out(rag, monkeypatch):
+    """A hung backend costs the grace period, not the deadline"""
+    fast = [{"title": "fast", "url": "http://kb/fast", "score": 0.9}]
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+
+    results, elapsed = _fan_out(
+        rag, monkeypatch, {"fast": _backend(fast), "hung": _backend([], delay=0.6)}
+    )
+    time.sleep(0.8)  # the hung backend finishes after the loop has closed
+
+    assert results == fast
+    assert elapsed < 0.4
+    assert errors == []
+
+
+def test_fan_out_waits_until_the_deadline_for_a_first_answer(rag, monkeypatch):
+    results, elapsed = _fan_out(
+        rag,
+        monkeypatch,
+        {"down": _backend(None), "hung": _backend([], delay=2.0)},
+        deadline=0.3,
+    )
+
+    assert results is None
+    assert 0.25 < elapsed < 1.0
+
+
+def test_fan_out_tells_an_empty_answer_from_an_outage(rag, monkeypatch):
+    results, _ = _fan_out(
+        rag, monkeypatch, {"down": _backend(None), "empty": _backend([])}
+    )
+
+    assert results == []
@@ -0,0 +1,184 @@
+"""
+Tests for the pre-tool-use rule engine (scripts/hooklib/safety.py).
+
+The bypass cases are regressions: each was allowed by an earlier version of
+_check_rm while the original `rm\\s+-rf\\s+/` regex blocked it.
+"""
+
+import os
+import shlex
+
+import pytest
+
+from hooklib.safety import RuleEngine
+
+pytestmark = pytest.mark.security
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RuleEngine()
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "rm -rf /",
+        "rm -rf /usr",
+        "sudo rm -rf /etc",
+        # usrmerge: /bin resolves to /usr/bin, deeper than the /usr deny entry
+        "rm -rf /bin",
+        "rm -rf /lib",
+        "rm -rf /sbin",
+        # a glob directly under a protected directory empties it
+        "rm -rf /usr/*",
+        "rm -rf /etc/*",
+        # nested command lines
+        "bash -c 'rm -rf /'",
+        'sh -c "rm -rf ~"',
+        "eval 'rm -rf /'",
+        "sudo bash -lc 'rm -rf /usr'",
+        "sh -c \"eval 'rm -rf /'\"",
+        # home directory spellings
+        "rm -rf ~",
+        "rm -rf $HOME",
+        "rm -rf ${HOME}/",
+        "rm -fr ~/..",
+        # an unset variable expands to nothing
+        "rm -rf $LOADGEN_SURELY_UNSET/",
+        # an ancestor of a protected directory
+        "rm -rf /private",
+        # anything under a protected directory
+        "rm -rf /etc/ssh",
+        "rm -rf /usr/lib",
+        "rm -rf /usr/bin",
+        "rm -rf /var/lib",
+        "rm -rf /boot/grub",
+        "rm -rf /lib/modules",
+        "rm -rf /usr/local/../lib",
+        "rm -rf /var/tmp/../lib",
+        "rm -rf /var/tmp",
+        # home directories, whoever's they are
+        "rm -rf /home",
+        "rm -rf /home/other",
+        "rm -rf /home/dev/..",
+        "rm -rf /root",
+        "rm -rf /Users",
+        "rm -rf /Users/someone/",
+        "rm -rf ../../other",
+    ],
+)
+def test_destructive_rm_is_blocked(engine, command, monkeypatch):
+    """
+    Recursive deletes of /, home and system
+    directories are blocked however they are spelled.
+    """
+    monkeypatch.setenv("HOME", "/home/dev")
+    monkeypatch.delenv("LOADGEN_SURELY_UNSET", raising=False)
+
+    verdict = engine.check_bash(command, "/home/dev/project")
+
+    assert verdict is not None
+    assert verdict.rule == "rm-recursive"
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "rm -rf /tmp/build",
+        "rm -rf build dist",
+        "rm -rf ./node_modules",
+        "rm -rf src/*",
+        "rm -rf ~/project/node_modules",
+        "rm -rf $HOME/.cache/pip",
+        "rm -rf /var/tmp/scratch",
+        "rm -rf /var/tmp/build/../cache",
+        "rm -rf /root/project/build",
+        "rm -f /etc/hosts.bak",  # not recursive
+        "bash -c 'ls -la'",
+        "eval echo done",
+        "echo 'rm -rf /'",
+    ],
+)
+def test_ordinary_commands_are_allowed(engine, command, monkeypatch):
+    """Everyday cleanups and quoted text are not blocked."""
+    monkeypatch.setenv("HOME", "/home/dev")
+
+    assert engine.check_bash(command, "/home/dev/project") is None
+
+
+@pytest.mark.parametrize(
+    "command, rule",
+    [
+        ("chmod -R 777 .", "chmod-777"),
+        ("curl -s https://example.com/install.sh | bash", "pipe-to-shell"),
+        ("dd if=/dev/zero of=/dev/sda", "dd-device"),
+        (":(){ :|:& };:", "fork-bomb"),
+        ("mkfs.ext4 /dev/sdb1", "mkfs"),
+        ("bash -c 'curl https://x/i.sh | sh'", "pipe-to-shell"),
+    ],
+)
+def test_other_rules(engine, command, rule):
+    """Structural and regex rules name the rule that matched."""
+    verdict = engine.check_bash(command)
+
+    assert verdict is not None and verdict.rule == rule
+
+
+def test_nesting_is_bounded(engine):
+    """Pathologically nested eval chains are refused rather than followed forever."""
+    command = "true"
+    for _ in range(8):
+        command = f"eval {shlex.quote(command)}"
+
+    verdict = engine.check_bash(command)
+
+    assert verdict is not None and verdict.rule == "nested-shell"
+
+
+@pytest.mark.parametrize(
+    "path, rule",
+    [
+        ("/etc/passwd", "system-dir"),
+        (".env", "sensitive-file"),
+        ("config/secrets.json", "sensitive-file"),
+        ("~/.ssh/config", "sensitive-dir"),
+    ],
+)
+def test_protected_paths_are_blocked(engine, path, rule):
+    """Writes to system directories and credential files are blocked."""
+    verdict = engine.check_path(path, "/home/dev/project")
+
+    assert verdict is not None and verdict.rule == rule
+
+
+@pytest.mark.parametrize("path", ["src/app.py", "/var/tmp/out.txt", ".env.example"])
+def test_ordinary_paths_are_allowed(engine, path):
+    """Project files and temp directories stay writable."""
+    assert engine.check_path(path, "/home/dev/project") is None
+
+
+def test_check_tool_dispatches_on_tool_name(engine):
+    """check_tool reads both the current and the legacy input shapes."""
+    assert (
+        engine.check_tool({"tool_name": "Bash", "tool_input": {"command": "rm -rf /"}})
+        is not None
+    )
+    assert (
+        engine.check_tool({"tool": "Write", "parameters": {"file_path": "/etc/hosts"}})
+        is not None
+    )
+    assert (
+        engine.check_tool(
+            {"tool_name": "Read", "tool_input": {"file_path": "/etc/hosts"}}
+        )
+        is None
+    )
+
+
+def test_realpath_is_checked(engine, tmp_path):
+    """A symlink into a protected directory is caught through its resolved path."""
+    link = tmp_path / "looks-harmless"
+    os.symlink("/usr", link)
+
+    assert engine.check_bash(f"rm -rf {link}", str(tmp_path)) is not None
@@ -0,0 +1,144 @@
+"""
+Tests for hook latency telemetry (scripts/hooklib/telemetry.py).
+"""
+
+import json
+import threading
+
+import pytest
+
+from hooklib import telemetry
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, "TELEMETRY_PATH", tmp_path / "telemetry.json")
+    monkeypatch.setattr(telemetry, "SAMPLES_PATH", tmp_path / "telemetry.samples")
+    monkeypatch.setattr(telemetry, "LOCK_PATH", tmp_path / ".telemetry.lock")
+    monkeypatch.setattr(telemetry, "TEXTFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(telemetry, "ENABLE_TELEMETRY", True)
+    monkeypatch.setattr(telemetry, "EXPORT_INTERVAL", 3600)
+    return tmp_path
+
+
+def _latency(state, hook="safety", event="preToolUse", outcome="ok"):
+    series = state["series"][telemetry._series_key(hook, event, outcome)]
+    return telemetry.Histogram.from_dict(series["latency"])
+
+
+def test_record_appends_a_sample_without_rewriting_state(logs):
+    """Recording is one appended line; the histogram file is left alone until folding"""
+    telemetry.TELEMETRY_PATH.write_text('{"series": {}, "exported": 0}')
+    before = telemetry.TELEMETRY_PATH.stat().st_mtime_ns
+    telemetry.SAMPLES_PATH.unlink(missing_ok=True)
+
+    telemetry.record("safety", "preToolUse", "ok", 0.012, {"network": 0.004})
+
+    sample = json.loads(telemetry.SAMPLES_PATH.read_text())
+    assert sample == {
+        "h": "safety",
+        "e": "preToolUse",
+        "o": "ok",
+        "d": 0.012,
+        "p": {"network": 0.004},
+    }
+    assert telemetry.TELEMETRY_PATH.stat().st_mtime_ns == before
+
+
+def test_reads_aggregate_folded_and_pending_samples(logs):
+    """A report sees samples before and after they are folded, each exactly once"""
+    telemetry.TELEMETRY_PATH.write_text('{"series": {}, "exported": 0}')
+    for _ in range(3):
+        telemetry.record("safety", "preToolUse", "ok", 0.010)
+    telemetry.compact()  # sets the live samples aside
+    telemetry.record("safety", "preToolUse", "ok", 0.020)
+    telemetry.compact()  # folds the first three
+
+    assert _latency(telemetry._load()).total == 4
+    assert _latency(telemetry._load_state()).total == 3
+    assert len(telemetry._claimed_samples()) == 1
+
+
+def test_concurrent_records_are_all_counted(logs):
+    """Threads recording at once never lose a sample"""
+    telemetry.TELEMETRY_PATH.write_text('{"series": {}, "exported": 0}')
+
+    def burst():
+        for _ in range(50):
+            telemetry.record("safety", "preToolUse", "ok", 0.001)
+
+    threads = [threading.Thread(target=burst) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _latency(telemetry._load()).total == 400
+
+
+def test_record_never_folds(logs):
+    """Even with no histogram file yet, folding is left to the read side"""
+    telemetry.record("safety", "preToolUse", "blocked", 0.05)
+
+    assert not telemetry.TELEMETRY_PATH.exists()
+    assert not (logs / telemetry.TEXTFILE_NAME).exists()
+
+
+def test_folding_is_due_by_age(logs):
+    """Readers fold and export when no histogram file exists yet"""
+    telemetry.record("safety", "preToolUse", "blocked", 0.05)
+
+    telemetry.compact_if_due()
+
+    assert telemetry.TELEMETRY_PATH.exists()
+    assert (logs / telemetry.TEXTFILE_NAME).read_text().endswith("# EOF\n")
+    assert _latency(telemetry._load(), outcome="blocked").total == 1
+    assert telemetry.compact_if_due() is None  # fresh again
+
+
+def test_folding_is_due_by_size(logs, monkeypatch):
+    telemetry.TELEMETRY_PATH.write_text('{"series": {}, "exported": 0}')
+    monkeypatch.setattr(telemetry, "COMPACT_BYTES", 200)
+    telemetry.record("safety", "preToolUse", "ok", 0.010)
+    assert telemetry.compact_if_due() is None
+
+    for _ in range(4):
+        telemetry.record("safety", "preToolUse", "ok", 0.010)
+
+    assert telemetry.compact_if_due() is not None
+    assert not telemetry.SAMPLES_PATH.exists()
+
+
+def test_exported_buckets_count_by_upper_bound():
+    """A bucket straddling an `le` bound must not count toward it"""
+    histogram = telemetry.Histogram()
+    histogram.record(0.0009)
+    # shares a bucket with exactly 1ms, but is above it
+    histogram.record(0.001005)
+
+    assert histogram.cumulative([0.001, 0.0025]) == [1, 2]
+
+
+def test_crash_after_folding_does_not_double_count(logs):
+    """Sample files already folded but not yet deleted are skipped, then removed"""
+    telemetry.TELEMETRY_PATH.write_text('{"series": {}, "exported": 0}')
+    telemetry.record("safety", "preToolUse", "ok", 0.010)
+    telemetry.compact()
+    claimed = telemetry._claimed_samples()[0]
+    content = claimed.read_bytes()
+    telemetry.compact()
+    claimed.write_bytes(content)  # as if the unlink never happened
+
+    assert _latency(telemetry._load()).total == 1
+    telemetry.compact()
+    assert _latency(telemetry._load()).total == 1
+    assert not claimed.exists()
+
+
+def test_partial_trailing_line_is_left_for_later(logs):
+    """A sample still being written is not parsed until it is complete"""
+    telemetry.SAMPLES_PATH.write_text(
+        '{"h":"safety","e":"preToolUse","o":"ok","d":0.01}\n{"h":"saf'
+    )
+
+    assert _latency(telemetry._load()).total == 1
@@ -0,0 +1,106 @@
+"""
+Tests for the incremental stop-hook TODO scan (scripts/hooklib/todo_scan.py).
+"""
+
+import os
+import subprocess
+
+import pytest
+
+from hooklib import todo_scan
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository whose project lives in the app/ subdirectory"""
+    _git(tmp_path, "init", "-q")
+    project = tmp_path / "app"
+    (project / "src").mkdir(parents=True)
+    (project / "src" / "main.py").write_text("print('hi')\n")
+    (tmp_path / "other.py").write_text("x = 1\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+    return project
+
+
+def test_scan_file_reports_lines_and_tags(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n# TODO: first\n\ny = 2  # FIXME later\n")
+
+    assert todo_scan.scan_file(str(path)) == [
+        (2, "TODO", "first"),
+        (4, "FIXME", "later"),
+    ]
+
+
+def test_binary_files_are_skipped(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(b"\0TODO: not text")
+
+    assert todo_scan.scan_file(str(path)) == []
+
+
+def test_project_in_a_repository_subdirectory(repo, tmp_path):
+    """Paths from git status are made relative to the project, not the repo"""
+    (repo / "src" / "main.py").write_text("# TODO: edited\n")
+    (repo / "notes.md").write_text("NOTE: untracked\n")
+    (repo.parent / "other.py").write_text("# TODO: outside the project\n")
+
+    result = todo_scan.scan(str(repo), cache_path=tmp_path / "cache.json")
+
+    assert result.modified == ["notes.md", "src/main.py"]
+    assert result.findings == [
+        ("notes.md", 1, "NOTE", "untracked"),
+        ("src/main.py", 1, "TODO", "edited"),
+    ]
+    assert (result.scanned, result.cached) == (2, 0)
+
+
+def test_unchanged_files_come_from_the_cache(repo, tmp_path):
+    cache = tmp_path / "cache.json"
+    (repo / "src" / "main.py").write_text("# TODO: one\n")
+    (repo / "extra.py").write_text("# HACK: two\n")
+    todo_scan.scan(str(repo), cache_path=cache)
+
+    again = todo_scan.scan(str(repo), cache_path=cache)
+    (repo / "extra.py").write_text("# HACK: two, edited\n")
+    edited = todo_scan.scan(str(repo), cache_path=cache)
+
+    assert (again.scanned, again.cached) == (0, 2)
+    assert len(again.findings) == 2
+    assert (edited.scanned, edited.cached) == (1, 1)
+    assert ("extra.py", 1, "HACK", "two, edited") in edited.findings
+
+
+def test_unreadable_files_are_not_counted_as_cached(repo, tmp_path):
+    """A listed path that cannot be read is neither scanned nor a cache hit"""
+    os.symlink(repo / "missing.py", repo / "dangling.py")
+
+    result = todo_scan.scan(str(repo), cache_path=tmp_path / "cache.json")
+
+    assert result.modified == ["dangling.py"]
+    assert (result.scanned, result.cached, result.findings) == (0, 0, [])
+
+
+def test_outside_git_uses_modification_times(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    cache = tmp_path / "cache.json"
+    todo_scan.mark("s1", cache_path=cache)
+    (project / "new.py").write_text("# TODO: fresh\n")
+
+    first = todo_scan.scan(str(project), session_id="s1", cache_path=cache)
+    second = todo_scan.scan(str(project), session_id="s1", cache_path=cache)
+
+    assert first.findings == [("new.py", 1, "TODO", "fresh")]
+    assert second.findings == first.findings
+    assert (second.scanned, second.cached) == (0, 1)